@@ -0,0 +1,41 @@
+"""add_deliveries_outbox
+
+Revision ID: a8b9c0d1e2f3
+Revises: f7a8b9c0d1e2
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "a8b9c0d1e2f3"
+down_revision: Union[str, Sequence[str], None] = "f7a8b9c0d1e2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS deliveries (
+            id SERIAL PRIMARY KEY,
+            opportunity_id INTEGER NOT NULL REFERENCES opportunities(id) ON DELETE CASCADE,
+            chat_id VARCHAR NOT NULL,
+            status VARCHAR(10) NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            leased_until TIMESTAMP WITHOUT TIME ZONE,
+            message_id BIGINT,
+            last_error TEXT,
+            created_at TIMESTAMP WITHOUT TIME ZONE,
+            updated_at TIMESTAMP WITHOUT TIME ZONE,
+            CONSTRAINT uq_delivery_opportunity_chat UNIQUE (opportunity_id, chat_id)
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_delivery_due ON deliveries (status, next_attempt_at)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_delivery_due")
+    op.execute("DROP TABLE IF EXISTS deliveries")
@@ -0,0 +1,35 @@
+"""add_scraped_articles_index
+
+Revision ID: b7c8d9e0f1a2
+Revises: a1b2c3d4e5f6
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "b7c8d9e0f1a2"
+down_revision: Union[str, Sequence[str], None] = "a1b2c3d4e5f6"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS scraped_articles (
+            source_url VARCHAR NOT NULL,
+            link VARCHAR,
+            opportunity_id INTEGER,
+            created_at TIMESTAMP WITHOUT TIME ZONE DEFAULT NOW(),
+            PRIMARY KEY (source_url),
+            FOREIGN KEY (opportunity_id) REFERENCES opportunities(id) ON DELETE CASCADE
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_scraped_articles_opportunity_id ON scraped_articles (opportunity_id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_scraped_articles_opportunity_id")
+    op.execute("DROP TABLE IF EXISTS scraped_articles")
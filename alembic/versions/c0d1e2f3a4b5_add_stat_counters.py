@@ -0,0 +1,110 @@
+"""add_stat_counters
+
+Revision ID: c0d1e2f3a4b5
+Revises: b9c0d1e2f3a4
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "c0d1e2f3a4b5"
+down_revision: Union[str, Sequence[str], None] = "b9c0d1e2f3a4"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Keys must match what get_stats_from_db reads: ("status", "posted"|"unposted"),
+    # ("day", "YYYY-MM-DD") and ("tag", "<tag id>").
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS stat_counters (
+            kind VARCHAR NOT NULL,
+            key VARCHAR NOT NULL,
+            value BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (kind, key)
+        )
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_stat_counters_kind_value ON stat_counters (kind, value)")
+    op.execute("""
+        CREATE OR REPLACE FUNCTION stat_counter_add(k VARCHAR, n VARCHAR, delta BIGINT) RETURNS void AS $$
+            INSERT INTO stat_counters (kind, key, value) VALUES (k, n, delta)
+            ON CONFLICT (kind, key) DO UPDATE SET value = stat_counters.value + EXCLUDED.value
+        $$ LANGUAGE sql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION opportunities_stat_counters() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM stat_counter_add('status',
+                    CASE WHEN OLD.posted_to_telegram THEN 'posted' ELSE 'unposted' END, -1);
+                IF OLD.created_at IS NOT NULL THEN
+                    PERFORM stat_counter_add('day', to_char(OLD.created_at, 'YYYY-MM-DD'), -1);
+                END IF;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'INSERT') THEN
+                PERFORM stat_counter_add('status',
+                    CASE WHEN NEW.posted_to_telegram THEN 'posted' ELSE 'unposted' END, 1);
+                IF NEW.created_at IS NOT NULL THEN
+                    PERFORM stat_counter_add('day', to_char(NEW.created_at, 'YYYY-MM-DD'), 1);
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION opportunity_tags_stat_counters() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                PERFORM stat_counter_add('tag', OLD.tag_id::text, -1);
+            ELSE
+                PERFORM stat_counter_add('tag', NEW.tag_id::text, 1);
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("DROP TRIGGER IF EXISTS opportunities_stat_counters ON opportunities")
+    op.execute("""
+        CREATE TRIGGER opportunities_stat_counters AFTER INSERT OR DELETE ON opportunities
+        FOR EACH ROW EXECUTE FUNCTION opportunities_stat_counters()
+    """)
+    op.execute("DROP TRIGGER IF EXISTS opportunities_stat_counters_update ON opportunities")
+    op.execute("""
+        CREATE TRIGGER opportunities_stat_counters_update AFTER UPDATE OF posted_to_telegram, created_at
+        ON opportunities FOR EACH ROW
+        WHEN (OLD.posted_to_telegram IS DISTINCT FROM NEW.posted_to_telegram
+              OR OLD.created_at::date IS DISTINCT FROM NEW.created_at::date)
+        EXECUTE FUNCTION opportunities_stat_counters()
+    """)
+    op.execute("DROP TRIGGER IF EXISTS opportunity_tags_stat_counters ON opportunity_tags")
+    op.execute("""
+        CREATE TRIGGER opportunity_tags_stat_counters AFTER INSERT OR DELETE ON opportunity_tags
+        FOR EACH ROW EXECUTE FUNCTION opportunity_tags_stat_counters()
+    """)
+    # Backfill in the same transaction as the triggers, so no row is counted twice or missed.
+    op.execute("LOCK TABLE opportunities, opportunity_tags IN SHARE MODE")
+    op.execute("DELETE FROM stat_counters")
+    op.execute("""
+        INSERT INTO stat_counters (kind, key, value)
+        SELECT 'status', CASE WHEN posted_to_telegram THEN 'posted' ELSE 'unposted' END, count(*)
+        FROM opportunities GROUP BY 2
+        UNION ALL
+        SELECT 'day', to_char(created_at, 'YYYY-MM-DD'), count(*)
+        FROM opportunities WHERE created_at IS NOT NULL GROUP BY 2
+        UNION ALL
+        SELECT 'tag', tag_id::text, count(*) FROM opportunity_tags GROUP BY 2
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER IF EXISTS opportunity_tags_stat_counters ON opportunity_tags")
+    op.execute("DROP TRIGGER IF EXISTS opportunities_stat_counters_update ON opportunities")
+    op.execute("DROP TRIGGER IF EXISTS opportunities_stat_counters ON opportunities")
+    op.execute("DROP FUNCTION IF EXISTS opportunity_tags_stat_counters()")
+    op.execute("DROP FUNCTION IF EXISTS opportunities_stat_counters()")
+    op.execute("DROP FUNCTION IF EXISTS stat_counter_add(VARCHAR, VARCHAR, BIGINT)")
+    op.execute("DROP TABLE IF EXISTS stat_counters")
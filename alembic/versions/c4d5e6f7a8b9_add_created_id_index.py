@@ -0,0 +1,25 @@
+"""add_created_id_index
+
+Revision ID: c4d5e6f7a8b9
+Revises: b7c8d9e0f1a2
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "c4d5e6f7a8b9"
+down_revision: Union[str, Sequence[str], None] = "b7c8d9e0f1a2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Backs keyset pagination on (created_at, id).
+    op.execute("CREATE INDEX IF NOT EXISTS idx_created_id ON opportunities (created_at, id)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_created_id")
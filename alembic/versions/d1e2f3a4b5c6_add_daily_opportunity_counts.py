@@ -0,0 +1,101 @@
+"""add_daily_opportunity_counts
+
+Revision ID: d1e2f3a4b5c6
+Revises: c0d1e2f3a4b5
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "d1e2f3a4b5c6"
+down_revision: Union[str, Sequence[str], None] = "c0d1e2f3a4b5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("""
+        CREATE TABLE IF NOT EXISTS daily_opportunity_counts (
+            day VARCHAR(10) PRIMARY KEY,
+            unposted BIGINT NOT NULL DEFAULT 0,
+            posted BIGINT NOT NULL DEFAULT 0
+        )
+    """)
+    op.execute("""
+        CREATE OR REPLACE FUNCTION daily_opportunity_count_add(d VARCHAR, is_posted BOOLEAN, delta BIGINT)
+        RETURNS void AS $$
+            INSERT INTO daily_opportunity_counts (day, unposted, posted)
+            VALUES (d, CASE WHEN is_posted THEN 0 ELSE delta END, CASE WHEN is_posted THEN delta ELSE 0 END)
+            ON CONFLICT (day) DO UPDATE SET
+                unposted = daily_opportunity_counts.unposted + EXCLUDED.unposted,
+                posted = daily_opportunity_counts.posted + EXCLUDED.posted
+        $$ LANGUAGE sql
+    """)
+    # Per-day counts move from stat_counters ("day" rows) to the rollup table.
+    op.execute("""
+        CREATE OR REPLACE FUNCTION opportunities_stat_counters() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM stat_counter_add('status',
+                    CASE WHEN OLD.posted_to_telegram THEN 'posted' ELSE 'unposted' END, -1);
+                IF OLD.created_at IS NOT NULL THEN
+                    PERFORM daily_opportunity_count_add(to_char(OLD.created_at, 'YYYY-MM-DD'),
+                        coalesce(OLD.posted_to_telegram, false), -1);
+                END IF;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'INSERT') THEN
+                PERFORM stat_counter_add('status',
+                    CASE WHEN NEW.posted_to_telegram THEN 'posted' ELSE 'unposted' END, 1);
+                IF NEW.created_at IS NOT NULL THEN
+                    PERFORM daily_opportunity_count_add(to_char(NEW.created_at, 'YYYY-MM-DD'),
+                        coalesce(NEW.posted_to_telegram, false), 1);
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("LOCK TABLE opportunities IN SHARE MODE")
+    op.execute("DELETE FROM stat_counters WHERE kind = 'day'")
+    op.execute("DELETE FROM daily_opportunity_counts")
+    op.execute("""
+        INSERT INTO daily_opportunity_counts (day, unposted, posted)
+        SELECT to_char(created_at, 'YYYY-MM-DD'),
+               count(*) FILTER (WHERE NOT coalesce(posted_to_telegram, false)),
+               count(*) FILTER (WHERE posted_to_telegram)
+        FROM opportunities WHERE created_at IS NOT NULL GROUP BY 1
+    """)
+
+
+def downgrade() -> None:
+    op.execute("""
+        CREATE OR REPLACE FUNCTION opportunities_stat_counters() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                PERFORM stat_counter_add('status',
+                    CASE WHEN OLD.posted_to_telegram THEN 'posted' ELSE 'unposted' END, -1);
+                IF OLD.created_at IS NOT NULL THEN
+                    PERFORM stat_counter_add('day', to_char(OLD.created_at, 'YYYY-MM-DD'), -1);
+                END IF;
+            END IF;
+            IF TG_OP IN ('UPDATE', 'INSERT') THEN
+                PERFORM stat_counter_add('status',
+                    CASE WHEN NEW.posted_to_telegram THEN 'posted' ELSE 'unposted' END, 1);
+                IF NEW.created_at IS NOT NULL THEN
+                    PERFORM stat_counter_add('day', to_char(NEW.created_at, 'YYYY-MM-DD'), 1);
+                END IF;
+            END IF;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        INSERT INTO stat_counters (kind, key, value)
+        SELECT 'day', day, unposted + posted FROM daily_opportunity_counts
+        ON CONFLICT (kind, key) DO UPDATE SET value = EXCLUDED.value
+    """)
+    op.execute("DROP FUNCTION IF EXISTS daily_opportunity_count_add(VARCHAR, BOOLEAN, BIGINT)")
+    op.execute("DROP TABLE IF EXISTS daily_opportunity_counts")
@@ -0,0 +1,35 @@
+"""add_opportunity_fulltext_index
+
+Revision ID: d5e6f7a8b9c0
+Revises: c4d5e6f7a8b9
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "d5e6f7a8b9c0"
+down_revision: Union[str, Sequence[str], None] = "c4d5e6f7a8b9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Weighted document: title > tags > description. A generated column keeps it
+    # in sync without triggers; the denormalized tags string mirrors tags_rel.
+    op.execute("""
+        ALTER TABLE opportunities ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(tags, '')), 'B') ||
+            setweight(to_tsvector('english', coalesce(description, '')), 'C')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_opportunities_search ON opportunities USING GIN (search_vector)")
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_opportunities_search")
+    op.execute("ALTER TABLE opportunities DROP COLUMN IF EXISTS search_vector")
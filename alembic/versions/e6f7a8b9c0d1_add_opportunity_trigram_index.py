@@ -0,0 +1,29 @@
+"""add_opportunity_trigram_index
+
+Revision ID: e6f7a8b9c0d1
+Revises: d5e6f7a8b9c0
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "e6f7a8b9c0d1"
+down_revision: Union[str, Sequence[str], None] = "d5e6f7a8b9c0"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    # Must match the expression used by match=fuzzy in search_opportunities.
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS idx_opportunities_trgm ON opportunities
+        USING GIN ((lower(coalesce(title, '') || ' ' || coalesce(tags, ''))) gin_trgm_ops)
+    """)
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS idx_opportunities_trgm")
@@ -0,0 +1,24 @@
+"""add_opportunity_claimed_until
+
+Revision ID: f7a8b9c0d1e2
+Revises: e6f7a8b9c0d1
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+revision: str = "f7a8b9c0d1e2"
+down_revision: Union[str, Sequence[str], None] = "e6f7a8b9c0d1"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TABLE opportunities ADD COLUMN IF NOT EXISTS claimed_until TIMESTAMP WITHOUT TIME ZONE")
+
+
+def downgrade() -> None:
+    op.execute("ALTER TABLE opportunities DROP COLUMN IF EXISTS claimed_until")
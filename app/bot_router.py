@@ -0,0 +1,132 @@
+import re
+import time
+import logging
+import importlib
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+_logger = logging.getLogger(__name__)
+
+SLOW_ROUTE_SECONDS = 2.0
+
+
+@dataclass
+class UpdateContext:
+    """What a route handler needs to know about the update it is answering."""
+    chat_id: int
+    user_id: int
+    text: str
+    message: Optional[dict] = None
+    callback_query: Optional[dict] = None
+
+
+@dataclass
+class Route:
+    name: str
+    handler: object  # callable, or "module:function" until first use
+    owner_only: bool = False
+
+    def resolve(self) -> Callable[[UpdateContext], object]:
+        if isinstance(self.handler, str):
+            module, _, attr = self.handler.partition(":")
+            self.handler = getattr(importlib.import_module(module), attr)
+        return self.handler
+
+
+class Router:
+    """Map command words / callback data to handlers without walking an if/elif chain.
+
+    Lookup order: exact key (one dict lookup), then prefix routes, then
+    regexes. Prefix routes must end with "_"; they are found by looking up
+    each "_"-terminated prefix of the data, longest first, so the cost
+    depends on the data, not on how many routes exist. A handler can be
+    registered as a "module:function" string and is imported on first use.
+    """
+
+    def __init__(self):
+        self._exact: dict[str, Route] = {}
+        self._prefix: dict[str, Route] = {}
+        self._regex: list[tuple[re.Pattern, Route]] = []
+        self._stats: dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def _add(self, kind: str, key, handler, owner_only: bool, name: Optional[str] = None):
+        route = Route(name or f"{kind}:{key if isinstance(key, str) else key.pattern}", handler, owner_only)
+        if kind == "exact":
+            self._exact[key] = route
+        elif kind == "prefix":
+            if not key.endswith("_"):
+                raise ValueError(f"prefix routes must end with '_': {key!r}")
+            self._prefix[key] = route
+        else:
+            self._regex.append((key, route))
+        return route
+
+    def exact(self, *keys: str, owner_only: bool = False):
+        def decorator(fn):
+            for key in keys:
+                self._add("exact", key, fn, owner_only)
+            return fn
+        return decorator
+
+    def prefix(self, *prefixes: str, owner_only: bool = False):
+        def decorator(fn):
+            for p in prefixes:
+                self._add("prefix", p, fn, owner_only)
+            return fn
+        return decorator
+
+    def regex(self, pattern: str, owner_only: bool = False):
+        def decorator(fn):
+            self._add("regex", re.compile(pattern), fn, owner_only)
+            return fn
+        return decorator
+
+    def lazy(self, kind: str, key: str, target: str, owner_only: bool = False) -> None:
+        """Register "module:function" under key; the module is imported on the first matching update."""
+        self._add(kind, re.compile(key) if kind == "regex" else key, target, owner_only)
+
+    def match(self, data: str) -> Optional[Route]:
+        route = self._exact.get(data)
+        if route is not None:
+            return route
+        if self._prefix:
+            end = data.rfind("_")
+            while end >= 0:
+                route = self._prefix.get(data[:end + 1])
+                if route is not None:
+                    return route
+                end = data.rfind("_", 0, end)
+        for pattern, route in self._regex:
+            if pattern.match(data):
+                return route
+        return None
+
+    def dispatch(self, data: str, ctx: UpdateContext, is_owner: bool) -> bool:
+        """Run the route for data; False when none matched (or it is owner-only and the user is not)."""
+        route = self.match(data)
+        if route is None or (route.owner_only and not is_owner):
+            return False
+        handler = route.resolve()
+        start = time.perf_counter()
+        try:
+            handler(ctx)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                s = self._stats.setdefault(route.name, [0, 0.0, 0.0])
+                s[0] += 1
+                s[1] += elapsed
+                s[2] = max(s[2], elapsed)
+            if elapsed > SLOW_ROUTE_SECONDS:
+                _logger.warning("Slow bot route %s: %.2fs", route.name, elapsed)
+        return True
+
+    def stats(self) -> dict[str, dict]:
+        """Per-route call count and timing in milliseconds."""
+        with self._lock:
+            return {
+                name: {"calls": n, "avg_ms": round(total * 1000 / n, 2), "max_ms": round(peak * 1000, 2)}
+                for name, (n, total, peak) in sorted(self._stats.items())
+            }
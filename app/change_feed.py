@@ -0,0 +1,142 @@
+import os
+import time
+import select
+import logging
+import threading
+from typing import Callable
+
+from sqlalchemy import text
+
+from app.config_cache import config_cache, CONFIG_CACHE_TTL
+
+_logger = logging.getLogger(__name__)
+
+CHANGE_CHANNEL = "config_changes"
+CHANGE_POLL_INTERVAL = float(os.getenv("CHANGE_POLL_INTERVAL", "1"))
+# While change notifications are arriving the TTL is only a safety net.
+CONFIG_CACHE_TTL_NOTIFIED = float(os.getenv("CONFIG_CACHE_TTL_NOTIFIED", "600"))
+
+_subscribers: dict[str, list[Callable[[str], None]]] = {}
+_lock = threading.Lock()
+_status = {"backend": None, "connected": False, "received": 0, "reconnects": 0}
+
+
+def subscribe(topic: str, callback: Callable[[str], None]) -> None:
+    """Call callback(topic) whenever any process announces a change to topic."""
+    with _lock:
+        _subscribers.setdefault(topic, []).append(callback)
+
+
+def notify_change(db, topic: str) -> None:
+    """Announce a change to topic from inside db's transaction.
+
+    Postgres delivers NOTIFY only when the transaction commits, so a rolled
+    back change is never announced. SQLite has no NOTIFY; the topic's row in
+    config_versions is bumped instead and listeners poll it.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_notify(:channel, :topic)"), {"channel": CHANGE_CHANNEL, "topic": topic})
+    else:
+        db.execute(
+            text("INSERT INTO config_versions (topic, version) VALUES (:topic, 1) "
+                 "ON CONFLICT (topic) DO UPDATE SET version = config_versions.version + 1"),
+            {"topic": topic},
+        )
+
+
+def dispatch(topic: str) -> None:
+    """Drop the topic's cached config and run its subscribers."""
+    config_cache.invalidate(topic)
+    with _lock:
+        callbacks = list(_subscribers.get(topic, ()))
+        _status["received"] += 1
+    for callback in callbacks:
+        try:
+            callback(topic)
+        except Exception:
+            _logger.warning("Change subscriber for %s failed", topic, exc_info=True)
+
+
+def _set_connected(connected: bool) -> None:
+    with _lock:
+        _status["connected"] = connected
+    config_cache.ttl = CONFIG_CACHE_TTL_NOTIFIED if connected else CONFIG_CACHE_TTL
+    # Changes made while nobody was listening were missed; start from a clean cache.
+    config_cache.invalidate()
+
+
+def read_versions(engine) -> dict[str, int]:
+    with engine.connect() as conn:
+        return {topic: version for topic, version in conn.execute(text("SELECT topic, version FROM config_versions"))}
+
+
+def dispatch_changed(seen: dict[str, int], current: dict[str, int]) -> None:
+    for topic, version in current.items():
+        if seen.get(topic) != version:
+            dispatch(topic)
+
+
+def _listen_postgres(engine, shutdown: threading.Event) -> None:
+    raw = engine.raw_connection()
+    # A LISTENing autocommit connection must never go back to the pool.
+    raw.detach()
+    try:
+        conn = raw.driver_connection
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute(f"LISTEN {CHANGE_CHANNEL}")
+        _set_connected(True)
+        while not shutdown.is_set():
+            if select.select([conn], [], [], 5) == ([], [], []):
+                continue
+            conn.poll()
+            topics = set()
+            while conn.notifies:
+                topics.add(conn.notifies.pop(0).payload)
+            for topic in topics:
+                dispatch(topic)
+    finally:
+        _set_connected(False)
+        raw.close()
+
+
+def _poll_versions(engine, shutdown: threading.Event) -> None:
+    seen = read_versions(engine)
+    _set_connected(True)
+    try:
+        while not shutdown.wait(CHANGE_POLL_INTERVAL):
+            current = read_versions(engine)
+            dispatch_changed(seen, current)
+            seen = current
+    finally:
+        _set_connected(False)
+
+
+def start_change_listener(shutdown: threading.Event) -> None:
+    """Apply config changes made by any process: LISTEN on Postgres, version polling on SQLite."""
+    from app.db import engine
+    backend = "notify" if engine.dialect.name == "postgresql" else "poll"
+    with _lock:
+        _status["backend"] = backend
+    backoff = 1
+    _logger.info("Config change listener started (%s)", backend)
+    while not shutdown.is_set():
+        started = time.monotonic()
+        try:
+            if backend == "notify":
+                _listen_postgres(engine, shutdown)
+            else:
+                _poll_versions(engine, shutdown)
+        except Exception as e:
+            _logger.warning("Config change listener error: %s", e)
+            with _lock:
+                _status["reconnects"] += 1
+            if time.monotonic() - started > 60:
+                backoff = 1
+            shutdown.wait(backoff)
+            backoff = min(backoff * 2, 30)
+
+
+def feed_status() -> dict:
+    with _lock:
+        return dict(_status)
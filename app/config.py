@@ -30,6 +30,7 @@ TELEGRAPH_AUTHOR_URL = os.getenv("TELEGRAPH_AUTHOR_URL", "https://t.me/opportuni
 PUBLIC_URL = os.getenv("PUBLIC_URL") or ""
 USE_POLLING = os.getenv("USE_POLLING", "true").lower() == "true"
 RUN_SCHEDULER = os.getenv("RUN_SCHEDULER", "true").lower() == "true"
+CHANGE_FEED_ENABLED = os.getenv("CHANGE_FEED_ENABLED", "true").lower() == "true"
 API_KEY = os.getenv("API_KEY", "")
 SENTRY_DSN = os.getenv("SENTRY_DSN", "")
 
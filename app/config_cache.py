@@ -0,0 +1,66 @@
+import os
+import time
+import threading
+from typing import Callable, Hashable
+
+CONFIG_CACHE_TTL = float(os.getenv("CONFIG_CACHE_TTL", "30"))
+
+
+class ConfigCache:
+    """Read-through cache for small configuration reads (schedule times, channels, admins).
+
+    Keys are tuples whose first element names a namespace; the functions that
+    change a namespace call invalidate(namespace) after they commit. The TTL
+    bounds how long another process's changes can go unseen. A load that
+    overlaps an invalidation is returned but not stored, so it cannot put
+    pre-change data back into the cache.
+    """
+
+    def __init__(self, ttl: float = CONFIG_CACHE_TTL):
+        self.ttl = ttl
+        self._entries: dict[tuple, tuple[float, object]] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._hits = 0
+        self._misses = 0
+        self._invalidations = 0
+
+    def get(self, key: tuple, load: Callable[[], object]):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+            generation = self._generation
+        value = load()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+        return value
+
+    def invalidate(self, *namespaces: Hashable) -> None:
+        """Drop every key in the given namespaces, or everything when called without any."""
+        with self._lock:
+            self._generation += 1
+            self._invalidations += 1
+            if not namespaces:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if k[0] in namespaces]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "invalidations": self._invalidations,
+                "hit_ratio": round(self._hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+config_cache = ConfigCache()
@@ -0,0 +1,339 @@
+import html
+import logging
+from threading import Thread
+
+from app.config import TELEGRAM_API_URL
+from app.http_client import http as _http
+from app.keyboards import build_main_menu, build_custom_post_keyboard, build_custom_post_preview_keyboard
+from app.telegram_bot import post_to_all_channels
+from app.telegram_handlers import safe_edit_message_text, _side_call
+from app.utils import format_telegram_message
+
+logger = logging.getLogger(__name__)
+
+# Imported by the bot router on the first create_post callback, not at bot start.
+
+# --- Custom post composer state (in-memory) ---
+_pending_custom_posts: dict[int, dict] = {}
+
+def _get_custom_post_state(user_id: int) -> dict | None:
+    return _pending_custom_posts.get(user_id)
+
+def _set_custom_post_state(user_id: int, /, **fields):
+    if user_id not in _pending_custom_posts:
+        _pending_custom_posts[user_id] = {}
+    _pending_custom_posts[user_id].update(fields)
+
+def _clear_custom_post_state(user_id: int):
+    _pending_custom_posts.pop(user_id, None)
+
+_STEP_ORDER = ["title", "description", "image", "link", "deadline"]
+_STEP_NUMBERS = {s: i + 1 for i, s in enumerate(_STEP_ORDER)}
+_STEP_ICONS = {
+    "title": "📌", "description": "📝", "image": "🖼",
+    "link": "🔗", "deadline": "📅",
+}
+_STEP_PROMPTS = {
+    "title": "Send the post title.",
+    "description": "Send the post description/body.",
+    "image": "Send an image for the post (optional).",
+    "link": "Send the URL for the <b>Apply</b> button.",
+    "deadline": "Send a deadline (optional, e.g. <i>July 15, 2026</i>).",
+}
+
+def _get_field_display(state: dict, field: str) -> str:
+    if field == "image":
+        return "🖼 [attached]" if state.get("image_file_id") else "None"
+    val = state.get(field, "")
+    return f'"{html.escape(val)}"' if val else "None"
+
+def _render_custom_post_wizard(state: dict, is_complete: bool = False) -> str:
+    current_step = state.get("step", "title")
+    editing = state.get("editing", False)
+    status = state.get("status")
+    total = len(_STEP_ORDER)
+    step_num = _STEP_NUMBERS.get(current_step, 0)
+    icon = _STEP_ICONS.get(current_step, "•")
+
+    if status == "posting":
+        return "━━━ 📝 <b>Create Post</b> ─── ⏳ Posting ━━━\n\nPosting to all channels..."
+    if status == "posted":
+        return "━━━ 📝 <b>Create Post</b> ─── ✅ Posted ━━━\n\n✅ Custom post sent to all channels!"
+    if status == "failed":
+        return "━━━ 📝 <b>Create Post</b> ─── ❌ Failed ━━━\n\n❌ Failed to post. Check channels and DB."
+    if status == "cancelled":
+        return "━━━ 📝 <b>Create Post</b> ─── ❌ Cancelled ━━━\n\nPost creation cancelled."
+
+    if is_complete:
+        title = state.get("title", "")
+        description = state.get("description", "")
+        link = state.get("link", "")
+        deadline = state.get("deadline", "")
+        image_file_id = state.get("image_file_id", "")
+        opp = {
+            "title": title,
+            "description": description,
+            "link": link,
+            "deadline": deadline,
+            "thumbnail": image_file_id or "",
+        }
+        preview = format_telegram_message(opp)
+        image_note = ""
+        if image_file_id:
+            image_note = "\n\n🖼 <b>Image attached</b>"
+        return (
+            "━━━ 📝 <b>Create Post</b> ─── Preview ━━━\n\n"
+            f"{preview}{image_note}"
+        )
+
+    if editing:
+        current_value = _get_field_display(state, current_step)
+        current_line = f"\n<b>Current:</b> {current_value}" if current_value else ""
+        prompt = _STEP_PROMPTS.get(current_step, f"Send the new {current_step}:")
+        return (
+            f"━━━ 📝 <b>Create Post</b> ─── ✏️ Step {step_num}/{total} ━━━\n\n"
+            f"Editing: {icon} <b>{current_step.title()}</b>{current_line}\n\n"
+            f"{prompt}"
+        )
+
+    completed_lines = []
+    for step in _STEP_ORDER:
+        if step == current_step:
+            break
+        s_icon = _STEP_ICONS[step]
+        if step == "image":
+            if state.get("image_file_id"):
+                completed_lines.append(f"✅ {s_icon} Image: attached")
+        elif step == "deadline":
+            val = state.get("deadline")
+            if val:
+                completed_lines.append(f"✅ {s_icon} Deadline: {html.escape(val)}")
+        else:
+            val = state.get(step)
+            if val:
+                display = val[:50] + "..." if len(val) > 50 else val
+                completed_lines.append(f"✅ {s_icon} {step.title()}: {html.escape(display)}")
+
+    completed_section = "\n".join(completed_lines)
+    if completed_section:
+        completed_section += "\n\n"
+
+    prompt = _STEP_PROMPTS.get(current_step, f"Send the {current_step}:")
+    skip_hint = ""
+    if current_step == "image":
+        skip_hint = "\n\n<i>Or tap Skip Image below.</i>"
+    if current_step == "deadline":
+        skip_hint = "\n\n<i>Or tap Skip Deadline below.</i>"
+
+    return (
+        f"━━━ 📝 <b>Create Post</b> ─── Step {step_num}/{total} ━━━\n\n"
+        f"{completed_section}{icon} {prompt}{skip_hint}"
+    )
+
+
+def _update_custom_post_wizard(user_id: int, is_complete: bool = False):
+    state = _get_custom_post_state(user_id)
+    if not state:
+        return
+    wc = state.get("wizard_chat_id")
+    wm = state.get("wizard_message_id")
+    if not wc or not wm:
+        return
+    text = _render_custom_post_wizard(state, is_complete)
+    payload = {
+        "chat_id": wc,
+        "message_id": wm,
+        "text": text,
+        "parse_mode": "HTML",
+    }
+    status = state.get("status")
+    if status == "posting":
+        payload["reply_markup"] = {"inline_keyboard": [[{"text": "⏳ Posting...", "callback_data": "noop"}]]}
+    elif status in ("posted", "failed", "cancelled"):
+        payload["reply_markup"] = build_main_menu(user_id)
+    elif is_complete:
+        payload["reply_markup"] = build_custom_post_preview_keyboard()
+    else:
+        payload["reply_markup"] = build_custom_post_keyboard(state.get("step", "title"))
+    new_id = safe_edit_message_text(payload)
+    if new_id is not None:
+        _set_custom_post_state(user_id, wizard_message_id=new_id)
+
+
+def _advance_custom_post_step(user_id: int, chat_id: int, **field_value):
+    state = _get_custom_post_state(user_id)
+    if not state or state.get("status"):
+        return
+    current_step = state.get("step")
+    _set_custom_post_state(user_id, **field_value)
+    editing = state.get("editing", False)
+    if editing:
+        _set_custom_post_state(user_id, editing=False)
+        try:
+            _update_custom_post_wizard(user_id, is_complete=True)
+        except Exception:
+            logger.warning("Failed to update wizard after editing", exc_info=True)
+    else:
+        idx = _STEP_ORDER.index(current_step)
+        if idx + 1 < len(_STEP_ORDER):
+            next_step = _STEP_ORDER[idx + 1]
+            _set_custom_post_state(user_id, step=next_step)
+            try:
+                _update_custom_post_wizard(user_id)
+            except Exception:
+                logger.warning("Failed to update wizard advancing %s -> %s", current_step, next_step, exc_info=True)
+        else:
+            _set_custom_post_state(user_id, step="complete")
+            try:
+                _update_custom_post_wizard(user_id, is_complete=True)
+            except Exception:
+                logger.warning("Failed to update wizard on complete", exc_info=True)
+
+
+def take_photo(ctx) -> bool:
+    """Use an owner's photo as the post image; False when no wizard is waiting for one."""
+    chat_id, user_id, message = ctx.chat_id, ctx.user_id, ctx.message
+    state = _get_custom_post_state(user_id)
+    if not state or state.get("step") != "image":
+        return False
+    file_id = message["photo"][-1]["file_id"]
+    _advance_custom_post_step(user_id, chat_id, image_file_id=file_id)
+    _http.post(f"{TELEGRAM_API_URL}/deleteMessage", json={
+        "chat_id": chat_id, "message_id": message["message_id"]
+    })
+    return True
+
+
+def take_text(ctx) -> bool:
+    """Feed an owner's text to the open wizard step; False when no wizard is open."""
+    chat_id, user_id, text, message = ctx.chat_id, ctx.user_id, ctx.text, ctx.message
+    state = _get_custom_post_state(user_id)
+    if not state:
+        return False
+    step = state.get("step")
+    if step == "title":
+        _advance_custom_post_step(user_id, chat_id, title=text)
+    elif step == "description":
+        _advance_custom_post_step(user_id, chat_id, description=text)
+    elif step == "image":
+        _advance_custom_post_step(user_id, chat_id, image_file_id=text)
+    elif step == "link":
+        _advance_custom_post_step(user_id, chat_id, link=text)
+    elif step == "deadline":
+        _advance_custom_post_step(user_id, chat_id, deadline=text)
+    elif state.get("editing"):
+        _advance_custom_post_step(user_id, chat_id, **{step: text})
+    _http.post(f"{TELEGRAM_API_URL}/deleteMessage", json={
+        "chat_id": chat_id, "message_id": message["message_id"]
+    })
+    return True
+
+
+# --- Callback routes (registered lazily in app.telegram_handlers) ---
+
+def on_create_post(ctx):
+    chat_id, user_id, callback_query = ctx.chat_id, ctx.user_id, ctx.callback_query
+    _set_custom_post_state(user_id,
+        step="title",
+        editing=False,
+        user_id=user_id,
+        wizard_chat_id=chat_id,
+        wizard_message_id=callback_query["message"]["message_id"],
+    )
+    _update_custom_post_wizard(user_id)
+
+
+def on_create_post_skip_image(ctx):
+    chat_id, user_id = ctx.chat_id, ctx.user_id
+    _advance_custom_post_step(user_id, chat_id, image_file_id="")
+
+
+def on_create_post_skip_deadline(ctx):
+    chat_id, user_id = ctx.chat_id, ctx.user_id
+    _advance_custom_post_step(user_id, chat_id, deadline="")
+
+
+def on_create_post_confirm(ctx):
+    user_id, callback_query = ctx.user_id, ctx.callback_query
+    state = _get_custom_post_state(user_id)
+    if state and not state.get("status"):
+        if not state.get("title") or not state.get("link"):
+            _side_call("answerCallbackQuery", {
+                "callback_query_id": callback_query.get("id"),
+                "text": "Title and link are required.",
+                "show_alert": True,
+            })
+        else:
+            opp = {
+                "title": state["title"],
+                "description": state.get("description", ""),
+                "link": state["link"],
+                "deadline": state.get("deadline", ""),
+                "thumbnail": state.get("image_file_id", ""),
+            }
+            _set_custom_post_state(user_id, status="posting")
+            _update_custom_post_wizard(user_id)
+            def _post_and_notify():
+                try:
+                    ok = post_to_all_channels(opp)
+                except Exception:
+                    ok = False
+                _set_custom_post_state(user_id, status="posted" if ok else "failed")
+                try:
+                    _update_custom_post_wizard(user_id)
+                except Exception:
+                    pass
+                _clear_custom_post_state(user_id)
+            Thread(target=_post_and_notify, daemon=True).start()
+            _side_call("answerCallbackQuery", {
+                "callback_query_id": callback_query.get("id"),
+                "text": "Posting...",
+                "show_alert": False,
+            })
+
+
+def on_create_post_cancel(ctx):
+    chat_id, user_id, callback_query = ctx.chat_id, ctx.user_id, ctx.callback_query
+    state = _get_custom_post_state(user_id)
+    if state:
+        if state.get("status"):
+            safe_edit_message_text({
+                "chat_id": chat_id,
+                "message_id": callback_query["message"]["message_id"],
+                "text": "🔙 Main Menu",
+                "parse_mode": "HTML",
+                "reply_markup": build_main_menu(user_id),
+            })
+        else:
+            _set_custom_post_state(user_id, status="cancelled")
+            _update_custom_post_wizard(user_id)
+            _clear_custom_post_state(user_id)
+
+
+def on_create_post_back(ctx):
+    user_id, callback_query = ctx.user_id, ctx.callback_query
+    state = _get_custom_post_state(user_id)
+    if state and not state.get("status"):
+        current_step = state.get("step", "title")
+        idx = _STEP_ORDER.index(current_step)
+        if idx > 0:
+            prev_step = _STEP_ORDER[idx - 1]
+            _set_custom_post_state(user_id, step=prev_step, editing=False)
+            _update_custom_post_wizard(user_id)
+    _side_call("answerCallbackQuery", {
+        "callback_query_id": callback_query.get("id"),
+    })
+
+
+def on_create_post_edit(ctx):
+    chat_id, user_id, text, callback_query = ctx.chat_id, ctx.user_id, ctx.text, ctx.callback_query
+    field = text.replace("create_post_edit_", "")
+    state = _get_custom_post_state(user_id)
+    if state and not state.get("status"):
+        _set_custom_post_state(user_id,
+            step=field,
+            editing=True,
+            wizard_chat_id=chat_id,
+            wizard_message_id=callback_query["message"]["message_id"],
+        )
+        _update_custom_post_wizard(user_id)
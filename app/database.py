@@ -1,13 +1,19 @@
 import logging
+import time
+import base64
+import struct
+import threading
 from datetime import datetime, timedelta
 from os import getenv
 from typing import List, Optional
 import re
-from sqlalchemy import Column, Integer, BigInteger, String, Text, Boolean, DateTime, func, Index, case, ForeignKey, Table
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import Column, Integer, BigInteger, Float, String, Text, Boolean, DateTime, func, Index, case, ForeignKey, Table, or_, and_, select, tuple_, UniqueConstraint, event, text, table, column, literal_column, literal
+from sqlalchemy.orm import declarative_base, relationship, Session
 from sqlalchemy.exc import IntegrityError
 
 from app.db import engine, SessionLocal, get_session
+from app.config_cache import config_cache
+from app.change_feed import notify_change
 
 _logger = logging.getLogger(__name__)
 
@@ -39,15 +45,28 @@ class Opportunity(Base):
     tags = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     posted_to_telegram = Column(Boolean, default=False)
+    # Lease taken by claim_unposted so concurrent post cycles pick disjoint rows.
+    claimed_until = Column(DateTime, nullable=True)
 
     tags_rel = relationship("Tag", secondary=opportunity_tags, lazy="selectin")
 
     __table_args__ = (
         Index("idx_posted_created", "posted_to_telegram", "created_at"),
+        Index("idx_created_id", "created_at", "id"),
         Index("idx_tags", "tags"),
     )
 
 
+class ScrapedArticle(Base):
+    """Listing-level dedup index: source detail URL -> resolved link / opportunity."""
+    __tablename__ = "scraped_articles"
+
+    source_url = Column(String, primary_key=True)
+    link = Column(String, nullable=True)
+    opportunity_id = Column(Integer, ForeignKey("opportunities.id", ondelete="CASCADE"), nullable=True, index=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
 class Admin(Base):
     __tablename__ = "bot_admins"
 
@@ -101,6 +120,37 @@ class Channel(Base):
     is_active = Column(Boolean, default=True)
 
 
+class RateLimitBucket(Base):
+    """Token bucket shared by every worker process; updated_at is epoch seconds."""
+    __tablename__ = "rate_limit_buckets"
+
+    key = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(Float, nullable=False, index=True)
+
+
+class Delivery(Base):
+    """Outbox row: one opportunity to be sent to one chat."""
+    __tablename__ = "deliveries"
+
+    id = Column(Integer, primary_key=True)
+    opportunity_id = Column(Integer, ForeignKey("opportunities.id", ondelete="CASCADE"), nullable=False)
+    chat_id = Column(String, nullable=False)
+    status = Column(String(10), nullable=False, default="pending")  # pending | sending | sent | failed
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    leased_until = Column(DateTime, nullable=True)
+    message_id = Column(BigInteger, nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("opportunity_id", "chat_id", name="uq_delivery_opportunity_chat"),
+        Index("idx_delivery_due", "status", "next_attempt_at"),
+    )
+
+
 def add_channel(chat_id: int, title: str = "", added_by: int = 0) -> bool:
     try:
         with get_session() as db:
@@ -109,12 +159,16 @@ def add_channel(chat_id: int, title: str = "", added_by: int = 0) -> bool:
                 existing.is_active = True
                 if title:
                     existing.title = title
+                notify_change(db, "channels")
                 return True
             db.add(Channel(chat_id=chat_id, title=title, added_by=added_by))
+            notify_change(db, "channels")
             return True
     except Exception as e:
         _logger.warning("Failed to add channel %s: %s", chat_id, e, exc_info=True)
         return False
+    finally:
+        config_cache.invalidate("channels")
 
 
 def remove_channel(chat_id: int) -> bool:
@@ -124,17 +178,24 @@ def remove_channel(chat_id: int) -> bool:
             if not ch:
                 return False
             db.delete(ch)
+            notify_change(db, "channels")
             return True
     except Exception as e:
         _logger.warning("Failed to remove channel %s: %s", chat_id, e, exc_info=True)
         return False
+    finally:
+        config_cache.invalidate("channels")
+
+
+def _load_active_channels() -> list[dict]:
+    with get_session() as db:
+        rows = db.query(Channel).filter_by(is_active=True).order_by(Channel.created_at).all()
+        return [{"chat_id": r.chat_id, "title": r.title, "added_by": r.added_by, "created_at": r.created_at} for r in rows]
 
 
 def get_active_channels() -> list[dict]:
     try:
-        with get_session() as db:
-            rows = db.query(Channel).filter_by(is_active=True).order_by(Channel.created_at).all()
-            return [{"chat_id": r.chat_id, "title": r.title, "added_by": r.added_by, "created_at": r.created_at} for r in rows]
+        return list(config_cache.get(("channels",), _load_active_channels))
     except Exception:
         _logger.warning("Failed to fetch active channels from DB", exc_info=True)
         return []
@@ -148,12 +209,16 @@ def get_channel(chat_id: int) -> Optional[dict]:
         return None
 
 
-def get_schedule_times(schedule_type: str = "scrape") -> list[str]:
+def _load_schedule_times(schedule_type: str) -> list[str]:
     with get_session() as db:
         rows = db.query(ScheduleTime).filter(ScheduleTime.schedule_type == schedule_type).order_by(ScheduleTime.time_str).all()
         return [r.time_str for r in rows]
 
 
+def get_schedule_times(schedule_type: str = "scrape") -> list[str]:
+    return list(config_cache.get(("schedule_times", schedule_type), lambda: _load_schedule_times(schedule_type)))
+
+
 def add_schedule_time(time_str: str, schedule_type: str = "scrape") -> bool:
     try:
         with get_session() as db:
@@ -164,9 +229,12 @@ def add_schedule_time(time_str: str, schedule_type: str = "scrape") -> bool:
             if existing:
                 return False
             db.add(ScheduleTime(time_str=time_str, schedule_type=schedule_type))
+            notify_change(db, "schedule_times")
             return True
     except IntegrityError:
         return False
+    finally:
+        config_cache.invalidate("schedule_times")
 
 
 def remove_schedule_time(time_str: str, schedule_type: str = "scrape") -> bool:
@@ -179,9 +247,12 @@ def remove_schedule_time(time_str: str, schedule_type: str = "scrape") -> bool:
             if not row:
                 return False
             db.delete(row)
+            notify_change(db, "schedule_times")
             return True
     except Exception:
         return False
+    finally:
+        config_cache.invalidate("schedule_times")
 
 
 _TIME_RE = re.compile(r'^(\d{1,2}):(\d{2})(?:\s*([ap]\.?m\.?))?$', re.IGNORECASE)
@@ -306,6 +377,11 @@ def pop_pending_schedule_input(user_id: int) -> str | None:
 def init_db():
     Base.metadata.create_all(bind=engine)
     _run_alembic_migrations()
+    _add_missing_sqlite_columns()
+    _init_fulltext()
+    _init_fuzzy()
+    _init_stat_counters()
+    _init_change_feed()
     owner_id = getenv("BOT_OWNER_ID")
     if owner_id:
         try:
@@ -331,6 +407,21 @@ def init_db():
                 _logger.info("Seeded default post times")
     except Exception:
         _logger.warning("Failed to seed default schedule times", exc_info=True)
+    config_cache.invalidate()
+
+
+def _add_missing_sqlite_columns():
+    """create_all never alters existing tables and the migrations target Postgres,
+    so older SQLite files get newly added nullable columns here."""
+    if engine.dialect.name != "sqlite":
+        return
+    try:
+        with engine.begin() as conn:
+            present = {row[1] for row in conn.execute(text("PRAGMA table_info(opportunities)"))}
+            if "claimed_until" not in present:
+                conn.execute(text("ALTER TABLE opportunities ADD COLUMN claimed_until DATETIME"))
+    except Exception:
+        _logger.warning("Failed to add missing SQLite columns", exc_info=True)
 
 
 def _run_alembic_migrations():
@@ -346,9 +437,228 @@ def _run_alembic_migrations():
         _logger.warning("Alembic migration failed (non-fatal)", exc_info=True)
 
 
+_SQLITE_FTS_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS opportunities_fts USING fts5("
+    " title, description, tags, content='opportunities', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS opportunities_fts_ai AFTER INSERT ON opportunities BEGIN"
+    " INSERT INTO opportunities_fts(rowid, title, description, tags)"
+    " VALUES (new.id, new.title, new.description, new.tags); END",
+    "CREATE TRIGGER IF NOT EXISTS opportunities_fts_ad AFTER DELETE ON opportunities BEGIN"
+    " INSERT INTO opportunities_fts(opportunities_fts, rowid, title, description, tags)"
+    " VALUES ('delete', old.id, old.title, old.description, old.tags); END",
+    "CREATE TRIGGER IF NOT EXISTS opportunities_fts_au AFTER UPDATE OF title, description, tags ON opportunities BEGIN"
+    " INSERT INTO opportunities_fts(opportunities_fts, rowid, title, description, tags)"
+    " VALUES ('delete', old.id, old.title, old.description, old.tags);"
+    " INSERT INTO opportunities_fts(rowid, title, description, tags)"
+    " VALUES (new.id, new.title, new.description, new.tags); END",
+)
+
+# Which full-text index search_opportunities can use: "postgres" (tsvector + GIN,
+# created by migration), "fts5" (SQLite virtual table kept in sync by triggers),
+# or None (fall back to ILIKE scans).
+_fulltext_backend: Optional[str] = None
+
+
+def _init_fulltext():
+    global _fulltext_backend
+    _fulltext_backend = None
+    try:
+        if engine.dialect.name == "postgresql":
+            with engine.connect() as conn:
+                has_column = conn.execute(text(
+                    "SELECT 1 FROM information_schema.columns"
+                    " WHERE table_name = 'opportunities' AND column_name = 'search_vector'"
+                )).first()
+            if has_column:
+                _fulltext_backend = "postgres"
+        elif engine.dialect.name == "sqlite":
+            with engine.begin() as conn:
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'opportunities_fts'"
+                )).first()
+                for ddl in _SQLITE_FTS_DDL:
+                    conn.execute(text(ddl))
+                if not exists:
+                    conn.execute(text("INSERT INTO opportunities_fts(opportunities_fts) VALUES ('rebuild')"))
+            _fulltext_backend = "fts5"
+    except Exception:
+        _logger.warning("Full-text index unavailable, search falls back to ILIKE", exc_info=True)
+    if _fulltext_backend:
+        _logger.info("Full-text search backend: %s", _fulltext_backend)
+
+
+# Fuzzy search documents are title + tags, lowercased; trigrams are taken over the
+# whole string padded with one space on each side (see _query_trigrams).
+_TRIGRAM_DOC_SQL = "' ' || lower(coalesce({p}.title, '') || ' ' || coalesce({p}.tags, '')) || ' '"
+_TRIGRAM_MAX_CHARS = 512
+_TRIGRAM_INSERT_SQL = (
+    "INSERT OR IGNORE INTO opportunity_trigrams (trigram, opportunity_id)"
+    " SELECT substr(d.doc, p.n, 3), d.id FROM ({source}) d"
+    " JOIN trigram_positions p ON p.n <= length(d.doc) - 2"
+)
+_SQLITE_TRIGRAM_DDL = (
+    "CREATE TABLE IF NOT EXISTS trigram_positions (n INTEGER PRIMARY KEY)",
+    "CREATE TABLE IF NOT EXISTS opportunity_trigrams ("
+    " trigram TEXT NOT NULL, opportunity_id INTEGER NOT NULL,"
+    " PRIMARY KEY (trigram, opportunity_id)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_opportunity_trigrams_opp ON opportunity_trigrams (opportunity_id)",
+    "CREATE TRIGGER IF NOT EXISTS opportunity_trigrams_ai AFTER INSERT ON opportunities BEGIN "
+    + _TRIGRAM_INSERT_SQL.format(source=f"SELECT new.id AS id, {_TRIGRAM_DOC_SQL.format(p='new')} AS doc")
+    + "; END",
+    "CREATE TRIGGER IF NOT EXISTS opportunity_trigrams_ad AFTER DELETE ON opportunities BEGIN"
+    " DELETE FROM opportunity_trigrams WHERE opportunity_id = old.id; END",
+    "CREATE TRIGGER IF NOT EXISTS opportunity_trigrams_au AFTER UPDATE OF title, tags ON opportunities BEGIN"
+    " DELETE FROM opportunity_trigrams WHERE opportunity_id = old.id; "
+    + _TRIGRAM_INSERT_SQL.format(source=f"SELECT new.id AS id, {_TRIGRAM_DOC_SQL.format(p='new')} AS doc")
+    + "; END",
+)
+
+FUZZY_SEARCH_THRESHOLD = float(getenv("FUZZY_SEARCH_THRESHOLD", "0.5"))
+
+# "postgres" (pg_trgm GIN index, created by migration), "sqlite" (trigram table
+# kept in sync by triggers), or None (match=fuzzy degrades to the text search).
+_fuzzy_backend: Optional[str] = None
+
+
+def _init_fuzzy():
+    global _fuzzy_backend
+    _fuzzy_backend = None
+    try:
+        if engine.dialect.name == "postgresql":
+            with engine.connect() as conn:
+                has_trgm = conn.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+            if has_trgm:
+                _fuzzy_backend = "postgres"
+        elif engine.dialect.name == "sqlite":
+            with engine.begin() as conn:
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'opportunity_trigrams'"
+                )).first()
+                for ddl in _SQLITE_TRIGRAM_DDL:
+                    conn.execute(text(ddl))
+                conn.execute(
+                    text("INSERT OR IGNORE INTO trigram_positions (n) VALUES (:n)"),
+                    [{"n": n} for n in range(1, _TRIGRAM_MAX_CHARS + 1)],
+                )
+                if not exists:
+                    conn.execute(text(_TRIGRAM_INSERT_SQL.format(
+                        source=f"SELECT o.id AS id, {_TRIGRAM_DOC_SQL.format(p='o')} AS doc FROM opportunities o"
+                    )))
+            _fuzzy_backend = "sqlite"
+    except Exception:
+        _logger.warning("Trigram index unavailable, fuzzy search disabled", exc_info=True)
+    if _fuzzy_backend:
+        _logger.info("Fuzzy search backend: %s", _fuzzy_backend)
+
+
+# Analytics counters kept current by triggers on opportunities / opportunity_tags:
+# stat_counters holds ("status", "posted"|"unposted") and ("tag", "<tag id>") rows,
+# daily_opportunity_counts one (unposted, posted) row per "YYYY-MM-DD" of created_at.
+# The Postgres tables, functions and triggers are created by migration.
+_STAT_UPSERT = (
+    "INSERT INTO stat_counters (kind, key, value) SELECT {kind}, {key}, {delta} WHERE {when}"
+    " ON CONFLICT (kind, key) DO UPDATE SET value = value + excluded.value; "
+)
+_DAILY_UPSERT = (
+    "INSERT INTO daily_opportunity_counts (day, unposted, posted)"
+    " SELECT date({row}.created_at), CASE WHEN {row}.posted_to_telegram THEN 0 ELSE {delta} END,"
+    " CASE WHEN {row}.posted_to_telegram THEN {delta} ELSE 0 END WHERE {row}.created_at IS NOT NULL"
+    " ON CONFLICT (day) DO UPDATE SET unposted = unposted + excluded.unposted, posted = posted + excluded.posted; "
+)
+
+
+def _stat_row_upserts(row: str, delta: int) -> str:
+    return (
+        _STAT_UPSERT.format(kind="'status'", key=f"CASE WHEN {row}.posted_to_telegram THEN 'posted' ELSE 'unposted' END",
+                            delta=delta, when="1")
+        + _DAILY_UPSERT.format(row=row, delta=delta)
+    )
+
+
+_SQLITE_STATS_DDL = (
+    "CREATE TABLE IF NOT EXISTS stat_counters ("
+    " kind TEXT NOT NULL, key TEXT NOT NULL, value INTEGER NOT NULL DEFAULT 0,"
+    " PRIMARY KEY (kind, key)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS idx_stat_counters_kind_value ON stat_counters (kind, value)",
+    "CREATE TABLE IF NOT EXISTS daily_opportunity_counts ("
+    " day TEXT PRIMARY KEY, unposted INTEGER NOT NULL DEFAULT 0, posted INTEGER NOT NULL DEFAULT 0) WITHOUT ROWID",
+    # Superseded by the opportunity_counts_* triggers (per-day counts moved to their own table).
+    "DROP TRIGGER IF EXISTS stat_counters_ai",
+    "DROP TRIGGER IF EXISTS stat_counters_ad",
+    "DROP TRIGGER IF EXISTS stat_counters_au",
+    "CREATE TRIGGER IF NOT EXISTS opportunity_counts_ai AFTER INSERT ON opportunities BEGIN "
+    + _stat_row_upserts("new", 1) + "END",
+    "CREATE TRIGGER IF NOT EXISTS opportunity_counts_ad AFTER DELETE ON opportunities BEGIN "
+    + _stat_row_upserts("old", -1) + "END",
+    "CREATE TRIGGER IF NOT EXISTS opportunity_counts_au AFTER UPDATE OF posted_to_telegram, created_at ON opportunities"
+    " WHEN old.posted_to_telegram IS NOT new.posted_to_telegram OR date(old.created_at) IS NOT date(new.created_at)"
+    " BEGIN " + _stat_row_upserts("old", -1) + _stat_row_upserts("new", 1) + "END",
+    "CREATE TRIGGER IF NOT EXISTS stat_counters_tag_ai AFTER INSERT ON opportunity_tags BEGIN "
+    + _STAT_UPSERT.format(kind="'tag'", key="CAST(new.tag_id AS TEXT)", delta=1, when="1") + "END",
+    "CREATE TRIGGER IF NOT EXISTS stat_counters_tag_ad AFTER DELETE ON opportunity_tags BEGIN "
+    + _STAT_UPSERT.format(kind="'tag'", key="CAST(old.tag_id AS TEXT)", delta=-1, when="1") + "END",
+)
+
+_SQLITE_STATS_REBUILD = (
+    "DELETE FROM stat_counters",
+    "INSERT INTO stat_counters (kind, key, value)"
+    " SELECT 'status', CASE WHEN posted_to_telegram THEN 'posted' ELSE 'unposted' END, count(*)"
+    " FROM opportunities GROUP BY 2",
+    "INSERT INTO stat_counters (kind, key, value)"
+    " SELECT 'tag', CAST(tag_id AS TEXT), count(*) FROM opportunity_tags GROUP BY 2",
+    "DELETE FROM daily_opportunity_counts",
+    "INSERT INTO daily_opportunity_counts (day, unposted, posted)"
+    " SELECT date(created_at), sum(CASE WHEN posted_to_telegram THEN 0 ELSE 1 END),"
+    " sum(CASE WHEN posted_to_telegram THEN 1 ELSE 0 END)"
+    " FROM opportunities WHERE created_at IS NOT NULL GROUP BY 1",
+)
+
+# "postgres" / "sqlite" when the counter tables are maintained, or None (stats scan the tables).
+_stats_backend: Optional[str] = None
+
+
+def _init_stat_counters():
+    global _stats_backend
+    _stats_backend = None
+    try:
+        if engine.dialect.name == "postgresql":
+            with engine.connect() as conn:
+                has_rollup = conn.execute(text(
+                    "SELECT 1 FROM pg_trigger WHERE tgname = 'opportunities_stat_counters'"
+                    " AND to_regclass('daily_opportunity_counts') IS NOT NULL"
+                )).first()
+            if has_rollup:
+                _stats_backend = "postgres"
+        elif engine.dialect.name == "sqlite":
+            with engine.begin() as conn:
+                exists = conn.execute(text(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'daily_opportunity_counts'"
+                )).first()
+                for ddl in _SQLITE_STATS_DDL:
+                    conn.execute(text(ddl))
+                if not exists:
+                    for stmt in _SQLITE_STATS_REBUILD:
+                        conn.execute(text(stmt))
+            _stats_backend = "sqlite"
+    except Exception:
+        _logger.warning("Stat counters unavailable, analytics scan the opportunities table", exc_info=True)
+
+
+_SQLITE_CONFIG_VERSIONS_DDL = (
+    "CREATE TABLE IF NOT EXISTS config_versions ("
+    "topic TEXT PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0)"
+)
+
+
+def _init_change_feed():
+    # Postgres announces config changes with NOTIFY; SQLite listeners poll a version row per topic.
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text(_SQLITE_CONFIG_VERSIONS_DDL))
+
+
 def is_admin(user_id: int) -> bool:
-    with get_session() as db:
-        return db.query(Admin).filter(Admin.user_id == user_id).first() is not None
+    return any(a["user_id"] == user_id for a in get_admins())
 
 
 def add_admin(user_id: int, added_by: int, name: str = "") -> bool:
@@ -358,11 +668,15 @@ def add_admin(user_id: int, added_by: int, name: str = "") -> bool:
             if existing:
                 if name and existing.name != name:
                     existing.name = name
+                    notify_change(db, "admins")
                 return False
             db.add(Admin(user_id=user_id, added_by=added_by, name=name))
+            notify_change(db, "admins")
             return True
     except IntegrityError:
         return False
+    finally:
+        config_cache.invalidate("admins")
 
 
 def remove_admin(user_id: int) -> bool:
@@ -372,17 +686,24 @@ def remove_admin(user_id: int) -> bool:
             if not admin:
                 return False
             db.delete(admin)
+            notify_change(db, "admins")
             return True
     except Exception:
         return False
+    finally:
+        config_cache.invalidate("admins")
 
 
-def get_admins() -> List[dict]:
+def _load_admins() -> List[dict]:
     with get_session() as db:
         results = db.query(Admin).order_by(Admin.created_at).all()
         return [{"user_id": a.user_id, "name": a.name, "added_by": a.added_by, "created_at": a.created_at} for a in results]
 
 
+def get_admins() -> List[dict]:
+    return list(config_cache.get(("admins",), _load_admins))
+
+
 def opportunity_exists(title: str, link: str) -> bool:
     with get_session() as db:
         return db.query(Opportunity).filter_by(link=link).first() is not None
@@ -394,29 +715,118 @@ def opportunities_exist(links: list[str]) -> set[str]:
         return {r[0] for r in results}
 
 
+def known_article_urls(source_urls: list[str]) -> set[str]:
+    """Return the source URLs that need no detail fetch: already stored, or known to have no external link."""
+    if not source_urls:
+        return set()
+    with get_session() as db:
+        results = (
+            db.query(ScrapedArticle.source_url)
+            .outerjoin(Opportunity, Opportunity.id == ScrapedArticle.opportunity_id)
+            .filter(
+                ScrapedArticle.source_url.in_(source_urls),
+                or_(ScrapedArticle.link.is_(None), Opportunity.id.isnot(None)),
+            )
+            .all()
+        )
+        return {r[0] for r in results}
+
+
+def index_scraped_articles(entries: list[dict]) -> int:
+    """Record source_url -> link/opportunity_id for scraped articles.
+
+    Entries with a link are only indexed once that link is stored, so a failed
+    save never hides an article from the next scrape. Entries with link=None
+    mark detail pages that resolved to no external link.
+    """
+    entries = [e for e in entries if e.get("source_url")]
+    if not entries:
+        return 0
+    try:
+        with get_session() as db:
+            links = [e["link"] for e in entries if e.get("link")]
+            ids = dict(db.query(Opportunity.link, Opportunity.id).filter(Opportunity.link.in_(links)).all()) if links else {}
+            rows = {}
+            for e in entries:
+                link = e.get("link")
+                if link and link not in ids:
+                    continue
+                rows[e["source_url"]] = {
+                    "source_url": e["source_url"],
+                    "link": link,
+                    "opportunity_id": ids.get(link) if link else None,
+                    "created_at": datetime.utcnow(),
+                }
+            if not rows:
+                return 0
+            db.query(ScrapedArticle).filter(ScrapedArticle.source_url.in_(list(rows))).delete(synchronize_session=False)
+            db.execute(ScrapedArticle.__table__.insert(), list(rows.values()))
+            return len(rows)
+    except Exception:
+        _logger.warning("Failed to update scraped article index", exc_info=True)
+        return 0
+
+
+def _dialect_insert(db):
+    """insert() for the session's dialect, so ON CONFLICT clauses are available where supported."""
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        from sqlalchemy import insert
+    return insert
+
+
+def _resolve_tag_ids(db, names: set[str]) -> dict[str, int]:
+    """Map tag names to ids, creating the missing tags in one statement."""
+    if not names:
+        return {}
+    ids = dict(db.query(Tag.name, Tag.id).filter(Tag.name.in_(names)).all())
+    missing = names - ids.keys()
+    if missing:
+        insert = _dialect_insert(db)
+        stmt = insert(Tag).values([{"name": n} for n in sorted(missing)])
+        if hasattr(stmt, "on_conflict_do_nothing"):
+            stmt = stmt.on_conflict_do_nothing(index_elements=["name"])
+        ids.update(db.execute(stmt.returning(Tag.name, Tag.id)).all())
+        # Names inserted concurrently by another transaction come back from neither query above.
+        raced = names - ids.keys()
+        if raced:
+            ids.update(db.query(Tag.name, Tag.id).filter(Tag.name.in_(raced)).all())
+    return ids
+
+
+def _set_tags_bulk(db, tags_by_opp: dict[int, list[str]], replace: bool = True):
+    """Set the tags of many opportunities with a fixed number of statements.
+
+    One query resolves every distinct name, one insert creates the missing
+    tags, and the associations go in with a single executemany. With replace,
+    the opportunities' previous associations are deleted first.
+    """
+    wanted = {}
+    for opp_id, tag_names in tags_by_opp.items():
+        names = [n.strip() for n in tag_names or [] if n and n.strip()]
+        wanted[opp_id] = list(dict.fromkeys(names))
+    if replace and wanted:
+        db.execute(opportunity_tags.delete().where(opportunity_tags.c.opportunity_id.in_(list(wanted))))
+    tag_ids = _resolve_tag_ids(db, {n for names in wanted.values() for n in names})
+    links = [
+        {"opportunity_id": opp_id, "tag_id": tag_ids[name]}
+        for opp_id, names in wanted.items() for name in names
+    ]
+    if links:
+        db.execute(opportunity_tags.insert(), links)
+
+
 def _set_opportunity_tags(db, opp_id: int, tag_names: list[str]):
     """Associate tags with an opportunity, creating new tags as needed."""
-    db.execute(opportunity_tags.delete().where(opportunity_tags.c.opportunity_id == opp_id))
-    for name in tag_names:
-        name = name.strip()
-        if not name:
-            continue
-        tag = db.query(Tag).filter(Tag.name == name).first()
-        if not tag:
-            tag = Tag(name=name)
-            db.add(tag)
-            db.flush()
-        db.execute(opportunity_tags.insert().values(opportunity_id=opp_id, tag_id=tag.id))
+    _set_tags_bulk(db, {opp_id: tag_names})
 
 
 def save_opportunity(opportunity: dict, scraped_date: Optional[str] = None) -> Optional[int]:
-    if scraped_date:
-        try:
-            dt = datetime.strptime(scraped_date.replace("/", "-"), "%Y-%m-%d")
-        except ValueError:
-            dt = datetime.utcnow()
-    else:
-        dt = datetime.utcnow()
+    dt = _scraped_datetime(scraped_date)
     try:
         with get_session() as db:
             opp = Opportunity(
@@ -488,10 +898,243 @@ def delete_opportunity(opportunity_id: int) -> bool:
         return False
 
 
-def get_unposted_opportunities() -> List[dict]:
+POST_CLAIM_LEASE = int(getenv("POST_CLAIM_LEASE", "900"))
+
+_BACKLOG_ORDER = (Opportunity.created_at.asc(), Opportunity.id.asc())
+
+
+def get_unposted_opportunities(limit: Optional[int] = None, offset: int = 0) -> List[dict]:
+    """Unposted opportunities, oldest first; pass limit to read one slice of the backlog."""
+    with get_session() as db:
+        q = db.query(Opportunity).filter(Opportunity.posted_to_telegram == False).order_by(*_BACKLOG_ORDER)
+        if offset:
+            q = q.offset(offset)
+        if limit is not None:
+            q = q.limit(limit)
+        return [opportunity_to_dict(opp, include_status=False) for opp in q.all()]
+
+
+def count_unposted() -> int:
+    with get_session() as db:
+        return db.query(func.count(Opportunity.id)).filter(Opportunity.posted_to_telegram == False).scalar() or 0
+
+
+def claim_unposted(limit: int, lease_seconds: int = POST_CLAIM_LEASE, date_str: Optional[str] = None,
+                   opportunity_ids: Optional[list[int]] = None) -> List[dict]:
+    """Atomically lease up to limit of the oldest unposted, unclaimed opportunities.
+
+    The rows are picked with FOR UPDATE SKIP LOCKED on Postgres (SQLite
+    serialises writers), and stamped with claimed_until in the same statement,
+    so two post cycles never receive the same row. A lease that is not
+    released expires after lease_seconds and the row becomes claimable again.
+    date_str and opportunity_ids narrow the pick to one day or to given rows.
+    """
+    if limit <= 0:
+        return []
+    now = datetime.utcnow()
+    with get_session() as db:
+        pick = select(Opportunity.id) \
+            .where(Opportunity.posted_to_telegram == False,
+                   or_(Opportunity.claimed_until.is_(None), Opportunity.claimed_until < now)) \
+            .order_by(*_BACKLOG_ORDER) \
+            .limit(limit)
+        if date_str is not None:
+            start, end = _date_range(date_str)
+            pick = pick.where(Opportunity.created_at >= start, Opportunity.created_at < end)
+        if opportunity_ids is not None:
+            pick = pick.where(Opportunity.id.in_(opportunity_ids))
+        if db.get_bind().dialect.name == "postgresql":
+            pick = pick.with_for_update(skip_locked=True)
+        ids = db.execute(
+            Opportunity.__table__.update()
+            .where(Opportunity.id.in_(pick.scalar_subquery()))
+            .values(claimed_until=now + timedelta(seconds=lease_seconds))
+            .returning(Opportunity.id)
+        ).scalars().all()
+        if not ids:
+            return []
+        rows = db.query(Opportunity).filter(Opportunity.id.in_(ids)).order_by(*_BACKLOG_ORDER).all()
+        return [opportunity_to_dict(opp, include_status=False) for opp in rows]
+
+
+def release_claims(opportunity_ids: list[int]) -> None:
+    """Drop the leases on rows that were claimed but not posted, so the next cycle retries them."""
+    if not opportunity_ids:
+        return
+    with get_session() as db:
+        db.query(Opportunity).filter(Opportunity.id.in_(opportunity_ids)) \
+            .update({"claimed_until": None}, synchronize_session=False)
+
+
+DELIVERY_LEASE = 120
+DELIVERY_MAX_ATTEMPTS = int(getenv("DELIVERY_MAX_ATTEMPTS", "5"))
+DELIVERY_BACKOFF_BASE = 30
+DELIVERY_BACKOFF_MAX = 3600
+
+
+def enqueue_deliveries(opportunity_ids: list[int], chat_ids: list) -> int:
+    """Queue one delivery per (opportunity, chat) and return how many became due.
+
+    Pairs that already failed are queued again with a fresh attempt budget;
+    pairs that are pending, sending or sent are left as they are.
+    """
+    rows = [{"opportunity_id": oid, "chat_id": str(cid)} for oid in opportunity_ids for cid in chat_ids]
+    if not rows:
+        return 0
+    with get_session() as db:
+        insert = _dialect_insert(db)
+        stmt = insert(Delivery).values(rows)
+        if hasattr(stmt, "on_conflict_do_update"):
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["opportunity_id", "chat_id"],
+                set_={"status": "pending", "attempts": 0, "next_attempt_at": datetime.utcnow(),
+                      "leased_until": None, "updated_at": datetime.utcnow()},
+                where=Delivery.__table__.c.status == "failed",
+            )
+        return len(db.execute(stmt.returning(Delivery.id)).all())
+
+
+def lease_deliveries(limit: int = 1, lease_seconds: int = DELIVERY_LEASE,
+                     opportunity_ids: Optional[list[int]] = None) -> List[dict]:
+    """Atomically lease up to limit due deliveries for sending.
+
+    Due means pending with next_attempt_at in the past, or stuck in sending
+    after its lease ran out (the worker died mid-send). Rows are picked with
+    FOR UPDATE SKIP LOCKED on Postgres, so any number of threads or processes
+    can lease concurrently without two of them getting the same delivery.
+    """
+    if limit <= 0:
+        return []
+    now = datetime.utcnow()
     with get_session() as db:
-        results = db.query(Opportunity).filter_by(posted_to_telegram=False).all()
-        return [opportunity_to_dict(opp, include_status=False) for opp in results]
+        pick = select(Delivery.id) \
+            .where(or_(
+                (Delivery.status == "pending") & (Delivery.next_attempt_at <= now),
+                (Delivery.status == "sending") & (Delivery.leased_until < now),
+            )) \
+            .order_by(Delivery.next_attempt_at, Delivery.id) \
+            .limit(limit)
+        if opportunity_ids is not None:
+            pick = pick.where(Delivery.opportunity_id.in_(opportunity_ids))
+        if db.get_bind().dialect.name == "postgresql":
+            pick = pick.with_for_update(skip_locked=True)
+        rows = db.execute(
+            Delivery.__table__.update()
+            .where(Delivery.id.in_(pick.scalar_subquery()))
+            .values(status="sending", attempts=Delivery.attempts + 1,
+                    leased_until=now + timedelta(seconds=lease_seconds), updated_at=now)
+            .returning(Delivery.id, Delivery.opportunity_id, Delivery.chat_id, Delivery.attempts)
+        ).all()
+        return [{"id": r.id, "opportunity_id": r.opportunity_id, "chat_id": r.chat_id, "attempts": r.attempts}
+                for r in sorted(rows, key=lambda r: r.id)]
+
+
+def _settle_opportunity(db, opportunity_id: int) -> None:
+    """Settle the opportunity once every one of its deliveries is sent or failed.
+
+    If at least one channel got it, the opportunity leaves the backlog; the
+    deliveries that gave up stay in the outbox with their last_error. If no
+    channel got it, it stays unposted with its claim released, so the next
+    post cycle re-queues the failed deliveries (or an admin can act on it).
+    """
+    statuses = {s for (s,) in db.query(Delivery.status).filter_by(opportunity_id=opportunity_id).distinct()}
+    if not statuses or statuses & {"pending", "sending"}:
+        return
+    values = {"claimed_until": None}
+    if "sent" in statuses:
+        values["posted_to_telegram"] = True
+    else:
+        _logger.error("Every delivery of opportunity %s failed; it stays in the backlog", opportunity_id)
+    db.query(Opportunity).filter_by(id=opportunity_id).update(values, synchronize_session=False)
+
+
+def complete_delivery(delivery_id: int, message_id: Optional[int] = None) -> None:
+    with get_session() as db:
+        d = db.query(Delivery).filter_by(id=delivery_id).first()
+        if d is None:
+            return
+        d.status = "sent"
+        d.message_id = message_id
+        d.leased_until = None
+        d.last_error = None
+        db.flush()
+        _settle_opportunity(db, d.opportunity_id)
+
+
+def fail_delivery(delivery_id: int, error: str, retry_after: Optional[float] = None,
+                  permanent: bool = False) -> str:
+    """Record a failed send; reschedule with exponential backoff or give up.
+
+    Returns the new status ("pending" or "failed").
+    """
+    with get_session() as db:
+        d = db.query(Delivery).filter_by(id=delivery_id).first()
+        if d is None:
+            return "failed"
+        d.last_error = (error or "")[:1000]
+        d.leased_until = None
+        if permanent or d.attempts >= DELIVERY_MAX_ATTEMPTS:
+            d.status = "failed"
+        else:
+            delay = retry_after if retry_after is not None else \
+                min(DELIVERY_BACKOFF_BASE * 2 ** (d.attempts - 1), DELIVERY_BACKOFF_MAX)
+            d.status = "pending"
+            d.next_attempt_at = datetime.utcnow() + timedelta(seconds=delay)
+        db.flush()
+        _settle_opportunity(db, d.opportunity_id)
+        return d.status
+
+
+def get_delivery_summary(opportunity_ids: list[int]) -> dict[int, dict[str, int]]:
+    """Per-opportunity delivery counts by status, e.g. {7: {"sent": 2, "pending": 1}}."""
+    summary: dict[int, dict[str, int]] = {}
+    if not opportunity_ids:
+        return summary
+    with get_session() as db:
+        rows = db.query(Delivery.opportunity_id, Delivery.status, func.count()) \
+            .filter(Delivery.opportunity_id.in_(opportunity_ids)) \
+            .group_by(Delivery.opportunity_id, Delivery.status).all()
+        for oid, status, n in rows:
+            summary.setdefault(oid, {})[status] = n
+    return summary
+
+
+def consume_rate_limit(key: str, rate: float, capacity: int, tokens: int = 1,
+                       now: Optional[float] = None) -> float:
+    """Take tokens from the shared bucket for key; return seconds to wait (0.0 if granted).
+
+    Same semantics as the in-memory TokenBucket (a refused call reserves the
+    next slot), done in one INSERT ... ON CONFLICT DO UPDATE ... RETURNING so
+    concurrent workers serialise on the row lock instead of racing a
+    read-modify-write. now defaults to the local clock; hosts are assumed to
+    be NTP-synced.
+    """
+    now = time.time() if now is None else now
+    b = RateLimitBucket.__table__.c
+    refilled = b.tokens + (now - b.updated_at) * rate
+    avail = case((refilled > capacity, literal(float(capacity))), else_=refilled)
+    granted = avail >= tokens
+    with get_session() as db:
+        stmt = _dialect_insert(db)(RateLimitBucket).values(
+            key=key, tokens=float(capacity - tokens), updated_at=now,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={
+                "tokens": case((granted, avail - tokens), else_=literal(0.0)),
+                "updated_at": case((granted, literal(now)), else_=literal(now) + (tokens - avail) / rate),
+            },
+        ).returning(RateLimitBucket.updated_at)
+        updated_at = db.execute(stmt).scalar_one()
+    return max(0.0, updated_at - now)
+
+
+def purge_rate_limits(idle_seconds: float) -> int:
+    """Drop buckets untouched for idle_seconds (they would be full again anyway)."""
+    with get_session() as db:
+        return db.query(RateLimitBucket) \
+            .filter(RateLimitBucket.updated_at < time.time() - idle_seconds) \
+            .delete(synchronize_session=False)
 
 
 def get_all_opportunities() -> List[dict]:
@@ -544,122 +1187,510 @@ def get_posted_by_date(date_str: str) -> List[dict]:
         return [opportunity_to_dict(o) for o in results]
 
 
+def get_daily_counts(first_day: str, last_day: str) -> dict[str, tuple[int, int]]:
+    """{"YYYY-MM-DD": (unposted, posted)} for the days in [first_day, last_day] that have opportunities."""
+    with get_session() as db:
+        if _stats_backend:
+            rows = db.execute(text(
+                "SELECT day, unposted, posted FROM daily_opportunity_counts"
+                " WHERE day BETWEEN :first AND :last AND (unposted > 0 OR posted > 0)"
+            ), {"first": first_day, "last": last_day}).all()
+        else:
+            start, _ = _date_range(first_day)
+            _, end = _date_range(last_day)
+            day = func.date(Opportunity.created_at)
+            rows = db.query(
+                day,
+                func.sum(case((Opportunity.posted_to_telegram == True, 0), else_=1)),
+                func.sum(case((Opportunity.posted_to_telegram == True, 1), else_=0)),
+            ).filter(Opportunity.created_at >= start, Opportunity.created_at < end).group_by(day).all()
+        return {str(day): (int(unposted), int(posted)) for day, unposted, posted in rows}
+
+
+def get_adjacent_days(date_str: str, posted: bool) -> tuple[Optional[str], Optional[str]]:
+    """The nearest earlier and later days that have posted (or unposted) opportunities."""
+    with get_session() as db:
+        if _stats_backend:
+            column_name = "posted" if posted else "unposted"
+            row = db.execute(text(
+                f"SELECT (SELECT max(day) FROM daily_opportunity_counts WHERE day < :day AND {column_name} > 0),"
+                f" (SELECT min(day) FROM daily_opportunity_counts WHERE day > :day AND {column_name} > 0)"
+            ), {"day": date_str}).first()
+            return row[0], row[1]
+        start, end = _date_range(date_str)
+        status = Opportunity.posted_to_telegram == posted
+        before = db.query(func.max(Opportunity.created_at)).filter(status, Opportunity.created_at < start).scalar()
+        after = db.query(func.min(Opportunity.created_at)).filter(status, Opportunity.created_at >= end).scalar()
+        return (before.strftime("%Y-%m-%d") if before else None,
+                after.strftime("%Y-%m-%d") if after else None)
+
+
+# get_stats_from_db results are reused for STATS_CACHE_TTL seconds and dropped
+# whenever a committed transaction in this process touched opportunities.
+STATS_CACHE_TTL = int(getenv("STATS_CACHE_TTL", "30"))
+_stats_cache: Optional[tuple[float, dict]] = None
+
+
+def invalidate_stats() -> None:
+    global _stats_cache
+    _stats_cache = None
+
+
+def _scan_stats(db, today_start: datetime, week_start: datetime, month_start: datetime) -> dict:
+    """Counts aggregated over the whole table; used when stat_counters is not maintained."""
+    status_counts = dict(
+        db.query(Opportunity.posted_to_telegram, func.count(Opportunity.id))
+        .group_by(Opportunity.posted_to_telegram)
+        .all()
+    )
+    row = db.query(
+        func.sum(case((Opportunity.created_at >= today_start, 1), else_=0)),
+        func.sum(case((Opportunity.created_at >= week_start, 1), else_=0)),
+        func.sum(case((Opportunity.created_at >= month_start, 1), else_=0)),
+    ).first()
+    top_tags = (
+        db.query(Tag.name, func.count(opportunity_tags.c.opportunity_id))
+        .join(opportunity_tags, Tag.id == opportunity_tags.c.tag_id)
+        .group_by(Tag.id, Tag.name)
+        .order_by(func.count(opportunity_tags.c.opportunity_id).desc(), Tag.name)
+        .limit(10)
+        .all()
+    )
+    return {
+        "posted": status_counts.get(True, 0),
+        "unposted": status_counts.get(False, 0),
+        "today": int(row[0] or 0),
+        "week": int(row[1] or 0),
+        "month": int(row[2] or 0),
+        "top_tags": [(name, count) for name, count in top_tags],
+    }
+
+
+def _counter_stats(db, today_start: datetime, week_start: datetime, month_start: datetime) -> dict:
+    """The same counts read from the counter tables: a few dozen rows whatever the table size."""
+    status = dict(db.execute(text("SELECT key, value FROM stat_counters WHERE kind = 'status'")).all())
+    days = {
+        day: unposted + posted for day, unposted, posted in db.execute(text(
+            "SELECT day, unposted, posted FROM daily_opportunity_counts WHERE day >= :since"
+        ), {"since": min(week_start, month_start).date().isoformat()})
+    }
+    top_tags = db.execute(text(
+        "SELECT t.name, c.value FROM stat_counters c JOIN tags t ON CAST(t.id AS VARCHAR) = c.key"
+        " WHERE c.kind = 'tag' AND c.value > 0 ORDER BY c.value DESC, t.name LIMIT 10"
+    )).all()
+
+    def since_day(start: datetime) -> int:
+        first = start.date().isoformat()
+        return sum(n for day, n in days.items() if day >= first)
+
+    return {
+        "posted": status.get("posted", 0),
+        "unposted": status.get("unposted", 0),
+        "today": since_day(today_start),
+        "week": since_day(week_start),
+        "month": since_day(month_start),
+        "top_tags": [(name, count) for name, count in top_tags],
+    }
+
+
 def get_stats_from_db() -> dict:
+    global _stats_cache
+    cached = _stats_cache
+    if cached and cached[0] > time.monotonic():
+        return dict(cached[1])
     with get_session() as db:
         now = datetime.utcnow()
         today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
         week_start = today_start - timedelta(days=today_start.weekday())
         month_start = today_start.replace(day=1)
 
-        status_counts = dict(
-            db.query(Opportunity.posted_to_telegram, func.count(Opportunity.id))
-            .group_by(Opportunity.posted_to_telegram)
-            .all()
-        )
-        posted = status_counts.get(True, 0)
-        unposted = status_counts.get(False, 0)
-        total = posted + unposted
-
-        row = db.query(
-            func.min(Opportunity.created_at),
-            func.max(Opportunity.created_at).filter(Opportunity.posted_to_telegram == True),
-            func.sum(case((Opportunity.created_at >= today_start, 1), else_=0)),
-            func.sum(case((Opportunity.created_at >= week_start, 1), else_=0)),
-            func.sum(case((Opportunity.created_at >= month_start, 1), else_=0)),
-        ).first()
-        oldest = row[0]
-        last_posted = row[1]
-        today_count = row[2] or 0
-        week_count = row[3] or 0
-        month_count = row[4] or 0
-
-        top_tags = (
-            db.query(Tag.name, func.count(opportunity_tags.c.opportunity_id))
-            .join(opportunity_tags, Tag.id == opportunity_tags.c.tag_id)
-            .group_by(Tag.id, Tag.name)
-            .order_by(func.count(opportunity_tags.c.opportunity_id).desc())
-            .limit(10)
-            .all()
-        )
-        top_tags = [(name, count) for name, count in top_tags]
-
-        return {
-            "total": total,
-            "unposted": unposted,
-            "posted": posted,
-            "today": int(today_count),
-            "week": int(week_count),
-            "month": int(month_count),
+        counts = (_counter_stats if _stats_backend else _scan_stats)(db, today_start, week_start, month_start)
+        # Both ends come straight off an index (idx_created_id / idx_posted_created).
+        oldest = db.query(Opportunity.created_at).filter(Opportunity.created_at.isnot(None)) \
+            .order_by(Opportunity.created_at.asc()).limit(1).scalar()
+        last_posted = db.query(Opportunity.created_at).filter(Opportunity.posted_to_telegram == True) \
+            .order_by(Opportunity.created_at.desc()).limit(1).scalar()
+
+        stats = {
+            "total": counts["posted"] + counts["unposted"],
+            "unposted": counts["unposted"],
+            "posted": counts["posted"],
+            "today": counts["today"],
+            "week": counts["week"],
+            "month": counts["month"],
             "last_posted": last_posted.strftime("%Y-%m-%d %H:%M") if last_posted else "N/A",
             "oldest": oldest.strftime("%Y-%m-%d") if oldest else "N/A",
-            "top_tags": top_tags,
+            "top_tags": counts["top_tags"],
+        }
+    _stats_cache = (time.monotonic() + STATS_CACHE_TTL, stats)
+    return dict(stats)
+
+
+_fts_table = table("opportunities_fts", column("rowid"), column("rank"))
+_fts_match = literal_column("opportunities_fts").op("MATCH")
+_search_vector = literal_column("opportunities.search_vector")
+
+
+def _fulltext_query(keyword: str) -> Optional[str]:
+    """Every word of keyword as a prefix term, ANDed, in the active backend's query syntax."""
+    words = re.findall(r"\w+", keyword.lower())
+    if not words or _fulltext_backend is None:
+        return None
+    if _fulltext_backend == "postgres":
+        return " & ".join(f"{w}:*" for w in words)
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def _keyword_like(keyword: str):
+    like = f"%{keyword}%"
+    return or_(
+        Opportunity.title.ilike(like),
+        Opportunity.description.ilike(like),
+        Opportunity.tags.ilike(like),
+        Opportunity.tags_rel.any(Tag.name.ilike(like)),
+    )
+
+
+def _search_filters(keyword: str, posted: Optional[bool]) -> list:
+    filters = []
+    if keyword:
+        query = _fulltext_query(keyword)
+        if query and _fulltext_backend == "postgres":
+            tsquery = func.to_tsquery("english", query)
+            # A keyword made only of stopwords ("the", "for") parses to an empty
+            # tsquery that matches nothing; those keep the substring match.
+            filters.append(or_(
+                _search_vector.op("@@")(tsquery),
+                and_(func.numnode(tsquery) == 0, _keyword_like(keyword)),
+            ))
+        elif query:
+            filters.append(Opportunity.id.in_(select(_fts_table.c.rowid).where(_fts_match(query))))
+        else:
+            filters.append(_keyword_like(keyword))
+    if posted is not None:
+        filters.append(Opportunity.posted_to_telegram == posted)
+    return filters
+
+
+def _search_rank(keyword: str):
+    """ORDER BY term putting the most relevant matches first, or None without a full-text query."""
+    query = _fulltext_query(keyword) if keyword else None
+    if not query:
+        return None
+    if _fulltext_backend == "postgres":
+        return func.ts_rank_cd(_search_vector, func.to_tsquery("english", query)).desc()
+    # FTS5 rank is bm25(): lower is better.
+    return select(_fts_table.c.rank) \
+        .where(_fts_match(query), _fts_table.c.rowid == Opportunity.id) \
+        .scalar_subquery().asc()
+
+
+def _ranked_search(keyword: str, rank, skip: int, limit: int, posted: Optional[bool], with_total: bool) -> dict:
+    with get_session() as db:
+        rows = db.query(Opportunity).filter(*_search_filters(keyword, posted)) \
+            .order_by(rank, Opportunity.created_at.desc(), Opportunity.id.desc()) \
+            .offset(skip).limit(limit).all()
+        return {
+            "results": [opportunity_to_dict(o) for o in rows],
+            "total": _cached_count((keyword, posted), lambda: _count_matches(db, keyword, posted)) if with_total else None,
+            "offset": skip,
+            "limit": limit,
+            "next_cursor": None,
+            "prev_cursor": None,
         }
 
 
-def search_opportunities(keyword: str, skip: int = 0, limit: int = 10, posted: Optional[bool] = None) -> dict:
-    with get_session() as db:
-        q = db.query(Opportunity)
-        if keyword:
-            like = f"%{keyword}%"
-            q = q.outerjoin(opportunity_tags, Opportunity.id == opportunity_tags.c.opportunity_id) \
-                 .outerjoin(Tag, opportunity_tags.c.tag_id == Tag.id) \
-                 .filter(
-                     (Opportunity.title.ilike(like)) |
-                     (Opportunity.description.ilike(like)) |
-                     (Opportunity.tags.ilike(like)) |
-                     (Tag.name.ilike(like))
-                 ).distinct()
-        if posted is not None:
-            q = q.filter(Opportunity.posted_to_telegram == posted)
-        total = q.count()
-        results = q.order_by(Opportunity.created_at.desc()).offset(skip).limit(limit).all()
+def _count_matches(db, keyword: str, posted: Optional[bool]) -> int:
+    return db.query(func.count(Opportunity.id)).filter(*_search_filters(keyword, posted)).scalar()
+
+
+_trgm_table = table("opportunity_trigrams", column("trigram"), column("opportunity_id"))
+
+
+def _query_trigrams(keyword: str) -> list[str]:
+    doc = " " + " ".join(keyword.lower().split()) + " "
+    return sorted({doc[i:i + 3] for i in range(len(doc) - 2)})
+
+
+def _fuzzy_query(db, keyword: str, posted: Optional[bool]):
+    """(query over Opportunity, score) for rows whose title/tags are similar to keyword."""
+    posted_filters = _search_filters("", posted)
+    if _fuzzy_backend == "postgres":
+        doc = func.lower(func.coalesce(Opportunity.title, "") + " " + func.coalesce(Opportunity.tags, ""))
+        # Transaction-local threshold for the index-backed <% operator.
+        db.execute(text("SELECT set_config('pg_trgm.word_similarity_threshold', :t, true)"),
+                   {"t": str(FUZZY_SEARCH_THRESHOLD)})
+        score = func.word_similarity(keyword.lower(), doc)
+        q = db.query(Opportunity).filter(literal(keyword.lower()).op("<%")(doc), *posted_filters)
+        return q, score
+    grams = _query_trigrams(keyword)
+    # Share of the keyword's trigrams present in the document (word-similarity style).
+    ratio = func.count() * 1.0 / len(grams)
+    shared = select(_trgm_table.c.opportunity_id, ratio.label("score")) \
+        .where(_trgm_table.c.trigram.in_(grams)) \
+        .group_by(_trgm_table.c.opportunity_id) \
+        .having(ratio >= FUZZY_SEARCH_THRESHOLD) \
+        .subquery()
+    q = db.query(Opportunity).join(shared, shared.c.opportunity_id == Opportunity.id).filter(*posted_filters)
+    return q, shared.c.score
+
+
+def _fuzzy_search(keyword: str, skip: int, limit: int, posted: Optional[bool], with_total: bool) -> dict:
+    with get_session() as db:
+        q, score = _fuzzy_query(db, keyword, posted)
+        rows = q.add_columns(score) \
+            .order_by(score.desc(), Opportunity.created_at.desc(), Opportunity.id.desc()) \
+            .offset(skip).limit(limit).all()
+        results = []
+        for opp, similarity in rows:
+            d = opportunity_to_dict(opp)
+            d["score"] = round(float(similarity), 3)
+            results.append(d)
+        total = None
+        if with_total:
+            total = _cached_count(("fuzzy", keyword, posted), lambda: q.count())
         return {
-            "results": [opportunity_to_dict(o) for o in results],
+            "results": results,
             "total": total,
             "offset": skip,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": None,
+            "prev_cursor": None,
         }
 
 
-def bulk_save_opportunities(opportunities: list[dict], scraped_date: Optional[str] = None) -> int:
+_EPOCH = datetime(1970, 1, 1)
+_CURSOR_FMT = ">cqq"
+
+
+def encode_cursor(direction: str, created_at: datetime, opp_id: int) -> str:
+    """Opaque keyset cursor: direction ('n'ext / 'p'rev) plus the (created_at, id) boundary row."""
+    micros = (created_at - _EPOCH) // timedelta(microseconds=1)
+    raw = struct.pack(_CURSOR_FMT, direction.encode(), micros, opp_id)
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, datetime, int]:
+    """Inverse of encode_cursor. Raises ValueError on a malformed cursor."""
     try:
-        if scraped_date:
-            try:
-                dt = datetime.strptime(scraped_date.replace("/", "-"), "%Y-%m-%d")
-            except ValueError:
-                dt = datetime.utcnow()
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        direction, micros, opp_id = struct.unpack(_CURSOR_FMT, raw)
+        direction = direction.decode()
+    except (struct.error, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    if direction not in ("n", "p"):
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return direction, _EPOCH + timedelta(microseconds=micros), opp_id
+
+
+# Matching-row counts per (keyword, posted), reused for SEARCH_COUNT_TTL seconds
+# and dropped whenever a committed transaction touched opportunities.
+SEARCH_COUNT_TTL = int(getenv("SEARCH_COUNT_TTL", "60"))
+_count_cache: dict[tuple, tuple[float, int]] = {}
+_count_lock = threading.Lock()
+
+
+def invalidate_search_counts() -> None:
+    with _count_lock:
+        _count_cache.clear()
+
+
+def _cached_count(key: tuple, count) -> int:
+    """Return the cached count for key, calling count() to refresh it."""
+    now = time.monotonic()
+    with _count_lock:
+        hit = _count_cache.get(key)
+    if hit and hit[0] > now:
+        return hit[1]
+    total = count() or 0
+    with _count_lock:
+        _count_cache[key] = (now + SEARCH_COUNT_TTL, total)
+    return total
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_opportunity_flush(session, flush_context):
+    if any(isinstance(obj, Opportunity) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info["opportunities_changed"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_opportunity_dml(orm_execute_state):
+    if (orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete) \
+            and orm_execute_state.bind_mapper is not None \
+            and orm_execute_state.bind_mapper.class_ is Opportunity:
+        orm_execute_state.session.info["opportunities_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session):
+    if session.info.pop("opportunities_changed", False):
+        invalidate_search_counts()
+        invalidate_stats()
+
+
+def search_opportunities(keyword: str, skip: int = 0, limit: int = 10, posted: Optional[bool] = None,
+                         cursor: Optional[str] = None, with_total: bool = True, match: str = "text") -> dict:
+    """Page through matching opportunities, newest first.
+
+    With a cursor (from a previous page's next_cursor/prev_cursor) the page is
+    located by keyset on (created_at, id) and skip is ignored, so every page
+    costs the same. Without one, skip is used as a plain offset. total is a
+    cached count (see SEARCH_COUNT_TTL), or None when with_total is False.
+    A keyword is matched through the full-text index and results are ranked by
+    relevance; those pages are offset-based and carry no cursors.
+    match="fuzzy" instead ranks by trigram similarity of title + tags (typos,
+    partial names) and adds a "score" in [0, 1] to each result.
+    Raises ValueError for a malformed cursor, or a cursor combined with a
+    ranked keyword search.
+    """
+    if match == "fuzzy" and keyword.strip() and _fuzzy_backend:
+        if cursor:
+            raise ValueError("Cursors are not supported for ranked keyword searches; use skip")
+        return _fuzzy_search(keyword, skip, limit, posted, with_total)
+    rank = _search_rank(keyword)
+    if rank is not None:
+        if cursor:
+            raise ValueError("Cursors are not supported for ranked keyword searches; use skip")
+        return _ranked_search(keyword, rank, skip, limit, posted, with_total)
+    direction = None
+    if cursor:
+        direction, after_created, after_id = decode_cursor(cursor)
+    with get_session() as db:
+        q = db.query(Opportunity).filter(*_search_filters(keyword, posted))
+        key = tuple_(Opportunity.created_at, Opportunity.id)
+        if direction == "n":
+            q = q.filter(key < tuple_(after_created, after_id))
+        elif direction == "p":
+            q = q.filter(key > tuple_(after_created, after_id))
+        if direction == "p":
+            q = q.order_by(Opportunity.created_at.asc(), Opportunity.id.asc())
+        else:
+            q = q.order_by(Opportunity.created_at.desc(), Opportunity.id.desc())
+        if direction is None and skip:
+            q = q.offset(skip)
+        rows = q.limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        if direction == "p":
+            rows.reverse()
+            has_next, has_prev = True, has_more
         else:
-            dt = datetime.utcnow()
-        existing_links = opportunities_exist([o["link"] for o in opportunities])
-        new_data = []
-        tag_map = []
-        for opp in opportunities:
-            if opp["link"] in existing_links:
-                continue
-            if opp["link"].startswith("https://opportunitydesk.org"):
-                continue
-            new_data.append({
-                "title": opp['title'],
-                "link": opp['link'],
-                "description": opp.get('description', ''),
-                "deadline": opp.get('deadline', ''),
-                "thumbnail": opp.get('thumbnail', ''),
-                "tags": ', '.join(opp.get('tags', [])),
-                "created_at": dt,
-            })
-            tag_map.append(opp.get("tags", []))
-        if not new_data:
-            return 0
+            has_next, has_prev = has_more, direction == "n" or bool(skip)
+        return {
+            "results": [opportunity_to_dict(o) for o in rows],
+            "total": _cached_count((keyword, posted), lambda: _count_matches(db, keyword, posted)) if with_total else None,
+            "offset": skip if direction is None else None,
+            "limit": limit,
+            "next_cursor": encode_cursor("n", rows[-1].created_at, rows[-1].id) if rows and has_next else None,
+            "prev_cursor": encode_cursor("p", rows[0].created_at, rows[0].id) if rows and has_prev else None,
+        }
+
+
+EXPORT_COLUMNS = ("id", "title", "link", "description", "deadline", "tags", "created_at", "posted_to_telegram")
+
+
+def iter_opportunities_for_export(keyword: str = "", posted: Optional[bool] = None, batch_size: int = 500):
+    """Yield export rows (dicts keyed by EXPORT_COLUMNS), newest first, without loading the table.
+
+    Rows come off a server-side cursor in batches of batch_size; tag names are
+    fetched with one query per batch. The session stays open until the
+    generator is exhausted or closed.
+    """
+    columns = [getattr(Opportunity, c) for c in EXPORT_COLUMNS if c != "tags"]
+    with get_session() as db:
+        result = db.execute(
+            select(*columns)
+            .where(*_search_filters(keyword, posted))
+            .order_by(Opportunity.created_at.desc(), Opportunity.id.desc())
+            .execution_options(stream_results=True, yield_per=batch_size)
+        )
+        for batch in result.partitions():
+            tags_by_id = {}
+            tag_rows = db.execute(
+                select(opportunity_tags.c.opportunity_id, Tag.name)
+                .join(Tag, opportunity_tags.c.tag_id == Tag.id)
+                .where(opportunity_tags.c.opportunity_id.in_([row.id for row in batch]))
+            )
+            for opp_id, name in tag_rows:
+                tags_by_id.setdefault(opp_id, []).append(name)
+            for row in batch:
+                d = row._asdict()
+                d["tags"] = tags_by_id.get(row.id, [])
+                yield d
+
+
+def _scraped_datetime(scraped_date: Optional[str]) -> datetime:
+    if scraped_date:
+        try:
+            return datetime.strptime(scraped_date.replace("/", "-"), "%Y-%m-%d")
+        except ValueError:
+            pass
+    return datetime.utcnow()
+
+
+def bulk_insert_opportunities(opportunities: list[dict], scraped_date: Optional[str] = None) -> list[dict]:
+    """Insert opportunities with one INSERT ... ON CONFLICT (link) DO NOTHING RETURNING.
+
+    Returns one outcome per input row, in order: {"link", "status", "id"} where
+    status is "inserted", "duplicate" (link already stored, possibly by a
+    concurrent writer, or repeated in the batch), "invalid" (internal link)
+    or "error" (the statement failed; nothing was saved).
+    A per-row "scraped_date" (used by multi-date backfills) overrides scraped_date.
+    """
+    dt = _scraped_datetime(scraped_date)
+    outcomes = []
+    rows = {}
+    first_seen = {}
+    tags_by_link = {}
+    for opp in opportunities:
+        link = opp["link"]
+        outcome = {"link": link, "status": "duplicate", "id": None}
+        outcomes.append(outcome)
+        if link.startswith("https://opportunitydesk.org"):
+            outcome["status"] = "invalid"
+            continue
+        if link in rows:
+            continue
+        first_seen[link] = outcome
+        tags_by_link[link] = opp.get("tags", [])
+        rows[link] = {
+            "title": opp['title'],
+            "link": link,
+            "description": opp.get('description', ''),
+            "deadline": opp.get('deadline', ''),
+            "thumbnail": opp.get('thumbnail', ''),
+            "tags": ', '.join(opp.get('tags', [])),
+            "created_at": _scraped_datetime(opp["scraped_date"]) if opp.get("scraped_date") else dt,
+        }
+    if not rows:
+        return outcomes
+    try:
         with get_session() as db:
-            from sqlalchemy import insert
-            stmt = insert(Opportunity).returning(Opportunity.id)
-            result = db.execute(stmt, new_data)
-            for row_id, tags in zip(result.scalars().all(), tag_map):
-                _set_opportunity_tags(db, row_id, tags)
-        return len(new_data)
+            stmt = _dialect_insert(db)(Opportunity)
+            if hasattr(stmt, "on_conflict_do_nothing"):
+                stmt = stmt.on_conflict_do_nothing(index_elements=["link"])
+            else:
+                stored = opportunities_exist(list(rows))
+                rows = {link: row for link, row in rows.items() if link not in stored}
+            inserted = dict(
+                db.execute(stmt.returning(Opportunity.link, Opportunity.id), list(rows.values())).all()
+            ) if rows else {}
+            _set_tags_bulk(db, {opp_id: tags_by_link[link] for link, opp_id in inserted.items()}, replace=False)
     except Exception:
-        _logger.exception("bulk_save_opportunities failed")
-        return 0
+        _logger.exception("bulk_insert_opportunities failed")
+        for outcome in first_seen.values():
+            outcome["status"] = "error"
+        return outcomes
+    for link, opp_id in inserted.items():
+        first_seen[link].update(status="inserted", id=opp_id)
+    return outcomes
+
+
+def bulk_save_opportunities(opportunities: list[dict], scraped_date: Optional[str] = None) -> int:
+    """Insert new opportunities in one statement; returns how many were inserted."""
+    outcomes = bulk_insert_opportunities(opportunities, scraped_date)
+    return sum(1 for o in outcomes if o["status"] == "inserted")
 
 
 def delete_old_entries(days: Optional[int] = None):
@@ -669,4 +1700,8 @@ def delete_old_entries(days: Optional[int] = None):
     with get_session() as db:
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         deleted = db.query(Opportunity).filter(Opportunity.created_at < cutoff_date).delete()
+        db.query(ScrapedArticle).filter(ScrapedArticle.created_at < cutoff_date).delete()
+        if _stats_backend:
+            # Days that no longer have any opportunity; their counters have dropped to zero.
+            db.execute(text("DELETE FROM daily_opportunity_counts WHERE unposted <= 0 AND posted <= 0"))
         _logger.info("Deleted %d old opportunities (older than %s days)", deleted, days)
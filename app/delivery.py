@@ -0,0 +1,90 @@
+import os
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import requests
+
+from app.database import lease_deliveries, complete_delivery, fail_delivery, get_opportunity_by_id
+from app.http_client import sanitize as _sanitize
+
+_logger = logging.getLogger(__name__)
+
+DELIVERY_WORKERS = int(os.getenv("DELIVERY_WORKERS", "3"))
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    from app.telegram_bot import _retry_after as _response_retry_after
+    response = getattr(exc, "response", None)
+    return None if response is None else _response_retry_after(response)
+
+
+def _is_permanent(exc: BaseException) -> bool:
+    """4xx other than 429 (chat not found, bot kicked, bad request) will not fix itself."""
+    response = getattr(exc, "response", None)
+    if isinstance(exc, requests.HTTPError) and response is not None:
+        return 400 <= response.status_code < 500 and response.status_code != 429
+    return False
+
+
+def _deliver(job: dict, opportunities: dict, lock: threading.Lock) -> str:
+    from app.telegram_bot import _send_opportunity
+
+    oid = job["opportunity_id"]
+    with lock:
+        opp = opportunities.get(oid)
+    if opp is None:
+        opp = get_opportunity_by_id(oid)
+        with lock:
+            opportunities[oid] = opp
+    if opp is None:
+        return fail_delivery(job["id"], "opportunity no longer exists", permanent=True)
+
+    try:
+        message_id = _send_opportunity(opp, job["chat_id"])
+    except Exception as e:
+        error = _sanitize(str(e))
+        status = fail_delivery(job["id"], error, retry_after=_retry_after(e), permanent=_is_permanent(e))
+        _logger.warning("Delivery %s of opportunity %s to %s failed (attempt %s, now %s): %s",
+                        job["id"], oid, job["chat_id"], job["attempts"], status, error)
+        return status
+    complete_delivery(job["id"], message_id)
+    return "sent"
+
+
+def run_delivery_workers(workers: int = DELIVERY_WORKERS, opportunity_ids: Optional[list[int]] = None,
+                         opportunities: Optional[dict] = None) -> dict[str, int]:
+    """Drain the due deliveries with a pool of workers and return counts by outcome.
+
+    Each worker leases one delivery at a time until nothing due is left, so
+    several pools (threads here, or other processes) can share the outbox.
+    opportunity_ids restricts the drain to those opportunities; opportunities
+    is an optional {id: dict} cache so already-loaded rows are not re-read.
+    With a single worker the drain runs inline on the calling thread.
+    """
+    opportunities = dict(opportunities or {})
+    lock = threading.Lock()
+    counts = {"sent": 0, "pending": 0, "failed": 0}
+
+    def worker():
+        while True:
+            jobs = lease_deliveries(1, opportunity_ids=opportunity_ids)
+            if not jobs:
+                return
+            try:
+                status = _deliver(jobs[0], opportunities, lock)
+            except Exception:
+                # The lease expires and another worker picks the delivery up again.
+                _logger.warning("Delivery worker crashed on %s", jobs[0]["id"], exc_info=True)
+                continue
+            with lock:
+                counts[status] = counts.get(status, 0) + 1
+
+    if workers <= 1:
+        worker()
+        return counts
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for _ in range(workers):
+            pool.submit(worker)
+    return counts
@@ -0,0 +1,159 @@
+import os
+import re
+import logging
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import html as _lxml_html
+except ImportError:  # optional fast path; BeautifulSoup is always available
+    _lxml_html = None
+
+_logger = logging.getLogger(__name__)
+
+# "auto" uses lxml when installed, "bs4" forces the BeautifulSoup backend.
+SCRAPER_PARSER = os.getenv("SCRAPER_PARSER", "auto").lower()
+
+_APPLY_MARKERS = ("for more information", "apply here", "apply now")
+_DEADLINE_RE = re.compile(r"deadline:\s*(.*)", re.IGNORECASE)
+_DEADLINE_PREFIX_RE = re.compile(r"deadline\s*:", re.IGNORECASE)
+_SKIP_TEXT_TAGS = frozenset(("script", "style", "template"))
+
+
+def _pick_description(texts) -> str | None:
+    desc_paragraphs = []
+    for text in texts:
+        if _DEADLINE_PREFIX_RE.match(text):
+            continue
+        desc_paragraphs.append(text)
+        if len(desc_paragraphs) == 2:
+            break
+    return " ".join(desc_paragraphs) if desc_paragraphs else None
+
+
+def parse_bs4(html: str) -> tuple:
+    """Reference backend: full BeautifulSoup tree with the stdlib html.parser."""
+    soup = BeautifulSoup(html, "html.parser")
+
+    more_info_link = None
+    deadline = None
+    thumbnail_url = None
+    description = None
+    tags = []
+
+    for p in soup.find_all("p"):
+        raw = p.get_text(strip=True)
+        text = raw.lower()
+        if any(marker in text for marker in _APPLY_MARKERS):
+            a_tag = p.find("a", href=True)
+            if a_tag:
+                more_info_link = a_tag['href']
+
+        strong_tag = p.find("strong")
+        if strong_tag and "deadline:" in strong_tag.get_text(strip=True).lower():
+            match = _DEADLINE_RE.search(raw)
+            if match:
+                deadline = match.group(1).strip()
+
+    figure = soup.find("figure", class_="image-link")
+    if figure:
+        img = figure.find("img")
+        if img and img.has_attr("src"):
+            thumbnail_url = img['src']
+
+    content_div = soup.find("div", class_="entry-content")
+    if content_div:
+        paragraphs = content_div.find_all("p", recursive=False)
+        description = _pick_description(p.get_text(strip=True) for p in paragraphs)
+
+    categories = soup.find_all("a", rel="category tag")
+    if categories:
+        tags = [cat.get_text(strip=True) for cat in categories]
+
+    return more_info_link, deadline, thumbnail_url, description, tags
+
+
+def _strings(el):
+    """Yield text nodes under el the way BeautifulSoup's get_text does (no comments/scripts)."""
+    if el.text:
+        yield el.text
+    for child in el:
+        if isinstance(child.tag, str) and child.tag not in _SKIP_TEXT_TAGS:
+            yield from _strings(child)
+        if child.tail:
+            yield child.tail
+
+
+def _text(el) -> str:
+    return "".join(s.strip() for s in _strings(el))
+
+
+def _has_class(el, name: str) -> bool:
+    return name in (el.get("class") or "").split()
+
+
+def parse_lxml(html: str) -> tuple:
+    """Fast backend: libxml2 tree, one walk over the elements we care about."""
+    root = _lxml_html.document_fromstring(html)
+
+    more_info_link = None
+    deadline = None
+    thumbnail_url = None
+    description = None
+    tags = []
+    figure_seen = False
+    content_seen = False
+
+    for el in root.iter("p", "figure", "div", "a"):
+        tag = el.tag
+        if tag == "p":
+            raw = _text(el)
+            text = raw.lower()
+            if any(marker in text for marker in _APPLY_MARKERS):
+                a_tag = next((a for a in el.iter("a") if a.get("href") is not None), None)
+                if a_tag is not None:
+                    more_info_link = a_tag.get("href")
+            strong_tag = next(el.iter("strong"), None)
+            if strong_tag is not None and "deadline:" in _text(strong_tag).lower():
+                match = _DEADLINE_RE.search(raw)
+                if match:
+                    deadline = match.group(1).strip()
+        elif tag == "a":
+            if " ".join((el.get("rel") or "").split()) == "category tag":
+                tags.append(_text(el))
+        elif tag == "figure" and not figure_seen and _has_class(el, "image-link"):
+            figure_seen = True
+            img = next(el.iter("img"), None)
+            if img is not None and img.get("src") is not None:
+                thumbnail_url = img.get("src")
+        elif tag == "div" and not content_seen and _has_class(el, "entry-content"):
+            content_seen = True
+            description = _pick_description(_text(c) for c in el if c.tag == "p")
+
+    return more_info_link, deadline, thumbnail_url, description, tags
+
+
+def _backend():
+    if SCRAPER_PARSER == "bs4" or _lxml_html is None:
+        return parse_bs4
+    return parse_lxml
+
+
+def parse_detail_page(html: str, detail_url: str) -> tuple:
+    """Extract (link, deadline, thumbnail, description, tags) from a detail page.
+
+    Uses the lxml fast path when available and falls back to BeautifulSoup if
+    lxml is missing or rejects the document.
+    """
+    parse = _backend()
+    try:
+        result = parse(html)
+    except Exception:
+        if parse is parse_bs4:
+            raise
+        _logger.debug("lxml parse failed for %s, falling back to BeautifulSoup", detail_url, exc_info=True)
+        result = parse_bs4(html)
+
+    more_info_link, deadline, thumbnail_url, description, tags = result
+    if not more_info_link:
+        more_info_link = detail_url
+    return more_info_link, deadline, thumbnail_url, description, tags
@@ -0,0 +1,81 @@
+import io
+import csv
+import json
+import zlib
+from typing import Iterable, Iterator
+
+from app.database import EXPORT_COLUMNS
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+# Bytes buffered before a chunk is handed to the response.
+CHUNK_SIZE = 64 * 1024
+
+
+def _csv_lines(rows: Iterable[dict]) -> Iterator[str]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def _take() -> str:
+        line = buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        return line
+
+    writer.writerow(EXPORT_COLUMNS)
+    yield _take()
+    for op in rows:
+        writer.writerow([
+            op["id"], op["title"], op["link"], op.get("description") or "",
+            op.get("deadline") or "", ", ".join(op.get("tags") or []),
+            str(op["created_at"])[:10] if op.get("created_at") else "",
+            bool(op.get("posted_to_telegram")),
+        ])
+        yield _take()
+
+
+def _ndjson_lines(rows: Iterable[dict]) -> Iterator[str]:
+    for op in rows:
+        created_at = op.get("created_at")
+        yield json.dumps({
+            **op,
+            "created_at": created_at.isoformat() if created_at else None,
+            "posted_to_telegram": bool(op.get("posted_to_telegram")),
+        }, ensure_ascii=False) + "\n"
+
+
+def encode_export(rows: Iterable[dict], fmt: str = "csv", compress: bool = False) -> Iterator[bytes]:
+    """Encode rows as CSV or NDJSON, yielding ~CHUNK_SIZE byte chunks (gzip-framed if compress)."""
+    lines = _csv_lines(rows) if fmt == "csv" else _ndjson_lines(rows)
+    gz = zlib.compressobj(wbits=31) if compress else None
+    pending = []
+    size = 0
+    started = False
+    for line in lines:
+        data = line.encode("utf-8")
+        pending.append(data)
+        size += len(data)
+        # The first line (CSV header / first record) is flushed right away so
+        # the client sees bytes before the rest of the query has been read.
+        if size >= CHUNK_SIZE or not started:
+            chunk = b"".join(pending)
+            pending.clear()
+            size = 0
+            if gz is not None:
+                chunk = gz.compress(chunk) + (gz.flush(zlib.Z_SYNC_FLUSH) if not started else b"")
+            started = True
+            if chunk:
+                yield chunk
+    chunk = b"".join(pending)
+    if gz is not None:
+        chunk = gz.compress(chunk) + gz.flush()
+    if chunk:
+        yield chunk
+
+
+def export_filename(fmt: str, compress: bool) -> str:
+    name = f"opportunities.{EXPORT_FORMATS[fmt][1]}"
+    return name + ".gz" if compress else name
@@ -0,0 +1,155 @@
+import os
+import re
+import time
+import sqlite3
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+
+_logger = logging.getLogger(__name__)
+
+HTTP_CACHE_ENABLED = os.getenv("HTTP_CACHE_ENABLED", "true").lower() == "true"
+HTTP_CACHE_DIR = os.getenv("HTTP_CACHE_DIR", os.path.join(os.path.dirname(__file__), "..", ".cache"))
+HTTP_CACHE_MAX_BYTES = int(os.getenv("HTTP_CACHE_MAX_BYTES", str(50 * 1024 * 1024)))
+
+_LISTING_RE = re.compile(r"^https?://[^/]+/(\d{4})/(\d{2})/(\d{2})/?$")
+
+# Seconds a stored body is served without contacting the origin, per URL class.
+# Past the TTL the entry is still used for a conditional revalidation.
+TTL_POLICY = {
+    "listing_past": 7 * 86400,   # listing for a date two or more days back: practically immutable
+    "listing_recent": 10 * 60,   # today's / yesterday's listing may still gain articles
+    "detail": 86400,
+    "other": 0,
+}
+
+
+def classify_url(url: str, today: Optional[datetime] = None) -> str:
+    m = _LISTING_RE.match(url)
+    if m:
+        try:
+            day = datetime(int(m.group(1)), int(m.group(2)), int(m.group(3)))
+        except ValueError:
+            return "other"
+        today = (today or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+        return "listing_past" if day <= today - timedelta(days=2) else "listing_recent"
+    if url.startswith("https://opportunitydesk.org/"):
+        return "detail"
+    return "other"
+
+
+class HttpCache:
+    """Size-bounded LRU cache of GET bodies and their validators, stored in a SQLite file."""
+
+    def __init__(self, directory: str, max_bytes: int = HTTP_CACHE_MAX_BYTES, ttl_policy: Optional[dict] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_policy = ttl_policy or TTL_POLICY
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite3.connect(os.path.join(self.directory, "http_cache.sqlite3"), check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, body BLOB NOT NULL,"
+                " size INTEGER NOT NULL, stored_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries (accessed_at)")
+            self._conn = conn
+        return self._conn
+
+    def lookup(self, url: str) -> Optional[dict]:
+        """Return the cached entry for url (with a `fresh` flag) and mark it recently used."""
+        try:
+            with self._lock:
+                db = self._db()
+                row = db.execute(
+                    "SELECT etag, last_modified, body, stored_at FROM entries WHERE url = ?", (url,)
+                ).fetchone()
+                if not row:
+                    return None
+                now = time.time()
+                db.execute("UPDATE entries SET accessed_at = ? WHERE url = ?", (now, url))
+                db.commit()
+        except sqlite3.Error:
+            _logger.warning("HTTP cache lookup failed for %s", url, exc_info=True)
+            return None
+        etag, last_modified, body, stored_at = row
+        ttl = self.ttl_policy.get(classify_url(url), 0)
+        return {
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": bytes(body),
+            "fresh": now - stored_at < ttl,
+        }
+
+    @staticmethod
+    def conditional_headers(entry: Optional[dict]) -> dict:
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def store(self, url: str, headers, body: bytes) -> None:
+        """Store a 200 response body with its validators, then evict LRU entries over the size cap."""
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "INSERT OR REPLACE INTO entries (url, etag, last_modified, body, size, stored_at, accessed_at)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, etag, last_modified, body, len(body), now, now),
+                )
+                self._evict(db)
+                db.commit()
+        except sqlite3.Error:
+            _logger.warning("HTTP cache store failed for %s", url, exc_info=True)
+
+    def revalidated(self, url: str, headers) -> None:
+        """Record a 304: the stored body is current again, with possibly refreshed validators."""
+        try:
+            with self._lock:
+                db = self._db()
+                db.execute(
+                    "UPDATE entries SET stored_at = ?, etag = COALESCE(?, etag),"
+                    " last_modified = COALESCE(?, last_modified) WHERE url = ?",
+                    (time.time(), headers.get("ETag"), headers.get("Last-Modified"), url),
+                )
+                db.commit()
+        except sqlite3.Error:
+            _logger.warning("HTTP cache revalidation failed for %s", url, exc_info=True)
+
+    def _evict(self, db: sqlite3.Connection) -> None:
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        victims = []
+        for url, size in db.execute("SELECT url, size FROM entries ORDER BY accessed_at"):
+            victims.append((url,))
+            freed += size
+            if freed >= excess:
+                break
+        db.executemany("DELETE FROM entries WHERE url = ?", victims)
+        _logger.info("HTTP cache evicted %d entr(ies), %d bytes", len(victims), freed)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+scrape_cache: Optional[HttpCache] = HttpCache(HTTP_CACHE_DIR) if HTTP_CACHE_ENABLED else None
@@ -5,12 +5,12 @@ from urllib3.util.retry import Retry
 
 
 class _TimeoutAdapter(HTTPAdapter):
-    def __init__(self, timeout=15, max_retries=2, *args, **kwargs):
+    def __init__(self, timeout=15, max_retries=2, *args, status_forcelist=(429, 500, 502, 503, 504), **kwargs):
         self.timeout = timeout
         retry_strategy = Retry(
             total=max_retries,
             backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
+            status_forcelist=list(status_forcelist),
             allowed_methods=["GET", "POST", "PUT", "DELETE", "HEAD"],
         )
         super().__init__(max_retries=retry_strategy, *args, **kwargs)
@@ -25,11 +25,16 @@ http.mount("https://", _TimeoutAdapter(timeout=15))
 http.mount("http://", _TimeoutAdapter(timeout=15))
 
 
-def make_session() -> requests.Session:
-    """Create a new session with the same timeout defaults (thread-safe)."""
+def make_session(retry_429: bool = True) -> requests.Session:
+    """Create a new session with the same timeout defaults (thread-safe).
+
+    retry_429=False leaves 429s to the caller, e.g. so a rate limiter can
+    honour retry_after instead of the transport retrying behind its back.
+    """
+    statuses = (429, 500, 502, 503, 504) if retry_429 else (500, 502, 503, 504)
     s = requests.Session()
-    s.mount("https://", _TimeoutAdapter(timeout=15))
-    s.mount("http://", _TimeoutAdapter(timeout=15))
+    s.mount("https://", _TimeoutAdapter(timeout=15, status_forcelist=statuses))
+    s.mount("http://", _TimeoutAdapter(timeout=15, status_forcelist=statuses))
     return s
 
 
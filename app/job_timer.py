@@ -0,0 +1,188 @@
+import heapq
+import logging
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+_logger = logging.getLogger(__name__)
+
+# Upper bound on one sleep, so a wall-clock jump (NTP, DST) is noticed.
+MAX_SLEEP_SECONDS = 300.0
+LATE_WARNING_SECONDS = 60.0
+
+
+@dataclass
+class DailyJob:
+    name: str  # unique, e.g. "post@08:00"
+    kind: str  # concurrency group, e.g. "post"
+    at: str  # "HH:MM", local time
+    fn: Callable[[], object]
+
+    def next_due(self, now: datetime, fired: Optional[datetime] = None) -> datetime:
+        """The first slot at or after now, and strictly after the slot that last fired."""
+        hour, minute = map(int, self.at.split(":"))
+        due = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        while due < now or (fired is not None and due <= fired):
+            due += timedelta(days=1)
+        return due
+
+
+class JobTimer:
+    """Run daily jobs from a heap of due times on a bounded thread pool.
+
+    The timer thread sleeps until the earliest due time (or until woken by
+    replace()/run_now()/stop()), hands every due job to the pool and pushes
+    its next occurrence back on the heap. Each job kind has a concurrency
+    limit: a job whose kind is at its limit waits in a FIFO for that kind
+    instead of taking a worker, and a job that is already waiting is not
+    queued twice. Lateness (start time minus due time) is recorded per job.
+    """
+
+    def __init__(self, limits: dict[str, int], clock: Callable[[], datetime] = datetime.now):
+        self.limits = limits
+        self._clock = clock
+        self._heap: list[tuple[datetime, int, DailyJob]] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._running: dict[str, int] = {}
+        self._waiting: dict[str, deque] = {}
+        self._stats: dict[str, dict] = {}
+        self._fired: dict[str, datetime] = {}
+        self._pool = ThreadPoolExecutor(max_workers=max(1, sum(limits.values())), thread_name_prefix="scheduler")
+        self._stopped = False
+        self.active = False
+
+    def replace(self, jobs: list[DailyJob]) -> None:
+        """Swap the whole timetable; jobs already running or waiting are unaffected.
+
+        A slot that already fired is not due again, even if the timetable is
+        replaced within its minute.
+        """
+        now = self._clock()
+        with self._cond:
+            self._heap = [(job.next_due(now, self._fired.get(job.name)), next(self._seq), job) for job in jobs]
+            heapq.heapify(self._heap)
+            self._cond.notify_all()
+
+    def run_now(self, name: str, kind: str, fn: Callable[[], object]) -> None:
+        """Queue a one-off job as if it were due now."""
+        with self._cond:
+            self._release(DailyJob(name, kind, "", fn), self._clock())
+
+    def fire_due(self) -> Optional[float]:
+        """Release every job that is due; seconds until the next one, or None if none is scheduled."""
+        now = self._clock()
+        with self._cond:
+            while self._heap and self._heap[0][0] <= now:
+                due, _, job = heapq.heappop(self._heap)
+                self._fired[job.name] = due
+                following = due + timedelta(days=1)
+                while following <= now:
+                    following += timedelta(days=1)
+                heapq.heappush(self._heap, (following, next(self._seq), job))
+                self._release(job, due)
+            if not self._heap:
+                return None
+            return max(0.0, (self._heap[0][0] - now).total_seconds())
+
+    def run(self, shutdown: Optional[threading.Event] = None) -> None:
+        self.active = True
+        try:
+            while not self._stopped and not (shutdown and shutdown.is_set()):
+                delay = self.fire_due()
+                with self._cond:
+                    if not self._stopped:
+                        self._cond.wait(MAX_SLEEP_SECONDS if delay is None else min(delay, MAX_SLEEP_SECONDS))
+        finally:
+            self.active = False
+            self._pool.shutdown(wait=False)
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def wait_idle(self, timeout: float) -> bool:
+        """Block until no job is running or waiting; False on timeout."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not any(self._running.values()) and not any(self._waiting.values()), timeout)
+
+    def _release(self, job: DailyJob, due: datetime) -> None:
+        # Caller holds self._cond.
+        if self._running.get(job.kind, 0) < self.limits.get(job.kind, 1):
+            self._submit(job, due)
+            return
+        waiting = self._waiting.setdefault(job.kind, deque())
+        if any(queued.name == job.name for queued, _ in waiting):
+            self._job_stats(job.name)["coalesced"] += 1
+            _logger.warning("Scheduled job %s is still queued from an earlier slot; skipping this one", job.name)
+            return
+        waiting.append((job, due))
+
+    def _submit(self, job: DailyJob, due: datetime) -> None:
+        self._running[job.kind] = self._running.get(job.kind, 0) + 1
+        self._pool.submit(self._execute, job, due)
+
+    def _job_stats(self, name: str) -> dict:
+        return self._stats.setdefault(name, {
+            "runs": 0, "failures": 0, "coalesced": 0, "lateness_total": 0.0,
+            "last_lateness": 0.0, "max_lateness": 0.0, "last_duration": 0.0, "last_run": None,
+        })
+
+    def _execute(self, job: DailyJob, due: datetime) -> None:
+        started = self._clock()
+        lateness = max(0.0, (started - due).total_seconds())
+        if lateness > LATE_WARNING_SECONDS:
+            _logger.warning("Scheduled job %s started %.0fs late", job.name, lateness)
+        failed = False
+        try:
+            job.fn()
+        except Exception:
+            failed = True
+            _logger.error("Scheduled job %s failed", job.name, exc_info=True)
+        finally:
+            duration = (self._clock() - started).total_seconds()
+            with self._cond:
+                s = self._job_stats(job.name)
+                s["runs"] += 1
+                s["failures"] += failed
+                s["lateness_total"] += lateness
+                s["last_lateness"] = lateness
+                s["max_lateness"] = max(s["max_lateness"], lateness)
+                s["last_duration"] = duration
+                s["last_run"] = started.isoformat(timespec="seconds")
+                self._running[job.kind] -= 1
+                waiting = self._waiting.get(job.kind)
+                if waiting and not self._stopped:
+                    self._submit(*waiting.popleft())
+                self._cond.notify_all()
+
+    def stats(self) -> dict:
+        """Per-job run counts and lateness in seconds, plus the upcoming timetable."""
+        with self._cond:
+            jobs = {
+                name: {
+                    "runs": s["runs"],
+                    "failures": s["failures"],
+                    "coalesced": s["coalesced"],
+                    "avg_lateness_s": round(s["lateness_total"] / s["runs"], 3) if s["runs"] else 0.0,
+                    "last_lateness_s": round(s["last_lateness"], 3),
+                    "max_lateness_s": round(s["max_lateness"], 3),
+                    "last_duration_s": round(s["last_duration"], 3),
+                    "last_run": s["last_run"],
+                }
+                for name, s in sorted(self._stats.items())
+            }
+            upcoming = [{"job": job.name, "due": due.isoformat(timespec="seconds")}
+                        for due, _, job in sorted(self._heap)]
+            return {
+                "jobs": jobs,
+                "upcoming": upcoming,
+                "running": {k: n for k, n in self._running.items() if n},
+                "waiting": {k: [j.name for j, _ in q] for k, q in self._waiting.items() if q},
+            }
@@ -31,17 +31,23 @@ def build_main_menu(user_id=None):
         ])
     return {"inline_keyboard": keyboard}
 
-def build_date_nav_keyboard(date_str, mode):
+def build_date_nav_keyboard(date_str, mode, adjacent=None):
+    """Previous/Next step one day, or, given adjacent=(prev, next), jump to those days (None hides the button)."""
     date = datetime.strptime(date_str, "%Y-%m-%d")
-    prev_date = (date - timedelta(days=1)).strftime("%Y-%m-%d")
-    next_date = (date + timedelta(days=1)).strftime("%Y-%m-%d")
+    if adjacent is None:
+        prev_date = (date - timedelta(days=1)).strftime("%Y-%m-%d")
+        next_date = (date + timedelta(days=1)).strftime("%Y-%m-%d")
+    else:
+        prev_date, next_date = adjacent
+    row = []
+    if prev_date:
+        row.append({"text": "⬅️ Previous", "callback_data": f"{mode}_date_{prev_date}"})
+    row.append({"text": f"{date_str}", "callback_data": "noop"})
+    if next_date:
+        row.append({"text": "Next ➡️", "callback_data": f"{mode}_date_{next_date}"})
     return {
         "inline_keyboard": [
-            [
-                {"text": "⬅️ Previous", "callback_data": f"{mode}_date_{prev_date}"},
-                {"text": f"{date_str}", "callback_data": "noop"},
-                {"text": "Next ➡️", "callback_data": f"{mode}_date_{next_date}"}
-            ],
+            row,
             [
                 {"text": "📅 Pick Date", "callback_data": f"{mode}_pick_year"}
             ],
@@ -61,16 +67,32 @@ def build_year_picker(mode):
     keyboard.append([{"text": "🔙 Back", "callback_data": f"{mode}_date_{datetime.utcnow().strftime('%Y-%m-%d')}"}])
     return {"inline_keyboard": keyboard}
 
-def build_month_picker(mode, year):
+def _mode_count(counts, mode):
+    unposted, posted = counts
+    return posted if mode == "posted" else unposted
+
+def build_month_picker(mode, year, counts=None):
+    """counts: get_daily_counts() for the year; months with opportunities show how many."""
     months = [
         ("Jan", 1), ("Feb", 2), ("Mar", 3), ("Apr", 4), ("May", 5), ("Jun", 6),
         ("Jul", 7), ("Aug", 8), ("Sep", 9), ("Oct", 10), ("Nov", 11), ("Dec", 12)
     ]
-    keyboard = [[{"text": m[0], "callback_data": f"{mode}_pick_day_{year}-{m[1]:02d}"} for m in months[i:i+4]] for i in range(0, 12, 4)]
+    per_month = {}
+    for day, day_counts in (counts or {}).items():
+        key = int(day[5:7])
+        per_month[key] = per_month.get(key, 0) + _mode_count(day_counts, mode)
+
+    def label(name, number):
+        return f"{name} ({per_month[number]})" if per_month.get(number) else name
+
+    keyboard = [[{"text": label(*m), "callback_data": f"{mode}_pick_day_{year}-{m[1]:02d}"} for m in months[i:i+4]] for i in range(0, 12, 4)]
     keyboard.append([{"text": "🔙 Back", "callback_data": f"{mode}_pick_year"}])
     return {"inline_keyboard": keyboard}
 
-def build_day_picker(mode, year_month):
+def build_day_picker(mode, year_month, counts=None):
+    """With counts (get_daily_counts() for the month) a day reads "7·12" when it has 12
+    opportunities in this mode; empty posted days are not selectable and "✓" marks
+    unposted-mode days whose opportunities are all posted."""
     year, month = map(int, year_month.split("-"))
     days = monthrange(year, month)[1]
     keyboard = []
@@ -78,17 +100,28 @@ def build_day_picker(mode, year_month):
         row = []
         for d in range(i, min(i+7, days+1)):
             date_str = f"{year}-{month:02d}-{d:02d}"
-            row.append({"text": str(d), "callback_data": f"{mode}_date_{date_str}"})
+            button = {"text": str(d), "callback_data": f"{mode}_date_{date_str}"}
+            if counts is not None:
+                day_counts = counts.get(date_str, (0, 0))
+                n = _mode_count(day_counts, mode)
+                if n:
+                    button["text"] = f"{d}·{n}"
+                elif mode == "posted":
+                    button = {"text": "·", "callback_data": "noop"}
+                elif day_counts[1]:
+                    button["text"] = f"{d}✓"
+            row.append(button)
         keyboard.append(row)
     keyboard.append([{"text": "🔙 Back", "callback_data": f"{mode}_pick_month_{year}"}])
     return {"inline_keyboard": keyboard}
 
-def build_search_keyboard(offset, total, keyword):
+def build_search_keyboard(offset, total, keyword, match="text"):
+    prefix = "fsearch" if match == "fuzzy" else "search"
     keyboard = []
     if offset > 0:
-        keyboard.append([{"text": "⬅️ Previous", "callback_data": f"search_{keyword}_{offset - 10}"}])
+        keyboard.append([{"text": "⬅️ Previous", "callback_data": f"{prefix}_{keyword}_{offset - 10}"}])
     if offset + 10 < total:
-        keyboard.append([{"text": "Next ➡️", "callback_data": f"search_{keyword}_{offset + 10}"}])
+        keyboard.append([{"text": "Next ➡️", "callback_data": f"{prefix}_{keyword}_{offset + 10}"}])
     keyboard.append([{"text": "🔙 Main Menu", "callback_data": "main_menu"}])
     return {"inline_keyboard": keyboard}
 
@@ -131,15 +164,22 @@ def build_custom_post_preview_keyboard():
     ]
     return {"inline_keyboard": keyboard}
 
-def build_browse_keyboard(page, total, total_count, mode):
+def build_browse_keyboard(page, total, total_count, mode, next_cursor=None, prev_cursor=None):
+    """Prev/Next carry keyset cursors when given (browse_<mode>_<page>_<cursor>), page numbers otherwise."""
     per_page = 10
     max_page = (total_count - 1) // per_page if total_count else 0
     keyboard = []
     row = []
-    if page > 0:
-        row.append({"text": "⬅️ Prev", "callback_data": f"browse_{mode}_{page - 1}"})
-    if page < max_page:
-        row.append({"text": "Next ➡️", "callback_data": f"browse_{mode}_{page + 1}"})
+    if next_cursor or prev_cursor:
+        if prev_cursor:
+            row.append({"text": "⬅️ Prev", "callback_data": f"browse_{mode}_{max(page - 1, 0)}_{prev_cursor}"})
+        if next_cursor:
+            row.append({"text": "Next ➡️", "callback_data": f"browse_{mode}_{page + 1}_{next_cursor}"})
+    else:
+        if page > 0:
+            row.append({"text": "⬅️ Prev", "callback_data": f"browse_{mode}_{page - 1}"})
+        if page < max_page:
+            row.append({"text": "Next ➡️", "callback_data": f"browse_{mode}_{page + 1}"})
     if row:
         keyboard.append(row)
     if mode == "unposted" and total_count:
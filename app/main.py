@@ -1,6 +1,4 @@
 import os
-import csv
-import io
 import asyncio
 import time
 import logging
@@ -14,24 +12,27 @@ logging.basicConfig(
 )
 _logger = logging.getLogger(__name__)
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request, BackgroundTasks, Query
+from fastapi import FastAPI, Request, Response, BackgroundTasks, Query
+from fastapi.responses import JSONResponse
 from threading import Thread, Event
 from fastapi.middleware.cors import CORSMiddleware
 from datetime import datetime, timedelta
 from typing import Optional
 
-from app.scheduler import start_scheduler, run_scrape, run_post
-from app.scraper import fetch_opportunities_by_date
+from app.scheduler import start_scheduler, stop_scheduler, scheduler_stats, run_scrape, run_post
+from app.scraper import fetch_opportunities_by_date, backfill_opportunities, backfill_dates
 import requests
 from app.database import (
     init_db,
     engine,
     get_unposted_opportunities,
+    count_unposted,
     get_stats_from_db,
     get_opportunity_by_id,
     update_opportunity,
     delete_opportunity,
     search_opportunities,
+    iter_opportunities_for_export,
     opportunity_to_dict,
     Opportunity,
     Admin,
@@ -44,7 +45,7 @@ from app.schemas import (
     SearchResultOut, StatsOut, AdminOut, AdminCreate,
     RootOut, RunOnceOut, WebhookOut,
 )
-from app.config import TELEGRAM_API_URL, BOT_OWNER_ID, PUBLIC_URL, USE_POLLING, RUN_SCHEDULER, API_KEY, SENTRY_DSN, TELEGRAM_CHANNEL_ID
+from app.config import TELEGRAM_API_URL, BOT_OWNER_ID, PUBLIC_URL, USE_POLLING, RUN_SCHEDULER, CHANGE_FEED_ENABLED, API_KEY, SENTRY_DSN, TELEGRAM_CHANNEL_ID
 
 if SENTRY_DSN:
     try:
@@ -60,7 +61,10 @@ if SENTRY_DSN:
 
 from app.http_client import http as _http, sanitize as _sanitize
 from app.rate_limiter import api_limiter
-from app.telegram_handlers import process_telegram_update, set_bot_info
+from app.telegram_client import telegram_client, TelegramAPIError, bind_loop
+from app.telegram_handlers import process_telegram_update, process_telegram_update_async, handle_webhook_update, set_bot_info
+from app.update_dispatcher import UpdateDispatcher, POLLING_WORKERS
+from app.change_feed import start_change_listener, feed_status
 
 _shutdown_event = Event()
 
@@ -72,8 +76,9 @@ async def lifespan(app):
         logging.warning("DB init failed (will retry on next restart): %s", e)
     if not TELEGRAM_CHANNEL_ID:
         logging.info("TELEGRAM_CHANNEL_ID not set — will use channels configured via Telegram admin")
+    bind_loop(asyncio.get_running_loop())
     try:
-        me = _http.post(f"{TELEGRAM_API_URL}/getMe").json().get("result", {})
+        me = await telegram_client.get_me()
         set_bot_info(me.get("username"), me.get("first_name", "Opportunity Search Bot"))
     except Exception:
         logging.warning("Failed to get bot info from Telegram (non-fatal)")
@@ -95,6 +100,11 @@ async def lifespan(app):
             _logger.info("Scheduler started (primary worker)")
     else:
         _logger.info("Secondary worker (no scheduler/webhook)")
+    if CHANGE_FEED_ENABLED:
+        # Every worker caches config, so every worker listens for changes.
+        t = Thread(target=start_change_listener, args=(_shutdown_event,), daemon=True)
+        t.start()
+        threads.append(t)
     if os.getenv("RENDER"):
         def _keepalive(shutdown: Event):
             while not shutdown.is_set():
@@ -112,10 +122,13 @@ async def lifespan(app):
     yield
     _logger.info("Shutdown: signalling threads to stop...")
     _shutdown_event.set()
+    stop_scheduler()
     for t in threads:
         t.join(timeout=10)
     _logger.info("Shutdown: closing database connections...")
     engine.dispose()
+    bind_loop(None)
+    await telegram_client.aclose()
     _logger.info("Shutdown: done.")
 
 
@@ -147,9 +160,16 @@ async def telegram_webhook(request: Request, background_tasks: BackgroundTasks):
         loop.call_soon_threadsafe(background_tasks.add_task, coro)
 
     try:
-        await loop.run_in_executor(None, process_telegram_update, data, _thread_safe_add_task)
+        # Updates that need no DB or blocking work are answered on the event loop.
+        reply = await process_telegram_update_async(data)
+        if reply is None:
+            reply = await loop.run_in_executor(None, handle_webhook_update, data, _thread_safe_add_task)
     except Exception as e:
         logging.warning(_sanitize(f"Webhook processing error: {e}"))
+        reply = None
+    if reply:
+        # Webhook reply: Telegram performs this call itself, saving a round trip.
+        return JSONResponse(reply)
     return {"ok": True}
 
 # CORS config - allow all origins for now, restrict in production if needed
@@ -193,11 +213,16 @@ def set_webhook():
         _http.get(f"{TELEGRAM_API_URL}/deleteWebhook")
         _logger.info("Webhook cleared (polling mode)")
 
+_polling_dispatcher: Optional[UpdateDispatcher] = None
+
+
 def start_polling(shutdown: Event):
+    global _polling_dispatcher
     offset = 0
     backoff = 1
     max_backoff = 30
-    _logger.info("Polling started (local mode - no webhook required)")
+    dispatcher = _polling_dispatcher = UpdateDispatcher(process_telegram_update).start()
+    _logger.info("Polling started (local mode - no webhook required), %d update workers", POLLING_WORKERS)
     while not shutdown.is_set():
         try:
             resp = _http.get(
@@ -207,13 +232,11 @@ def start_polling(shutdown: Event):
             )
             if resp.ok:
                 backoff = 1
+                # The next getUpdates call acknowledges this batch, so the
+                # offset only moves past updates that are already queued.
                 for update in resp.json().get("result", []):
-                    try:
-                        process_telegram_update(update)
-                    except Exception as e:
-                        logging.warning(_sanitize(f"Error processing update {update.get('update_id')}: {e}"))
-                    finally:
-                        offset = update["update_id"] + 1
+                    dispatcher.submit(update)
+                    offset = update["update_id"] + 1
         except requests.exceptions.Timeout:
             backoff = 1
             pass
@@ -221,6 +244,7 @@ def start_polling(shutdown: Event):
             logging.warning(_sanitize(f"Polling error: {e}"))
             time.sleep(backoff)
             backoff = min(backoff * 2, max_backoff)
+    dispatcher.stop()
 
 @app.get("/", tags=["Health"], summary="Root welcome message", response_model=RootOut)
 async def root():
@@ -240,12 +264,11 @@ async def ping():
         checks["db"] = f"error: {e}"
         logging.warning("Healthcheck DB failure: %s", e)
     try:
-        tg = _http.get(f"{TELEGRAM_API_URL}/getMe", timeout=5)
-        if tg.ok:
-            checks["telegram"] = "ok"
-        else:
-            checks["telegram"] = f"error: {tg.status_code}"
-            logging.warning("Healthcheck Telegram failure: %s", tg.status_code)
+        await telegram_client.get_me(attempts=1)
+        checks["telegram"] = "ok"
+    except TelegramAPIError as e:
+        checks["telegram"] = f"error: {e.error_code}"
+        logging.warning("Healthcheck Telegram failure: %s", e.error_code)
     except Exception as e:
         checks["telegram"] = f"error: {e}"
         logging.warning("Healthcheck Telegram error: %s", e)
@@ -255,52 +278,97 @@ async def ping():
         raise HTTPException(status_code=503, detail=checks)
     return checks
 
+@app.get("/polling/metrics", tags=["Telegram"], summary="Long-polling dispatcher queue metrics")
+async def polling_metrics():
+    """Queue depth and throughput of the update workers (empty when the bot runs on a webhook)."""
+    if _polling_dispatcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **_polling_dispatcher.stats()}
+
+@app.get("/config-cache/metrics", tags=["Management"], summary="Configuration cache and change feed counters")
+async def config_cache_metrics():
+    """Hits, misses and invalidations of the schedule/channel/admin lookup cache, and the change listener state."""
+    from app.config_cache import config_cache
+    return {**config_cache.stats(), "change_feed": feed_status()}
+
+@app.get("/scheduler/metrics", tags=["Management"], summary="Scheduled job lateness and run counts")
+async def scheduler_metrics():
+    """Per-job runs, failures and start lateness, plus the upcoming timetable of this worker's scheduler."""
+    return scheduler_stats()
+
+@app.get("/telegram/route-metrics", tags=["Telegram"], summary="Bot command and callback route timings")
+async def route_metrics():
+    """Calls, average and worst handling time per bot route since startup."""
+    from app.telegram_handlers import commands, callbacks
+    return {"commands": commands.stats(), "callbacks": callbacks.stats()}
+
 @app.head("/ping", tags=["Health"], summary="Health check (HEAD)", include_in_schema=False)
 async def ping_head():
     return
 
 @app.get("/opportunities", tags=["Opportunities"], summary="List opportunities", response_model=SearchResultOut)
 async def get_opportunities(
-    skip: int = Query(0, ge=0, description="Number of records to skip"),
+    skip: int = Query(0, ge=0, description="Number of records to skip (ignored when a cursor is given)"),
     limit: int = Query(20, ge=1, le=100, description="Max records to return"),
     search: Optional[str] = Query(None, description="Search keyword in title/description/tags"),
     posted: Optional[str] = Query(None, description="Filter: 'true' for posted, 'false' for unposted, omit for all"),
+    cursor: Optional[str] = Query(None, description="next_cursor / prev_cursor from a previous page"),
+    with_total: bool = Query(True, description="Include the (cached) total count"),
+    match: str = Query("text", pattern="^(text|fuzzy)$", description="'text' for full-text search, 'fuzzy' for typo-tolerant matching with similarity scores"),
 ):
-    """Search and paginate opportunities."""
+    """Search and paginate opportunities.
+
+    Follow next_cursor / prev_cursor for constant-cost paging; skip is kept for
+    compatibility and gets slower on deep pages.
+    """
+    from fastapi import HTTPException
     posted_bool = {"true": True, "false": False}.get(posted.lower()) if posted else None
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, search_opportunities, search or "", skip, limit, posted_bool)
+    try:
+        return await loop.run_in_executor(
+            None, search_opportunities, search or "", skip, limit, posted_bool, cursor, with_total, match,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/opportunities/export", tags=["Opportunities"], summary="Export as CSV")
+@app.get("/opportunities/export", tags=["Opportunities"], summary="Export as CSV or NDJSON")
 async def export_opportunities(
     posted: Optional[str] = Query(None, description="Filter: 'true' for posted, 'false' for unposted, omit for all"),
     search: Optional[str] = Query(None, description="Search keyword"),
+    fmt: str = Query("csv", alias="format", pattern="^(csv|ndjson)$", description="Output format: 'csv' or 'ndjson'"),
+    gzip: bool = Query(False, description="Gzip-compress the download"),
 ):
-    """Export opportunities as a CSV file."""
+    """Stream opportunities as a CSV or NDJSON file.
+
+    Rows are read from a server-side cursor and written out in chunks, so memory
+    stays flat regardless of table size.
+    """
     from fastapi.responses import StreamingResponse
+    from app.export import EXPORT_FORMATS, encode_export, export_filename
     posted_bool = {"true": True, "false": False}.get(posted.lower()) if posted else None
-    def _fetch_all():
-        return search_opportunities(search or "", 0, 1000000, posted_bool)
-    loop = asyncio.get_running_loop()
-    data = await loop.run_in_executor(None, _fetch_all)
-    output = io.StringIO()
-    writer = csv.writer(output)
-    writer.writerow(["id", "title", "link", "description", "deadline", "tags", "created_at", "posted_to_telegram"])
-    for op in data["results"]:
-        writer.writerow([
-            op["id"], op["title"], op["link"], op.get("description", ""),
-            op.get("deadline", ""), ", ".join(op.get("tags", [])),
-            str(op.get("created_at", ""))[:10] if op.get("created_at") else "",
-            op.get("posted_to_telegram", False),
-        ])
-    output.seek(0)
-    return StreamingResponse(output, media_type="text/csv", headers={"Content-Disposition": "attachment; filename=opportunities.csv"})
+    rows = iter_opportunities_for_export(search or "", posted_bool)
+    media_type = "application/gzip" if gzip else EXPORT_FORMATS[fmt][0]
+    # A sync iterator: Starlette pulls each chunk in the threadpool, keeping DB reads off the event loop.
+    return StreamingResponse(
+        encode_export(rows, fmt, gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={export_filename(fmt, gzip)}"},
+    )
 
 @app.get("/opportunities/unposted", tags=["Opportunities"], summary="List unposted opportunities", response_model=list[OpportunityOut])
-async def get_unposted():
-    """Returns opportunities that have not yet been sent to Telegram."""
+async def get_unposted(
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000, description="Max records to return"),
+    offset: int = Query(0, ge=0, description="Number of records to skip"),
+):
+    """Returns a slice of the opportunities not yet sent to Telegram, oldest first.
+
+    The size of the whole backlog is returned in the X-Total-Count header.
+    """
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, get_unposted_opportunities)
+    total = await loop.run_in_executor(None, count_unposted)
+    response.headers["X-Total-Count"] = str(total)
+    return await loop.run_in_executor(None, get_unposted_opportunities, limit, offset)
 
 @app.get("/opportunities/posted", tags=["Opportunities"], summary="List posted opportunities", response_model=list[OpportunityOut])
 async def get_posted():
@@ -421,25 +489,30 @@ async def bulk_delete_opportunities(
 
 @app.post("/opportunities/{opportunity_id}/post", tags=["Opportunities"], summary="Mark as posted and post to Telegram", dependencies=[Depends(verify_api_key)])
 async def post_opportunity(opportunity_id: int):
-    """Mark an opportunity as posted and send it to Telegram."""
-    from app.telegram_bot import post_to_telegram
+    """Send an unposted opportunity to every channel through the deliveries outbox."""
+    from app.database import claim_unposted, release_claims
+    from app.telegram_bot import post_claimed
     def _post():
-        opp = get_opportunity_by_id(opportunity_id)
-        if not opp:
-            return None
-        ok = post_to_telegram(opp)
-        if ok:
-            from app.database import update_posted_status
-            update_posted_status(opportunity_id)
-        return ok
+        if not get_opportunity_by_id(opportunity_id):
+            return 404
+        # The claim keeps a post cycle from sending the same row at the same time.
+        claimed = claim_unposted(1, opportunity_ids=[opportunity_id])
+        if not claimed:
+            return 409
+        if post_claimed(claimed, workers=1):
+            return 200
+        release_claims([opportunity_id])
+        return 502
     loop = asyncio.get_running_loop()
-    ok = await loop.run_in_executor(None, _post)
-    if ok is None:
-        from fastapi import HTTPException
-        raise HTTPException(status_code=404, detail="Opportunity not found")
-    if not ok:
+    status = await loop.run_in_executor(None, _post)
+    if status != 200:
         from fastapi import HTTPException
-        raise HTTPException(status_code=502, detail="Failed to post to Telegram")
+        detail = {
+            404: "Opportunity not found",
+            409: "Opportunity is already posted or being posted",
+            502: "Failed to post to Telegram",
+        }[status]
+        raise HTTPException(status_code=status, detail=detail)
     return {"ok": True, "message": "Posted to Telegram"}
 
 @app.post("/opportunities/{opportunity_id}/unpost", tags=["Opportunities"], summary="Mark as unposted", dependencies=[Depends(verify_api_key)])
@@ -517,3 +590,18 @@ async def trigger_scrape(date: Optional[str] = Query(None, description="Date in
     loop = asyncio.get_running_loop()
     result = await loop.run_in_executor(None, _scrape)
     return result
+
+@app.post("/backfill", tags=["Management"], summary="Backfill a date range", dependencies=[Depends(verify_api_key)])
+async def trigger_backfill(
+    start: str = Query(..., description="First date in YYYY-MM-DD format"),
+    end: str = Query(..., description="Last date in YYYY-MM-DD format (inclusive)"),
+    include_weekends: bool = Query(False, description="Also scrape Saturdays and Sundays"),
+):
+    """Scrape every date in the range concurrently and save new opportunities in one batch."""
+    try:
+        dates = backfill_dates(start, end, include_weekends)
+    except ValueError as e:
+        from fastapi import HTTPException
+        raise HTTPException(status_code=400, detail=str(e))
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, backfill_opportunities, dates)
@@ -1,5 +1,11 @@
+import os
 import time
+import logging
 import threading
+from collections import OrderedDict
+from typing import Optional
+
+_logger = logging.getLogger(__name__)
 
 
 class TokenBucket:
@@ -25,35 +31,208 @@ class TokenBucket:
             return wait
 
 
-# Telegram allows ~20 messages per minute to a single chat
-telegram_limiter = TokenBucket(rate=20.0 / 60.0, capacity=5)
+class MemoryBuckets:
+    """Keyed token buckets in process memory: each worker process enforces its own limits."""
+
+    def __init__(self):
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, capacity: int, tokens: int = 1) -> float:
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(rate, capacity)
+        return bucket.consume(tokens)
+
+
+class DatabaseBuckets:
+    """Keyed token buckets in the rate_limit_buckets table, shared by every worker and replica.
+
+    Each check is one atomic upsert. If the database cannot be reached the
+    check falls back to process-local buckets instead of failing the caller.
+    Idle rows are purged every PURGE_INTERVAL seconds.
+    """
+
+    PURGE_INTERVAL = 600
+
+    def __init__(self, idle_ttl: float = 3600):
+        self.idle_ttl = idle_ttl
+        self._fallback = MemoryBuckets()
+        self._next_purge = time.monotonic() + self.PURGE_INTERVAL
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, capacity: int, tokens: int = 1) -> float:
+        from app.database import consume_rate_limit
+        try:
+            wait = consume_rate_limit(key, rate, capacity, tokens)
+        except Exception:
+            _logger.warning("Shared rate limit unavailable for %s, using local buckets", key, exc_info=True)
+            return self._fallback.consume(key, rate, capacity, tokens)
+        self._maybe_purge()
+        return wait
+
+    def _maybe_purge(self):
+        with self._lock:
+            if time.monotonic() < self._next_purge:
+                return
+            self._next_purge = time.monotonic() + self.PURGE_INTERVAL
+        from app.database import purge_rate_limits
+        try:
+            purge_rate_limits(self.idle_ttl)
+        except Exception:
+            _logger.warning("Failed to purge idle rate limit buckets", exc_info=True)
+
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").lower()
+
+
+def make_buckets(backend: str = RATE_LIMIT_BACKEND):
+    """Bucket store for the given backend name: "memory" (default) or "database"."""
+    if backend == "database":
+        return DatabaseBuckets()
+    if backend != "memory":
+        _logger.warning("Unknown RATE_LIMIT_BACKEND %r, using memory", backend)
+    return MemoryBuckets()
+
+
+class TelegramLimiter:
+    """Bot API send limits: a global bucket shared by every chat plus one bucket per chat.
+
+    Telegram allows ~30 messages/s overall, 20/min to a group or channel and
+    about 1/s to a private chat. A 429's retry_after blocks the chat (or every
+    chat, when no chat is given) until it has passed. acquire() blocks the
+    calling thread, so sends to different chats only contend on the global
+    bucket and throughput grows with the number of chats.
+    """
+
+    GLOBAL_RATE = 30.0
+    GROUP_RATE = 20.0 / 60.0
+    PRIVATE_RATE = 1.0
+
+    def __init__(self, global_rate: float = GLOBAL_RATE, global_capacity: int = 30,
+                 group_rate: float = GROUP_RATE, group_capacity: int = 3,
+                 private_rate: float = PRIVATE_RATE, private_capacity: int = 1,
+                 buckets=None):
+        self._buckets = buckets or MemoryBuckets()
+        self._global = (global_rate, global_capacity)
+        self._group = (group_rate, group_capacity)
+        self._private = (private_rate, private_capacity)
+        self._blocked: dict[Optional[str], float] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_group(chat_id: str) -> bool:
+        # Channels and groups have negative ids (or are addressed by @username).
+        return chat_id.startswith("-") or chat_id.startswith("@")
+
+    def _blocked_for(self, chat_id: str) -> float:
+        now = time.monotonic()
+        with self._lock:
+            until = max(self._blocked.get(None, 0.0), self._blocked.get(chat_id, 0.0))
+        return max(0.0, until - now)
+
+    def reserve(self, chat_id) -> float:
+        """Take chat_id's slot for one message and return how long to wait until it frees up."""
+        chat_id = str(chat_id)
+        rate, capacity = self._group if self._is_group(chat_id) else self._private
+        return max(self._blocked_for(chat_id), self._buckets.consume(f"tg:{chat_id}", rate, capacity))
+
+    def reserve_global(self) -> float:
+        """Take a slot from the bucket shared by every chat and return how long to wait for it."""
+        return self._buckets.consume("tg:*", *self._global)
+
+    def acquire(self, chat_id) -> None:
+        """Block until one message may go to chat_id.
+
+        The global slot is only taken once the chat's slot has freed up. Taking
+        it up front would let a message held back by its chat spend global
+        capacity early and then go out together with later messages, above
+        the global rate.
+        """
+        wait = self.reserve(chat_id)
+        if wait > 0:
+            time.sleep(wait)
+        wait = self.reserve_global()
+        if wait > 0:
+            time.sleep(wait)
+
+    def penalize(self, retry_after: float, chat_id=None) -> None:
+        """Honour a 429: nothing more goes to chat_id (or anywhere, if None) for retry_after seconds."""
+        key = None if chat_id is None else str(chat_id)
+        until = time.monotonic() + retry_after
+        with self._lock:
+            self._blocked[key] = max(self._blocked.get(key, 0.0), until)
+
+
+telegram_limiter = TelegramLimiter(buckets=make_buckets())
 
 
 class PerIPLimiter:
-    """Per-IP rate limiter using token buckets with TTL cleanup."""
+    """Per-IP rate limiter using token buckets, evicted least-recently-seen first.
+
+    IPs are spread over independently locked shards. Each shard keeps its
+    buckets in an OrderedDict in last-seen order, so a call only touches
+    the key it consumes plus at most EVICT_BATCH expired entries at the cold
+    end. The work per call stays constant however many IPs have been seen.
+    max_keys bounds memory: past it the least recently seen IP is dropped,
+    and it starts again with a full bucket if it comes back.
+    """
+
+    EVICT_BATCH = 8
 
-    def __init__(self, rate: float, capacity: int, ttl: float = 3600):
+    def __init__(self, rate: float, capacity: int, ttl: float = 3600,
+                 max_keys: int = 100_000, shards: int = 16):
         self.rate = rate
         self.capacity = capacity
         self.ttl = ttl
-        self._buckets: dict[str, tuple[TokenBucket, float]] = {}
-        self._lock = threading.Lock()
+        self._shard_cap = max(1, max_keys // shards)
+        self._shards = [(OrderedDict(), threading.Lock()) for _ in range(shards)]
 
-    def _evict_expired(self):
-        now = time.monotonic()
-        expired = [ip for ip, (_, ts) in self._buckets.items() if now - ts > self.ttl]
-        for ip in expired:
-            del self._buckets[ip]
+    def __contains__(self, ip: str) -> bool:
+        buckets, lock = self._shards[hash(ip) % len(self._shards)]
+        with lock:
+            return ip in buckets
+
+    def __len__(self) -> int:
+        return sum(len(buckets) for buckets, _ in self._shards)
 
     def consume(self, ip: str, tokens: int = 1) -> float:
-        with self._lock:
-            self._evict_expired()
-            if ip not in self._buckets:
-                self._buckets[ip] = (TokenBucket(self.rate, self.capacity), time.monotonic())
-            bucket, _ = self._buckets[ip]
-            wait = bucket.consume(tokens)
-            self._buckets[ip] = (bucket, time.monotonic())
-            return wait
+        buckets, lock = self._shards[hash(ip) % len(self._shards)]
+        now = time.monotonic()
+        with lock:
+            for _ in range(self.EVICT_BATCH):
+                if not buckets:
+                    break
+                _, seen = next(iter(buckets.values()))
+                if now - seen <= self.ttl:
+                    break
+                buckets.popitem(last=False)
+            entry = buckets.pop(ip, None)
+            if entry is None:
+                if len(buckets) >= self._shard_cap:
+                    buckets.popitem(last=False)
+                bucket = TokenBucket(self.rate, self.capacity)
+            else:
+                bucket = entry[0]
+            buckets[ip] = (bucket, now)
+        return bucket.consume(tokens)
+
+
+class KeyedLimiter:
+    """Per-key limiter over a bucket store, with the same consume() call as PerIPLimiter."""
+
+    def __init__(self, rate: float, capacity: int, buckets, prefix: str = ""):
+        self.rate = rate
+        self.capacity = capacity
+        self.prefix = prefix
+        self._buckets = buckets
+
+    def consume(self, key: str, tokens: int = 1) -> float:
+        return self._buckets.consume(self.prefix + key, self.rate, self.capacity, tokens)
 
 
-api_limiter = PerIPLimiter(rate=10.0 / 60.0, capacity=5)
+if RATE_LIMIT_BACKEND == "database":
+    api_limiter = KeyedLimiter(rate=10.0 / 60.0, capacity=5, buckets=DatabaseBuckets(), prefix="api:")
+else:
+    api_limiter = PerIPLimiter(rate=10.0 / 60.0, capacity=5)
@@ -1,16 +1,16 @@
 import math
-import schedule
-import time
 import logging
 import threading
 from datetime import datetime, timedelta
 from threading import Lock
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import sentry_sdk
-from app.scraper import fetch_opportunities_by_date_safe
-from app.database import delete_old_entries, get_schedule_times, get_unposted_opportunities
-from app.telegram_bot import post_to_all_channels
-from app.rate_limiter import telegram_limiter
+from app.scraper import fetch_opportunities_by_date_safe, backfill_opportunities
+from app.database import (
+    delete_old_entries, get_schedule_times, count_unposted, claim_unposted, release_claims,
+)
+from app.telegram_bot import post_claimed, drain_due_deliveries
+from app.change_feed import subscribe
+from app.job_timer import DailyJob, JobTimer
 
 logger = logging.getLogger(__name__)
 
@@ -21,6 +21,9 @@ _catch_up_scrape_done_today: str = ""
 _telegram_failures: int = 0
 _telegram_failures_lock = Lock()
 _TELEGRAM_CIRCUIT_BREAKER_MAX = 5
+# A scrape and a post can overlap; two scrapes (or two posts) never do.
+JOB_LIMITS = {"scrape": 1, "post": 1}
+_timer = JobTimer(JOB_LIMITS)
 
 def _today_str() -> str:
     return datetime.now().strftime("%Y-%m-%d")
@@ -39,17 +42,20 @@ def reload_schedules():
             changed = True
         if not changed:
             return
-        schedule.clear()
-        now = datetime.now().strftime("%H:%M")
-        for t in scrape_times:
-            if t >= now:
-                schedule.every().day.at(t).do(run_scrape)
-        for t in post_times:
-            if t >= now:
-                schedule.every().day.at(t).do(run_post)
+        _timer.replace(
+            [DailyJob(f"scrape@{t}", "scrape", t, run_scrape) for t in scrape_times]
+            + [DailyJob(f"post@{t}", "post", t, run_post) for t in post_times]
+        )
         logger.info("Search times: %s", scrape_times)
         logger.info("Post times: %s", post_times)
 
+def _on_schedule_changed(topic: str) -> None:
+    if _timer.active:
+        reload_schedules()
+
+
+subscribe("schedule_times", _on_schedule_changed)
+
 def run_scrape():
     today = datetime.now()
     if today.weekday() >= 5:
@@ -85,23 +91,23 @@ def _catch_up_scrapes():
     if passed <= 0:
         _catch_up_scrape_done_today = today
         return
-    weekday_count = 0
+    days = []
     max_iter = 10
     target = min(passed, 5)
     for i in range(max_iter):
-        if weekday_count >= target:
+        if len(days) >= target:
             break
         day_dt = datetime.now() - timedelta(days=i + 1)
         if day_dt.weekday() >= 5:
             logger.info("Catch-up skipping weekend %s (no articles expected)", day_dt.strftime("%Y/%m/%d"))
             continue
-        weekday_count += 1
-        day = day_dt.strftime("%Y/%m/%d")
-        logger.info("Catch-up search for %s (%d/%d weekday(s))", day, weekday_count, target)
-        try:
-            fetch_opportunities_by_date_safe(day)
-        except Exception:
-            logger.exception(f"Catch-up search failed for {day}")
+        days.append(day_dt.strftime("%Y/%m/%d"))
+    logger.info("Catch-up search for %d weekday(s): %s", len(days), ", ".join(days))
+    try:
+        backfill_opportunities(days)
+    except Exception as e:
+        logger.exception("Catch-up search failed for %s", days)
+        sentry_sdk.capture_exception(e)
     _catch_up_scrape_done_today = today
 
 
@@ -111,19 +117,16 @@ def _remaining_post_slots_today() -> int:
     return sum(1 for t in sorted(post_times) if t >= now)
 
 def _post_batch(batch: list) -> int:
-    """Post a batch of opportunities to all channels in parallel with rate limiting."""
-    sent = 0
-    with ThreadPoolExecutor(max_workers=3) as pool:
-        futures = {}
-        for opp in batch:
-            wait = telegram_limiter.consume()
-            if wait > 0:
-                time.sleep(wait)
-            futures[pool.submit(post_to_all_channels, opp)] = opp
-        for future in as_completed(futures):
-            if future.result():
-                sent += 1
-    return sent
+    """Queue a batch for every channel and drain the deliveries outbox with the worker pool.
+
+    Returns how many opportunities reached at least one channel; rows that
+    reached none get their claim released for the next cycle.
+    """
+    if not batch:
+        return 0
+    sent = post_claimed(batch, drain_all=True)
+    release_claims([opp["id"] for opp in batch if opp["id"] not in sent])
+    return len(sent)
 
 def run_post():
     global _telegram_failures
@@ -138,20 +141,25 @@ def run_post():
             return
     logger.info("Running post...")
     try:
-        unposted = get_unposted_opportunities()
+        backlog = count_unposted()
         total = len(get_schedule_times("post"))
         remaining = _remaining_post_slots_today()
-        if not unposted:
+        if not backlog:
             logger.info("No unposted opportunities.")
+            drain_due_deliveries()
             return
         if total <= 0:
             logger.info("No post times configured.")
             return
         if remaining <= 0:
             remaining = total
-        batch_size = math.ceil(len(unposted) / remaining)
-        batch = unposted[:batch_size]
-        logger.info("Posting %d/%d opportunities (%d per %d remaining slot(s))", len(batch), len(unposted), batch_size, remaining)
+        batch_size = math.ceil(backlog / remaining)
+        batch = claim_unposted(batch_size)
+        if not batch:
+            logger.info("Unposted opportunities are all claimed by another post cycle.")
+            drain_due_deliveries()
+            return
+        logger.info("Posting %d/%d opportunities (%d per %d remaining slot(s))", len(batch), backlog, batch_size, remaining)
         sent = _post_batch(batch)
         with _telegram_failures_lock:
             if sent == 0 and batch:
@@ -166,20 +174,18 @@ def run_post():
         with _telegram_failures_lock:
             _telegram_failures += 1
 
+def _startup_jobs():
+    _catch_up_scrapes()
+    _timer.run_now("post@startup", "post", run_post)
+
 def start_scheduler(shutdown: threading.Event | None = None):
+    """Run the scrape/post timetable until shutdown (or stop_scheduler()) is signalled."""
     reload_schedules()
-    _catch_up_scrapes()
-    run_post()
-    check_counter = 0
-    while not (shutdown and shutdown.is_set()):
-        try:
-            schedule.run_pending()
-            check_counter += 1
-            if check_counter >= 10:
-                reload_schedules()
-                check_counter = 0
-            time.sleep(30)
-        except Exception as e:
-            logger.error(f"Scheduler loop error: {e}", exc_info=True)
-            sentry_sdk.capture_exception(e)
-            time.sleep(60)
+    _timer.run_now("catch-up", "scrape", _startup_jobs)
+    _timer.run(shutdown)
+
+def stop_scheduler():
+    _timer.stop()
+
+def scheduler_stats() -> dict:
+    return _timer.stats()
@@ -14,6 +14,9 @@ class OpportunityOut(BaseModel):
     created_at: Optional[datetime] = None
     posted_to_telegram: Optional[bool] = None
 
+class SearchHitOut(OpportunityOut):
+    score: Optional[float] = None  # similarity in [0, 1], only for match=fuzzy
+
 class OpportunityCreate(BaseModel):
     title: str
     link: str
@@ -33,10 +36,12 @@ class OpportunityUpdate(BaseModel):
     posted_to_telegram: Optional[bool] = None
 
 class SearchResultOut(BaseModel):
-    results: list[OpportunityOut]
-    total: int
-    offset: int
+    results: list[SearchHitOut]
+    total: Optional[int] = None
+    offset: Optional[int] = None
     limit: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
 
 class StatsOut(BaseModel):
     total: int
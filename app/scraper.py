@@ -1,16 +1,21 @@
+import os
+import asyncio
 import logging
 import requests
+import httpx
 from bs4 import BeautifulSoup
 import re
 import time
 import random
 from datetime import datetime, timedelta
+from urllib.parse import urlsplit
 import sys
 import sentry_sdk
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from app.database import opportunities_exist, bulk_save_opportunities
-from app.http_client import make_session, sanitize as _sanitize
+from app.database import bulk_insert_opportunities, known_article_urls, index_scraped_articles
+from app.http_client import sanitize as _sanitize
+from app.http_cache import HttpCache, scrape_cache
+from app.detail_parser import parse_detail_page
 
 _logger = logging.getLogger(__name__)
 
@@ -38,11 +43,31 @@ def random_headers():
         "Connection": "keep-alive"
     }
 
+def _cached_requests_response(url, entry):
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = "utf-8"
+    response._content = entry["body"]
+    return response
+
+def _cached_httpx_response(url, entry):
+    return httpx.Response(200, content=entry["body"], request=httpx.Request("GET", url))
+
 def safe_get(session, url, max_retries=5):
+    entry = scrape_cache.lookup(url) if scrape_cache else None
+    if entry and entry["fresh"]:
+        return _cached_requests_response(url, entry)
+    validators = HttpCache.conditional_headers(entry)
     for i in range(max_retries):
         try:
-            response = session.get(url, headers=random_headers(), timeout=30)
+            response = session.get(url, headers={**random_headers(), **validators}, timeout=30)
+            if response.status_code == 304 and entry:
+                scrape_cache.revalidated(url, response.headers)
+                return _cached_requests_response(url, entry)
             if response.status_code < 500:
+                if response.status_code == 200 and scrape_cache:
+                    scrape_cache.store(url, response.headers, response.content)
                 return response
             response.raise_for_status()
             return response
@@ -51,61 +76,105 @@ def safe_get(session, url, max_retries=5):
             time.sleep((2 ** i) + random.uniform(2, 4))
     return None
 
+# Max in-flight requests per host; all detail pages live on one host.
+MAX_CONCURRENCY_PER_HOST = int(os.getenv("SCRAPER_CONCURRENCY_PER_HOST", "4"))
+# Max in-flight requests across all hosts and dates during a backfill.
+MAX_GLOBAL_CONCURRENCY = int(os.getenv("SCRAPER_GLOBAL_CONCURRENCY", "8"))
+
+
+class _Slot:
+    """Async context manager taking a per-host slot, then a slot from the global budget (if any)."""
+
+    def __init__(self, host: asyncio.Semaphore, budget: asyncio.Semaphore | None):
+        self.host = host
+        self.budget = budget
+
+    async def __aenter__(self):
+        await self.host.acquire()
+        if self.budget is not None:
+            try:
+                await self.budget.acquire()
+            except BaseException:
+                self.host.release()
+                raise
+
+    async def __aexit__(self, *exc):
+        if self.budget is not None:
+            self.budget.release()
+        self.host.release()
+
+
+class HostClients:
+    """One pooled keep-alive AsyncClient per host, each capped at `per_host` in-flight requests.
+
+    `total` optionally caps in-flight requests across every host, so many
+    dates can share one budget during a backfill.
+    """
+
+    def __init__(self, per_host: int = MAX_CONCURRENCY_PER_HOST, total: int | None = None):
+        self.per_host = per_host
+        self._budget = asyncio.Semaphore(total) if total else None
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._slots: dict[str, _Slot] = {}
+
+    def get(self, url: str) -> tuple[httpx.AsyncClient, _Slot]:
+        host = urlsplit(url).netloc
+        if host not in self._clients:
+            self._clients[host] = httpx.AsyncClient(
+                timeout=30,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=self.per_host, max_keepalive_connections=self.per_host),
+                transport=httpx.AsyncHTTPTransport(retries=2),
+            )
+            self._slots[host] = _Slot(asyncio.Semaphore(self.per_host), self._budget)
+        return self._clients[host], self._slots[host]
+
+    async def aclose(self):
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients.clear()
+        self._slots.clear()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+async def async_safe_get(clients: HostClients, url, max_retries=5):
+    """Async counterpart of safe_get: retries transport errors and 5xx, returns None on exhaustion.
+
+    Cache reads and writes are blocking SQLite calls, so they run in a thread.
+    """
+    entry = await asyncio.to_thread(scrape_cache.lookup, url) if scrape_cache else None
+    if entry and entry["fresh"]:
+        return _cached_httpx_response(url, entry)
+    validators = HttpCache.conditional_headers(entry)
+    client, slots = clients.get(url)
+    for i in range(max_retries):
+        try:
+            async with slots:
+                response = await client.get(url, headers={**random_headers(), **validators})
+            if response.status_code == 304 and entry:
+                await asyncio.to_thread(scrape_cache.revalidated, url, response.headers)
+                return _cached_httpx_response(url, entry)
+            if response.status_code < 500:
+                if response.status_code == 200 and scrape_cache:
+                    await asyncio.to_thread(scrape_cache.store, url, response.headers, response.content)
+                return response
+            response.raise_for_status()
+            return response
+        except httpx.HTTPError as e:
+            _logger.warning("Attempt %d failed for %s: %s", i + 1, url, e)
+            await asyncio.sleep((2 ** i) + random.uniform(2, 4))
+    return None
+
 def extract_detail_info(session, detail_url):
     response = safe_get(session, detail_url)
     if not response:
         return None, None, None, None, []
-
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    more_info_link = None
-    deadline = None
-    thumbnail_url = None
-    description = None
-    tags = []
-
-    for p in soup.find_all("p"):
-        text = p.get_text(strip=True).lower()
-        if "for more information" in text or "apply here" in text or "apply now" in text:
-            a_tag = p.find("a", href=True)
-            if a_tag:
-                more_info_link = a_tag['href']
-
-        strong_tag = p.find("strong")
-        if strong_tag and "deadline:" in strong_tag.get_text(strip=True).lower():
-            match = re.search(r"deadline:\s*(.*)", p.get_text(strip=True), re.IGNORECASE)
-            if match:
-                deadline = match.group(1).strip()
-
-    figure = soup.find("figure", class_="image-link")
-    if figure:
-        img = figure.find("img")
-        if img and img.has_attr("src"):
-            thumbnail_url = img['src']
-
-    content_div = soup.find("div", class_="entry-content")
-    if content_div:
-        paragraphs = content_div.find_all("p", recursive=False)
-        if paragraphs:
-            desc_paragraphs = []
-            for p in paragraphs:
-                text = p.get_text(strip=True)
-                if re.match(r"deadline\s*:", text, re.IGNORECASE):
-                    continue
-                desc_paragraphs.append(text)
-                if len(desc_paragraphs) == 2:
-                    break
-            if desc_paragraphs:
-                description = " ".join(desc_paragraphs)
-
-    categories = soup.find_all("a", rel="category tag")
-    if categories:
-        tags = [cat.get_text(strip=True) for cat in categories]
-
-    if not more_info_link:
-        more_info_link = detail_url
-
-    return more_info_link, deadline, thumbnail_url, description, tags
+    return parse_detail_page(response.text, detail_url)
 
 def clean_deadline(deadline_str):
     if not deadline_str:
@@ -122,21 +191,15 @@ def clean_deadline(deadline_str):
             return match.group(1)
     return deadline_str
 
-def _fetch_article(article):
-    """Process a single article: fetch detail, clean, return opportunity dict or None."""
+def _article_target(article):
+    """Return (title, detail_url) for a listing-page <article>, or None."""
     title_link = article.find("a", string=True, href=True)
     if not title_link:
         return None
-    title = title_link.get_text(strip=True)
-    detail_url = title_link['href']
-    session = make_session()
-    try:
-        link, deadline, thumbnail, description, tags = extract_detail_info(session, detail_url)
-    except Exception:
-        _logger.warning("Failed to fetch detail for: %s", title)
-        return None
-    finally:
-        session.close()
+    return title_link.get_text(strip=True), title_link['href']
+
+def _build_opportunity(title, detail_url, info):
+    link, deadline, thumbnail, description, tags = info
     link = clean_url(link)
     if not link:
         return None
@@ -152,12 +215,38 @@ def _fetch_article(article):
         "thumbnail": thumbnail,
         "description": description,
         "tags": tags,
+        "source_url": detail_url,
     }
 
-MAX_DETAIL_WORKERS = 3
+async def _fetch_article(clients, article, dead_ends=None):
+    """Process a single article: fetch detail, clean, return opportunity dict or None.
 
-def fetch_opportunities_by_date(target_date=None):
-    """Fetch and save opportunities for given date (default: yesterday)"""
+    Detail pages that parse fine but have no external link are appended to
+    `dead_ends` (when given) so they can be indexed and skipped next time.
+    Any status other than 200 (403, 404, 429...) is a failed fetch: nothing
+    is parsed or indexed, so the article is tried again on the next scrape.
+    """
+    target = _article_target(article)
+    if not target:
+        return None
+    title, detail_url = target
+    try:
+        response = await async_safe_get(clients, detail_url)
+        if not response:
+            return None
+        if response.status_code != 200:
+            _logger.warning("Detail page %s answered %s; will retry next scrape", detail_url, response.status_code)
+            return None
+        info = parse_detail_page(response.text, detail_url)
+    except Exception:
+        _logger.warning("Failed to fetch detail for: %s", title)
+        return None
+    opp = _build_opportunity(title, detail_url, info)
+    if opp is None and dead_ends is not None:
+        dead_ends.append(detail_url)
+    return opp
+
+def _resolve_target_date(target_date=None):
     if not target_date:
         target_date = (datetime.now() - timedelta(days=1)).strftime("%Y/%m/%d")
 
@@ -168,48 +257,158 @@ def fetch_opportunities_by_date(target_date=None):
             _logger.info("Target date %s is a weekend — few or no articles expected", target_date)
     except ValueError:
         pass
+    return target_date
 
+async def collect_candidates(clients, target_date):
+    """Fetch the listing page for target_date and its unknown detail pages concurrently.
+
+    Returns (candidates, dead_ends): opportunity dicts with external links, and
+    detail URLs that resolved to no external link.
+    """
     url = f"{BASE_URL}/{target_date}/"
     _logger.info("Fetching %s", url)
 
-    page_response = safe_get(make_session(), url)
+    page_response = await async_safe_get(clients, url)
     if not page_response:
         _logger.warning("Could not fetch %s", url)
-        return []
+        return [], []
 
     soup = BeautifulSoup(page_response.text, "html.parser")
     articles = soup.select("article")
     _logger.info("Found %d articles on %s.", len(articles), target_date)
 
     if not articles:
-        return []
-
-    # Phase 1: fetch all detail pages in parallel
-    candidates = []
-    with ThreadPoolExecutor(max_workers=MAX_DETAIL_WORKERS) as pool:
-        futures = {pool.submit(_fetch_article, a): a for a in articles}
-        for future in as_completed(futures):
-            opp = future.result()
-            if opp:
-                candidates.append(opp)
-
+        return [], []
+
+    # Skip articles already indexed from a previous scrape, straight from the listing
+    targets = [(a, _article_target(a)) for a in articles]
+    known = await asyncio.to_thread(known_article_urls, [t[1] for _, t in targets if t])
+    if known:
+        articles = [a for a, t in targets if not t or t[1] not in known]
+        _logger.info("Skipping %d already-indexed article(s) on %s", len(known), target_date)
+        if not articles:
+            return [], []
+
+    # Phase 1: fetch remaining detail pages concurrently (bounded per host)
+    dead_ends = []
+    results = await asyncio.gather(*(_fetch_article(clients, a, dead_ends) for a in articles))
+    return [opp for opp in results if opp], dead_ends
+
+def save_candidates(candidates, target_date, dead_ends=()):
+    """Phase 2: persist candidates (existing links are skipped) and index their source URLs.
+
+    Returns the saved dicts.
+    """
+    saved = _save_new(candidates, target_date)
+    _index_candidates(candidates, dead_ends)
+    return saved
+
+def _index_candidates(candidates, dead_ends):
+    entries = [{"source_url": c.get("source_url"), "link": c["link"]} for c in candidates]
+    entries += [{"source_url": u, "link": None} for u in dead_ends]
+    if entries:
+        index_scraped_articles(entries)
+
+def _save_new(candidates, target_date):
     if not candidates:
         _logger.info("No candidates with external links for %s", target_date)
         return []
 
-    # Phase 2: batch-check existence
-    all_links = [c["link"] for c in candidates]
-    existing_links = opportunities_exist(all_links)
-    batch = [c for c in candidates if c["link"] not in existing_links]
+    # Links that already exist (or race in from a concurrent scrape) come back as
+    # "duplicate" outcomes instead of failing the batch.
+    outcomes = bulk_insert_opportunities(candidates, scraped_date=target_date)
+    saved = [c for c, o in zip(candidates, outcomes) if o["status"] == "inserted"]
+    statuses = [o["status"] for o in outcomes]
+    if saved:
+        _logger.info("Saved %d/%d opportunities (skipped %d existing)",
+                     len(saved), len(candidates), statuses.count("duplicate"))
+    elif "error" not in statuses:
+        _logger.info("All %d candidates already exist for %s", len(candidates), target_date)
+    if "error" in statuses:
+        _logger.warning("Failed to save %d candidate(s) for %s", statuses.count("error"), target_date)
+    return saved
+
+async def fetch_opportunities_by_date_async(target_date=None):
+    """Async engine behind fetch_opportunities_by_date."""
+    target_date = _resolve_target_date(target_date)
+    async with HostClients() as clients:
+        candidates, dead_ends = await collect_candidates(clients, target_date)
+    return save_candidates(candidates, target_date, dead_ends)
 
-    if batch:
-        saved = bulk_save_opportunities(batch, scraped_date=target_date)
-        _logger.info("Saved %d/%d opportunities (skipped %d existing)", saved, len(batch), len(candidates) - len(batch))
-        if saved == len(batch):
-            return batch
-        return []
-    _logger.info("All %d candidates already exist for %s", len(candidates), target_date)
-    return []
+def fetch_opportunities_by_date(target_date=None):
+    """Fetch and save opportunities for given date (default: yesterday).
+
+    Runs the async engine on a private event loop, so it must be called from
+    a thread without a running loop (scheduler, executor, bot worker threads).
+    """
+    return asyncio.run(fetch_opportunities_by_date_async(target_date))
+
+MAX_BACKFILL_DAYS = 92
+
+def backfill_dates(start_date, end_date, include_weekends=False):
+    """Return YYYY/MM/DD strings from start_date to end_date inclusive (weekdays only by default)."""
+    start = datetime.strptime(start_date.replace("/", "-"), "%Y-%m-%d")
+    end = datetime.strptime(end_date.replace("/", "-"), "%Y-%m-%d")
+    if end < start:
+        start, end = end, start
+    if (end - start).days >= MAX_BACKFILL_DAYS:
+        raise ValueError(f"Backfill range is limited to {MAX_BACKFILL_DAYS} days")
+    days = []
+    day = start
+    while day <= end:
+        if include_weekends or day.weekday() < 5:
+            days.append(day.strftime("%Y/%m/%d"))
+        day += timedelta(days=1)
+    return days
+
+async def _collect_many(dates, total):
+    async with HostClients(total=total) as clients:
+        return await asyncio.gather(
+            *(collect_candidates(clients, d) for d in dates), return_exceptions=True
+        )
+
+def backfill_opportunities(dates, total=MAX_GLOBAL_CONCURRENCY):
+    """Scrape many dates concurrently and persist them in one batch.
+
+    All dates share one pool of per-host clients and one global request
+    budget. Existence checks, inserts and index updates run once for the
+    whole range. Returns {"dates", "found", "saved", "failed", "per_date"}.
+    """
+    results = asyncio.run(_collect_many(dates, total))
+
+    candidates = []
+    dead_ends = []
+    failed = []
+    seen_links = set()
+    for target_date, result in zip(dates, results):
+        if isinstance(result, BaseException):
+            _logger.error("Backfill collect failed for %s: %s", target_date, result)
+            sentry_sdk.capture_exception(result)
+            failed.append(target_date)
+            continue
+        date_candidates, date_dead_ends = result
+        dead_ends.extend(date_dead_ends)
+        for c in date_candidates:
+            # The same external link can be listed on several dates; keep the earliest
+            if c["link"] in seen_links:
+                continue
+            seen_links.add(c["link"])
+            candidates.append({**c, "scraped_date": target_date})
+
+    label = f"{dates[0]}..{dates[-1]}" if dates else "backfill"
+    saved = save_candidates(candidates, label, dead_ends) if candidates or dead_ends else []
+    per_date = {d: 0 for d in dates}
+    for c in saved:
+        per_date[c["scraped_date"]] += 1
+    _logger.info("Backfill of %d date(s): %d candidate(s), %d saved, %d failed",
+                 len(dates), len(candidates), len(saved), len(failed))
+    return {
+        "dates": len(dates),
+        "found": len(candidates),
+        "saved": len(saved),
+        "failed": failed,
+        "per_date": per_date,
+    }
 
 def fetch_opportunities_by_date_safe(target_date=None):
     """Wrapper that reports errors to Sentry."""
@@ -221,7 +420,14 @@ def fetch_opportunities_by_date_safe(target_date=None):
         return []
 
 if __name__ == "__main__":
-    if len(sys.argv) > 1:
+    if len(sys.argv) > 2:
+        # Backfill a range: python -m app.scraper 2026/06/01 2026/06/30
+        try:
+            result = backfill_opportunities(backfill_dates(sys.argv[1], sys.argv[2]))
+            _logger.warning("Backfill saved %d/%d opportunities", result["saved"], result["found"])
+        except ValueError as e:
+            _logger.warning("Invalid range (%s). Use format: YYYY/MM/DD YYYY/MM/DD", e)
+    elif len(sys.argv) > 1:
         try:
             datetime.strptime(sys.argv[1], "%Y/%m/%d")
             fetch_opportunities_by_date(sys.argv[1])
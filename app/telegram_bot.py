@@ -8,11 +8,15 @@ from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_excep
 
 import sentry_sdk
 from app.config import TELEGRAM_API_URL, TELEGRAM_CHANNEL_ID, TELEGRAM_BOT_TOKEN
-from app.database import update_posted_status, get_unposted_opportunities
+from app.database import claim_unposted, release_claims
 from app.utils import format_telegram_message, format_condensed_post, _close_html_tags, split_html_message
 from app.telegraph import create_page, build_telegraph_content
 
-from app.http_client import http as _http, sanitize as _sanitize, strip_invisible as _strip_invisible
+from app.http_client import make_session, sanitize as _sanitize, strip_invisible as _strip_invisible
+from app.rate_limiter import telegram_limiter
+
+# 429s are not retried by the transport: the limiter has to see them to honour retry_after.
+_send_http = make_session(retry_429=False)
 _logger = logging.getLogger(__name__)
 
 
@@ -37,17 +41,38 @@ def _post_to_telegram_with_retry(payload: dict, use_photo: bool = False) -> requ
         url = f"{TELEGRAM_API_URL}/sendPhoto"
     else:
         url = f"{TELEGRAM_API_URL}/sendMessage"
-    resp = _http.post(url, json=payload, timeout=15)
+    # Every send (fallbacks and continuation chunks included) waits for its chat's slot.
+    telegram_limiter.acquire(payload["chat_id"])
+    resp = _send_http.post(url, json=payload, timeout=15)
+    if resp.status_code == 429:
+        retry_after = _retry_after(resp)
+        if retry_after is not None:
+            telegram_limiter.penalize(retry_after, chat_id=payload["chat_id"])
     resp.raise_for_status()
     return resp
 
 
-def post_to_telegram(opportunity: dict, chat_id: Optional[str] = None) -> bool:
-    target = chat_id or TELEGRAM_CHANNEL_ID
-    if not TELEGRAM_BOT_TOKEN or not target:
-        _logger.error("Missing Telegram credentials in environment variables.")
-        return False
+def _retry_after(response) -> Optional[float]:
+    """Seconds Telegram asked us to wait (429 parameters.retry_after), if any."""
+    try:
+        return float(response.json()["parameters"]["retry_after"])
+    except Exception:
+        return None
 
+
+def _message_id(response) -> Optional[int]:
+    try:
+        return response.json()["result"]["message_id"]
+    except Exception:
+        return None
+
+
+def _send_opportunity(opportunity: dict, target: str) -> Optional[int]:
+    """Send one opportunity to one chat and return the (first) message id.
+
+    Raises requests.RequestException (or anything else) on failure; the
+    callers decide whether that means a retry, a False, or an outbox backoff.
+    """
     # Prepare inline button
     link = _strip_invisible(opportunity.get("link", "https://fallback-link.com")).strip()
     reply_markup = {
@@ -61,125 +86,29 @@ def post_to_telegram(opportunity: dict, chat_id: Optional[str] = None) -> bool:
         ]
     }
 
-    try:
-        thumbnail = _strip_invisible(opportunity.get("thumbnail", ""))
-        use_photo = bool(thumbnail)
-
-        # Determine limits
-        text_limit = 1024 if use_photo else 4096
-
-        # Try full message first
-        message = format_telegram_message(opportunity)
-        fits_inline = len(message) <= text_limit
-
-        if fits_inline:
-            # Short enough — send directly (existing behavior)
-            payload = {
-                "chat_id": target,
-                "parse_mode": "HTML",
-                "disable_web_page_preview": False,
-                "reply_markup": reply_markup
-            }
-            if use_photo:
-                payload["photo"] = thumbnail
-                payload["caption"] = message
-            else:
-                payload["text"] = message
-
-            try:
-                response = _post_to_telegram_with_retry(payload, use_photo=use_photo)
-            except requests.RequestException:
-                if use_photo:
-                    _logger.warning(
-                        f"sendPhoto failed for '{opportunity['title']}', falling back to sendMessage"
-                    )
-                    text_limit = 4096
-                    fits_inline = len(message) <= text_limit
-                    if fits_inline:
-                        payload.pop("photo", None)
-                        payload.pop("caption", None)
-                        payload["text"] = message
-                        response = _post_to_telegram_with_retry(payload, use_photo=False)
-                        use_photo = False
-                    else:
-                        raise
-                else:
-                    raise
-
-            _logger.info(f"Posted directly to Telegram: {opportunity['title']} -> {target}")
-            opp_id = opportunity.get("id")
-            if opp_id:
-                update_posted_status(opp_id)
-            return True
-
-        # Message too long — try Telegraph
-        telegraph_url = create_page(
-            title=opportunity.get("title", "Opportunity"),
-            content=build_telegraph_content(opportunity),
-        )
-
-        if telegraph_url:
-            # Success — send condensed post with Telegraph link
-            condensed = format_condensed_post(opportunity, telegraph_url)
-
-            # Try photo+caption if thumbnail available and condensed fits
-            if use_photo and len(condensed) <= 1024:
-                payload = {
-                    "chat_id": target,
-                    "parse_mode": "HTML",
-                    "disable_web_page_preview": False,
-                    "reply_markup": reply_markup,
-                    "photo": thumbnail,
-                    "caption": condensed,
-                }
-                try:
-                    response = _post_to_telegram_with_retry(payload, use_photo=True)
-                except requests.RequestException:
-                    _logger.warning(
-                        f"sendPhoto failed for '{opportunity['title']}', falling back to sendMessage"
-                    )
-                    payload.pop("photo", None)
-                    payload.pop("caption", None)
-                    payload["text"] = condensed
-                    response = _post_to_telegram_with_retry(payload, use_photo=False)
-            else:
-                payload = {
-                    "chat_id": target,
-                    "parse_mode": "HTML",
-                    "disable_web_page_preview": False,
-                    "reply_markup": reply_markup,
-                    "text": condensed,
-                }
-                response = _post_to_telegram_with_retry(payload, use_photo=False)
-
-            _logger.info(f"Posted via Telegraph: {opportunity['title']} -> {target}")
-            opp_id = opportunity.get("id")
-            if opp_id:
-                update_posted_status(opp_id)
-            return True
+    thumbnail = _strip_invisible(opportunity.get("thumbnail", ""))
+    use_photo = bool(thumbnail)
 
-        # Telegraph failed — fall back to splitting
-        _logger.warning(
-            f"Telegraph unavailable for '{opportunity['title']}', falling back to split message"
-        )
-        if use_photo and text_limit == 1024:
-            use_photo = False
-            text_limit = 4096
+    # Determine limits
+    text_limit = 1024 if use_photo else 4096
 
-        chunks = split_html_message(message, max_length=text_limit)
+    # Try full message first
+    message = format_telegram_message(opportunity)
+    fits_inline = len(message) <= text_limit
 
+    if fits_inline:
+        # Short enough — send directly (existing behavior)
         payload = {
             "chat_id": target,
             "parse_mode": "HTML",
             "disable_web_page_preview": False,
             "reply_markup": reply_markup
         }
-
         if use_photo:
             payload["photo"] = thumbnail
-            payload["caption"] = chunks[0]
+            payload["caption"] = message
         else:
-            payload["text"] = chunks[0]
+            payload["text"] = message
 
         try:
             response = _post_to_telegram_with_retry(payload, use_photo=use_photo)
@@ -188,37 +117,133 @@ def post_to_telegram(opportunity: dict, chat_id: Optional[str] = None) -> bool:
                 _logger.warning(
                     f"sendPhoto failed for '{opportunity['title']}', falling back to sendMessage"
                 )
-                chunks = split_html_message(message, max_length=4096)
-                payload.pop("photo", None)
-                payload.pop("caption", None)
-                payload["text"] = chunks[0]
-                response = _post_to_telegram_with_retry(payload, use_photo=False)
+                text_limit = 4096
+                fits_inline = len(message) <= text_limit
+                if fits_inline:
+                    payload.pop("photo", None)
+                    payload.pop("caption", None)
+                    payload["text"] = message
+                    response = _post_to_telegram_with_retry(payload, use_photo=False)
+                    use_photo = False
+                else:
+                    raise
             else:
                 raise
 
-        first_message_id = response.json()["result"]["message_id"]
+        _logger.info(f"Posted directly to Telegram: {opportunity['title']} -> {target}")
+        return _message_id(response)
 
-        for chunk in chunks[1:]:
-            reply_payload = {
+    # Message too long — try Telegraph
+    telegraph_url = create_page(
+        title=opportunity.get("title", "Opportunity"),
+        content=build_telegraph_content(opportunity),
+    )
+
+    if telegraph_url:
+        # Success — send condensed post with Telegraph link
+        condensed = format_condensed_post(opportunity, telegraph_url)
+
+        # Try photo+caption if thumbnail available and condensed fits
+        if use_photo and len(condensed) <= 1024:
+            payload = {
                 "chat_id": target,
                 "parse_mode": "HTML",
-                "disable_web_page_preview": True,
-                "text": chunk,
-                "reply_to_message_id": first_message_id,
+                "disable_web_page_preview": False,
+                "reply_markup": reply_markup,
+                "photo": thumbnail,
+                "caption": condensed,
             }
             try:
-                _post_to_telegram_with_retry(reply_payload, use_photo=False)
-            except requests.RequestException as e:
-                _logger.warning(f"Failed to send continuation chunk: {_sanitize(str(e))}")
-
-        _logger.info(
-            f"Posted to Telegram (split fallback): {opportunity['title']} -> {target} ({len(chunks)} chunk(s))"
-        )
-        opp_id = opportunity.get("id")
-        if opp_id:
-            update_posted_status(opp_id)
-        return True
+                response = _post_to_telegram_with_retry(payload, use_photo=True)
+            except requests.RequestException:
+                _logger.warning(
+                    f"sendPhoto failed for '{opportunity['title']}', falling back to sendMessage"
+                )
+                payload.pop("photo", None)
+                payload.pop("caption", None)
+                payload["text"] = condensed
+                response = _post_to_telegram_with_retry(payload, use_photo=False)
+        else:
+            payload = {
+                "chat_id": target,
+                "parse_mode": "HTML",
+                "disable_web_page_preview": False,
+                "reply_markup": reply_markup,
+                "text": condensed,
+            }
+            response = _post_to_telegram_with_retry(payload, use_photo=False)
+
+        _logger.info(f"Posted via Telegraph: {opportunity['title']} -> {target}")
+        return _message_id(response)
+
+    # Telegraph failed — fall back to splitting
+    _logger.warning(
+        f"Telegraph unavailable for '{opportunity['title']}', falling back to split message"
+    )
+    if use_photo and text_limit == 1024:
+        use_photo = False
+        text_limit = 4096
+
+    chunks = split_html_message(message, max_length=text_limit)
+
+    payload = {
+        "chat_id": target,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": False,
+        "reply_markup": reply_markup
+    }
+
+    if use_photo:
+        payload["photo"] = thumbnail
+        payload["caption"] = chunks[0]
+    else:
+        payload["text"] = chunks[0]
+
+    try:
+        response = _post_to_telegram_with_retry(payload, use_photo=use_photo)
+    except requests.RequestException:
+        if use_photo:
+            _logger.warning(
+                f"sendPhoto failed for '{opportunity['title']}', falling back to sendMessage"
+            )
+            chunks = split_html_message(message, max_length=4096)
+            payload.pop("photo", None)
+            payload.pop("caption", None)
+            payload["text"] = chunks[0]
+            response = _post_to_telegram_with_retry(payload, use_photo=False)
+        else:
+            raise
+
+    first_message_id = _message_id(response)
 
+    for chunk in chunks[1:]:
+        reply_payload = {
+            "chat_id": target,
+            "parse_mode": "HTML",
+            "disable_web_page_preview": True,
+            "text": chunk,
+            "reply_to_message_id": first_message_id,
+        }
+        try:
+            _post_to_telegram_with_retry(reply_payload, use_photo=False)
+        except requests.RequestException as e:
+            _logger.warning(f"Failed to send continuation chunk: {_sanitize(str(e))}")
+
+    _logger.info(
+        f"Posted to Telegram (split fallback): {opportunity['title']} -> {target} ({len(chunks)} chunk(s))"
+    )
+    return first_message_id
+
+
+def post_to_telegram(opportunity: dict, chat_id: Optional[str] = None) -> bool:
+    target = chat_id or TELEGRAM_CHANNEL_ID
+    if not TELEGRAM_BOT_TOKEN or not target:
+        _logger.error("Missing Telegram credentials in environment variables.")
+        return False
+
+    try:
+        _send_opportunity(opportunity, target)
+        return True
     except requests.RequestException as e:
         _logger.error(f"Telegram API error for '{opportunity['title']}': {_sanitize(str(e))}")
         sentry_sdk.capture_exception(e)
@@ -229,33 +254,104 @@ def post_to_telegram(opportunity: dict, chat_id: Optional[str] = None) -> bool:
         return False
 
 
-def post_to_all_channels(opportunity: dict) -> bool:
-    """Post an opportunity to all active channels. Returns True if at least one succeeded."""
+def channel_targets() -> list[str]:
+    """Chat ids of the active channels, or the configured default channel if none are registered."""
     from app.database import get_active_channels
     channels = get_active_channels()
-    if not channels:
-        if TELEGRAM_CHANNEL_ID:
-            channels = [{"chat_id": TELEGRAM_CHANNEL_ID, "title": "default"}]
-        else:
-            _logger.warning("No channels configured and TELEGRAM_CHANNEL_ID not set")
+    if channels:
+        return [str(ch["chat_id"]) for ch in channels]
+    if TELEGRAM_CHANNEL_ID:
+        return [str(TELEGRAM_CHANNEL_ID)]
+    _logger.warning("No channels configured and TELEGRAM_CHANNEL_ID not set")
+    return []
+
+
+def post_to_all_channels(opportunity: dict) -> bool:
+    """Post an opportunity to all active channels. Returns True if at least one succeeded.
+
+    Stored opportunities go through the deliveries outbox, so a channel that
+    fails is retried on its own later and the opportunity only counts as
+    posted once every channel has settled. Unsaved ones (custom posts) are
+    sent directly.
+    """
+    opp_id = opportunity.get("id")
+    if opp_id:
+        claimed = claim_unposted(1, opportunity_ids=[opp_id])
+        if not claimed:
             return False
+        sent = post_claimed(claimed, workers=1)
+        if not sent:
+            release_claims([opp_id])
+        return bool(sent)
     any_success = False
-    for ch in channels:
-        ok = post_to_telegram(opportunity, chat_id=str(ch["chat_id"]))
-        if ok:
+    for target in channel_targets():
+        if post_to_telegram(opportunity, chat_id=target):
             any_success = True
     return any_success
 
 
+def post_claimed(batch: list[dict], workers: Optional[int] = None, drain_all: bool = False) -> list[int]:
+    """Queue claimed opportunities for every channel, drain the outbox once, return the ids that got out.
+
+    An id counts once at least one channel received it. Claims are left to
+    the caller, which releases the ids that did not get out when it is done
+    claiming. drain_all also sends other due deliveries (earlier retries),
+    not just this batch's.
+    """
+    if not batch:
+        return []
+    from app.database import enqueue_deliveries, get_delivery_summary
+    from app.delivery import run_delivery_workers, DELIVERY_WORKERS
+    targets = channel_targets()
+    if not targets:
+        return []
+    ids = [opp["id"] for opp in batch]
+    enqueue_deliveries(ids, targets)
+    counts = run_delivery_workers(DELIVERY_WORKERS if workers is None else workers,
+                                  opportunity_ids=None if drain_all else ids,
+                                  opportunities={opp["id"]: opp for opp in batch})
+    _logger.info("Delivery pool finished: %s", counts)
+    summary = get_delivery_summary(ids)
+    return [oid for oid in ids if summary.get(oid, {}).get("sent")]
+
+
+def drain_due_deliveries(workers: Optional[int] = None) -> dict[str, int]:
+    """Send every delivery that is due, whichever cycle queued it.
+
+    Retries scheduled by fail_delivery belong to rows an earlier cycle
+    claimed, so they are not picked up by claiming; this sends them even when
+    a cycle has nothing new to claim.
+    """
+    from app.delivery import run_delivery_workers, DELIVERY_WORKERS
+    counts = run_delivery_workers(DELIVERY_WORKERS if workers is None else workers)
+    if any(counts.values()):
+        _logger.info("Drained due deliveries: %s", counts)
+    return counts
+
+
+POST_CHUNK_SIZE = 20
+
+
 def post_new_opportunities(date_str: Optional[str] = None):
-    """Fetch unposted opportunities from DB and post them to Telegram."""
-    opportunities = get_unposted_opportunities()
-    if not opportunities:
+    """Post the unposted backlog to Telegram, claiming it one slice at a time."""
+    failed = []
+    seen = 0
+    try:
+        while True:
+            opportunities = claim_unposted(POST_CHUNK_SIZE)
+            if not opportunities:
+                break
+            seen += len(opportunities)
+            sent = set(post_claimed(opportunities))
+            for opp in opportunities:
+                if opp["id"] in sent:
+                    _logger.info("Posted: %s", opp["title"])
+                else:
+                    _logger.warning("Failed to post: %s", opp["title"])
+                    failed.append(opp["id"])
+    finally:
+        # Released only at the end so failures are not re-claimed by this same loop.
+        release_claims(failed)
+    drain_due_deliveries()
+    if not seen:
         _logger.info("No new opportunities to post.")
-        return
-    for opp in opportunities:
-        posted = post_to_telegram(opp)
-        if posted:
-            _logger.info("Posted: %s", opp["title"])
-        else:
-            _logger.warning("Failed to post: %s", opp["title"])
@@ -0,0 +1,212 @@
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Optional
+
+import httpx
+from tenacity import AsyncRetrying, stop_after_attempt, wait_exponential, retry_if_exception
+
+from app.config import TELEGRAM_API_URL
+from app.http_client import sanitize as _sanitize
+
+_logger = logging.getLogger(__name__)
+
+
+class TelegramAPIError(Exception):
+    """A Bot API call answered ok=false (or a non-JSON error status)."""
+
+    def __init__(self, method: str, error_code: int, description: str, retry_after: Optional[float] = None):
+        super().__init__(_sanitize(f"{method} failed ({error_code}): {description}"))
+        self.method = method
+        self.error_code = error_code
+        self.description = description
+        self.retry_after = retry_after
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    # Same policy as the blocking client: transport errors, 429 and 5xx.
+    if isinstance(exc, TelegramAPIError):
+        return exc.error_code == 429 or exc.error_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+def _wait(retry_state) -> float:
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, TelegramAPIError) and exc.retry_after is not None:
+        return exc.retry_after
+    return wait_exponential(multiplier=1, min=2, max=10)(retry_state)
+
+
+class AsyncTelegramClient:
+    """Bot API client on a pooled, keep-alive httpx.AsyncClient.
+
+    An AsyncClient's pool belongs to the event loop it was first used on, so
+    the client is (re)created lazily per running loop; in the server that is
+    one pool per worker for its whole life.
+    """
+
+    def __init__(self, base_url: str = TELEGRAM_API_URL, timeout: float = 15,
+                 max_connections: int = 20, attempts: int = 3, transport=None):
+        self.base_url = base_url
+        self.timeout = timeout
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        self.attempts = attempts
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _http(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits, transport=self._transport)
+            self._loop = loop
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+
+    async def _call_once(self, method: str, payload: Optional[dict]) -> Any:
+        resp = await self._http().post(f"{self.base_url}/{method}", json=payload or {})
+        try:
+            data = resp.json()
+        except ValueError:
+            resp.raise_for_status()
+            raise TelegramAPIError(method, resp.status_code, "invalid JSON response")
+        if not data.get("ok"):
+            params = data.get("parameters") or {}
+            raise TelegramAPIError(method, data.get("error_code", resp.status_code),
+                                   data.get("description", ""), params.get("retry_after"))
+        return data.get("result")
+
+    async def call(self, method: str, payload: Optional[dict] = None, *, attempts: Optional[int] = None) -> Any:
+        """Call a Bot API method and return its result, retrying transient failures."""
+        try:
+            async for attempt in AsyncRetrying(
+                stop=stop_after_attempt(attempts or self.attempts),
+                wait=_wait,
+                retry=retry_if_exception(_is_retryable),
+                reraise=True,
+            ):
+                with attempt:
+                    return await self._call_once(method, payload)
+        except httpx.HTTPError as e:
+            _logger.warning("Telegram %s failed: %s", method, _sanitize(str(e)))
+            raise
+
+    async def get_me(self, attempts: Optional[int] = None) -> dict:
+        return await self.call("getMe", attempts=attempts)
+
+    async def send_message(self, chat_id, text: str, *, parse_mode: Optional[str] = "HTML",
+                           reply_markup: Optional[dict] = None,
+                           disable_web_page_preview: Optional[bool] = None,
+                           reply_to_message_id: Optional[int] = None) -> dict:
+        payload = {"chat_id": chat_id, "text": text}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        if reply_markup is not None:
+            payload["reply_markup"] = reply_markup
+        if disable_web_page_preview is not None:
+            payload["disable_web_page_preview"] = disable_web_page_preview
+        if reply_to_message_id is not None:
+            payload["reply_to_message_id"] = reply_to_message_id
+        return await self.call("sendMessage", payload)
+
+    async def edit_message_text(self, chat_id, message_id: int, text: str, *,
+                                parse_mode: Optional[str] = "HTML",
+                                reply_markup: Optional[dict] = None,
+                                disable_web_page_preview: Optional[bool] = None) -> dict:
+        payload = {"chat_id": chat_id, "message_id": message_id, "text": text}
+        if parse_mode:
+            payload["parse_mode"] = parse_mode
+        if reply_markup is not None:
+            payload["reply_markup"] = reply_markup
+        if disable_web_page_preview is not None:
+            payload["disable_web_page_preview"] = disable_web_page_preview
+        return await self.call("editMessageText", payload)
+
+    async def send_photo(self, chat_id, photo: str, *, caption: Optional[str] = None,
+                         parse_mode: Optional[str] = "HTML", reply_markup: Optional[dict] = None) -> dict:
+        payload = {"chat_id": chat_id, "photo": photo}
+        if caption is not None:
+            payload["caption"] = caption
+            if parse_mode:
+                payload["parse_mode"] = parse_mode
+        if reply_markup is not None:
+            payload["reply_markup"] = reply_markup
+        return await self.call("sendPhoto", payload)
+
+    async def answer_callback_query(self, callback_query_id: str, *, text: Optional[str] = None,
+                                    show_alert: bool = False) -> bool:
+        payload = {"callback_query_id": callback_query_id}
+        if text is not None:
+            payload["text"] = text
+            payload["show_alert"] = show_alert
+        return await self.call("answerCallbackQuery", payload)
+
+    async def send_chat_action(self, chat_id, action: str = "typing") -> bool:
+        return await self.call("sendChatAction", {"chat_id": chat_id, "action": action})
+
+
+telegram_client = AsyncTelegramClient()
+
+
+# -- fire-and-forget side calls ---------------------------------------------
+
+CHAT_ACTION_TTL = 4.0  # Telegram shows a chat action for ~5s; resending sooner is wasted
+
+_side_loop: Optional[asyncio.AbstractEventLoop] = None
+_side_pool: Optional[ThreadPoolExecutor] = None
+_side_lock = threading.Lock()
+_chat_actions: dict = {}
+
+
+def bind_loop(loop: Optional[asyncio.AbstractEventLoop]) -> None:
+    """Route side calls through the async client on loop (the server's), or threads if None."""
+    global _side_loop
+    _side_loop = loop
+
+
+def _blocking_side_call(method: str, payload: dict) -> None:
+    from app.http_client import http
+    try:
+        http.post(f"{TELEGRAM_API_URL}/{method}", json=payload, timeout=10)
+    except Exception as e:
+        _logger.warning("Telegram %s side call failed: %s", method, _sanitize(str(e)))
+
+
+def _log_side_failure(future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        _logger.warning("Telegram side call failed: %s", _sanitize(str(exc)))
+
+
+def send_later(method: str, payload: dict) -> None:
+    """Send a UI side call (chat action, callback ack) without waiting for it.
+
+    Repeated chat actions for a chat within CHAT_ACTION_TTL are coalesced
+    into the one already sent.
+    """
+    if method == "sendChatAction":
+        key = (payload.get("chat_id"), payload.get("action"))
+        now = time.monotonic()
+        with _side_lock:
+            if now - _chat_actions.get(key, float("-inf")) < CHAT_ACTION_TTL:
+                return
+            _chat_actions[key] = now
+            if len(_chat_actions) > 1000:
+                _chat_actions.clear()
+    loop = _side_loop
+    if loop is not None and loop.is_running():
+        future = asyncio.run_coroutine_threadsafe(telegram_client.call(method, payload, attempts=1), loop)
+        future.add_done_callback(_log_side_failure)
+        return
+    global _side_pool
+    with _side_lock:
+        if _side_pool is None:
+            _side_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tg-side")
+    _side_pool.submit(_blocking_side_call, method, payload)
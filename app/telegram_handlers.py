@@ -1,23 +1,23 @@
 import os
 import re
+import sys
 import secrets
-import csv
-import io
 import time
-import html
 import logging
+import threading
 from threading import Thread
 from typing import Optional
 from datetime import datetime, timedelta
+from calendar import monthrange
 
-from app.scheduler import reload_schedules
-from app.scraper import fetch_opportunities_by_date
 from app.database import (
     get_admins,
     get_stats_from_db,
     get_unposted_opportunities,
     get_unposted_by_date,
     get_posted_by_date,
+    get_daily_counts,
+    get_adjacent_days,
     get_opportunity_by_id,
     update_opportunity,
     delete_opportunity,
@@ -42,18 +42,17 @@ from app.database import (
     remove_channel,
     get_active_channels,
 )
-from app.telegram_bot import post_to_telegram, post_to_all_channels
-from app.utils import format_telegram_message
 from app.config import TELEGRAM_API_URL, BOT_OWNER_ID, TELEGRAM_CHANNEL_ID
 from app.keyboards import (
     build_main_menu, build_date_nav_keyboard, build_year_picker,
     build_month_picker, build_day_picker, build_search_keyboard,
     build_stats_keyboard, build_browse_keyboard,
-    build_custom_post_keyboard, build_custom_post_preview_keyboard,
 )
 import sentry_sdk
 from app.http_client import http as _http, sanitize as _sanitize
-from app.rate_limiter import telegram_limiter
+from app.telegram_client import send_later
+from app.bot_router import Router, UpdateContext
+from app.change_feed import subscribe
 
 logger = logging.getLogger(__name__)
 
@@ -66,191 +65,30 @@ def set_bot_info(username: str | None, first_name: str) -> None:
     BOT_USERNAME = username
     BOT_FIRST_NAME = first_name
 
-# --- Admin cache (short TTL; survives worker restart) ---
+# --- Admin cache (short TTL, reset by change notifications; survives worker restart) ---
 _admin_ids: set[int] = set()
 _admin_names: dict[int, str] = {}
 _last_admin_refresh: float = 0
 _ADMIN_CACHE_TTL = 10
 
-# --- Custom post composer state (in-memory) ---
-_pending_custom_posts: dict[int, dict] = {}
-
-def _get_custom_post_state(user_id: int) -> dict | None:
-    return _pending_custom_posts.get(user_id)
-
-def _set_custom_post_state(user_id: int, **fields):
-    if user_id not in _pending_custom_posts:
-        _pending_custom_posts[user_id] = {}
-    _pending_custom_posts[user_id].update(fields)
-
-def _clear_custom_post_state(user_id: int):
-    _pending_custom_posts.pop(user_id, None)
-
-_STEP_ORDER = ["title", "description", "image", "link", "deadline"]
-_STEP_NUMBERS = {s: i + 1 for i, s in enumerate(_STEP_ORDER)}
-_STEP_ICONS = {
-    "title": "📌", "description": "📝", "image": "🖼",
-    "link": "🔗", "deadline": "📅",
-}
-_STEP_PROMPTS = {
-    "title": "Send the post title.",
-    "description": "Send the post description/body.",
-    "image": "Send an image for the post (optional).",
-    "link": "Send the URL for the <b>Apply</b> button.",
-    "deadline": "Send a deadline (optional, e.g. <i>July 15, 2026</i>).",
-}
-
-def _get_field_display(state: dict, field: str) -> str:
-    if field == "image":
-        return "🖼 [attached]" if state.get("image_file_id") else "None"
-    val = state.get(field, "")
-    return f'"{html.escape(val)}"' if val else "None"
-
-def _render_custom_post_wizard(state: dict, is_complete: bool = False) -> str:
-    current_step = state.get("step", "title")
-    editing = state.get("editing", False)
-    status = state.get("status")
-    total = len(_STEP_ORDER)
-    step_num = _STEP_NUMBERS.get(current_step, 0)
-    icon = _STEP_ICONS.get(current_step, "•")
-
-    if status == "posting":
-        return "━━━ 📝 <b>Create Post</b> ─── ⏳ Posting ━━━\n\nPosting to all channels..."
-    if status == "posted":
-        return "━━━ 📝 <b>Create Post</b> ─── ✅ Posted ━━━\n\n✅ Custom post sent to all channels!"
-    if status == "failed":
-        return "━━━ 📝 <b>Create Post</b> ─── ❌ Failed ━━━\n\n❌ Failed to post. Check channels and DB."
-    if status == "cancelled":
-        return "━━━ 📝 <b>Create Post</b> ─── ❌ Cancelled ━━━\n\nPost creation cancelled."
-
-    if is_complete:
-        title = state.get("title", "")
-        description = state.get("description", "")
-        link = state.get("link", "")
-        deadline = state.get("deadline", "")
-        image_file_id = state.get("image_file_id", "")
-        opp = {
-            "title": title,
-            "description": description,
-            "link": link,
-            "deadline": deadline,
-            "thumbnail": image_file_id or "",
-        }
-        preview = format_telegram_message(opp)
-        image_note = ""
-        if image_file_id:
-            image_note = "\n\n🖼 <b>Image attached</b>"
-        return (
-            "━━━ 📝 <b>Create Post</b> ─── Preview ━━━\n\n"
-            f"{preview}{image_note}"
-        )
-
-    if editing:
-        current_value = _get_field_display(state, current_step)
-        current_line = f"\n<b>Current:</b> {current_value}" if current_value else ""
-        prompt = _STEP_PROMPTS.get(current_step, f"Send the new {current_step}:")
-        return (
-            f"━━━ 📝 <b>Create Post</b> ─── ✏️ Step {step_num}/{total} ━━━\n\n"
-            f"Editing: {icon} <b>{current_step.title()}</b>{current_line}\n\n"
-            f"{prompt}"
-        )
-
-    completed_lines = []
-    for step in _STEP_ORDER:
-        if step == current_step:
-            break
-        s_icon = _STEP_ICONS[step]
-        if step == "image":
-            if state.get("image_file_id"):
-                completed_lines.append(f"✅ {s_icon} Image: attached")
-        elif step == "deadline":
-            val = state.get("deadline")
-            if val:
-                completed_lines.append(f"✅ {s_icon} Deadline: {html.escape(val)}")
-        else:
-            val = state.get(step)
-            if val:
-                display = val[:50] + "..." if len(val) > 50 else val
-                completed_lines.append(f"✅ {s_icon} {step.title()}: {html.escape(display)}")
-
-    completed_section = "\n".join(completed_lines)
-    if completed_section:
-        completed_section += "\n\n"
-
-    prompt = _STEP_PROMPTS.get(current_step, f"Send the {current_step}:")
-    skip_hint = ""
-    if current_step == "image":
-        skip_hint = "\n\n<i>Or tap Skip Image below.</i>"
-    if current_step == "deadline":
-        skip_hint = "\n\n<i>Or tap Skip Deadline below.</i>"
-
-    return (
-        f"━━━ 📝 <b>Create Post</b> ─── Step {step_num}/{total} ━━━\n\n"
-        f"{completed_section}{icon} {prompt}{skip_hint}"
-    )
-
-
-def _update_custom_post_wizard(user_id: int, is_complete: bool = False):
-    state = _get_custom_post_state(user_id)
-    if not state:
-        return
-    wc = state.get("wizard_chat_id")
-    wm = state.get("wizard_message_id")
-    if not wc or not wm:
-        return
-    text = _render_custom_post_wizard(state, is_complete)
-    payload = {
-        "chat_id": wc,
-        "message_id": wm,
-        "text": text,
-        "parse_mode": "HTML",
-    }
-    status = state.get("status")
-    if status == "posting":
-        payload["reply_markup"] = {"inline_keyboard": [[{"text": "⏳ Posting...", "callback_data": "noop"}]]}
-    elif status in ("posted", "failed", "cancelled"):
-        payload["reply_markup"] = build_main_menu(user_id)
-    elif is_complete:
-        payload["reply_markup"] = build_custom_post_preview_keyboard()
-    else:
-        payload["reply_markup"] = build_custom_post_keyboard(state.get("step", "title"))
-    new_id = safe_edit_message_text(payload)
-    if new_id is not None:
-        _set_custom_post_state(user_id, wizard_message_id=new_id)
+# --- Update routing ---
+commands = Router()
+callbacks = Router()
 
 
-def _advance_custom_post_step(user_id: int, chat_id: int, **field_value):
-    state = _get_custom_post_state(user_id)
-    if not state or state.get("status"):
-        return
-    current_step = state.get("step")
-    _set_custom_post_state(user_id, **field_value)
-    editing = state.get("editing", False)
-    if editing:
-        _set_custom_post_state(user_id, editing=False)
-        try:
-            _update_custom_post_wizard(user_id, is_complete=True)
-        except Exception:
-            logger.warning("Failed to update wizard after editing", exc_info=True)
-    else:
-        idx = _STEP_ORDER.index(current_step)
-        if idx + 1 < len(_STEP_ORDER):
-            next_step = _STEP_ORDER[idx + 1]
-            _set_custom_post_state(user_id, step=next_step)
-            try:
-                _update_custom_post_wizard(user_id)
-            except Exception:
-                logger.warning("Failed to update wizard advancing %s -> %s", current_step, next_step, exc_info=True)
-        else:
-            _set_custom_post_state(user_id, step="complete")
-            try:
-                _update_custom_post_wizard(user_id, is_complete=True)
-            except Exception:
-                logger.warning("Failed to update wizard on complete", exc_info=True)
+def _command_word(text: str) -> str:
+    """"/add_admin@MyBot 123" -> "/add_admin"."""
+    return text.split(maxsplit=1)[0].split("@", 1)[0]
 
 
+def _loaded_custom_post():
+    # Wizard state lives in app.custom_post, so until that module is loaded no wizard is open.
+    return sys.modules.get("app.custom_post")
 
 
+def _reload_schedules():
+    from app.scheduler import reload_schedules
+    reload_schedules()
 
 def _refresh_admin_cache():
     global _admin_ids, _admin_names, _last_admin_refresh
@@ -261,6 +99,14 @@ def _refresh_admin_cache():
         _admin_names = {a["user_id"]: a["name"] for a in admins}
         _last_admin_refresh = now
 
+
+def _on_admins_changed(topic: str) -> None:
+    global _last_admin_refresh
+    _last_admin_refresh = 0
+
+
+subscribe("admins", _on_admins_changed)
+
 def _is_authorized(user_id: int) -> bool:
     if BOT_OWNER_ID and user_id == BOT_OWNER_ID:
         return True
@@ -270,6 +116,16 @@ def _is_authorized(user_id: int) -> bool:
 def get_stats():
     return get_stats_from_db()
 
+def _format_search_results(keyword, result, match="text") -> str:
+    heading = "Closest matches" if match == "fuzzy" else "Results"
+    lines = [f"<b>{heading} for \"{keyword}\" ({result['total']} found):</b>\n"]
+    for op in result["results"]:
+        status = "🟢" if op["posted_to_telegram"] else "🟡"
+        date_str = str(op.get("created_at", ""))[:10] if op.get("created_at") else "?"
+        score = f" | {op['score']:.0%} match" if op.get("score") is not None else ""
+        lines.append(f"{status} <b>{op['title']}</b>\n📅 {date_str}{score} | <a href='{op['link']}'>Link</a>")
+    return "\n\n".join(lines)
+
 def safe_edit_message_text(payload) -> int | None:
     """Edit a message, falling back to sendMessage if the edit fails.
     Returns the new message_id if a fallback send occurred, None otherwise.
@@ -305,7 +161,48 @@ def safe_edit_message_text(payload) -> int | None:
             return None
     return None
 
+_reply_slot = threading.local()
+
+
+def _side_call(method: str, payload: dict) -> None:
+    """Secondary Bot API call (chat action, callback ack): sent in the background, never awaited."""
+    send_later(method, payload)
+
+
+def _reply(method: str, payload: dict) -> None:
+    """Send the update's final reply.
+
+    While handle_webhook_update is running, the first reply is held back and
+    returned as the webhook response body (Bot API webhook reply), which saves
+    a round trip. Otherwise, or for any later reply, it is sent right away.
+    """
+    slot = getattr(_reply_slot, "value", None)
+    if slot is not None and not slot:
+        slot.append({"method": method, **payload})
+        return
+    if slot:
+        # Keep the order: whatever was held back goes out before this one.
+        held = slot.pop()
+        slot.append(None)
+        if held:
+            _http.post(f"{TELEGRAM_API_URL}/{held.pop('method')}", json=held)
+    _http.post(f"{TELEGRAM_API_URL}/{method}", json=payload)
+
+
+def handle_webhook_update(data, run_in_background=None) -> Optional[dict]:
+    """Run process_telegram_update and return its held-back reply (or None) for the webhook response."""
+    _reply_slot.value = []
+    try:
+        process_telegram_update(data, run_in_background)
+    except Exception as e:
+        logging.warning(_sanitize(f"Webhook processing error: {e}"))
+    finally:
+        slot, _reply_slot.value = _reply_slot.value, None
+    return slot[0] if slot else None
+
+
 def _scrape_only(today, chat_id, message_id):
+    from app.scraper import fetch_opportunities_by_date
     try:
         target = today.replace("-", "/")
         new_ops = fetch_opportunities_by_date(target)
@@ -327,6 +224,44 @@ def _scrape_only(today, chat_id, message_id):
         logger.warning("Failed to send scrape result to Telegram (chat_id=%s)", chat_id, exc_info=True)
 
 
+_HELP_TEXT = (
+    "<b>Available commands:</b>\n\n"
+    "/start - Show the main menu\n"
+    "/myid - Show your Telegram user ID\n"
+    "/help - Show this message\n"
+    "/search &lt;keyword&gt; - Search opportunities by title, description, or tags\n"
+    "/request_admin - Request admin access from the owner\n\n"
+    "<i>Owner-only:</i>\n"
+    "/add_admin &lt;id&gt; - Add admin\n"
+    "/remove_admin &lt;id&gt; - Remove an admin\n"
+    "/list_admins - List all admins\n"
+    "/add_scrape HH:MM - Add auto-scrape time (UTC)\n"
+    "/add_post HH:MM - Add auto-post time (UTC)\n"
+    "/remove_scrape HH:MM - Remove a scrape time\n"
+    "/remove_post HH:MM - Remove a post time\n"
+    "/list_schedules - List all schedule times"
+)
+
+
+async def process_telegram_update_async(data) -> Optional[dict]:
+    """Answer updates that need no DB or blocking work straight from the event loop.
+
+    Returns the reply as a webhook-reply body, or None when the update has to
+    go through process_telegram_update.
+    """
+    message = data.get("message")
+    if not message or data.get("my_chat_member"):
+        return None
+    text = message.get("text") or ""
+    chat_id = message["chat"]["id"]
+    if text.startswith("/myid"):
+        return {"method": "sendMessage", "chat_id": chat_id, "parse_mode": "HTML",
+                "text": f"Your Telegram user ID: <code>{message['from']['id']}</code>"}
+    if text.startswith("/help"):
+        return {"method": "sendMessage", "chat_id": chat_id, "parse_mode": "HTML", "text": _HELP_TEXT}
+    return None
+
+
 def process_telegram_update(data, run_in_background=None):
     # Auto-detect when bot is added to a group or channel
     my_chat_member = data.get("my_chat_member")
@@ -338,7 +273,7 @@ def process_telegram_update(data, run_in_background=None):
             title = chat.get("title", f"Chat {chat_id}")
             add_channel(chat_id, title=title)
             logger.info("Auto-added channel %s (%s)", title, chat_id)
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+            _reply("sendMessage", {
                 "chat_id": chat_id,
                 "text": "👋 Bot added! Use the bot's admin panel to manage this channel.",
                 "parse_mode": "HTML"
@@ -356,7 +291,7 @@ def process_telegram_update(data, run_in_background=None):
         text = message.get("text", "")
         # /myid works for anyone (even non-admins)
         if text and text.startswith("/myid"):
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+            _reply("sendMessage", {
                 "chat_id": chat_id,
                 "text": f"Your Telegram user ID: <code>{user_id}</code>",
                 "parse_mode": "HTML"
@@ -374,18 +309,18 @@ def process_telegram_update(data, run_in_background=None):
                 elif add_admin(user_id, owner_id, message["from"].get("first_name", "")):
                     _admin_ids.add(user_id)
                     _admin_names[user_id] = message["from"].get("first_name", "")
-                    _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                    _reply("sendMessage", {
                         "chat_id": chat_id,
                         "text": "🎉 You've been added as an admin! Use the menu below to control the bot.",
                         "reply_markup": build_main_menu(user_id),
                         "parse_mode": "HTML"
                         })
                     return {"ok": True}
-            _http.post(f"{TELEGRAM_API_URL}/sendChatAction", json={
+            _side_call("sendChatAction", {
                 "chat_id": chat_id,
                 "action": "typing"
             })
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+            _reply("sendMessage", {
                 "chat_id": chat_id,
                 "text": (
                     f"<b>Welcome to {BOT_FIRST_NAME}!</b>\n\n"
@@ -399,28 +334,28 @@ def process_telegram_update(data, run_in_background=None):
         if text and text.startswith("/search"):
             keyword = text[len("/search "):].strip() if len(text) > len("/search ") else ""
             if not keyword:
-                _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                _reply("sendMessage", {
                     "chat_id": chat_id,
                     "text": "Usage: /search &lt;keyword&gt;\n\nExample: /search scholarship",
                     "parse_mode": "HTML"
                 })
             else:
+                match = "text"
                 result = search_opportunities(keyword, 0, 10)
                 if result["total"] == 0:
-                    _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                    # Nothing contains the words as typed: retry typo-tolerant.
+                    match = "fuzzy"
+                    result = search_opportunities(keyword, 0, 10, match=match)
+                if result["total"] == 0:
+                    _reply("sendMessage", {
                         "chat_id": chat_id,
                         "text": f"No results found for \"<b>{keyword}</b>\".",
                         "parse_mode": "HTML"
                     })
                 else:
-                    lines = [f"<b>Results for \"{keyword}\" ({result['total']} found):</b>\n"]
-                    for op in result["results"]:
-                        status = "🟢" if op["posted_to_telegram"] else "🟡"
-                        date_str = str(op.get("created_at", ""))[:10] if op.get("created_at") else "?"
-                        lines.append(f"{status} <b>{op['title']}</b>\n📅 {date_str} | <a href='{op['link']}'>Link</a>")
-                    msg = "\n\n".join(lines)
-                    kb = build_search_keyboard(0, result["total"], keyword) if result["total"] > 10 else {"inline_keyboard": [[{"text": "🔙 Main Menu", "callback_data": "main_menu"}]]}
-                    _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                    msg = _format_search_results(keyword, result, match)
+                    kb = build_search_keyboard(0, result["total"], keyword, match) if result["total"] > 10 else {"inline_keyboard": [[{"text": "🔙 Main Menu", "callback_data": "main_menu"}]]}
+                    _reply("sendMessage", {
                         "chat_id": chat_id,
                         "text": msg,
                         "parse_mode": "HTML",
@@ -429,24 +364,8 @@ def process_telegram_update(data, run_in_background=None):
                     })
             return {"ok": True}
         if text and text.startswith("/help"):
-            msg = (
-                "<b>Available commands:</b>\n\n"
-                "/start - Show the main menu\n"
-                "/myid - Show your Telegram user ID\n"
-                "/help - Show this message\n"
-                "/search &lt;keyword&gt; - Search opportunities by title, description, or tags\n"
-                "/request_admin - Request admin access from the owner\n\n"
-                "<i>Owner-only:</i>\n"
-                "/add_admin &lt;id&gt; - Add admin\n"
-                "/remove_admin &lt;id&gt; - Remove an admin\n"
-                "/list_admins - List all admins\n"
-                "/add_scrape HH:MM - Add auto-scrape time (UTC)\n"
-                "/add_post HH:MM - Add auto-post time (UTC)\n"
-                "/remove_scrape HH:MM - Remove a scrape time\n"
-                "/remove_post HH:MM - Remove a post time\n"
-                "/list_schedules - List all schedule times"
-            )
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+            msg = _HELP_TEXT
+            _reply("sendMessage", {
                 "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
             })
             return {"ok": True}
@@ -475,7 +394,7 @@ def process_telegram_update(data, run_in_background=None):
                     "❌ Failed to create a Telegraph account."
                 ]
 
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+            _reply("sendMessage", {
                 "chat_id": chat_id, "text": "\n".join(lines), "parse_mode": "HTML"
             })
             return {"ok": True}
@@ -490,7 +409,7 @@ def process_telegram_update(data, run_in_background=None):
                 )
             })
             if BOT_OWNER_ID:
-                _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                _reply("sendMessage", {
                     "chat_id": BOT_OWNER_ID,
                     "text": (
                         f"👤 <b>Admin request</b>\n"
@@ -508,7 +427,7 @@ def process_telegram_update(data, run_in_background=None):
                 })
             return {"ok": True}
         if not _is_authorized(user_id):
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+            _reply("sendMessage", {
                 "chat_id": chat_id,
                 "text": (
                     "Sorry, you are not authorized to control this bot.\n\n"
@@ -522,10 +441,10 @@ def process_telegram_update(data, run_in_background=None):
         chat_id = callback_query["message"]["chat"]["id"]
         if not _is_authorized(user_id):
             if callback_id:
-                _http.post(f"{TELEGRAM_API_URL}/answerCallbackQuery", json={"callback_query_id": callback_id, "text": "Not authorized.", "show_alert": True})
+                _side_call("answerCallbackQuery", {"callback_query_id": callback_id, "text": "Not authorized.", "show_alert": True})
             return {"ok": True}
         if callback_id:
-            _http.post(f"{TELEGRAM_API_URL}/answerCallbackQuery", json={"callback_query_id": callback_id})
+            _side_call("answerCallbackQuery", {"callback_query_id": callback_id})
         chat_id = callback_query["message"]["chat"]["id"]
         text = callback_query["data"]
 
@@ -541,1137 +460,1252 @@ def process_telegram_update(data, run_in_background=None):
             if add_admin(target_id, user_id, name):
                 _admin_ids.add(target_id)
                 _admin_names[target_id] = name
-                _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                _reply("sendMessage", {
                     "chat_id": chat_id,
                     "text": f"User <code>{target_id}</code> ({name}) added as admin.",
                     "parse_mode": "HTML"
                 })
             else:
-                _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                _reply("sendMessage", {
                     "chat_id": chat_id,
                     "text": f"User <code>{target_id}</code> is already an admin.",
                     "parse_mode": "HTML"
                 })
         else:
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+            _reply("sendMessage", {
                 "chat_id": chat_id,
                 "text": "Could not read user ID from that contact. Ask them to message me first, then try again.",
                 "parse_mode": "HTML"
             })
         return {"ok": True}
 
-    if message and text.startswith("/add_admin") and user_id == BOT_OWNER_ID:
-        parts = text.split()
-        if len(parts) != 2:
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                "chat_id": chat_id,
-                "text": (
-                    "<b>Add an Admin</b>\n\n"
-                    "Two ways:\n\n"
-                    "1️⃣ <b>Forward a message</b>\n"
-                    "  Forward any message from the person here.\n\n"
-                    "2️⃣ <b>Manual</b> — <code>/add_admin &lt;user_id&gt;</code>\n\n"
-                    "3️⃣ <b>Share contact</b> — tap 📎 &gt; Contact"
-                ),
-                "parse_mode": "HTML"
-            })
-        else:
-            try:
-                target_id = int(parts[1])
-                if add_admin(target_id, user_id):
-                    _admin_ids.add(target_id)
-                    _admin_names[target_id] = ""
-                    msg = f"User <code>{target_id}</code> added as admin."
-                else:
-                    msg = f"User <code>{target_id}</code> is already an admin."
-            except ValueError:
-                msg = "Invalid user ID."
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
-            })
-    elif message and text.startswith("/remove_admin") and user_id == BOT_OWNER_ID:
-        parts = text.split()
-        if len(parts) != 2:
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                "chat_id": chat_id, "text": "Usage: /remove_admin &lt;telegram_user_id&gt;", "parse_mode": "HTML"
-            })
-        else:
-            try:
-                target_id = int(parts[1])
-                if target_id == BOT_OWNER_ID:
-                    msg = "Cannot remove the owner."
-                elif remove_admin(target_id):
-                    _admin_ids.discard(target_id)
-                    _admin_names.pop(target_id, None)
-                    msg = f"User <code>{target_id}</code> removed from admins."
-                else:
-                    msg = f"User <code>{target_id}</code> is not an admin."
-            except ValueError:
-                msg = "Invalid user ID."
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
-            })
-    elif message and text.startswith("/list_admins") and user_id == BOT_OWNER_ID:
-        _refresh_admin_cache()
-        if not _admin_ids:
-            msg = "<b>No admins found.</b>"
-        else:
-            lines = ["<b>📋 Bot Admins</b>\n"]
-            for i, aid in enumerate(sorted(_admin_ids), 1):
-                name = _admin_names.get(aid, "")
-                if name:
-                    lines.append(f"{i}. {name} — <code>{aid}</code>")
-                else:
-                    lines.append(f"{i}. <code>{aid}</code>")
-            msg = "\n".join(lines)
-        _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-            "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
+    ctx = UpdateContext(chat_id=chat_id, user_id=user_id, text=text or "",
+                        message=message, callback_query=callback_query)
+    is_owner = user_id == BOT_OWNER_ID
+    if message:
+        if text and text.startswith("/"):
+            commands.dispatch(_command_word(text), ctx, is_owner)
+        elif is_owner and message.get("photo"):
+            _on_owner_photo(ctx)
+        elif is_owner and text:
+            _on_owner_text(ctx)
+    elif callback_query:
+        if not callbacks.dispatch(text, ctx, is_owner):
+            _on_unhandled_callback(ctx)
+
+
+# --- Owner commands ---
+
+@commands.exact("/add_admin", owner_only=True)
+def _cmd_add_admin(ctx):
+    chat_id, user_id, text = ctx.chat_id, ctx.user_id, ctx.text
+    parts = text.split()
+    if len(parts) != 2:
+        _reply("sendMessage", {
+            "chat_id": chat_id,
+            "text": (
+                "<b>Add an Admin</b>\n\n"
+                "Two ways:\n\n"
+                "1️⃣ <b>Forward a message</b>\n"
+                "  Forward any message from the person here.\n\n"
+                "2️⃣ <b>Manual</b> — <code>/add_admin &lt;user_id&gt;</code>\n\n"
+                "3️⃣ <b>Share contact</b> — tap 📎 &gt; Contact"
+            ),
+            "parse_mode": "HTML"
         })
-    elif message and text.startswith("/add_scrape") and user_id == BOT_OWNER_ID:
-        parts = text.strip().split(maxsplit=1)
-        if len(parts) < 2:
-            msg = "Usage: <code>/add_scrape HH:MM</code> (24h UTC) or <code>/add_scrape 6:30 AM</code>"
-        else:
-            time_str = parse_time_12h(parts[1])
-            if not time_str:
-                msg = "❌ Invalid time. Use 24h like <code>06:30</code> or 12h like <code>6:30 AM</code>."
-            elif add_schedule_time(time_str, "scrape"):
-                msg = f"✅ Search time added: <code>{time_str}</code> ({format_time_12h(time_str)})"
-                reload_schedules()
+    else:
+        try:
+            target_id = int(parts[1])
+            if add_admin(target_id, user_id):
+                _admin_ids.add(target_id)
+                _admin_names[target_id] = ""
+                msg = f"User <code>{target_id}</code> added as admin."
             else:
-                msg = f"❌ Search time <code>{time_str}</code> already exists."
-        _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                msg = f"User <code>{target_id}</code> is already an admin."
+        except ValueError:
+            msg = "Invalid user ID."
+        _reply("sendMessage", {
             "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
         })
-    elif message and text.startswith("/add_post") and user_id == BOT_OWNER_ID:
-        parts = text.strip().split(maxsplit=1)
-        if len(parts) < 2:
-            msg = "Usage: <code>/add_post HH:MM</code> (24h UTC) or <code>/add_post 6:30 AM</code>"
-        else:
-            time_str = parse_time_12h(parts[1])
-            if not time_str:
-                msg = "❌ Invalid time."
-            elif add_schedule_time(time_str, "post"):
-                msg = f"✅ Post time added: <code>{time_str}</code> ({format_time_12h(time_str)})"
-                reload_schedules()
-            else:
-                msg = f"❌ Post time <code>{time_str}</code> already exists."
-        _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-            "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
+
+
+@commands.exact("/remove_admin", owner_only=True)
+def _cmd_remove_admin(ctx):
+    chat_id, text = ctx.chat_id, ctx.text
+    parts = text.split()
+    if len(parts) != 2:
+        _reply("sendMessage", {
+            "chat_id": chat_id, "text": "Usage: /remove_admin &lt;telegram_user_id&gt;", "parse_mode": "HTML"
         })
-    elif message and text.startswith("/remove_scrape") and user_id == BOT_OWNER_ID:
-        parts = text.strip().split(maxsplit=1)
-        if len(parts) < 2:
-            msg = "Usage: <code>/remove_scrape HH:MM</code> (24h UTC) or <code>/remove_scrape 6:30 AM</code>"
-        else:
-            time_str = parse_time_12h(parts[1])
-            if not time_str:
-                msg = "❌ Invalid time."
-            elif remove_schedule_time(time_str, "scrape"):
-                msg = f"🗑️ Search time removed: <code>{time_str}</code> ({format_time_12h(time_str)})"
-                reload_schedules()
+    else:
+        try:
+            target_id = int(parts[1])
+            if target_id == BOT_OWNER_ID:
+                msg = "Cannot remove the owner."
+            elif remove_admin(target_id):
+                _admin_ids.discard(target_id)
+                _admin_names.pop(target_id, None)
+                msg = f"User <code>{target_id}</code> removed from admins."
             else:
-                msg = f"❌ Search time not found."
-        _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                msg = f"User <code>{target_id}</code> is not an admin."
+        except ValueError:
+            msg = "Invalid user ID."
+        _reply("sendMessage", {
             "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
         })
-    elif message and text.startswith("/remove_post") and user_id == BOT_OWNER_ID:
-        parts = text.strip().split(maxsplit=1)
-        if len(parts) < 2:
-            msg = "Usage: <code>/remove_post HH:MM</code> (24h UTC) or <code>/remove_post 6:30 AM</code>"
-        else:
-            time_str = parse_time_12h(parts[1])
-            if not time_str:
-                msg = "❌ Invalid time."
-            elif remove_schedule_time(time_str, "post"):
-                msg = f"🗑️ Post time removed: <code>{time_str}</code> ({format_time_12h(time_str)})"
-                reload_schedules()
+
+
+@commands.exact("/list_admins", owner_only=True)
+def _cmd_list_admins(ctx):
+    chat_id = ctx.chat_id
+    _refresh_admin_cache()
+    if not _admin_ids:
+        msg = "<b>No admins found.</b>"
+    else:
+        lines = ["<b>📋 Bot Admins</b>\n"]
+        for i, aid in enumerate(sorted(_admin_ids), 1):
+            name = _admin_names.get(aid, "")
+            if name:
+                lines.append(f"{i}. {name} — <code>{aid}</code>")
             else:
-                msg = f"❌ Post time not found."
-        _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-            "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
-        })
-    elif message and text.startswith("/list_schedules") and user_id == BOT_OWNER_ID:
-        scrape_times = get_schedule_times("scrape")
-        post_times = get_schedule_times("post")
-        lines = []
-        if scrape_times:
-            lines.append("<b>⏰ Search Times (UTC):</b>")
-            for i, t in enumerate(scrape_times, 1):
-                lines.append(f"{i}. <code>{t}</code> ({format_time_12h(t)})")
+                lines.append(f"{i}. <code>{aid}</code>")
+        msg = "\n".join(lines)
+    _reply("sendMessage", {
+        "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
+    })
+
+
+@commands.exact("/add_scrape", owner_only=True)
+def _cmd_add_scrape(ctx):
+    chat_id, text = ctx.chat_id, ctx.text
+    parts = text.strip().split(maxsplit=1)
+    if len(parts) < 2:
+        msg = "Usage: <code>/add_scrape HH:MM</code> (24h UTC) or <code>/add_scrape 6:30 AM</code>"
+    else:
+        time_str = parse_time_12h(parts[1])
+        if not time_str:
+            msg = "❌ Invalid time. Use 24h like <code>06:30</code> or 12h like <code>6:30 AM</code>."
+        elif add_schedule_time(time_str, "scrape"):
+            msg = f"✅ Search time added: <code>{time_str}</code> ({format_time_12h(time_str)})"
+            _reload_schedules()
         else:
-            lines.append("<b>⏰ Search Times:</b> None")
-        if post_times:
-            lines.append("\n<b>📤 Post Times (UTC):</b>")
-            for i, t in enumerate(post_times, 1):
-                lines.append(f"{i}. <code>{t}</code> ({format_time_12h(t)})")
+            msg = f"❌ Search time <code>{time_str}</code> already exists."
+    _reply("sendMessage", {
+        "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
+    })
+
+
+@commands.exact("/add_post", owner_only=True)
+def _cmd_add_post(ctx):
+    chat_id, text = ctx.chat_id, ctx.text
+    parts = text.strip().split(maxsplit=1)
+    if len(parts) < 2:
+        msg = "Usage: <code>/add_post HH:MM</code> (24h UTC) or <code>/add_post 6:30 AM</code>"
+    else:
+        time_str = parse_time_12h(parts[1])
+        if not time_str:
+            msg = "❌ Invalid time."
+        elif add_schedule_time(time_str, "post"):
+            msg = f"✅ Post time added: <code>{time_str}</code> ({format_time_12h(time_str)})"
+            _reload_schedules()
         else:
-            lines.append("\n<b>📤 Post Times:</b> None")
-        msg = "\n".join(lines)
-        _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+            msg = f"❌ Post time <code>{time_str}</code> already exists."
+    _reply("sendMessage", {
+        "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
+    })
+
+
+@commands.exact("/remove_scrape", owner_only=True)
+def _cmd_remove_scrape(ctx):
+    chat_id, text = ctx.chat_id, ctx.text
+    parts = text.strip().split(maxsplit=1)
+    if len(parts) < 2:
+        msg = "Usage: <code>/remove_scrape HH:MM</code> (24h UTC) or <code>/remove_scrape 6:30 AM</code>"
+    else:
+        time_str = parse_time_12h(parts[1])
+        if not time_str:
+            msg = "❌ Invalid time."
+        elif remove_schedule_time(time_str, "scrape"):
+            msg = f"🗑️ Search time removed: <code>{time_str}</code> ({format_time_12h(time_str)})"
+            _reload_schedules()
+        else:
+            msg = f"❌ Search time not found."
+    _reply("sendMessage", {
+        "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
+    })
+
+
+@commands.exact("/remove_post", owner_only=True)
+def _cmd_remove_post(ctx):
+    chat_id, text = ctx.chat_id, ctx.text
+    parts = text.strip().split(maxsplit=1)
+    if len(parts) < 2:
+        msg = "Usage: <code>/remove_post HH:MM</code> (24h UTC) or <code>/remove_post 6:30 AM</code>"
+    else:
+        time_str = parse_time_12h(parts[1])
+        if not time_str:
+            msg = "❌ Invalid time."
+        elif remove_schedule_time(time_str, "post"):
+            msg = f"🗑️ Post time removed: <code>{time_str}</code> ({format_time_12h(time_str)})"
+            _reload_schedules()
+        else:
+            msg = f"❌ Post time not found."
+    _reply("sendMessage", {
+        "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
+    })
+
+
+@commands.exact("/list_schedules", owner_only=True)
+def _cmd_list_schedules(ctx):
+    chat_id = ctx.chat_id
+    scrape_times = get_schedule_times("scrape")
+    post_times = get_schedule_times("post")
+    lines = []
+    if scrape_times:
+        lines.append("<b>⏰ Search Times (UTC):</b>")
+        for i, t in enumerate(scrape_times, 1):
+            lines.append(f"{i}. <code>{t}</code> ({format_time_12h(t)})")
+    else:
+        lines.append("<b>⏰ Search Times:</b> None")
+    if post_times:
+        lines.append("\n<b>📤 Post Times (UTC):</b>")
+        for i, t in enumerate(post_times, 1):
+            lines.append(f"{i}. <code>{t}</code> ({format_time_12h(t)})")
+    else:
+        lines.append("\n<b>📤 Post Times:</b> None")
+    msg = "\n".join(lines)
+    _reply("sendMessage", {
+        "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
+    })
+
+
+def _on_owner_photo(ctx):
+    wizard = _loaded_custom_post()
+    if wizard is not None and wizard.take_photo(ctx):
+        return
+    _reply("sendMessage", {
+        "chat_id": ctx.chat_id,
+        "text": "Received a photo, but no pending action needs one.",
+        "parse_mode": "HTML"
+    })
+
+
+def _on_owner_text(ctx):
+    chat_id, user_id, text = ctx.chat_id, ctx.user_id, ctx.text
+    wizard = _loaded_custom_post()
+    if wizard is not None and wizard.take_text(ctx):
+        return {"ok": True}
+    pending_type = pop_pending_schedule_input(user_id)
+    if pending_type:
+        time_str = parse_time_12h(text)
+        if not time_str:
+            msg = "❌ Invalid time. Try <code>6:30 AM</code> or <code>06:30</code> (UTC)."
+        elif add_schedule_time(time_str, pending_type):
+            type_label = "Scrape" if pending_type == "scrape" else "Post"
+            msg = f"✅ {type_label} time added: <code>{time_str}</code> ({format_time_12h(time_str)})"
+            _reload_schedules()
+        else:
+            type_label = "Scrape" if pending_type == "scrape" else "Post"
+            msg = f"❌ {type_label} time <code>{time_str}</code> already exists."
+        _reply("sendMessage", {
             "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
         })
-    elif message and message.get("photo") and user_id == BOT_OWNER_ID:
-        state = _get_custom_post_state(user_id)
-        if state and state.get("step") == "image":
-            file_id = message["photo"][-1]["file_id"]
-            _advance_custom_post_step(user_id, chat_id, image_file_id=file_id)
-            _http.post(f"{TELEGRAM_API_URL}/deleteMessage", json={
-                "chat_id": chat_id, "message_id": message["message_id"]
-            })
-            return {"ok": True}
-        _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-            "chat_id": chat_id,
-            "text": "Received a photo, but no pending action needs one.",
-            "parse_mode": "HTML"
-        })
         return {"ok": True}
-    elif message and user_id == BOT_OWNER_ID and text and not text.startswith("/"):
-        state = _get_custom_post_state(user_id)
-        if state:
-            step = state.get("step")
-            if step == "title":
-                _advance_custom_post_step(user_id, chat_id, title=text)
-            elif step == "description":
-                _advance_custom_post_step(user_id, chat_id, description=text)
-            elif step == "image":
-                _advance_custom_post_step(user_id, chat_id, image_file_id=text)
-            elif step == "link":
-                _advance_custom_post_step(user_id, chat_id, link=text)
-            elif step == "deadline":
-                _advance_custom_post_step(user_id, chat_id, deadline=text)
-            elif state.get("editing"):
-                _advance_custom_post_step(user_id, chat_id, **{step: text})
-            _http.post(f"{TELEGRAM_API_URL}/deleteMessage", json={
-                "chat_id": chat_id, "message_id": message["message_id"]
+    # Check if user sent a chat ID to add a channel
+    try:
+        potential_chat_id = int(text.strip().lstrip("-"))
+        text_stripped = text.strip()
+        # Accept numeric chat IDs (positive for users, negative for groups/channels)
+        if text_stripped.lstrip("-").isdigit():
+            chat_id_val = int(text_stripped)
+            add_channel(chat_id_val, title=f"Channel {chat_id_val}", added_by=user_id)
+            _reply("sendMessage", {
+                "chat_id": chat_id,
+                "text": f"✅ Channel <code>{chat_id_val}</code> added!",
+                "parse_mode": "HTML"
             })
             return {"ok": True}
-        pending_type = pop_pending_schedule_input(user_id)
-        if pending_type:
-            time_str = parse_time_12h(text)
-            if not time_str:
-                msg = "❌ Invalid time. Try <code>6:30 AM</code> or <code>06:30</code> (UTC)."
-            elif add_schedule_time(time_str, pending_type):
-                type_label = "Scrape" if pending_type == "scrape" else "Post"
-                msg = f"✅ {type_label} time added: <code>{time_str}</code> ({format_time_12h(time_str)})"
-                reload_schedules()
+    except (ValueError, TypeError):
+        pass
+
+
+# --- Callback routes ---
+
+@callbacks.exact("noop")
+def _cb_noop(ctx):
+    callback_query = ctx.callback_query
+    callback_id = callback_query.get("id")
+    if callback_id:
+        _side_call("answerCallbackQuery", {"callback_query_id": callback_id})
+
+
+@callbacks.exact("main_menu")
+def _cb_main_menu(ctx):
+    chat_id, user_id, callback_query = ctx.chat_id, ctx.user_id, ctx.callback_query
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": (
+            f"<b>{BOT_FIRST_NAME}</b>\n\n"
+            "Use the menu below to control the bot, get analytics, and view opportunities.\n\n"
+            "<i>Created by 👉 @twolamaa </i>"
+        ),
+        "parse_mode": "HTML",
+        "reply_markup": build_main_menu(user_id)
+    })
+
+
+@callbacks.exact("admin_menu", owner_only=True)
+def _cb_admin_menu(ctx):
+    chat_id, callback_query = ctx.chat_id, ctx.callback_query
+    _refresh_admin_cache()
+    admins = sorted(_admin_ids)
+    lines = ["<b>👥 Admin Management</b>\n"]
+    if admins:
+        lines.append("<b>Current admins:</b>")
+        for i, aid in enumerate(admins, 1):
+            name = _admin_names.get(aid, "")
+            if aid == BOT_OWNER_ID:
+                lines.append(f"{i}. {name} — <code>{aid}</code> (you)")
+            elif name:
+                lines.append(f"{i}. {name} — <code>{aid}</code>")
             else:
-                type_label = "Scrape" if pending_type == "scrape" else "Post"
-                msg = f"❌ {type_label} time <code>{time_str}</code> already exists."
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                "chat_id": chat_id, "text": msg, "parse_mode": "HTML"
-            })
-            return {"ok": True}
-        # Check if user sent a chat ID to add a channel
+                lines.append(f"{i}. <code>{aid}</code>")
+    else:
+        lines.append("No admins yet.")
+    pending_admins = get_pending_admins()
+    if pending_admins:
+        lines.append(f"\n<b>⏳ Pending requests:</b>")
+        for i, pa in enumerate(pending_admins, 1):
+            lines.append(f"{i}. {pa['name']} — <code>{pa['user_id']}</code>")
+    lines.append("\n<i>Share an invite link to let someone add themselves.</i>")
+    msg = "\n".join(lines)
+    remove_buttons = []
+    for aid in admins:
+        if aid != BOT_OWNER_ID:
+            label = f"❌ Remove {_admin_names.get(aid, aid)}"
+            remove_buttons.append([
+                {"text": label, "callback_data": f"remove_admin_click_{aid}"}
+            ])
+    pending_buttons = []
+    for pa in pending_admins:
+        uid = pa["user_id"]
+        pending_buttons.append([
+            {"text": f"✅ Approve {uid}", "callback_data": f"approve_pending_{uid}"},
+            {"text": f"❌ Reject {uid}", "callback_data": f"reject_pending_{uid}"}
+        ])
+    keyboard = pending_buttons + remove_buttons + [
+        [{"text": "🔗 Generate Invite Link", "callback_data": "generate_invite"}],
+        [{"text": "🔙 Main Menu", "callback_data": "main_menu"}]
+    ]
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": msg,
+        "parse_mode": "HTML",
+        "reply_markup": {"inline_keyboard": keyboard}
+    })
+
+
+@callbacks.exact("generate_invite", owner_only=True)
+def _cb_generate_invite(ctx):
+    chat_id, user_id, callback_query = ctx.chat_id, ctx.user_id, ctx.callback_query
+    global BOT_USERNAME
+    if not BOT_USERNAME:
         try:
-            potential_chat_id = int(text.strip().lstrip("-"))
-            text_stripped = text.strip()
-            # Accept numeric chat IDs (positive for users, negative for groups/channels)
-            if text_stripped.lstrip("-").isdigit():
-                chat_id_val = int(text_stripped)
-                add_channel(chat_id_val, title=f"Channel {chat_id_val}", added_by=user_id)
-                _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                    "chat_id": chat_id,
-                    "text": f"✅ Channel <code>{chat_id_val}</code> added!",
-                    "parse_mode": "HTML"
-                })
-                return {"ok": True}
-        except (ValueError, TypeError):
-            pass
-    elif callback_query:
-        if text == "noop":
-            callback_id = callback_query.get("id")
-            if callback_id:
-                _http.post(f"{TELEGRAM_API_URL}/answerCallbackQuery", json={"callback_query_id": callback_id})
-        elif text == "main_menu":
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": (
-                    f"<b>{BOT_FIRST_NAME}</b>\n\n"
-                    "Use the menu below to control the bot, get analytics, and view opportunities.\n\n"
-                    "<i>Created by 👉 @twolamaa </i>"
-                ),
-                "parse_mode": "HTML",
-                "reply_markup": build_main_menu(user_id)
-            })
-        elif text == "admin_menu" and user_id == BOT_OWNER_ID:
-            _refresh_admin_cache()
-            admins = sorted(_admin_ids)
-            lines = ["<b>👥 Admin Management</b>\n"]
-            if admins:
-                lines.append("<b>Current admins:</b>")
-                for i, aid in enumerate(admins, 1):
-                    name = _admin_names.get(aid, "")
-                    if aid == BOT_OWNER_ID:
-                        lines.append(f"{i}. {name} — <code>{aid}</code> (you)")
-                    elif name:
-                        lines.append(f"{i}. {name} — <code>{aid}</code>")
-                    else:
-                        lines.append(f"{i}. <code>{aid}</code>")
-            else:
-                lines.append("No admins yet.")
-            pending_admins = get_pending_admins()
-            if pending_admins:
-                lines.append(f"\n<b>⏳ Pending requests:</b>")
-                for i, pa in enumerate(pending_admins, 1):
-                    lines.append(f"{i}. {pa['name']} — <code>{pa['user_id']}</code>")
-            lines.append("\n<i>Share an invite link to let someone add themselves.</i>")
-            msg = "\n".join(lines)
-            remove_buttons = []
-            for aid in admins:
-                if aid != BOT_OWNER_ID:
-                    label = f"❌ Remove {_admin_names.get(aid, aid)}"
-                    remove_buttons.append([
-                        {"text": label, "callback_data": f"remove_admin_click_{aid}"}
-                    ])
-            pending_buttons = []
-            for pa in pending_admins:
-                uid = pa["user_id"]
-                pending_buttons.append([
-                    {"text": f"✅ Approve {uid}", "callback_data": f"approve_pending_{uid}"},
-                    {"text": f"❌ Reject {uid}", "callback_data": f"reject_pending_{uid}"}
-                ])
-            keyboard = pending_buttons + remove_buttons + [
-                [{"text": "🔗 Generate Invite Link", "callback_data": "generate_invite"}],
+            me = _http.post(f"{TELEGRAM_API_URL}/getMe").json()
+            BOT_USERNAME = me.get("result", {}).get("username", "") or ""
+        except Exception:
+            BOT_USERNAME = ""
+    token = secrets.token_hex(8)
+    add_invite_token(token, user_id)
+    link = f"https://t.me/{BOT_USERNAME}?start=invite_{token}" if BOT_USERNAME else f"Invite code: <code>invite_{token}</code>"
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": (
+            "<b>🔗 Invite Link Generated</b>\n\n"
+            f"Share this with the person you want to add:\n\n"
+            f"<code>{link}</code>\n\n"
+            "Once they click it and start the bot, they'll be auto-added as an admin.\n\n"
+            "<i>One-time use only.</i>"
+        ),
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True,
+        "reply_markup": {
+            "inline_keyboard": [
+                [{"text": "👥 Admin Menu", "callback_data": "admin_menu"}]
+            ]
+        }
+    })
+
+
+@callbacks.exact("list_schedules", owner_only=True)
+def _cb_list_schedules(ctx):
+    chat_id, callback_query = ctx.chat_id, ctx.callback_query
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": "<b>⏰ Schedule Management</b>\n\nChoose a schedule type to manage:",
+        "parse_mode": "HTML",
+        "reply_markup": {
+            "inline_keyboard": [
+                [{"text": "⏰ Search Schedule", "callback_data": "view_scrape_schedule"}],
+                [{"text": "📤 Post Schedule", "callback_data": "view_post_schedule"}],
                 [{"text": "🔙 Main Menu", "callback_data": "main_menu"}]
             ]
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": msg,
-                "parse_mode": "HTML",
-                "reply_markup": {"inline_keyboard": keyboard}
-            })
-        elif text == "generate_invite" and user_id == BOT_OWNER_ID:
-            global BOT_USERNAME
-            if not BOT_USERNAME:
-                try:
-                    me = _http.post(f"{TELEGRAM_API_URL}/getMe").json()
-                    BOT_USERNAME = me.get("result", {}).get("username", "") or ""
-                except Exception:
-                    BOT_USERNAME = ""
-            token = secrets.token_hex(8)
-            add_invite_token(token, user_id)
-            link = f"https://t.me/{BOT_USERNAME}?start=invite_{token}" if BOT_USERNAME else f"Invite code: <code>invite_{token}</code>"
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": (
-                    "<b>🔗 Invite Link Generated</b>\n\n"
-                    f"Share this with the person you want to add:\n\n"
-                    f"<code>{link}</code>\n\n"
-                    "Once they click it and start the bot, they'll be auto-added as an admin.\n\n"
-                    "<i>One-time use only.</i>"
-                ),
-                "parse_mode": "HTML",
-                "disable_web_page_preview": True,
-                "reply_markup": {
-                    "inline_keyboard": [
-                        [{"text": "👥 Admin Menu", "callback_data": "admin_menu"}]
-                    ]
-                }
-            })
-        elif text == "list_schedules" and user_id == BOT_OWNER_ID:
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": "<b>⏰ Schedule Management</b>\n\nChoose a schedule type to manage:",
-                "parse_mode": "HTML",
-                "reply_markup": {
-                    "inline_keyboard": [
-                        [{"text": "⏰ Search Schedule", "callback_data": "view_scrape_schedule"}],
-                        [{"text": "📤 Post Schedule", "callback_data": "view_post_schedule"}],
-                        [{"text": "🔙 Main Menu", "callback_data": "main_menu"}]
-                    ]
-                }
-            })
-        elif text == "view_scrape_schedule" and user_id == BOT_OWNER_ID:
-            times = get_schedule_times("scrape")
-            if times:
-                lines = ["<b>⏰ Search Times (UTC):</b>"]
-                for i, t in enumerate(times, 1):
-                    lines.append(f"{i}. <code>{t}</code> ({format_time_12h(t)})")
-            else:
-                lines = ["<b>⏰ Search Times:</b> None configured."]
-            txt = "\n".join(lines)
-            rm = [[{"text": f"❌ {format_time_12h(t)}", "callback_data": f"remove_scrape_{t}"}] for t in times]
-            keyboard = rm + [
-                [{"text": "➕ Add Search Time", "callback_data": "add_scrape_prompt"}],
-                [{"text": "🔙 Schedules", "callback_data": "list_schedules"}]
+        }
+    })
+
+
+@callbacks.exact("view_scrape_schedule", owner_only=True)
+def _cb_view_scrape_schedule(ctx):
+    chat_id, callback_query = ctx.chat_id, ctx.callback_query
+    times = get_schedule_times("scrape")
+    if times:
+        lines = ["<b>⏰ Search Times (UTC):</b>"]
+        for i, t in enumerate(times, 1):
+            lines.append(f"{i}. <code>{t}</code> ({format_time_12h(t)})")
+    else:
+        lines = ["<b>⏰ Search Times:</b> None configured."]
+    txt = "\n".join(lines)
+    rm = [[{"text": f"❌ {format_time_12h(t)}", "callback_data": f"remove_scrape_{t}"}] for t in times]
+    keyboard = rm + [
+        [{"text": "➕ Add Search Time", "callback_data": "add_scrape_prompt"}],
+        [{"text": "🔙 Schedules", "callback_data": "list_schedules"}]
+    ]
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": txt,
+        "parse_mode": "HTML",
+        "reply_markup": {"inline_keyboard": keyboard}
+    })
+
+
+@callbacks.exact("view_post_schedule", owner_only=True)
+def _cb_view_post_schedule(ctx):
+    chat_id, callback_query = ctx.chat_id, ctx.callback_query
+    times = get_schedule_times("post")
+    if times:
+        lines = ["<b>📤 Post Times (UTC):</b>"]
+        for i, t in enumerate(times, 1):
+            lines.append(f"{i}. <code>{t}</code> ({format_time_12h(t)})")
+    else:
+        lines = ["<b>📤 Post Times:</b> None configured."]
+    txt = "\n".join(lines)
+    rm = [[{"text": f"❌ {format_time_12h(t)}", "callback_data": f"remove_post_{t}"}] for t in times]
+    keyboard = rm + [
+        [{"text": "➕ Add Post Time", "callback_data": "add_post_prompt"}],
+        [{"text": "🔙 Schedules", "callback_data": "list_schedules"}]
+    ]
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": txt,
+        "parse_mode": "HTML",
+        "reply_markup": {"inline_keyboard": keyboard}
+    })
+
+
+@callbacks.exact("add_scrape_prompt", owner_only=True)
+def _cb_add_scrape_prompt(ctx):
+    chat_id, user_id, callback_query = ctx.chat_id, ctx.user_id, ctx.callback_query
+    set_pending_schedule_input(user_id, "scrape")
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": (
+            "<b>➕ Add Search Time</b>\n\n"
+            "Send me a time in 12-hour or 24-hour format, e.g.:\n"
+            "• <code>6:30 AM</code>\n"
+            "• <code>10:59 PM</code>\n"
+            "• <code>06:30</code>\n\n"
+            "All times are in <b>UTC</b>."
+        ),
+        "parse_mode": "HTML",
+        "reply_markup": {
+            "inline_keyboard": [
+                [{"text": "🔙 Search Schedule", "callback_data": "view_scrape_schedule"}]
             ]
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": txt,
-                "parse_mode": "HTML",
-                "reply_markup": {"inline_keyboard": keyboard}
-            })
-        elif text == "view_post_schedule" and user_id == BOT_OWNER_ID:
-            times = get_schedule_times("post")
-            if times:
-                lines = ["<b>📤 Post Times (UTC):</b>"]
-                for i, t in enumerate(times, 1):
-                    lines.append(f"{i}. <code>{t}</code> ({format_time_12h(t)})")
-            else:
-                lines = ["<b>📤 Post Times:</b> None configured."]
-            txt = "\n".join(lines)
-            rm = [[{"text": f"❌ {format_time_12h(t)}", "callback_data": f"remove_post_{t}"}] for t in times]
-            keyboard = rm + [
-                [{"text": "➕ Add Post Time", "callback_data": "add_post_prompt"}],
-                [{"text": "🔙 Schedules", "callback_data": "list_schedules"}]
+        }
+    })
+
+
+@callbacks.exact("add_post_prompt", owner_only=True)
+def _cb_add_post_prompt(ctx):
+    chat_id, user_id, callback_query = ctx.chat_id, ctx.user_id, ctx.callback_query
+    set_pending_schedule_input(user_id, "post")
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": (
+            "<b>➕ Add Post Time</b>\n\n"
+            "Send me a time in 12-hour or 24-hour format, e.g.:\n"
+            "• <code>8:00 AM</code>\n"
+            "• <code>2:00 PM</code>\n"
+            "• <code>14:00</code>\n\n"
+            "All times are in <b>UTC</b>."
+        ),
+        "parse_mode": "HTML",
+        "reply_markup": {
+            "inline_keyboard": [
+                [{"text": "🔙 Post Schedule", "callback_data": "view_post_schedule"}]
             ]
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": txt,
-                "parse_mode": "HTML",
-                "reply_markup": {"inline_keyboard": keyboard}
-            })
-        elif text == "add_scrape_prompt" and user_id == BOT_OWNER_ID:
-            set_pending_schedule_input(user_id, "scrape")
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": (
-                    "<b>➕ Add Search Time</b>\n\n"
-                    "Send me a time in 12-hour or 24-hour format, e.g.:\n"
-                    "• <code>6:30 AM</code>\n"
-                    "• <code>10:59 PM</code>\n"
-                    "• <code>06:30</code>\n\n"
-                    "All times are in <b>UTC</b>."
-                ),
-                "parse_mode": "HTML",
-                "reply_markup": {
-                    "inline_keyboard": [
-                        [{"text": "🔙 Search Schedule", "callback_data": "view_scrape_schedule"}]
-                    ]
-                }
-            })
-        elif text == "add_post_prompt" and user_id == BOT_OWNER_ID:
-            set_pending_schedule_input(user_id, "post")
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": (
-                    "<b>➕ Add Post Time</b>\n\n"
-                    "Send me a time in 12-hour or 24-hour format, e.g.:\n"
-                    "• <code>8:00 AM</code>\n"
-                    "• <code>2:00 PM</code>\n"
-                    "• <code>14:00</code>\n\n"
-                    "All times are in <b>UTC</b>."
-                ),
-                "parse_mode": "HTML",
-                "reply_markup": {
-                    "inline_keyboard": [
-                        [{"text": "🔙 Post Schedule", "callback_data": "view_post_schedule"}]
-                    ]
-                }
-            })
-        elif text.startswith("remove_scrape_") and user_id == BOT_OWNER_ID:
-            time_str = text[len("remove_scrape_"):]
-            removed = remove_schedule_time(time_str, "scrape")
-            if removed:
-                reload_schedules()
-            txt = f"🗑️ Removed search <code>{time_str}</code>." if removed else "❌ Not found."
-            times = get_schedule_times("scrape")
-            if times:
-                txt += "\n\n<b>⏰ Remaining Search Times:</b>\n" + "\n".join(f"{i}. <code>{t}</code> ({format_time_12h(t)})" for i, t in enumerate(times, 1))
-            rm = [[{"text": f"❌ {format_time_12h(t)}", "callback_data": f"remove_scrape_{t}"}] for t in times]
-            keyboard = rm + [
-                [{"text": "➕ Add Search Time", "callback_data": "add_scrape_prompt"}],
-                [{"text": "🔙 Schedules", "callback_data": "list_schedules"}]
+        }
+    })
+
+
+@callbacks.prefix("remove_scrape_", owner_only=True)
+def _cb_remove_scrape(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    time_str = text[len("remove_scrape_"):]
+    removed = remove_schedule_time(time_str, "scrape")
+    if removed:
+        _reload_schedules()
+    txt = f"🗑️ Removed search <code>{time_str}</code>." if removed else "❌ Not found."
+    times = get_schedule_times("scrape")
+    if times:
+        txt += "\n\n<b>⏰ Remaining Search Times:</b>\n" + "\n".join(f"{i}. <code>{t}</code> ({format_time_12h(t)})" for i, t in enumerate(times, 1))
+    rm = [[{"text": f"❌ {format_time_12h(t)}", "callback_data": f"remove_scrape_{t}"}] for t in times]
+    keyboard = rm + [
+        [{"text": "➕ Add Search Time", "callback_data": "add_scrape_prompt"}],
+        [{"text": "🔙 Schedules", "callback_data": "list_schedules"}]
+    ]
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": txt,
+        "parse_mode": "HTML",
+        "reply_markup": {"inline_keyboard": keyboard}
+    })
+
+
+@callbacks.prefix("remove_post_", owner_only=True)
+def _cb_remove_post(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    time_str = text[len("remove_post_"):]
+    removed = remove_schedule_time(time_str, "post")
+    if removed:
+        _reload_schedules()
+    txt = f"🗑️ Removed post <code>{time_str}</code>." if removed else "❌ Not found."
+    times = get_schedule_times("post")
+    if times:
+        txt += "\n\n<b>📤 Remaining Post Times:</b>\n" + "\n".join(f"{i}. <code>{t}</code> ({format_time_12h(t)})" for i, t in enumerate(times, 1))
+    rm = [[{"text": f"❌ {format_time_12h(t)}", "callback_data": f"remove_post_{t}"}] for t in times]
+    keyboard = rm + [
+        [{"text": "➕ Add Post Time", "callback_data": "add_post_prompt"}],
+        [{"text": "🔙 Schedules", "callback_data": "list_schedules"}]
+    ]
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": txt,
+        "parse_mode": "HTML",
+        "reply_markup": {"inline_keyboard": keyboard}
+    })
+
+
+@callbacks.prefix("remove_admin_click_", owner_only=True)
+def _cb_remove_admin_click(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    target_id = int(text.replace("remove_admin_click_", ""))
+    if target_id == BOT_OWNER_ID:
+        msg = "Cannot remove the owner."
+    elif remove_admin(target_id):
+        _admin_ids.discard(target_id)
+        _admin_names.pop(target_id, None)
+        msg = f"Admin <code>{target_id}</code> removed."
+    else:
+        msg = f"User <code>{target_id}</code> is not an admin."
+    _side_call("answerCallbackQuery", {
+        "callback_query_id": callback_query.get("id"),
+        "text": f"Admin {target_id} removed." if "removed" in msg else "Failed.",
+        "show_alert": False
+    })
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": msg,
+        "parse_mode": "HTML",
+        "reply_markup": {
+            "inline_keyboard": [
+                [{"text": "👥 Admin Menu", "callback_data": "admin_menu"}],
+                [{"text": "🔙 Main Menu", "callback_data": "main_menu"}]
             ]
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": txt,
-                "parse_mode": "HTML",
-                "reply_markup": {"inline_keyboard": keyboard}
-            })
-        elif text.startswith("remove_post_") and user_id == BOT_OWNER_ID:
-            time_str = text[len("remove_post_"):]
-            removed = remove_schedule_time(time_str, "post")
-            if removed:
-                reload_schedules()
-            txt = f"🗑️ Removed post <code>{time_str}</code>." if removed else "❌ Not found."
-            times = get_schedule_times("post")
-            if times:
-                txt += "\n\n<b>📤 Remaining Post Times:</b>\n" + "\n".join(f"{i}. <code>{t}</code> ({format_time_12h(t)})" for i, t in enumerate(times, 1))
-            rm = [[{"text": f"❌ {format_time_12h(t)}", "callback_data": f"remove_post_{t}"}] for t in times]
-            keyboard = rm + [
-                [{"text": "➕ Add Post Time", "callback_data": "add_post_prompt"}],
-                [{"text": "🔙 Schedules", "callback_data": "list_schedules"}]
+        }
+    })
+
+
+@callbacks.prefix("approve_pending_", owner_only=True)
+def _cb_approve_pending(ctx):
+    chat_id, user_id, text, callback_query = ctx.chat_id, ctx.user_id, ctx.text, ctx.callback_query
+    target_id = int(text.replace("approve_pending_", ""))
+    name = remove_pending_admin(target_id) or "Unknown"
+    if add_admin(target_id, user_id, name):
+        _admin_ids.add(target_id)
+        _admin_names[target_id] = name
+        txt = f"User <code>{target_id}</code> ({name}) approved as admin."
+        _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+            "chat_id": target_id,
+            "text": "🎉 You've been approved as an admin! Use /start to control the bot."
+        })
+    else:
+        txt = f"User <code>{target_id}</code> is already an admin."
+    _side_call("answerCallbackQuery", {
+        "callback_query_id": callback_query.get("id"),
+        "text": txt,
+        "show_alert": False
+    })
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": txt,
+        "parse_mode": "HTML",
+        "reply_markup": {
+            "inline_keyboard": [[{"text": "👥 Admin Menu", "callback_data": "admin_menu"}]]
+        }
+    })
+
+
+@callbacks.prefix("reject_pending_", owner_only=True)
+def _cb_reject_pending(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    target_id = int(text.replace("reject_pending_", ""))
+    name = remove_pending_admin(target_id) or "Unknown"
+    txt = f"User <code>{target_id}</code> ({name}) rejected."
+    _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+        "chat_id": target_id,
+        "text": "Your admin request was rejected by the owner."
+    })
+    _side_call("answerCallbackQuery", {
+        "callback_query_id": callback_query.get("id"),
+        "text": txt,
+        "show_alert": False
+    })
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": txt,
+        "parse_mode": "HTML",
+        "reply_markup": {
+            "inline_keyboard": [[{"text": "👥 Admin Menu", "callback_data": "admin_menu"}]]
+        }
+    })
+
+
+@callbacks.exact("channels", owner_only=True)
+def _cb_channels(ctx):
+    chat_id, callback_query = ctx.chat_id, ctx.callback_query
+    channels = get_active_channels()
+    lines = ["<b>📢 Channels</b>\n"]
+    if channels:
+        for i, ch in enumerate(channels, 1):
+            lines.append(f"{i}. {ch['title']} — <code>{ch['chat_id']}</code>")
+    else:
+        lines.append("No channels configured.")
+        if TELEGRAM_CHANNEL_ID:
+            lines.append(f"\nUsing <code>{TELEGRAM_CHANNEL_ID}</code> from TELEGRAM_CHANNEL_ID env var.")
+    txt = "\n".join(lines)
+    rm = [[{"text": f"❌ {ch['title']}", "callback_data": f"remove_channel_{ch['chat_id']}"}] for ch in channels]
+    keyboard = rm + [
+        [{"text": "➕ Add Channel", "callback_data": "add_channel_prompt"}],
+        [{"text": "🔙 Main Menu", "callback_data": "main_menu"}]
+    ]
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": txt,
+        "parse_mode": "HTML",
+        "reply_markup": {"inline_keyboard": keyboard}
+    })
+
+
+@callbacks.exact("add_channel_prompt", owner_only=True)
+def _cb_add_channel_prompt(ctx):
+    chat_id, callback_query = ctx.chat_id, ctx.callback_query
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": (
+            "<b>➕ Add a Channel</b>\n\n"
+            "Send me the chat ID of the channel or group.\n\n"
+            "Get the ID by:\n"
+            "1. Forward a message from the channel to <code>@getidsbot</code>\n"
+            "2. Or add me to the group and I'll auto-detect it\n\n"
+            "Group/channel IDs are negative numbers (e.g., <code>-1001234567890</code>)."
+        ),
+        "parse_mode": "HTML",
+        "reply_markup": {
+            "inline_keyboard": [
+                [{"text": "🔙 Channels", "callback_data": "channels"}]
             ]
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": txt,
-                "parse_mode": "HTML",
-                "reply_markup": {"inline_keyboard": keyboard}
-            })
-        elif text.startswith("remove_admin_click_") and user_id == BOT_OWNER_ID:
-            target_id = int(text.replace("remove_admin_click_", ""))
-            if target_id == BOT_OWNER_ID:
-                msg = "Cannot remove the owner."
-            elif remove_admin(target_id):
-                _admin_ids.discard(target_id)
-                _admin_names.pop(target_id, None)
-                msg = f"Admin <code>{target_id}</code> removed."
-            else:
-                msg = f"User <code>{target_id}</code> is not an admin."
-            _http.post(f"{TELEGRAM_API_URL}/answerCallbackQuery", json={
-                "callback_query_id": callback_query.get("id"),
-                "text": f"Admin {target_id} removed." if "removed" in msg else "Failed.",
-                "show_alert": False
-            })
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": msg,
-                "parse_mode": "HTML",
-                "reply_markup": {
+        }
+    })
+
+
+@callbacks.prefix("remove_channel_", owner_only=True)
+def _cb_remove_channel(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    try:
+        target_id = int(text.replace("remove_channel_", ""))
+        removed = remove_channel(target_id)
+        msg = f"🗑️ Channel <code>{target_id}</code> removed." if removed else "❌ Channel not found."
+    except ValueError:
+        msg = "❌ Invalid channel ID."
+    channels = get_active_channels()
+    lines = ["<b>📢 Channels</b>\n"]
+    if channels:
+        for i, ch in enumerate(channels, 1):
+            lines.append(f"{i}. {ch['title']} — <code>{ch['chat_id']}</code>")
+    else:
+        lines.append("No channels configured.")
+    txt = msg + "\n\n" + "\n".join(lines)
+    rm = [[{"text": f"❌ {ch['title']}", "callback_data": f"remove_channel_{ch['chat_id']}"}] for ch in channels]
+    keyboard = rm + [
+        [{"text": "➕ Add Channel", "callback_data": "add_channel_prompt"}],
+        [{"text": "🔙 Main Menu", "callback_data": "main_menu"}]
+    ]
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": txt,
+        "parse_mode": "HTML",
+        "reply_markup": {"inline_keyboard": keyboard}
+    })
+
+
+def _month_counts(year_month):
+    """Per-day counts for a "YYYY-MM" month and a "12 🟡 / 30 🟢" summary line."""
+    try:
+        year, month = map(int, year_month.split("-"))
+        last = monthrange(year, month)[1]
+    except ValueError:
+        return None, ""
+    counts = get_daily_counts(f"{year}-{month:02d}-01", f"{year}-{month:02d}-{last:02d}")
+    unposted = sum(u for u, _ in counts.values())
+    posted = sum(p for _, p in counts.values())
+    return counts, f"{unposted} 🟡 / {posted} 🟢"
+
+
+@callbacks.exact("posted_pick_year")
+def _cb_posted_pick_year(ctx):
+    chat_id, callback_query = ctx.chat_id, ctx.callback_query
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": "Pick a year:",
+        "parse_mode": "HTML",
+        "reply_markup": build_year_picker("posted")
+    })
+
+
+@callbacks.prefix("posted_pick_month_")
+def _cb_posted_pick_month(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    try:
+        year = int(text.split("posted_pick_month_")[-1])
+    except Exception:
+        year = datetime.utcnow().year
+    counts = get_daily_counts(f"{year}-01-01", f"{year}-12-31")
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": f"Pick a month for {year}:",
+        "parse_mode": "HTML",
+        "reply_markup": build_month_picker("posted", year, counts)
+    })
+
+
+@callbacks.prefix("posted_pick_day_")
+def _cb_posted_pick_day(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    try:
+        year_month = text.split("posted_pick_day_")[-1]
+    except Exception:
+        year_month = datetime.utcnow().strftime("%Y-%m")
+    counts, summary = _month_counts(year_month)
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": f"Pick a day for {year_month}:\n{summary}",
+        "parse_mode": "HTML",
+        "reply_markup": build_day_picker("posted", year_month, counts)
+    })
+
+
+@callbacks.exact("unposted_pick_year")
+def _cb_unposted_pick_year(ctx):
+    chat_id, callback_query = ctx.chat_id, ctx.callback_query
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": "Pick a year:",
+        "parse_mode": "HTML",
+        "reply_markup": build_year_picker("unposted")
+    })
+
+
+@callbacks.prefix("unposted_pick_month_")
+def _cb_unposted_pick_month(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    try:
+        year = int(text.split("unposted_pick_month_")[-1])
+    except Exception:
+        year = datetime.utcnow().year
+    counts = get_daily_counts(f"{year}-01-01", f"{year}-12-31")
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": f"Pick a month for {year}:",
+        "parse_mode": "HTML",
+        "reply_markup": build_month_picker("unposted", year, counts)
+    })
+
+
+@callbacks.prefix("unposted_pick_day_")
+def _cb_unposted_pick_day(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    try:
+        year_month = text.split("unposted_pick_day_")[-1]
+    except Exception:
+        year_month = datetime.utcnow().strftime("%Y-%m")
+    counts, summary = _month_counts(year_month)
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": f"Pick a day for {year_month}:\n{summary}",
+        "parse_mode": "HTML",
+        "reply_markup": build_day_picker("unposted", year_month, counts)
+    })
+
+
+@callbacks.prefix("posted_date_")
+def _cb_posted_date(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    rest = text[len("posted_date_"):]
+    parts = rest.rsplit("_", 1)
+    date_str = parts[0]
+    page = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+    per_page = 10
+    day_counts = get_daily_counts(date_str, date_str).get(date_str, (0, 0))
+    ops = get_posted_by_date(date_str) if day_counts[1] else []
+    total = len(ops)
+    page_ops = ops[page * per_page:(page + 1) * per_page]
+    if not page_ops:
+        msg = f"<b>No posted opportunities for {date_str}.</b>"
+    else:
+        lines = [f"<b>🟢 Posted for {date_str} — Page {page + 1}/{max(1, (total + per_page - 1) // per_page)} ({total} total):</b>\n"]
+        for op in page_ops:
+            lines.append(f"<b>{op['title']}</b>\n<a href='{op['link']}'>Details</a>\nDeadline: {op.get('deadline', 'N/A')}")
+        msg = "\n\n".join(lines)
+    nav = build_date_nav_keyboard(date_str, "posted", get_adjacent_days(date_str, posted=True))
+    page_row = []
+    if page > 0:
+        page_row.append({"text": "⬅️ Prev Page", "callback_data": f"posted_date_{date_str}_{page - 1}"})
+    if (page + 1) * per_page < total:
+        page_row.append({"text": "Next Page ➡️", "callback_data": f"posted_date_{date_str}_{page + 1}"})
+    inline_kb = nav["inline_keyboard"]
+    if page_row:
+        inline_kb.insert(0, page_row)
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": msg,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True,
+        "reply_markup": {"inline_keyboard": inline_kb}
+    })
+
+
+@callbacks.prefix("unposted_date_")
+def _cb_unposted_date(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    rest = text[len("unposted_date_"):]
+    parts = rest.rsplit("_", 1)
+    date_str = parts[0]
+    page = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
+    per_page = 10
+    unposted_count, posted_count = get_daily_counts(date_str, date_str).get(date_str, (0, 0))
+    today_unposted = get_unposted_by_date(date_str) if unposted_count else []
+    total = len(today_unposted)
+    page_ops = today_unposted[page * per_page:(page + 1) * per_page]
+
+    if page_ops:
+        lines = [f"<b>🟡 Unposted for {date_str} — Page {page + 1}/{max(1, (total + per_page - 1) // per_page)} ({total} total):</b>\n"]
+        for op in page_ops:
+            lines.append(f"<b>{op['title']}</b>\n<a href='{op['link']}'>Details</a>\nDeadline: {op.get('deadline', 'N/A')}")
+        msg = "\n\n".join(lines)
+        nav = build_date_nav_keyboard(date_str, "unposted")
+        page_row = []
+        if page > 0:
+            page_row.append({"text": "⬅️ Prev Page", "callback_data": f"unposted_date_{date_str}_{page - 1}"})
+        if (page + 1) * per_page < total:
+            page_row.append({"text": "Next Page ➡️", "callback_data": f"unposted_date_{date_str}_{page + 1}"})
+        inline_kb = nav["inline_keyboard"]
+        if page_row:
+            inline_kb.insert(0, page_row)
+        inline_kb.insert(0, [{"text": "📤 Post All", "callback_data": f"post_date_{date_str}"}])
+        keyboard = {"inline_keyboard": inline_kb}
+    elif posted_count:
+        msg = f"<b>All opportunities for {date_str} are already posted.</b>"
+        keyboard = build_date_nav_keyboard(date_str, "unposted")
+    else:
+        msg = f"<b>No data for {date_str}.</b>\n\nWould you like to search for it?"
+        nav = build_date_nav_keyboard(date_str, "unposted")
+        nav["inline_keyboard"].insert(0, [{"text": "🔄 Search", "callback_data": f"scrape_date_{date_str}"}])
+        keyboard = nav
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": msg,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True,
+        "reply_markup": keyboard
+    })
+
+
+@callbacks.prefix("scrape_date_")
+def _cb_scrape_date(ctx):
+    chat_id, text = ctx.chat_id, ctx.text
+    date_str = text.replace("scrape_date_", "")
+    _side_call("sendChatAction", {
+        "chat_id": chat_id,
+        "action": "typing"
+    })
+    resp = _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+        "chat_id": chat_id,
+        "text": f"⏳ Searching {date_str}... Please wait.",
+        "parse_mode": "HTML"
+    })
+    try:
+        msg_id = resp.json().get("result", {}).get("message_id")
+    except Exception:
+        msg_id = None
+    def _scrape_date_only():
+        from app.scraper import fetch_opportunities_by_date
+        new_ops = []
+        try:
+            new_ops = fetch_opportunities_by_date(date_str.replace("-", "/"))
+            if new_ops:
+                msg = f"<b>✅ Searched {len(new_ops)} opportunities for {date_str}:</b>\n\n" + "\n\n".join([
+                    f"<b>{op['title']}</b>\n<a href='{op['link']}'>Details</a>\nDeadline: {op.get('deadline', 'N/A')}" for op in new_ops[:10]
+                ])
+                if len(new_ops) > 10:
+                    msg += f"\n\n<i>...and {len(new_ops) - 10} more.</i>"
+                keyboard = {
                     "inline_keyboard": [
-                        [{"text": "👥 Admin Menu", "callback_data": "admin_menu"}],
+                        [{"text": f"📤 Post All ({len(new_ops)})", "callback_data": f"post_date_{date_str}"}],
+                        [{"text": "🟡 View Unposted", "callback_data": f"unposted_date_{date_str}"}],
                         [{"text": "🔙 Main Menu", "callback_data": "main_menu"}]
                     ]
                 }
-            })
-        elif text.startswith("approve_pending_") and user_id == BOT_OWNER_ID:
-            target_id = int(text.replace("approve_pending_", ""))
-            name = remove_pending_admin(target_id) or "Unknown"
-            if add_admin(target_id, user_id, name):
-                _admin_ids.add(target_id)
-                _admin_names[target_id] = name
-                txt = f"User <code>{target_id}</code> ({name}) approved as admin."
-                _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                    "chat_id": target_id,
-                    "text": "🎉 You've been approved as an admin! Use /start to control the bot."
+                safe_edit_message_text({
+                    "chat_id": chat_id,
+                    "message_id": msg_id,
+                    "text": msg,
+                    "parse_mode": "HTML",
+                    "disable_web_page_preview": True,
+                    "reply_markup": keyboard
                 })
             else:
-                txt = f"User <code>{target_id}</code> is already an admin."
-            _http.post(f"{TELEGRAM_API_URL}/answerCallbackQuery", json={
-                "callback_query_id": callback_query.get("id"),
-                "text": txt,
-                "show_alert": False
-            })
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": txt,
-                "parse_mode": "HTML",
-                "reply_markup": {
-                    "inline_keyboard": [[{"text": "👥 Admin Menu", "callback_data": "admin_menu"}]]
-                }
-            })
-        elif text.startswith("reject_pending_") and user_id == BOT_OWNER_ID:
-            target_id = int(text.replace("reject_pending_", ""))
-            name = remove_pending_admin(target_id) or "Unknown"
-            txt = f"User <code>{target_id}</code> ({name}) rejected."
-            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                "chat_id": target_id,
-                "text": "Your admin request was rejected by the owner."
-            })
-            _http.post(f"{TELEGRAM_API_URL}/answerCallbackQuery", json={
-                "callback_query_id": callback_query.get("id"),
-                "text": txt,
-                "show_alert": False
-            })
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": txt,
-                "parse_mode": "HTML",
-                "reply_markup": {
-                    "inline_keyboard": [[{"text": "👥 Admin Menu", "callback_data": "admin_menu"}]]
-                }
-            })
-        elif text == "channels" and user_id == BOT_OWNER_ID:
-            channels = get_active_channels()
-            lines = ["<b>📢 Channels</b>\n"]
-            if channels:
-                for i, ch in enumerate(channels, 1):
-                    lines.append(f"{i}. {ch['title']} — <code>{ch['chat_id']}</code>")
-            else:
-                lines.append("No channels configured.")
-                if TELEGRAM_CHANNEL_ID:
-                    lines.append(f"\nUsing <code>{TELEGRAM_CHANNEL_ID}</code> from TELEGRAM_CHANNEL_ID env var.")
-            txt = "\n".join(lines)
-            rm = [[{"text": f"❌ {ch['title']}", "callback_data": f"remove_channel_{ch['chat_id']}"}] for ch in channels]
-            keyboard = rm + [
-                [{"text": "➕ Add Channel", "callback_data": "add_channel_prompt"}],
-                [{"text": "🔙 Main Menu", "callback_data": "main_menu"}]
-            ]
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": txt,
-                "parse_mode": "HTML",
-                "reply_markup": {"inline_keyboard": keyboard}
-            })
-        elif text == "add_channel_prompt" and user_id == BOT_OWNER_ID:
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": (
-                    "<b>➕ Add a Channel</b>\n\n"
-                    "Send me the chat ID of the channel or group.\n\n"
-                    "Get the ID by:\n"
-                    "1. Forward a message from the channel to <code>@getidsbot</code>\n"
-                    "2. Or add me to the group and I'll auto-detect it\n\n"
-                    "Group/channel IDs are negative numbers (e.g., <code>-1001234567890</code>)."
-                ),
-                "parse_mode": "HTML",
-                "reply_markup": {
-                    "inline_keyboard": [
-                        [{"text": "🔙 Channels", "callback_data": "channels"}]
-                    ]
-                }
-            })
-        elif text.startswith("remove_channel_") and user_id == BOT_OWNER_ID:
-            try:
-                target_id = int(text.replace("remove_channel_", ""))
-                removed = remove_channel(target_id)
-                msg = f"🗑️ Channel <code>{target_id}</code> removed." if removed else "❌ Channel not found."
-            except ValueError:
-                msg = "❌ Invalid channel ID."
-            channels = get_active_channels()
-            lines = ["<b>📢 Channels</b>\n"]
-            if channels:
-                for i, ch in enumerate(channels, 1):
-                    lines.append(f"{i}. {ch['title']} — <code>{ch['chat_id']}</code>")
-            else:
-                lines.append("No channels configured.")
-            txt = msg + "\n\n" + "\n".join(lines)
-            rm = [[{"text": f"❌ {ch['title']}", "callback_data": f"remove_channel_{ch['chat_id']}"}] for ch in channels]
-            keyboard = rm + [
-                [{"text": "➕ Add Channel", "callback_data": "add_channel_prompt"}],
-                [{"text": "🔙 Main Menu", "callback_data": "main_menu"}]
-            ]
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": txt,
-                "parse_mode": "HTML",
-                "reply_markup": {"inline_keyboard": keyboard}
-            })
-        elif text.startswith("posted_pick_year"):
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": "Pick a year:",
-                "parse_mode": "HTML",
-                "reply_markup": build_year_picker("posted")
-            })
-        elif text.startswith("posted_pick_month_"):
-            try:
-                year = int(text.split("posted_pick_month_")[-1])
-            except Exception:
-                year = datetime.utcnow().year
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": f"Pick a month for {year}:",
-                "parse_mode": "HTML",
-                "reply_markup": build_month_picker("posted", year)
-            })
-        elif text.startswith("posted_pick_day_"):
-            try:
-                year_month = text.split("posted_pick_day_")[-1]
-            except Exception:
-                year_month = datetime.utcnow().strftime("%Y-%m")
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": f"Pick a day for {year_month}:",
-                "parse_mode": "HTML",
-                "reply_markup": build_day_picker("posted", year_month)
-            })
-        elif text.startswith("unposted_pick_year"):
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": "Pick a year:",
-                "parse_mode": "HTML",
-                "reply_markup": build_year_picker("unposted")
-            })
-        elif text.startswith("unposted_pick_month_"):
-            try:
-                year = int(text.split("unposted_pick_month_")[-1])
-            except Exception:
-                year = datetime.utcnow().year
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": f"Pick a month for {year}:",
-                "parse_mode": "HTML",
-                "reply_markup": build_month_picker("unposted", year)
-            })
-        elif text.startswith("unposted_pick_day_"):
-            try:
-                year_month = text.split("unposted_pick_day_")[-1]
-            except Exception:
-                year_month = datetime.utcnow().strftime("%Y-%m")
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": f"Pick a day for {year_month}:",
-                "parse_mode": "HTML",
-                "reply_markup": build_day_picker("unposted", year_month)
-            })
-        elif text.startswith("posted_date_"):
-            rest = text[len("posted_date_"):]
-            parts = rest.rsplit("_", 1)
-            date_str = parts[0]
-            page = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
-            per_page = 10
-            ops = get_posted_by_date(date_str)
-            total = len(ops)
-            page_ops = ops[page * per_page:(page + 1) * per_page]
-            if not page_ops:
-                msg = f"<b>No posted opportunities for {date_str}.</b>"
-            else:
-                lines = [f"<b>🟢 Posted for {date_str} — Page {page + 1}/{max(1, (total + per_page - 1) // per_page)} ({total} total):</b>\n"]
-                for op in page_ops:
-                    lines.append(f"<b>{op['title']}</b>\n<a href='{op['link']}'>Details</a>\nDeadline: {op.get('deadline', 'N/A')}")
-                msg = "\n\n".join(lines)
-            nav = build_date_nav_keyboard(date_str, "posted")
-            page_row = []
-            if page > 0:
-                page_row.append({"text": "⬅️ Prev Page", "callback_data": f"posted_date_{date_str}_{page - 1}"})
-            if (page + 1) * per_page < total:
-                page_row.append({"text": "Next Page ➡️", "callback_data": f"posted_date_{date_str}_{page + 1}"})
-            inline_kb = nav["inline_keyboard"]
-            if page_row:
-                inline_kb.insert(0, page_row)
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": msg,
-                "parse_mode": "HTML",
-                "disable_web_page_preview": True,
-                "reply_markup": {"inline_keyboard": inline_kb}
-            })
-        elif text.startswith("unposted_date_"):
-            rest = text[len("unposted_date_"):]
-            parts = rest.rsplit("_", 1)
-            date_str = parts[0]
-            page = int(parts[1]) if len(parts) > 1 and parts[1].isdigit() else 0
-            per_page = 10
-            today_unposted = get_unposted_by_date(date_str)
-            today_posted = get_posted_by_date(date_str)
-            total = len(today_unposted)
-            page_ops = today_unposted[page * per_page:(page + 1) * per_page]
-
-            if page_ops:
-                lines = [f"<b>🟡 Unposted for {date_str} — Page {page + 1}/{max(1, (total + per_page - 1) // per_page)} ({total} total):</b>\n"]
-                for op in page_ops:
-                    lines.append(f"<b>{op['title']}</b>\n<a href='{op['link']}'>Details</a>\nDeadline: {op.get('deadline', 'N/A')}")
-                msg = "\n\n".join(lines)
-                nav = build_date_nav_keyboard(date_str, "unposted")
-                page_row = []
-                if page > 0:
-                    page_row.append({"text": "⬅️ Prev Page", "callback_data": f"unposted_date_{date_str}_{page - 1}"})
-                if (page + 1) * per_page < total:
-                    page_row.append({"text": "Next Page ➡️", "callback_data": f"unposted_date_{date_str}_{page + 1}"})
-                inline_kb = nav["inline_keyboard"]
-                if page_row:
-                    inline_kb.insert(0, page_row)
-                inline_kb.insert(0, [{"text": "📤 Post All", "callback_data": f"post_date_{date_str}"}])
-                keyboard = {"inline_keyboard": inline_kb}
-            elif today_posted:
-                msg = f"<b>All opportunities for {date_str} are already posted.</b>"
-                keyboard = build_date_nav_keyboard(date_str, "unposted")
-            else:
-                msg = f"<b>No data for {date_str}.</b>\n\nWould you like to search for it?"
-                nav = build_date_nav_keyboard(date_str, "unposted")
-                nav["inline_keyboard"].insert(0, [{"text": "🔄 Search", "callback_data": f"scrape_date_{date_str}"}])
-                keyboard = nav
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": msg,
-                "parse_mode": "HTML",
-                "disable_web_page_preview": True,
-                "reply_markup": keyboard
-            })
-        elif text.startswith("scrape_date_"):
-            date_str = text.replace("scrape_date_", "")
-            _http.post(f"{TELEGRAM_API_URL}/sendChatAction", json={
-                "chat_id": chat_id,
-                "action": "typing"
-            })
-            resp = _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                "chat_id": chat_id,
-                "text": f"⏳ Searching {date_str}... Please wait.",
-                "parse_mode": "HTML"
-            })
-            try:
-                msg_id = resp.json().get("result", {}).get("message_id")
-            except Exception:
-                msg_id = None
-            def _scrape_date_only():
-                new_ops = []
-                try:
-                    new_ops = fetch_opportunities_by_date(date_str.replace("-", "/"))
-                    if new_ops:
-                        msg = f"<b>✅ Searched {len(new_ops)} opportunities for {date_str}:</b>\n\n" + "\n\n".join([
-                            f"<b>{op['title']}</b>\n<a href='{op['link']}'>Details</a>\nDeadline: {op.get('deadline', 'N/A')}" for op in new_ops[:10]
-                        ])
-                        if len(new_ops) > 10:
-                            msg += f"\n\n<i>...and {len(new_ops) - 10} more.</i>"
-                        keyboard = {
-                            "inline_keyboard": [
-                                [{"text": f"📤 Post All ({len(new_ops)})", "callback_data": f"post_date_{date_str}"}],
-                                [{"text": "🟡 View Unposted", "callback_data": f"unposted_date_{date_str}"}],
-                                [{"text": "🔙 Main Menu", "callback_data": "main_menu"}]
-                            ]
-                        }
-                        safe_edit_message_text({
-                            "chat_id": chat_id,
-                            "message_id": msg_id,
-                            "text": msg,
-                            "parse_mode": "HTML",
-                            "disable_web_page_preview": True,
-                            "reply_markup": keyboard
-                        })
-                    else:
-                        txt = f"No new opportunities found for {date_str}."
-                        safe_edit_message_text({
-                            "chat_id": chat_id,
-                            "message_id": msg_id,
-                            "text": txt,
-                            "parse_mode": "HTML"
-                        })
-                except Exception as e:
-                    try:
-                        safe_edit_message_text({
-                            "chat_id": chat_id,
-                            "message_id": msg_id,
-                            "text": f"❌ Error: {_sanitize(e)}",
-                            "parse_mode": "HTML"
-                        })
-                    except Exception:
-                        logger.warning("Failed to send error message to Telegram (chat_id=%s)", chat_id, exc_info=True)
-            Thread(target=_scrape_date_only, daemon=True).start()
-        elif text.startswith("post_date_"):
-            date_str = text.replace("post_date_", "")
-            def _post_date_job():
-                from app.telegram_bot import post_to_telegram
-                from concurrent.futures import ThreadPoolExecutor, as_completed
-                import time
-                date_ops = get_unposted_by_date(date_str)
-                if not date_ops:
-                    _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                        "chat_id": chat_id, "text": f"No unposted opportunities for {date_str}.", "parse_mode": "HTML"
-                    })
-                    return
-                sent = 0
-                with ThreadPoolExecutor(max_workers=3) as pool:
-                    futures = {}
-                    for op in date_ops:
-                        wait = telegram_limiter.consume()
-                        if wait > 0:
-                            time.sleep(wait)
-                        futures[pool.submit(post_to_telegram, op)] = op
-                    for future in as_completed(futures):
-                        if future.result():
-                            sent += 1
-                _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                txt = f"No new opportunities found for {date_str}."
+                safe_edit_message_text({
                     "chat_id": chat_id,
-                    "text": f"📤 Posted {sent}/{len(date_ops)} opportunities for {date_str}.",
+                    "message_id": msg_id,
+                    "text": txt,
                     "parse_mode": "HTML"
                 })
-            Thread(target=_post_date_job, daemon=True).start()
-        elif text == "post_all_unposted":
-            def _post_all_job():
-                from app.database import get_unposted_opportunities
-                from app.telegram_bot import post_to_telegram
-                from concurrent.futures import ThreadPoolExecutor, as_completed
-                import time
-                all_unposted = get_unposted_opportunities()
-                if not all_unposted:
-                    _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                        "chat_id": chat_id, "text": "No unposted opportunities.", "parse_mode": "HTML"
-                    })
-                    return
-                sent = 0
-                with ThreadPoolExecutor(max_workers=3) as pool:
-                    futures = {}
-                    for op in all_unposted:
-                        wait = telegram_limiter.consume()
-                        if wait > 0:
-                            time.sleep(wait)
-                        futures[pool.submit(post_to_telegram, op)] = op
-                    for future in as_completed(futures):
-                        if future.result():
-                            sent += 1
-                _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+        except Exception as e:
+            try:
+                safe_edit_message_text({
                     "chat_id": chat_id,
-                    "text": f"📤 Posted {sent}/{len(all_unposted)} unposted opportunities.",
+                    "message_id": msg_id,
+                    "text": f"❌ Error: {_sanitize(e)}",
                     "parse_mode": "HTML"
                 })
-            Thread(target=_post_all_job, daemon=True).start()
-        elif text == "stats":
-            _http.post(f"{TELEGRAM_API_URL}/sendChatAction", json={
-                "chat_id": chat_id,
-                "action": "typing"
-            })
-            stats = get_stats()
-            tags_section = ""
-            if stats.get("top_tags"):
-                tags_list = [f"  {t[0]}: {t[1]}" for t in stats["top_tags"][:5]]
-                tags_section = "\n<b>Top Tags:</b>\n" + "\n".join(tags_list)
-            msg = (
-                f"<b>📊 Analytics</b>\n\n"
-                f"Total: <b>{stats['total']}</b>\n"
-                f"🟢 Posted: <b>{stats['posted']}</b>\n"
-                f"🟡 Unposted: <b>{stats['unposted']}</b>\n\n"
-                f"<b>Search Results:</b>\n"
-                f"  Today: <b>{stats['today']}</b>\n"
-                f"  This Week: <b>{stats['week']}</b>\n"
-                f"  This Month: <b>{stats['month']}</b>\n\n"
-                f"<b>Timeline:</b>\n"
-                f"  Oldest: <b>{stats['oldest']}</b>\n"
-                f"  Last Posted: <b>{stats['last_posted']}</b>"
-                f"{tags_section}"
-            )
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": msg,
-                "parse_mode": "HTML",
-                "reply_markup": build_stats_keyboard(stats["total"], stats["unposted"], stats["posted"])
-            })
-        elif text in ("list_unposted", "list_posted"):
-            mode = "unposted" if text == "list_unposted" else "posted"
-            page = 0
-            per_page = 10
-            posted_filter = {"unposted": False, "posted": True}.get(mode)
-            result = search_opportunities("", page * per_page, per_page, posted_filter)
-            ops = result["results"]
-            if not ops:
-                msg = f"<b>No {'unposted' if mode == 'unposted' else 'posted'} opportunities.</b>"
-            else:
-                lines = [f"<b>Page 1/{max(1, (result['total'] + per_page - 1) // per_page)} ({result['total']} total):</b>\n"]
-                for op in ops:
-                    s = "🟢" if op["posted_to_telegram"] else "🟡"
-                    date_str = str(op.get("created_at", ""))[:10] if op.get("created_at") else "?"
-                    lines.append(f"{s} <b>{op['title']}</b>\n📅 {date_str} | <a href='{op['link']}'>Link</a>")
-                msg = "\n\n".join(lines)
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": msg,
-                "parse_mode": "HTML",
-                "disable_web_page_preview": True,
-                "reply_markup": build_browse_keyboard(page, result["total"], result["total"], mode)
-            })
-        elif text == "scrape_today":
-            today = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d")
-            _http.post(f"{TELEGRAM_API_URL}/sendChatAction", json={
-                "chat_id": chat_id,
-                "action": "typing"
-            })
-            resp = _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
-                "chat_id": chat_id,
-                "text": "⏳ Searching opportunities... Please wait.",
-                "parse_mode": "HTML"
-            })
-            try:
-                message_id = resp.json().get("result", {}).get("message_id")
             except Exception:
-                message_id = None
-            Thread(target=_scrape_only, args=(today, chat_id, message_id), daemon=True).start()
-        elif text == "goto_date_menu":
-            _http.post(f"{TELEGRAM_API_URL}/sendChatAction", json={
-                "chat_id": chat_id,
-                "action": "typing"
-            })
-            today = datetime.utcnow().strftime("%Y-%m-%d")
-            keyboard = {
-                "inline_keyboard": [
-                    [
-                        {"text": "Posted by Date", "callback_data": f"posted_pick_year"},
-                        {"text": "Unposted by Date", "callback_data": f"unposted_pick_year"}
-                    ],
-                    [
-                        {"text": "🔙 Main Menu", "callback_data": "main_menu"}
-                    ]
-                ]
-            }
-            _http.post(f"{TELEGRAM_API_URL}/editMessageText", json={
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": "Choose which opportunities to view by date:",
-                "reply_markup": keyboard,
-                "parse_mode": "HTML"
-            })
-        elif text == "about":
-            _http.post(f"{TELEGRAM_API_URL}/sendChatAction", json={
-                "chat_id": chat_id,
-                "action": "typing"
-            })
-            msg = (
-                "<b>About this Bot</b>\n\n"
-                "This bot searchs, stores, and shares the latest opportunities (scholarships, grants, fellowships, etc.) from the web.\n"
-                "You can control scheduling, view analytics, and browse opportunities right here!\n\n"
-                "<i>Made with ❤️ by @twolamaa</i>"
-            )
-            _http.post(f"{TELEGRAM_API_URL}/editMessageText", json={
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": msg,
-                "parse_mode": "HTML",
-                "reply_markup": build_main_menu(user_id)
-            })
-        elif text.startswith("search_"):
-            try:
-                rest = text[len("search_"):]
-                keyword, offset_str = rest.rsplit("_", 1)
-                offset = int(offset_str)
-            except (IndexError, ValueError):
-                keyword = ""
-                offset = 0
-            result = search_opportunities(keyword, offset, 10)
-            if not result["results"]:
-                msg = f"No more results for \"<b>{keyword}</b>\"."
-            else:
-                lines = [f"<b>Results for \"{keyword}\" ({result['total']} found):</b>\n"]
-                for op in result["results"]:
-                    status = "🟢" if op["posted_to_telegram"] else "🟡"
-                    date_str = str(op.get("created_at", ""))[:10] if op.get("created_at") else "?"
-                    lines.append(f"{status} <b>{op['title']}</b>\n📅 {date_str} | <a href='{op['link']}'>Link</a>")
-                msg = "\n\n".join(lines)
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": msg,
-                "parse_mode": "HTML",
-                "disable_web_page_preview": True,
-                "reply_markup": build_search_keyboard(offset, result["total"], keyword)
-            })
-        elif text.startswith("browse_"):
-            try:
-                parts = text.split("_", 2)
-                mode = parts[1]  # 'all', 'unposted', or 'posted'
-                page = int(parts[2])
-            except (IndexError, ValueError):
-                mode = "all"
-                page = 0
-            per_page = 10
-            posted_filter = {"all": None, "unposted": False, "posted": True}.get(mode)
-            result = search_opportunities("", page * per_page, per_page, posted_filter)
-            ops = result["results"]
-            if not ops:
-                msg = "<b>No opportunities found.</b>"
-            else:
-                status_map = {None: "", False: "🟡 ", True: "🟢 "}
-                prefix = status_map.get(posted_filter, "")
-                lines = [f"<b>{prefix}Page {page + 1}/{max(1, (result['total'] + per_page - 1) // per_page)} ({result['total']} total):</b>\n"]
-                for op in ops:
-                    s = "🟢" if op["posted_to_telegram"] else "🟡"
-                    date_str = str(op.get("created_at", ""))[:10] if op.get("created_at") else "?"
-                    lines.append(f"{s} <b>{op['title']}</b>\n📅 {date_str} | <a href='{op['link']}'>Link</a>")
-                msg = "\n\n".join(lines)
-            safe_edit_message_text({
-                "chat_id": chat_id,
-                "message_id": callback_query["message"]["message_id"],
-                "text": msg,
-                "parse_mode": "HTML",
-                "disable_web_page_preview": True,
-                "reply_markup": build_browse_keyboard(page, result["total"], result["total"], mode)
+                logger.warning("Failed to send error message to Telegram (chat_id=%s)", chat_id, exc_info=True)
+    Thread(target=_scrape_date_only, daemon=True).start()
+
+
+def _post_claimed_chunks(date_str: Optional[str] = None) -> tuple[int, int]:
+    """Claim the unposted backlog (or one day of it) chunk by chunk and send it through the outbox.
+
+    Returns (sent, attempted). Rows that did not get out are released only
+    at the end, so this loop does not claim them again.
+    """
+    from app.database import claim_unposted, release_claims
+    from app.telegram_bot import post_claimed, POST_CHUNK_SIZE
+    sent = 0
+    attempted = 0
+    failed = []
+    try:
+        while True:
+            chunk = claim_unposted(POST_CHUNK_SIZE, date_str=date_str)
+            if not chunk:
+                break
+            attempted += len(chunk)
+            ok = set(post_claimed(chunk))
+            sent += len(ok)
+            failed.extend(op["id"] for op in chunk if op["id"] not in ok)
+    finally:
+        release_claims(failed)
+    return sent, attempted
+
+
+@callbacks.prefix("post_date_")
+def _cb_post_date(ctx):
+    chat_id, text = ctx.chat_id, ctx.text
+    date_str = text.replace("post_date_", "")
+    def _post_date_job():
+        sent, attempted = _post_claimed_chunks(date_str)
+        if not attempted:
+            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                "chat_id": chat_id, "text": f"No unposted opportunities for {date_str}.", "parse_mode": "HTML"
             })
-        elif text == "create_post" and user_id == BOT_OWNER_ID:
-            _set_custom_post_state(user_id,
-                step="title",
-                editing=False,
-                user_id=user_id,
-                wizard_chat_id=chat_id,
-                wizard_message_id=callback_query["message"]["message_id"],
-            )
-            _update_custom_post_wizard(user_id)
-        elif text == "create_post_skip_image" and user_id == BOT_OWNER_ID:
-            _advance_custom_post_step(user_id, chat_id, image_file_id="")
-        elif text == "create_post_skip_deadline" and user_id == BOT_OWNER_ID:
-            _advance_custom_post_step(user_id, chat_id, deadline="")
-        elif text == "create_post_confirm" and user_id == BOT_OWNER_ID:
-            state = _get_custom_post_state(user_id)
-            if state and not state.get("status"):
-                if not state.get("title") or not state.get("link"):
-                    _http.post(f"{TELEGRAM_API_URL}/answerCallbackQuery", json={
-                        "callback_query_id": callback_query.get("id"),
-                        "text": "Title and link are required.",
-                        "show_alert": True,
-                    })
-                else:
-                    opp = {
-                        "title": state["title"],
-                        "description": state.get("description", ""),
-                        "link": state["link"],
-                        "deadline": state.get("deadline", ""),
-                        "thumbnail": state.get("image_file_id", ""),
-                    }
-                    _set_custom_post_state(user_id, status="posting")
-                    _update_custom_post_wizard(user_id)
-                    def _post_and_notify():
-                        try:
-                            ok = post_to_all_channels(opp)
-                        except Exception:
-                            ok = False
-                        _set_custom_post_state(user_id, status="posted" if ok else "failed")
-                        try:
-                            _update_custom_post_wizard(user_id)
-                        except Exception:
-                            pass
-                        _clear_custom_post_state(user_id)
-                    Thread(target=_post_and_notify, daemon=True).start()
-                    _http.post(f"{TELEGRAM_API_URL}/answerCallbackQuery", json={
-                        "callback_query_id": callback_query.get("id"),
-                        "text": "Posting...",
-                        "show_alert": False,
-                    })
-        elif text == "create_post_cancel" and user_id == BOT_OWNER_ID:
-            state = _get_custom_post_state(user_id)
-            if state:
-                if state.get("status"):
-                    safe_edit_message_text({
-                        "chat_id": chat_id,
-                        "message_id": callback_query["message"]["message_id"],
-                        "text": "🔙 Main Menu",
-                        "parse_mode": "HTML",
-                        "reply_markup": build_main_menu(user_id),
-                    })
-                else:
-                    _set_custom_post_state(user_id, status="cancelled")
-                    _update_custom_post_wizard(user_id)
-                    _clear_custom_post_state(user_id)
-        elif text == "create_post_back" and user_id == BOT_OWNER_ID:
-            state = _get_custom_post_state(user_id)
-            if state and not state.get("status"):
-                current_step = state.get("step", "title")
-                idx = _STEP_ORDER.index(current_step)
-                if idx > 0:
-                    prev_step = _STEP_ORDER[idx - 1]
-                    _set_custom_post_state(user_id, step=prev_step, editing=False)
-                    _update_custom_post_wizard(user_id)
-            _http.post(f"{TELEGRAM_API_URL}/answerCallbackQuery", json={
-                "callback_query_id": callback_query.get("id"),
+            return
+        _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+            "chat_id": chat_id,
+            "text": f"📤 Posted {sent}/{attempted} opportunities for {date_str}.",
+            "parse_mode": "HTML"
+        })
+    Thread(target=_post_date_job, daemon=True).start()
+
+
+@callbacks.exact("post_all_unposted")
+def _cb_post_all_unposted(ctx):
+    chat_id = ctx.chat_id
+    def _post_all_job():
+        sent, attempted = _post_claimed_chunks()
+        if not attempted:
+            _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+                "chat_id": chat_id, "text": "No unposted opportunities.", "parse_mode": "HTML"
             })
-        elif text.startswith("create_post_edit_") and user_id == BOT_OWNER_ID:
-            field = text.replace("create_post_edit_", "")
-            state = _get_custom_post_state(user_id)
-            if state and not state.get("status"):
-                _set_custom_post_state(user_id,
-                    step=field,
-                    editing=True,
-                    wizard_chat_id=chat_id,
-                    wizard_message_id=callback_query["message"]["message_id"],
-                )
-                _update_custom_post_wizard(user_id)
-        else:
-            logging.warning(f"Unhandled callback data: {text}")
-            callback_id = callback_query.get("id")
-            if callback_id:
-                _http.post(f"{TELEGRAM_API_URL}/answerCallbackQuery", json={"callback_query_id": callback_id, "text": "Not implemented or invalid action.", "show_alert": False})
+            return
+        _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+            "chat_id": chat_id,
+            "text": f"📤 Posted {sent}/{attempted} unposted opportunities.",
+            "parse_mode": "HTML"
+        })
+    Thread(target=_post_all_job, daemon=True).start()
+
+
+@callbacks.exact("stats")
+def _cb_stats(ctx):
+    chat_id, callback_query = ctx.chat_id, ctx.callback_query
+    _side_call("sendChatAction", {
+        "chat_id": chat_id,
+        "action": "typing"
+    })
+    stats = get_stats()
+    tags_section = ""
+    if stats.get("top_tags"):
+        tags_list = [f"  {t[0]}: {t[1]}" for t in stats["top_tags"][:5]]
+        tags_section = "\n<b>Top Tags:</b>\n" + "\n".join(tags_list)
+    msg = (
+        f"<b>📊 Analytics</b>\n\n"
+        f"Total: <b>{stats['total']}</b>\n"
+        f"🟢 Posted: <b>{stats['posted']}</b>\n"
+        f"🟡 Unposted: <b>{stats['unposted']}</b>\n\n"
+        f"<b>Search Results:</b>\n"
+        f"  Today: <b>{stats['today']}</b>\n"
+        f"  This Week: <b>{stats['week']}</b>\n"
+        f"  This Month: <b>{stats['month']}</b>\n\n"
+        f"<b>Timeline:</b>\n"
+        f"  Oldest: <b>{stats['oldest']}</b>\n"
+        f"  Last Posted: <b>{stats['last_posted']}</b>"
+        f"{tags_section}"
+    )
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": msg,
+        "parse_mode": "HTML",
+        "reply_markup": build_stats_keyboard(stats["total"], stats["unposted"], stats["posted"])
+    })
+
+
+@callbacks.exact("list_unposted", "list_posted")
+def _cb_list_opportunities(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    mode = "unposted" if text == "list_unposted" else "posted"
+    page = 0
+    per_page = 10
+    posted_filter = {"unposted": False, "posted": True}.get(mode)
+    result = search_opportunities("", page * per_page, per_page, posted_filter)
+    ops = result["results"]
+    if not ops:
+        msg = f"<b>No {'unposted' if mode == 'unposted' else 'posted'} opportunities.</b>"
+    else:
+        lines = [f"<b>Page 1/{max(1, (result['total'] + per_page - 1) // per_page)} ({result['total']} total):</b>\n"]
+        for op in ops:
+            s = "🟢" if op["posted_to_telegram"] else "🟡"
+            date_str = str(op.get("created_at", ""))[:10] if op.get("created_at") else "?"
+            lines.append(f"{s} <b>{op['title']}</b>\n📅 {date_str} | <a href='{op['link']}'>Link</a>")
+        msg = "\n\n".join(lines)
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": msg,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True,
+        "reply_markup": build_browse_keyboard(page, result["total"], result["total"], mode,
+                                              result["next_cursor"], result["prev_cursor"])
+    })
+
+
+@callbacks.exact("scrape_today")
+def _cb_scrape_today(ctx):
+    chat_id = ctx.chat_id
+    today = (datetime.utcnow() - timedelta(days=1)).strftime("%Y-%m-%d")
+    _side_call("sendChatAction", {
+        "chat_id": chat_id,
+        "action": "typing"
+    })
+    resp = _http.post(f"{TELEGRAM_API_URL}/sendMessage", json={
+        "chat_id": chat_id,
+        "text": "⏳ Searching opportunities... Please wait.",
+        "parse_mode": "HTML"
+    })
+    try:
+        message_id = resp.json().get("result", {}).get("message_id")
+    except Exception:
+        message_id = None
+    Thread(target=_scrape_only, args=(today, chat_id, message_id), daemon=True).start()
+
+
+@callbacks.exact("goto_date_menu")
+def _cb_goto_date_menu(ctx):
+    chat_id, callback_query = ctx.chat_id, ctx.callback_query
+    _side_call("sendChatAction", {
+        "chat_id": chat_id,
+        "action": "typing"
+    })
+    keyboard = {
+        "inline_keyboard": [
+            [
+                {"text": "Posted by Date", "callback_data": f"posted_pick_year"},
+                {"text": "Unposted by Date", "callback_data": f"unposted_pick_year"}
+            ],
+            [
+                {"text": "🔙 Main Menu", "callback_data": "main_menu"}
+            ]
+        ]
+    }
+    _http.post(f"{TELEGRAM_API_URL}/editMessageText", json={
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": "Choose which opportunities to view by date:",
+        "reply_markup": keyboard,
+        "parse_mode": "HTML"
+    })
+
+
+@callbacks.exact("about")
+def _cb_about(ctx):
+    chat_id, user_id, callback_query = ctx.chat_id, ctx.user_id, ctx.callback_query
+    _side_call("sendChatAction", {
+        "chat_id": chat_id,
+        "action": "typing"
+    })
+    msg = (
+        "<b>About this Bot</b>\n\n"
+        "This bot searchs, stores, and shares the latest opportunities (scholarships, grants, fellowships, etc.) from the web.\n"
+        "You can control scheduling, view analytics, and browse opportunities right here!\n\n"
+        "<i>Made with ❤️ by @twolamaa</i>"
+    )
+    _http.post(f"{TELEGRAM_API_URL}/editMessageText", json={
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": msg,
+        "parse_mode": "HTML",
+        "reply_markup": build_main_menu(user_id)
+    })
+
+
+@callbacks.prefix("search_", "fsearch_")
+def _cb_search(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    match = "fuzzy" if text.startswith("fsearch_") else "text"
+    try:
+        rest = text.split("_", 1)[1]
+        keyword, offset_str = rest.rsplit("_", 1)
+        offset = int(offset_str)
+    except (IndexError, ValueError):
+        keyword = ""
+        offset = 0
+    result = search_opportunities(keyword, offset, 10, match=match)
+    if not result["results"]:
+        msg = f"No more results for \"<b>{keyword}</b>\"."
+    else:
+        msg = _format_search_results(keyword, result, match)
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": msg,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True,
+        "reply_markup": build_search_keyboard(offset, result["total"], keyword, match)
+    })
+
+
+@callbacks.prefix("browse_")
+def _cb_browse(ctx):
+    chat_id, text, callback_query = ctx.chat_id, ctx.text, ctx.callback_query
+    cursor = None
+    try:
+        # browse_<mode>_<page>[_<cursor>]; the cursor is urlsafe base64 and may itself contain "_"
+        parts = text.split("_", 3)
+        mode = parts[1]  # 'all', 'unposted', or 'posted'
+        page = int(parts[2])
+        cursor = parts[3] if len(parts) > 3 else None
+    except (IndexError, ValueError):
+        mode = "all"
+        page = 0
+    per_page = 10
+    posted_filter = {"all": None, "unposted": False, "posted": True}.get(mode)
+    try:
+        result = search_opportunities("", page * per_page, per_page, posted_filter, cursor=cursor)
+    except ValueError:
+        page = 0
+        result = search_opportunities("", 0, per_page, posted_filter)
+    ops = result["results"]
+    if not ops:
+        msg = "<b>No opportunities found.</b>"
+    else:
+        status_map = {None: "", False: "🟡 ", True: "🟢 "}
+        prefix = status_map.get(posted_filter, "")
+        lines = [f"<b>{prefix}Page {page + 1}/{max(1, (result['total'] + per_page - 1) // per_page)} ({result['total']} total):</b>\n"]
+        for op in ops:
+            s = "🟢" if op["posted_to_telegram"] else "🟡"
+            date_str = str(op.get("created_at", ""))[:10] if op.get("created_at") else "?"
+            lines.append(f"{s} <b>{op['title']}</b>\n📅 {date_str} | <a href='{op['link']}'>Link</a>")
+        msg = "\n\n".join(lines)
+    safe_edit_message_text({
+        "chat_id": chat_id,
+        "message_id": callback_query["message"]["message_id"],
+        "text": msg,
+        "parse_mode": "HTML",
+        "disable_web_page_preview": True,
+        "reply_markup": build_browse_keyboard(page, result["total"], result["total"], mode,
+                                              result["next_cursor"], result["prev_cursor"])
+    })
+
+
+def _on_unhandled_callback(ctx):
+    text, callback_query = ctx.text, ctx.callback_query
+    logging.warning(f"Unhandled callback data: {text}")
+    callback_id = callback_query.get("id")
+    if callback_id:
+        _side_call("answerCallbackQuery", {"callback_query_id": callback_id, "text": "Not implemented or invalid action.", "show_alert": False})
+
 
+# The custom post wizard is only imported once an owner opens it.
+callbacks.lazy("exact", "create_post", "app.custom_post:on_create_post", owner_only=True)
+callbacks.lazy("exact", "create_post_skip_image", "app.custom_post:on_create_post_skip_image", owner_only=True)
+callbacks.lazy("exact", "create_post_skip_deadline", "app.custom_post:on_create_post_skip_deadline", owner_only=True)
+callbacks.lazy("exact", "create_post_confirm", "app.custom_post:on_create_post_confirm", owner_only=True)
+callbacks.lazy("exact", "create_post_cancel", "app.custom_post:on_create_post_cancel", owner_only=True)
+callbacks.lazy("exact", "create_post_back", "app.custom_post:on_create_post_back", owner_only=True)
+callbacks.lazy("prefix", "create_post_edit_", "app.custom_post:on_create_post_edit", owner_only=True)
@@ -0,0 +1,120 @@
+import os
+import time
+import queue
+import logging
+import threading
+from typing import Callable, Optional
+
+from app.http_client import sanitize as _sanitize
+
+_logger = logging.getLogger(__name__)
+
+POLLING_WORKERS = int(os.getenv("POLLING_WORKERS", "4"))
+POLLING_QUEUE_SIZE = int(os.getenv("POLLING_QUEUE_SIZE", "100"))
+
+_STOP = object()
+
+
+def update_chat_key(update: dict):
+    """The chat an update belongs to; updates without one are keyed by their own id."""
+    for field in ("message", "edited_message", "channel_post", "my_chat_member"):
+        chat = (update.get(field) or {}).get("chat")
+        if chat:
+            return chat.get("id")
+    callback = update.get("callback_query")
+    if callback:
+        chat = (callback.get("message") or {}).get("chat")
+        if chat:
+            return chat.get("id")
+        return ("user", callback.get("from", {}).get("id"))
+    return ("update", update.get("update_id"))
+
+
+class UpdateDispatcher:
+    """Fan Telegram updates out to a fixed pool of worker threads.
+
+    Every chat is pinned to one worker (by hash), and each worker drains its
+    own FIFO queue, so updates from one chat are handled in arrival order
+    while a slow handler only delays the chats that share its worker. The
+    queues are bounded: submit() blocks once a worker is queue_size behind,
+    which pushes back on the poller instead of buffering without limit.
+    """
+
+    def __init__(self, handler: Callable[[dict], object], workers: int = POLLING_WORKERS,
+                 queue_size: int = POLLING_QUEUE_SIZE):
+        self.handler = handler
+        self._queues = [queue.Queue(maxsize=queue_size) for _ in range(max(1, workers))]
+        self._threads: list[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._processed = 0
+        self._failed = 0
+        self._max_depth = 0
+        self._busy = [False] * len(self._queues)
+        self._handle_seconds = 0.0
+
+    def start(self) -> "UpdateDispatcher":
+        for i, q in enumerate(self._queues):
+            t = threading.Thread(target=self._work, args=(i, q), name=f"update-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def submit(self, update: dict, timeout: Optional[float] = None) -> None:
+        q = self._queues[hash(update_chat_key(update)) % len(self._queues)]
+        q.put(update, timeout=timeout)
+        with self._lock:
+            self._max_depth = max(self._max_depth, q.qsize())
+
+    def _work(self, index: int, q: queue.Queue) -> None:
+        while True:
+            update = q.get()
+            if update is _STOP:
+                q.task_done()
+                return
+            self._busy[index] = True
+            start = time.perf_counter()
+            failed = False
+            try:
+                self.handler(update)
+            except Exception as e:
+                failed = True
+                _logger.warning(_sanitize(f"Error processing update {update.get('update_id')}: {e}"))
+            finally:
+                elapsed = time.perf_counter() - start
+                self._busy[index] = False
+                with self._lock:
+                    self._processed += 1
+                    self._failed += failed
+                    self._handle_seconds += elapsed
+                q.task_done()
+
+    def join(self) -> None:
+        """Block until every submitted update has been handled."""
+        for q in self._queues:
+            q.join()
+
+    def stop(self, timeout: float = 10) -> None:
+        for q in self._queues:
+            try:
+                q.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass  # the worker is wedged; it is a daemon thread and dies with the process
+        deadline = time.monotonic() + timeout
+        for t in self._threads:
+            t.join(timeout=max(0.0, deadline - time.monotonic()))
+
+    def stats(self) -> dict:
+        """Queue depths and throughput counters, for /polling/metrics and logs."""
+        depths = [q.qsize() for q in self._queues]
+        with self._lock:
+            processed = self._processed
+            return {
+                "workers": len(self._queues),
+                "busy": sum(self._busy),
+                "queued": sum(depths),
+                "queue_depths": depths,
+                "max_depth": self._max_depth,
+                "processed": processed,
+                "failed": self._failed,
+                "avg_handle_ms": round(self._handle_seconds * 1000 / processed, 2) if processed else 0.0,
+            }
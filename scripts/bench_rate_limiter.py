@@ -0,0 +1,57 @@
+"""Per-check cost of the rate limiter backends.
+
+Usage:
+    python scripts/bench_rate_limiter.py [--checks 2000] [--keys 500] [--threads 4]
+
+The database backend uses DATABASE_URL (a throwaway SQLite file if unset), so
+point it at the deployment's Postgres to measure the real round trip.
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if not os.getenv("DATABASE_URL"):
+    os.environ["DATABASE_URL"] = f"sqlite:///{tempfile.mkdtemp()}/bench.db"
+
+from app.database import init_db  # noqa: E402
+from app.rate_limiter import PerIPLimiter, KeyedLimiter, MemoryBuckets, DatabaseBuckets  # noqa: E402
+
+
+def _run(limiter, checks: int, keys: int, threads: int) -> float:
+    """Seconds per consume() call, averaged over all threads."""
+    def work(offset):
+        for i in range(checks // threads):
+            limiter.consume(f"10.0.{(offset + i) % keys // 256}.{(offset + i) % 256}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(work, range(threads)))
+    return (time.perf_counter() - start) / checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=2000)
+    parser.add_argument("--keys", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    init_db()
+    limiters = {
+        "PerIPLimiter (memory)": PerIPLimiter(rate=10.0 / 60.0, capacity=5),
+        "KeyedLimiter + MemoryBuckets": KeyedLimiter(10.0 / 60.0, 5, MemoryBuckets(), "bench:"),
+        "KeyedLimiter + DatabaseBuckets": KeyedLimiter(10.0 / 60.0, 5, DatabaseBuckets(), "bench:"),
+    }
+    dialect = os.environ["DATABASE_URL"].split(":", 1)[0]
+    print(f"{args.checks} checks over {args.keys} keys, {args.threads} threads, db={dialect}")
+    for name, limiter in limiters.items():
+        per_check = _run(limiter, args.checks, args.keys, args.threads)
+        print(f"  {name:32s} {per_check * 1e6:10.1f} us/check")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ os.environ["USE_POLLING"] = "false"
 os.environ["RUN_SCHEDULER"] = "false"
 os.environ["API_KEY"] = "test-api-key-123"
 os.environ["TESTING"] = "true"
+os.environ["HTTP_CACHE_ENABLED"] = "false"
 
 from app.database import Base, engine as _orig_engine, SessionLocal as _orig_SessionLocal, init_db
 import app.db as db_module
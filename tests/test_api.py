@@ -92,11 +92,61 @@ class TestCRUD:
         assert resp.status_code == 200
         assert isinstance(resp.json(), list)
 
+    def test_unposted_list_is_paged(self, client):
+        resp = client.get("/opportunities/unposted?limit=1")
+        assert resp.status_code == 200
+        assert len(resp.json()) <= 1
+        assert int(resp.headers["x-total-count"]) >= len(resp.json())
+
     def test_posted_list(self, client):
         resp = client.get("/opportunities/posted")
         assert resp.status_code == 200
         assert isinstance(resp.json(), list)
 
+    def test_list_follows_cursor(self, client):
+        for i in range(2):
+            client.post("/opportunities", json={
+                "title": f"Cursor {i}", "link": f"https://example.com/cursor-{i}",
+            }, headers=API_HEADERS)
+        first = client.get("/opportunities?limit=1").json()
+        assert first["next_cursor"]
+        second = client.get(f"/opportunities?limit=1&cursor={first['next_cursor']}").json()
+        assert second["results"][0]["id"] != first["results"][0]["id"]
+        assert second["prev_cursor"]
+
+    def test_list_rejects_bad_cursor(self, client):
+        resp = client.get("/opportunities?cursor=garbage")
+        assert resp.status_code == 400
+
+    def test_list_fuzzy_match(self, client):
+        resp = client.get("/opportunities?search=Updatd&match=fuzzy")
+        assert resp.status_code == 200
+        hits = resp.json()["results"]
+        assert hits and hits[0]["title"] == "Updated Title"
+        assert hits[0]["score"] > 0
+
+    def test_export_csv(self, client):
+        resp = client.get("/opportunities/export?search=Updated")
+        assert resp.status_code == 200
+        assert resp.headers["content-type"].startswith("text/csv")
+        lines = resp.text.strip().splitlines()
+        assert lines[0].startswith("id,title,link")
+        assert any("Updated Title" in line for line in lines[1:])
+
+    def test_export_ndjson_gzip(self, client):
+        import gzip
+        import json
+        resp = client.get("/opportunities/export?format=ndjson&gzip=true")
+        assert resp.status_code == 200
+        assert "opportunities.ndjson.gz" in resp.headers["content-disposition"]
+        rows = [json.loads(line) for line in gzip.decompress(resp.content).decode().splitlines()]
+        assert any(r["title"] == "Updated Title" for r in rows)
+        assert all(isinstance(r["tags"], list) for r in rows)
+
+    def test_export_rejects_unknown_format(self, client):
+        resp = client.get("/opportunities/export?format=xml")
+        assert resp.status_code == 422
+
     def test_stats(self, client):
         resp = client.get("/stats")
         assert resp.status_code == 200
@@ -126,6 +176,14 @@ class TestCRUD:
         resp = client.put("/opportunities/1", json={"title": "x"})
         assert resp.status_code == 403
 
+    def test_backfill_rejects_oversized_range(self, client):
+        resp = client.post("/backfill?start=2026-01-01&end=2026-12-31", headers=API_HEADERS)
+        assert resp.status_code == 400
+
+    def test_backfill_requires_auth(self, client):
+        resp = client.post("/backfill?start=2026-06-01&end=2026-06-05")
+        assert resp.status_code == 403
+
     def test_bulk_delete(self, client):
         ids = []
         for i in range(3):
@@ -137,3 +195,24 @@ class TestCRUD:
         resp = client.delete(f"/opportunities?ids={','.join(ids)}", headers=API_HEADERS)
         assert resp.status_code == 200
         assert resp.json()["deleted"] == 3
+
+
+class TestWebhook:
+    def test_myid_answered_on_event_loop(self, client):
+        from unittest.mock import patch
+        update = {"update_id": 1, "message": {"chat": {"id": 7}, "from": {"id": 42}, "text": "/myid"}}
+        with patch("app.main.handle_webhook_update") as sync_handler:
+            resp = client.post("/webhook", json=update)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert body["method"] == "sendMessage" and body["chat_id"] == 7 and "42" in body["text"]
+        sync_handler.assert_not_called()
+
+    def test_final_reply_rides_on_webhook_response(self, client):
+        from unittest.mock import patch
+        update = {"update_id": 2, "message": {"chat": {"id": 7}, "from": {"id": 42}, "text": "/search"}}
+        with patch("app.telegram_handlers._http.post") as post:
+            resp = client.post("/webhook", json=update)
+        body = resp.json()
+        assert body["method"] == "sendMessage" and "Usage: /search" in body["text"]
+        post.assert_not_called()
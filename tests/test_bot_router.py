@@ -0,0 +1,78 @@
+import sys
+
+import pytest
+
+from app.bot_router import Router, UpdateContext
+
+
+def _ctx(text="x"):
+    return UpdateContext(chat_id=1, user_id=1, text=text)
+
+
+class TestRouter:
+    def test_exact_before_prefix(self):
+        router = Router()
+        router.exact("create_post_back")(lambda ctx: "exact")
+        router.prefix("create_post_")(lambda ctx: "prefix")
+        assert router.match("create_post_back").name == "exact:create_post_back"
+        assert router.match("create_post_edit").name == "prefix:create_post_"
+
+    def test_longest_prefix_wins(self):
+        router = Router()
+        router.prefix("posted_")(lambda ctx: None)
+        router.prefix("posted_date_")(lambda ctx: None)
+        assert router.match("posted_date_2026-01-02").name == "prefix:posted_date_"
+        assert router.match("posted_pick_2026").name == "prefix:posted_"
+        assert router.match("unposted_date_2026-01-02") is None
+
+    def test_prefix_must_end_with_underscore(self):
+        with pytest.raises(ValueError):
+            Router().prefix("browse")(lambda ctx: None)
+
+    def test_regex_fallback(self):
+        router = Router()
+        router.regex(r"^f?search_")(lambda ctx: None)
+        assert router.match("fsearch_grant_2") is not None
+        assert router.match("research_") is None
+
+    def test_owner_only(self):
+        router = Router()
+        calls = []
+        router.exact("admin_menu", owner_only=True)(calls.append)
+        assert router.dispatch("admin_menu", _ctx(), is_owner=False) is False
+        assert router.dispatch("admin_menu", _ctx(), is_owner=True) is True
+        assert len(calls) == 1
+
+    def test_lazy_handler_imported_on_first_dispatch(self, tmp_path, monkeypatch):
+        (tmp_path / "lazy_route_mod.py").write_text("calls = []\ndef handle(ctx):\n    calls.append(ctx.text)\n")
+        monkeypatch.syspath_prepend(str(tmp_path))
+        router = Router()
+        router.lazy("prefix", "lazy_", "lazy_route_mod:handle")
+        assert "lazy_route_mod" not in sys.modules
+        assert router.dispatch("lazy_1", _ctx("lazy_1"), is_owner=False)
+        assert sys.modules["lazy_route_mod"].calls == ["lazy_1"]
+        sys.modules.pop("lazy_route_mod")
+
+    def test_stats_recorded_even_when_handler_raises(self):
+        router = Router()
+
+        @router.exact("boom")
+        def boom(ctx):
+            raise RuntimeError("boom")
+
+        with pytest.raises(RuntimeError):
+            router.dispatch("boom", _ctx(), is_owner=False)
+        stats = router.stats()
+        assert stats["exact:boom"]["calls"] == 1
+
+
+class TestHandlerRoutes:
+    def test_command_word_strips_bot_mention_and_args(self):
+        from app.telegram_handlers import _command_word
+        assert _command_word("/add_admin@OppBot 123") == "/add_admin"
+
+    def test_wizard_routes_are_lazy(self):
+        from app.telegram_handlers import callbacks
+        route = callbacks.match("create_post_edit_title")
+        assert route.owner_only
+        assert isinstance(route.handler, str) or "app.custom_post" in sys.modules
@@ -0,0 +1,59 @@
+import app.db as db_module
+from app.change_feed import subscribe, dispatch, dispatch_changed, read_versions
+from app.config_cache import config_cache
+from app.database import add_admin, remove_admin, add_schedule_time, remove_schedule_time
+
+
+def _version(topic):
+    return read_versions(db_module.engine).get(topic, 0)
+
+
+class TestNotifyChange:
+    def test_mutations_bump_topic_version(self):
+        before = _version("admins")
+        assert add_admin(777001, added_by=12345, name="Feed")
+        assert remove_admin(777001)
+        assert _version("admins") == before + 2
+
+    def test_noop_mutation_is_not_announced(self):
+        assert add_schedule_time("03:17", "post")
+        before = _version("schedule_times")
+        assert add_schedule_time("03:17", "post") is False
+        assert _version("schedule_times") == before
+        assert remove_schedule_time("03:17", "post")
+
+
+class TestDispatch:
+    def test_changed_versions_invalidate_and_notify(self):
+        seen = []
+        subscribe("feed_test_a", seen.append)
+        subscribe("feed_test_b", seen.append)
+        config_cache.get(("feed_test_a",), lambda: 1)
+        dispatch_changed({"feed_test_a": 1, "feed_test_b": 4}, {"feed_test_a": 2, "feed_test_b": 4})
+        assert seen == ["feed_test_a"]
+        assert config_cache.get(("feed_test_a",), lambda: 2) == 2
+
+    def test_failing_subscriber_does_not_block_others(self):
+        seen = []
+
+        def boom(topic):
+            raise RuntimeError("boom")
+
+        subscribe("feed_test_c", boom)
+        subscribe("feed_test_c", seen.append)
+        dispatch("feed_test_c")
+        assert seen == ["feed_test_c"]
+
+    def test_schedule_change_reloads_running_scheduler(self, monkeypatch):
+        from app import scheduler
+        reloads = []
+        monkeypatch.setattr(scheduler, "reload_schedules", lambda: reloads.append(1))
+        monkeypatch.setattr(scheduler._timer, "active", True)
+        dispatch("schedule_times")
+        assert reloads == [1]
+
+    def test_admin_change_expires_handler_cache(self, monkeypatch):
+        from app import telegram_handlers
+        monkeypatch.setattr(telegram_handlers, "_last_admin_refresh", 1e12)
+        dispatch("admins")
+        assert telegram_handlers._last_admin_refresh == 0
@@ -0,0 +1,40 @@
+from app.config_cache import ConfigCache
+
+
+class TestConfigCache:
+    def test_read_through_counts_hits_and_misses(self):
+        cache = ConfigCache(ttl=60)
+        loads = []
+
+        def load():
+            loads.append(1)
+            return ["08:00"]
+
+        assert cache.get(("schedule_times", "post"), load) == ["08:00"]
+        assert cache.get(("schedule_times", "post"), load) == ["08:00"]
+        assert len(loads) == 1
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    def test_expired_entries_reload(self):
+        cache = ConfigCache(ttl=0)
+        values = iter([1, 2])
+        assert cache.get(("admins",), lambda: next(values)) == 1
+        assert cache.get(("admins",), lambda: next(values)) == 2
+
+    def test_invalidate_drops_only_its_namespace(self):
+        cache = ConfigCache(ttl=60)
+        cache.get(("schedule_times", "scrape"), lambda: "a")
+        cache.get(("channels",), lambda: "b")
+        cache.invalidate("schedule_times")
+        assert cache.get(("channels",), lambda: "stale") == "b"
+        assert cache.get(("schedule_times", "scrape"), lambda: "fresh") == "fresh"
+
+    def test_load_overlapping_invalidation_is_not_stored(self):
+        cache = ConfigCache(ttl=60)
+
+        def load():
+            cache.invalidate("channels")  # a writer commits while we read
+            return "old"
+
+        assert cache.get(("channels",), load) == "old"
+        assert cache.get(("channels",), lambda: "new") == "new"
@@ -1,4 +1,6 @@
 import pytest
+from datetime import datetime
+from unittest.mock import patch
 from app.database import (
     save_opportunity,
     get_unposted_opportunities,
@@ -6,6 +8,8 @@ from app.database import (
     get_stats_from_db,
     opportunity_exists,
     opportunities_exist,
+    known_article_urls,
+    index_scraped_articles,
     add_admin,
     remove_admin,
     is_admin,
@@ -85,6 +89,401 @@ class TestOpportunityCRUD:
         assert stats["unposted"] >= 2
 
 
+class TestBulkSave:
+    def test_per_row_scraped_date(self):
+        from app.database import bulk_save_opportunities, Opportunity
+        from app.db import get_session
+        saved = bulk_save_opportunities([
+            {"title": "Day A", "link": "https://example.com/day-a", "scraped_date": "2026/06/25"},
+            {"title": "Day B", "link": "https://example.com/day-b"},
+        ], scraped_date="2026/06/26")
+        assert saved == 2
+        with get_session() as db:
+            rows = dict(db.query(Opportunity.link, Opportunity.created_at).filter(
+                Opportunity.link.in_(["https://example.com/day-a", "https://example.com/day-b"])
+            ).all())
+        assert rows["https://example.com/day-a"].strftime("%Y-%m-%d") == "2026-06-25"
+        assert rows["https://example.com/day-b"].strftime("%Y-%m-%d") == "2026-06-26"
+
+
+    def test_conflicts_reported_per_row(self):
+        from app.database import bulk_insert_opportunities, get_opportunity_by_id
+        save_opportunity({"title": "Already here", "link": "https://example.com/upsert-existing"})
+        outcomes = bulk_insert_opportunities([
+            {"title": "Fresh", "link": "https://example.com/upsert-new", "tags": ["Upsert"]},
+            {"title": "Dup of stored", "link": "https://example.com/upsert-existing"},
+            {"title": "Internal", "link": "https://opportunitydesk.org/2026/06/25/x/"},
+            {"title": "Fresh again", "link": "https://example.com/upsert-new"},
+        ])
+        assert [o["status"] for o in outcomes] == ["inserted", "duplicate", "invalid", "duplicate"]
+        assert get_opportunity_by_id(outcomes[0]["id"])["tags"] == ["Upsert"]
+        assert get_opportunity_by_id(outcomes[0]["id"])["title"] == "Fresh"
+
+
+class TestTagPipeline:
+    def _count_statements(self):
+        from sqlalchemy import event
+        import app.db as db_module
+        statements = []
+        listener = lambda conn, cursor, stmt, params, context, executemany: statements.append(stmt)
+        event.listen(db_module.engine, "before_cursor_execute", listener)
+        return statements, lambda: event.remove(db_module.engine, "before_cursor_execute", listener)
+
+    def test_bulk_save_tag_round_trips_are_constant(self):
+        from app.database import bulk_save_opportunities, opportunities_exist
+        batch = [
+            {"title": f"Tagged {i}", "link": f"https://example.com/tagged-{i}",
+             "tags": ["Grant", f"Region{i % 3}", f"Topic{i}", "Grant"]}
+            for i in range(20)
+        ]
+        statements, stop = self._count_statements()
+        try:
+            assert bulk_save_opportunities(batch) == 20
+        finally:
+            stop()
+        tag_statements = [st for st in statements if "FROM tags" in st or "INTO tags" in st or "opportunity_tags" in st]
+        # resolve names, insert missing tags, insert associations
+        assert len(tag_statements) == 3
+        links = [o["link"] for o in batch]
+        assert opportunities_exist(links) == set(links)
+
+    def test_update_replaces_tags(self):
+        from app.database import update_opportunity, get_opportunity_by_id
+        opp_id = save_opportunity({"title": "Retag me", "link": "https://example.com/retag", "tags": ["Old", "Keep"]})
+        assert update_opportunity(opp_id, {"tags": ["Keep", "New", " New ", ""]})
+        assert sorted(get_opportunity_by_id(opp_id)["tags"]) == ["Keep", "New"]
+
+
+class TestUnpostedBacklog:
+    @pytest.fixture(autouse=True)
+    def backlog(self):
+        from app.db import get_session
+        from app.database import Opportunity, bulk_save_opportunities
+        with get_session() as db:
+            db.query(Opportunity).filter(Opportunity.posted_to_telegram == False) \
+                .update({"posted_to_telegram": True}, synchronize_session=False)
+        bulk_save_opportunities([
+            {"title": f"Backlog {i}", "link": f"https://example.com/backlog-{i}",
+             "scraped_date": f"2026/05/{10 + i:02d}"}
+            for i in range(5)
+        ])
+        with get_session() as db:
+            db.query(Opportunity).filter(Opportunity.link.like("https://example.com/backlog-%")) \
+                .update({"posted_to_telegram": False, "claimed_until": None}, synchronize_session=False)
+
+    def test_count_and_oldest_first_slice(self):
+        from app.database import count_unposted
+        assert count_unposted() == 5
+        titles = [o["title"] for o in get_unposted_opportunities(limit=2, offset=1)]
+        assert titles == ["Backlog 1", "Backlog 2"]
+
+    def test_claims_are_disjoint_until_released(self):
+        from app.database import claim_unposted, release_claims
+        first = claim_unposted(3)
+        second = claim_unposted(3)
+        assert [o["title"] for o in first] == ["Backlog 0", "Backlog 1", "Backlog 2"]
+        assert [o["title"] for o in second] == ["Backlog 3", "Backlog 4"]
+        assert claim_unposted(3) == []
+        release_claims([first[0]["id"]])
+        assert [o["id"] for o in claim_unposted(3)] == [first[0]["id"]]
+
+    def test_claim_narrowed_to_a_day_or_rows(self):
+        from app.database import claim_unposted
+        assert [o["title"] for o in claim_unposted(5, date_str="2026-05-12")] == ["Backlog 2"]
+        assert claim_unposted(5, date_str="2026-05-12") == []
+        ids = [o["id"] for o in get_unposted_opportunities()]
+        assert [o["id"] for o in claim_unposted(5, opportunity_ids=ids[:1])] == ids[:1]
+
+    def test_expired_lease_is_reclaimable(self):
+        from app.database import claim_unposted
+        assert len(claim_unposted(5, lease_seconds=-1)) == 5
+        assert len(claim_unposted(5)) == 5
+
+
+class TestDeliveryOutbox:
+    @pytest.fixture
+    def opp_ids(self):
+        from app.db import get_session
+        from app.database import Opportunity, Delivery, bulk_insert_opportunities
+        bulk_insert_opportunities([
+            {"title": f"Outbox {i}", "link": f"https://example.com/outbox-{i}"} for i in range(2)
+        ])
+        with get_session() as db:
+            ids = [o.id for o in db.query(Opportunity).filter(Opportunity.link.like("https://example.com/outbox-%"))]
+            db.query(Delivery).filter(Delivery.opportunity_id.in_(ids)).delete(synchronize_session=False)
+            db.query(Opportunity).filter(Opportunity.id.in_(ids)) \
+                .update({"posted_to_telegram": False}, synchronize_session=False)
+        return sorted(ids)
+
+    def test_enqueue_is_idempotent_and_leases_are_disjoint(self, opp_ids):
+        from app.database import enqueue_deliveries, lease_deliveries
+        assert enqueue_deliveries(opp_ids, ["@a", -100]) == 4
+        assert enqueue_deliveries(opp_ids, ["@a"]) == 0
+        first = lease_deliveries(3, opportunity_ids=opp_ids)
+        second = lease_deliveries(3, opportunity_ids=opp_ids)
+        assert len(first) == 3 and len(second) == 1
+        assert not {d["id"] for d in first} & {d["id"] for d in second}
+        assert lease_deliveries(3, opportunity_ids=opp_ids) == []
+
+    def test_posted_only_after_every_channel_settles(self, opp_ids):
+        from app.database import enqueue_deliveries, lease_deliveries, complete_delivery, fail_delivery, get_opportunity_by_id
+        oid = opp_ids[0]
+        enqueue_deliveries([oid], ["@a", "@b"])
+        a, b = lease_deliveries(2, opportunity_ids=[oid])
+        complete_delivery(a["id"], message_id=42)
+        assert fail_delivery(b["id"], "timeout") == "pending"
+        assert get_opportunity_by_id(oid)["posted_to_telegram"] is False
+        # Backed off, so not due yet; once due it is leased again and can succeed.
+        assert lease_deliveries(2, opportunity_ids=[oid]) == []
+        assert fail_delivery(b["id"], "chat not found", permanent=True) == "failed"
+        assert get_opportunity_by_id(oid)["posted_to_telegram"] is True
+
+    def test_retry_after_and_expired_lease(self, opp_ids):
+        from app.database import enqueue_deliveries, lease_deliveries, fail_delivery
+        oid = opp_ids[1]
+        enqueue_deliveries([oid], ["@a"])
+        job, = lease_deliveries(1, lease_seconds=-1, opportunity_ids=[oid])
+        again, = lease_deliveries(1, opportunity_ids=[oid])
+        assert again["id"] == job["id"] and again["attempts"] == 2
+        fail_delivery(job["id"], "429", retry_after=0)
+        assert lease_deliveries(1, opportunity_ids=[oid])[0]["attempts"] == 3
+
+
+class TestExportStream:
+    def test_batches_carry_tags(self):
+        from app.database import save_opportunity, iter_opportunities_for_export
+        save_opportunity({"title": "Export Me", "link": "https://example.com/export-me", "tags": ["Grant", "Africa"]})
+        rows = list(iter_opportunities_for_export("Export Me", batch_size=1))
+        assert len(rows) == 1
+        assert sorted(rows[0]["tags"]) == ["Africa", "Grant"]
+        assert rows[0]["posted_to_telegram"] is False
+
+    def test_matches_search(self):
+        from app.database import iter_opportunities_for_export, search_opportunities
+        exported = {r["id"] for r in iter_opportunities_for_export("export", batch_size=2)}
+        searched = {r["id"] for r in search_opportunities("export", 0, 10000)["results"]}
+        assert exported and exported == searched
+
+
+class TestStatCounters:
+    def _scanned(self):
+        from app.database import get_stats_from_db, invalidate_stats
+        import app.database as database
+        invalidate_stats()
+        backend, database._stats_backend = database._stats_backend, None
+        try:
+            return get_stats_from_db()
+        finally:
+            database._stats_backend = backend
+            invalidate_stats()
+
+    def _counted(self):
+        from app.database import get_stats_from_db, invalidate_stats
+        invalidate_stats()
+        return get_stats_from_db()
+
+    def _assert_counters_match_scan(self):
+        assert self._counted() == self._scanned()
+
+    def test_counters_follow_insert_post_update_and_delete(self):
+        import app.database as database
+        from app.database import update_posted_status, update_opportunity, delete_opportunity
+        assert database._stats_backend == "sqlite"
+        today = datetime.utcnow().strftime("%Y/%m/%d")
+        a = save_opportunity({"title": "Stats A", "link": "https://example.com/stats-a", "tags": ["StatTag"]}, today)
+        b = save_opportunity({"title": "Stats B", "link": "https://example.com/stats-b", "tags": ["StatTag"]})
+        self._assert_counters_match_scan()
+        update_posted_status(a)
+        update_opportunity(b, {"created_at": "2020-01-01", "tags": ["OtherTag"]})
+        self._assert_counters_match_scan()
+        delete_opportunity(a)
+        delete_opportunity(b)
+        self._assert_counters_match_scan()
+
+    def test_cached_until_opportunities_change(self):
+        from app.database import get_stats_from_db
+        before = self._counted()
+        with patch("app.database._counter_stats") as counter:
+            assert get_stats_from_db() == before
+        counter.assert_not_called()
+        save_opportunity({"title": "Stats C", "link": "https://example.com/stats-c"})
+        assert get_stats_from_db()["total"] == before["total"] + 1
+
+
+class TestDailyCounts:
+    def test_rollup_matches_scan(self):
+        import app.database as database
+        from app.database import get_daily_counts, update_posted_status
+        a = save_opportunity({"title": "Day Count A", "link": "https://example.com/daycount-a"}, "2024/02/10")
+        save_opportunity({"title": "Day Count B", "link": "https://example.com/daycount-b"}, "2024/02/10")
+        save_opportunity({"title": "Day Count C", "link": "https://example.com/daycount-c"}, "2024/02/12")
+        update_posted_status(a)
+        counted = get_daily_counts("2024-02-01", "2024-02-29")
+        assert counted == {"2024-02-10": (1, 1), "2024-02-12": (1, 0)}
+        backend, database._stats_backend = database._stats_backend, None
+        try:
+            assert get_daily_counts("2024-02-01", "2024-02-29") == counted
+        finally:
+            database._stats_backend = backend
+
+    def test_adjacent_days_skip_empty_ones(self):
+        import app.database as database
+        from app.database import get_adjacent_days
+        assert get_adjacent_days("2024-02-11", posted=False) == ("2024-02-10", "2024-02-12")
+        assert get_adjacent_days("2024-02-11", posted=True)[0] == "2024-02-10"
+        backend, database._stats_backend = database._stats_backend, None
+        try:
+            assert get_adjacent_days("2024-02-11", posted=False) == ("2024-02-10", "2024-02-12")
+        finally:
+            database._stats_backend = backend
+
+
+class TestFullTextSearch:
+    def test_prefix_and_stemmed_match(self):
+        save_opportunity({"title": "Zephyrine Scholarships 2027", "link": "https://example.com/fts-1"})
+        titles = [r["title"] for r in search_opportunities("zephyrine scholar", 0, 10)["results"]]
+        assert titles == ["Zephyrine Scholarships 2027"]
+
+    def test_title_match_ranks_first(self):
+        save_opportunity({"title": "General grant", "link": "https://example.com/fts-2",
+                          "description": "Open to quillfeather applicants and others"})
+        save_opportunity({"title": "Quillfeather Fellowship", "link": "https://example.com/fts-3",
+                          "description": "Annual fellowship"})
+        titles = [r["title"] for r in search_opportunities("quillfeather", 0, 10)["results"]]
+        assert titles == ["Quillfeather Fellowship", "General grant"]
+
+    def test_index_follows_updates_and_deletes(self):
+        from app.database import update_opportunity, delete_opportunity
+        opp_id = save_opportunity({"title": "Marblewood Prize", "link": "https://example.com/fts-4"})
+        update_opportunity(opp_id, {"title": "Cinderpath Prize"})
+        assert search_opportunities("marblewood", 0, 10)["results"] == []
+        assert [r["id"] for r in search_opportunities("cinderpath", 0, 10)["results"]] == [opp_id]
+        delete_opportunity(opp_id)
+        assert search_opportunities("cinderpath", 0, 10)["results"] == []
+
+    def test_tags_are_searchable(self):
+        save_opportunity({"title": "Untagged title", "link": "https://example.com/fts-5", "tags": ["Nimbusfield"]})
+        assert len(search_opportunities("nimbusfield", 0, 10)["results"]) == 1
+
+    def test_stopword_keyword_falls_back_to_substring_on_postgres(self, monkeypatch):
+        import app.database as database
+        from sqlalchemy.dialects import postgresql
+        monkeypatch.setattr(database, "_fulltext_backend", "postgres")
+        (clause,) = database._search_filters("the", None)
+        sql = str(clause.compile(dialect=postgresql.dialect()))
+        assert "numnode(to_tsquery(" in sql
+        assert "ILIKE" in sql
+
+    def test_stopword_keyword_matches(self):
+        save_opportunity({"title": "For the Wrenbrook Award", "link": "https://example.com/fts-6"})
+        assert search_opportunities("the", 0, 10000)["results"]
+
+    def test_cursor_rejected_for_ranked_search(self):
+        first = search_opportunities("", 0, 1)
+        with pytest.raises(ValueError):
+            search_opportunities("prize", 0, 10, cursor=first["next_cursor"])
+
+
+class TestFuzzySearch:
+    def test_typo_matches_with_score(self):
+        save_opportunity({"title": "Rosalind Scholarship for Engineers", "link": "https://example.com/fuzzy-1"})
+        assert search_opportunities("rosalnid scholarhsip", 0, 10)["total"] == 0
+        result = search_opportunities("rosalnid scholarhsip", 0, 10, match="fuzzy")
+        assert result["results"][0]["title"] == "Rosalind Scholarship for Engineers"
+        assert 0.5 <= result["results"][0]["score"] <= 1
+        assert result["total"] >= 1
+
+    def test_best_match_first(self):
+        save_opportunity({"title": "Vandermeer Foundation Grant", "link": "https://example.com/fuzzy-2"})
+        save_opportunity({"title": "Vandermeer Fund", "link": "https://example.com/fuzzy-3"})
+        result = search_opportunities("vandermeer foundation", 0, 10, match="fuzzy")
+        assert result["results"][0]["title"] == "Vandermeer Foundation Grant"
+        scores = [r["score"] for r in result["results"]]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_trigrams_follow_updates(self):
+        from app.database import update_opportunity
+        opp_id = save_opportunity({"title": "Halvorsen Award", "link": "https://example.com/fuzzy-4"})
+        update_opportunity(opp_id, {"title": "Okonkwo Award"})
+        ids = [r["id"] for r in search_opportunities("halvorsen", 0, 10, match="fuzzy")["results"]]
+        assert opp_id not in ids
+        ids = [r["id"] for r in search_opportunities("okonkow", 0, 10, match="fuzzy")["results"]]
+        assert opp_id in ids
+
+
+class TestKeysetPagination:
+    @pytest.fixture(autouse=True)
+    def rows(self):
+        # Idempotent: links already stored are skipped.
+        from app.database import bulk_save_opportunities
+        bulk_save_opportunities([
+            {"title": f"Keyset {i}", "link": f"https://example.com/keyset-{i}"} for i in range(7)
+        ], scraped_date="2026/06/20")
+
+    def test_cursor_roundtrip(self):
+        from app.database import encode_cursor, decode_cursor
+        ts = datetime(2026, 6, 20, 12, 30, 15, 123456)
+        assert decode_cursor(encode_cursor("n", ts, 42)) == ("n", ts, 42)
+
+    def test_invalid_cursor(self):
+        from app.database import decode_cursor
+        with pytest.raises(ValueError):
+            decode_cursor("not-a-cursor")
+
+    def test_forward_and_back_match_offset(self):
+        offset_ids = [r["id"] for r in search_opportunities("", 0, 10000)["results"]]
+        assert len(offset_ids) >= 7
+
+        pages = []
+        page = search_opportunities("", 0, 3)
+        assert page["prev_cursor"] is None
+        pages.append(page)
+        while page["next_cursor"]:
+            page = search_opportunities("", 0, 3, cursor=page["next_cursor"])
+            pages.append(page)
+        assert [r["id"] for p in pages for r in p["results"]] == offset_ids
+
+        back = search_opportunities("", 0, 3, cursor=pages[2]["prev_cursor"])
+        assert [r["id"] for r in back["results"]] == [r["id"] for r in pages[1]["results"]]
+        assert back["next_cursor"] and back["prev_cursor"]
+
+    def test_count_cache_invalidated_on_write(self):
+        from app.database import save_opportunity
+        before = search_opportunities("Keyset", 0, 1)["total"]
+        save_opportunity({"title": "Keyset extra", "link": "https://example.com/keyset-extra"})
+        assert search_opportunities("Keyset", 0, 1)["total"] == before + 1
+        assert search_opportunities("Keyset", 0, 1, with_total=False)["total"] is None
+
+
+class TestScrapedArticleIndex:
+    def test_indexes_stored_links_only(self):
+        save_opportunity({"title": "Indexed", "link": "https://example.com/indexed"})
+        count = index_scraped_articles([
+            {"source_url": "https://opportunitydesk.org/a/", "link": "https://example.com/indexed"},
+            {"source_url": "https://opportunitydesk.org/b/", "link": "https://example.com/never-saved"},
+            {"source_url": "https://opportunitydesk.org/c/", "link": None},
+        ])
+        assert count == 2
+        known = known_article_urls([
+            "https://opportunitydesk.org/a/",
+            "https://opportunitydesk.org/b/",
+            "https://opportunitydesk.org/c/",
+        ])
+        assert known == {"https://opportunitydesk.org/a/", "https://opportunitydesk.org/c/"}
+
+    def test_reindex_is_idempotent(self):
+        entry = {"source_url": "https://opportunitydesk.org/a/", "link": "https://example.com/indexed"}
+        assert index_scraped_articles([entry, entry]) == 1
+        assert known_article_urls(["https://opportunitydesk.org/a/"]) == {"https://opportunitydesk.org/a/"}
+
+    def test_deleted_opportunity_is_forgotten(self):
+        from app.database import delete_opportunity
+        opp_id = save_opportunity({"title": "Gone", "link": "https://example.com/gone"})
+        index_scraped_articles([{"source_url": "https://opportunitydesk.org/gone/", "link": "https://example.com/gone"}])
+        assert delete_opportunity(opp_id)
+        assert known_article_urls(["https://opportunitydesk.org/gone/"]) == set()
+
+
 class TestAdminCRUD:
     def test_add_admin(self):
         assert add_admin(100, 12345, "Alice")
@@ -165,6 +564,17 @@ class TestScheduleTimes:
     def test_list_empty_type(self):
         assert get_schedule_times("nonexistent") == []
 
+    def test_cached_reads_see_writes(self):
+        from app.config_cache import config_cache
+        before = config_cache.stats()["misses"]
+        get_schedule_times("post")
+        get_schedule_times("post")
+        assert config_cache.stats()["misses"] == before + 1
+        assert add_schedule_time("23:45", "post")
+        assert "23:45" in get_schedule_times("post")
+        assert remove_schedule_time("23:45", "post")
+        assert "23:45" not in get_schedule_times("post")
+
 
 class TestTimeHelpers:
     def test_parse_12h_am(self):
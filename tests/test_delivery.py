@@ -0,0 +1,121 @@
+from unittest.mock import patch, MagicMock
+
+import requests
+
+from app.database import bulk_insert_opportunities, enqueue_deliveries, get_delivery_summary
+from app.delivery import run_delivery_workers, _retry_after, _is_permanent
+
+
+def _http_error(status: int, body: dict = None) -> requests.HTTPError:
+    resp = MagicMock(status_code=status)
+    resp.json.return_value = body or {}
+    return requests.HTTPError(response=resp)
+
+
+def _new_opportunity(link: str) -> int:
+    return bulk_insert_opportunities([{"title": link, "link": link}])[0]["id"]
+
+
+class TestErrorClassification:
+    def test_retry_after_from_429_body(self):
+        assert _retry_after(_http_error(429, {"parameters": {"retry_after": 7}})) == 7.0
+        assert _retry_after(ConnectionError("reset")) is None
+
+    def test_client_errors_are_permanent_except_429(self):
+        assert _is_permanent(_http_error(403))
+        assert not _is_permanent(_http_error(429))
+        assert not _is_permanent(_http_error(502))
+
+
+class TestWorkerPool:
+    def test_drains_every_due_delivery_once(self):
+        # The test engine shares one SQLite connection, so the pool runs a single worker here.
+        ids = [_new_opportunity(f"https://example.com/pool-{i}") for i in range(4)]
+        enqueue_deliveries(ids, ["@a", "@b"])
+        seen = []
+
+        def fake_send(opp, target):
+            seen.append((opp["id"], target))
+            return len(seen)
+
+        with patch("app.telegram_bot._send_opportunity", side_effect=fake_send):
+            counts = run_delivery_workers(workers=1, opportunity_ids=ids)
+        assert counts["sent"] == 8
+        assert sorted(seen) == sorted((i, c) for i in ids for c in ("@a", "@b"))
+
+    def test_failed_channel_does_not_block_the_others(self):
+        oid = _new_opportunity("https://example.com/pool-partial")
+        enqueue_deliveries([oid], ["@ok", "@kicked", "@flaky"])
+
+        def fake_send(opp, target):
+            if target == "@kicked":
+                raise _http_error(403)
+            if target == "@flaky":
+                raise requests.ConnectionError("reset")
+            return 1
+
+        with patch("app.telegram_bot._send_opportunity", side_effect=fake_send):
+            counts = run_delivery_workers(workers=1, opportunity_ids=[oid])
+        assert counts == {"sent": 1, "pending": 1, "failed": 1}
+        assert get_delivery_summary([oid])[oid] == {"sent": 1, "pending": 1, "failed": 1}
+
+    def test_all_failed_stays_in_backlog_and_is_requeued(self):
+        from app.database import get_opportunity_by_id, claim_unposted, release_claims
+        oid = _new_opportunity("https://example.com/pool-all-failed")
+        enqueue_deliveries([oid], ["@kicked"])
+
+        with patch("app.telegram_bot._send_opportunity", side_effect=_http_error(403)):
+            counts = run_delivery_workers(workers=1, opportunity_ids=[oid])
+        assert counts == {"sent": 0, "pending": 0, "failed": 1}
+        assert get_opportunity_by_id(oid)["posted_to_telegram"] is False
+        claimed = [o["id"] for o in claim_unposted(1000)]
+        release_claims(claimed)
+        assert oid in claimed
+
+        assert enqueue_deliveries([oid], ["@kicked"]) == 1
+        with patch("app.telegram_bot._send_opportunity", return_value=5):
+            counts = run_delivery_workers(workers=1, opportunity_ids=[oid])
+        assert counts["sent"] == 1
+        assert get_opportunity_by_id(oid)["posted_to_telegram"] is True
+
+
+class TestPostToAllChannels:
+    def test_single_opportunity_is_sent_inline_through_the_outbox(self):
+        from app.database import get_opportunity_by_id
+        from app.telegram_bot import post_to_all_channels
+        oid = _new_opportunity("https://example.com/inline-post")
+        with patch("app.telegram_bot.channel_targets", return_value=["@a", "@b"]), \
+                patch("app.telegram_bot._send_opportunity", return_value=9) as send, \
+                patch("app.delivery.ThreadPoolExecutor", side_effect=AssertionError("no pool per post")):
+            assert post_to_all_channels(get_opportunity_by_id(oid))
+        assert send.call_count == 2
+        assert get_delivery_summary([oid])[oid] == {"sent": 2}
+        assert get_opportunity_by_id(oid)["posted_to_telegram"] is True
+
+    def test_row_claimed_by_a_post_cycle_is_not_sent_again(self):
+        from app.database import get_opportunity_by_id, claim_unposted, release_claims
+        from app.telegram_bot import post_to_all_channels
+        oid = _new_opportunity("https://example.com/claimed-post")
+        assert claim_unposted(1, opportunity_ids=[oid])
+        with patch("app.telegram_bot.channel_targets", return_value=["@a"]), \
+                patch("app.telegram_bot._send_opportunity") as send:
+            assert post_to_all_channels(get_opportunity_by_id(oid)) is False
+        send.assert_not_called()
+        release_claims([oid])
+
+
+class TestDrainDueDeliveries:
+    def test_retry_is_sent_when_nothing_new_is_claimed(self):
+        from app.database import get_opportunity_by_id, claim_unposted, release_claims
+        from app.telegram_bot import post_new_opportunities
+        oid = _new_opportunity("https://example.com/drain-retry")
+        assert claim_unposted(1, opportunity_ids=[oid])
+        enqueue_deliveries([oid], ["@a"])
+        with patch("app.telegram_bot.claim_unposted", return_value=[]), \
+                patch("app.delivery.DELIVERY_WORKERS", 1), \
+                patch("app.telegram_bot._send_opportunity", return_value=3) as send:
+            post_new_opportunities()
+        assert (oid, "@a") in [(opp["id"], target) for opp, target in (c.args for c in send.call_args_list)]
+        assert get_delivery_summary([oid])[oid] == {"sent": 1}
+        assert get_opportunity_by_id(oid)["posted_to_telegram"] is True
+        release_claims([oid])
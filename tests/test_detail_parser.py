@@ -0,0 +1,65 @@
+"""Parity tests: the lxml fast path must agree with the BeautifulSoup backend."""
+
+import os
+from unittest.mock import patch
+
+import pytest
+
+from app import detail_parser
+from app.detail_parser import parse_bs4, parse_lxml, parse_detail_page
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "html_fixtures")
+
+pytestmark = pytest.mark.skipif(detail_parser._lxml_html is None, reason="lxml not installed")
+
+
+def _load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+INLINE_CASES = [
+    "<html><body><div class='entry-content'><p>No link here</p></div></body></html>",
+    "<div class='entry-content'><p><strong>Deadline:</strong> July 15, 2026</p><p>Description line 1.</p></div>",
+    "<div class='entry-content'><p>For more information <a href='/apply/456'>apply here</a>.</p></div>",
+    "<p>Apply here: <a href='https://a.example/1'>one</a></p><p>Apply now <a href='https://a.example/2'>two</a></p>",
+    "<figure class='image-link'><img alt='no src'/></figure><figure class='image-link'><img src='x.jpg'/></figure>",
+    "<div class='entry-content'><p>deadline : soon</p><p>  </p><p>Only <i>this</i></p></div>",
+    "<p><strong>Application Deadline:</strong> 2026-03-15</p>",
+]
+
+
+class TestParity:
+    @pytest.mark.parametrize("name", ["detail_page.html", "detail_page_full.html", "listing_page.html"])
+    def test_fixtures(self, name):
+        html = _load_fixture(name)
+        assert parse_lxml(html) == parse_bs4(html)
+
+    @pytest.mark.parametrize("html", INLINE_CASES)
+    def test_inline(self, html):
+        assert parse_lxml(html) == parse_bs4(html)
+
+    def test_full_fixture_fields(self):
+        link, deadline, thumb, desc, tags = parse_lxml(_load_fixture("detail_page_full.html"))
+        assert link == "https://apply.globalleaders.org/2026?utm_source=od&ref=1"
+        assert deadline == "July 15th, 2026"
+        assert thumb == "https://opportunitydesk.org/wp-content/uploads/2026/06/fellowship.jpg"
+        assert desc.startswith("TheGlobal Leaders Fellowship")
+        assert "Third paragraph" not in desc
+        assert tags == ["Fellowships", "Leadership", "Fully Funded"]
+
+
+class TestParseDetailPage:
+    def test_falls_back_to_detail_url(self):
+        link, *_ = parse_detail_page("<p>nothing</p>", "https://opportunitydesk.org/x/")
+        assert link == "https://opportunitydesk.org/x/"
+
+    def test_empty_document_falls_back_to_bs4(self):
+        assert parse_detail_page("", "https://opportunitydesk.org/x/") == (
+            "https://opportunitydesk.org/x/", None, None, None, []
+        )
+
+    def test_bs4_backend_forced(self):
+        with patch.object(detail_parser, "SCRAPER_PARSER", "bs4"), \
+             patch.object(detail_parser, "parse_lxml", side_effect=AssertionError("lxml used")):
+            parse_detail_page(_load_fixture("detail_page.html"), "https://opportunitydesk.org/x/")
@@ -0,0 +1,104 @@
+import asyncio
+from datetime import datetime
+from unittest.mock import patch
+
+import httpx
+
+from app.http_cache import HttpCache, classify_url
+
+
+class TestClassifyUrl:
+    def test_past_listing(self):
+        today = datetime(2026, 6, 30)
+        assert classify_url("https://opportunitydesk.org/2026/06/25/", today) == "listing_past"
+
+    def test_recent_listing(self):
+        today = datetime(2026, 6, 26)
+        assert classify_url("https://opportunitydesk.org/2026/06/25/", today) == "listing_recent"
+
+    def test_detail_page(self):
+        assert classify_url("https://opportunitydesk.org/2026/06/25/some-opp/") == "detail"
+
+    def test_other_host(self):
+        assert classify_url("https://example.com/page") == "other"
+
+
+class TestHttpCache:
+    def test_store_and_lookup(self, tmp_path):
+        cache = HttpCache(str(tmp_path))
+        url = "https://opportunitydesk.org/2020/01/06/"
+        cache.store(url, {"ETag": '"abc"', "Last-Modified": "Mon, 06 Jan 2020 00:00:00 GMT"}, b"<html>listing</html>")
+        entry = cache.lookup(url)
+        assert entry["body"] == b"<html>listing</html>"
+        assert entry["fresh"] is True
+        assert HttpCache.conditional_headers(entry) == {
+            "If-None-Match": '"abc"',
+            "If-Modified-Since": "Mon, 06 Jan 2020 00:00:00 GMT",
+        }
+        cache.close()
+
+    def test_zero_ttl_is_stale(self, tmp_path):
+        cache = HttpCache(str(tmp_path))
+        cache.store("https://example.com/page", {}, b"body")
+        assert cache.lookup("https://example.com/page")["fresh"] is False
+        cache.close()
+
+    def test_lru_eviction(self, tmp_path):
+        cache = HttpCache(str(tmp_path), max_bytes=10)
+        cache.store("https://example.com/a", {}, b"aaaa")
+        cache.store("https://example.com/b", {}, b"bbbb")
+        cache.lookup("https://example.com/a")
+        cache.store("https://example.com/c", {}, b"cccc")
+        assert cache.lookup("https://example.com/b") is None
+        assert cache.lookup("https://example.com/a") is not None
+        assert cache.lookup("https://example.com/c") is not None
+        cache.close()
+
+
+class TestConditionalFetch:
+    def test_304_reuses_cached_body(self, tmp_path):
+        from app.scraper import HostClients, async_safe_get
+        cache = HttpCache(str(tmp_path))
+        url = "https://example.com/page"
+        cache.store(url, {"ETag": '"v1"'}, b"cached body")
+        seen = {}
+
+        async def _get(u, headers=None):
+            seen.update(headers)
+            return httpx.Response(304, request=httpx.Request("GET", u))
+
+        async def _run():
+            async with HostClients() as clients:
+                client, _ = clients.get(url)
+                client.get = _get
+                return await async_safe_get(clients, url)
+
+        with patch("app.scraper.scrape_cache", cache):
+            response = asyncio.run(_run())
+        assert seen["If-None-Match"] == '"v1"'
+        assert response.status_code == 200
+        assert response.text == "cached body"
+        cache.close()
+
+    def test_fresh_entry_skips_request(self, tmp_path):
+        from app.scraper import HostClients, async_safe_get
+        cache = HttpCache(str(tmp_path))
+        url = "https://opportunitydesk.org/2020/01/06/"
+        cache.store(url, {}, b"<html>old listing</html>")
+        calls = []
+
+        async def _get(u, headers=None):
+            calls.append(u)
+            return httpx.Response(200, content=b"new", request=httpx.Request("GET", u))
+
+        async def _run():
+            async with HostClients() as clients:
+                client, _ = clients.get(url)
+                client.get = _get
+                return await async_safe_get(clients, url)
+
+        with patch("app.scraper.scrape_cache", cache):
+            response = asyncio.run(_run())
+        assert calls == []
+        assert response.text == "<html>old listing</html>"
+        cache.close()
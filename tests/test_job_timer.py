@@ -0,0 +1,98 @@
+import threading
+from datetime import datetime, timedelta
+
+from app.job_timer import DailyJob, JobTimer
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestDailyJob:
+    def test_next_due_today_or_tomorrow(self):
+        now = datetime(2026, 3, 2, 8, 0, 30)
+        assert DailyJob("a", "post", "08:00", print).next_due(now) == datetime(2026, 3, 3, 8, 0)
+        assert DailyJob("b", "post", "08:01", print).next_due(now) == datetime(2026, 3, 2, 8, 1)
+        assert DailyJob("c", "post", "08:00", print).next_due(datetime(2026, 3, 2, 8, 0)) == datetime(2026, 3, 2, 8, 0)
+
+    def test_next_due_after_fired_slot(self):
+        job = DailyJob("a", "post", "08:00", print)
+        now = datetime(2026, 3, 2, 8, 0)
+        assert job.next_due(now, fired=datetime(2026, 3, 2, 8, 0)) == datetime(2026, 3, 3, 8, 0)
+
+
+class TestJobTimer:
+    def test_fires_due_jobs_and_reschedules_next_day(self):
+        clock = FakeClock(datetime(2026, 3, 2, 7, 0))
+        timer = JobTimer({"post": 1}, clock=clock)
+        ran = []
+        timer.replace([DailyJob("post@08:00", "post", "08:00", lambda: ran.append(1))])
+        assert timer.fire_due() == 3600
+        clock.now = datetime(2026, 3, 2, 8, 0, 5)
+        timer.fire_due()
+        assert timer.wait_idle(2)
+        assert ran == [1]
+        assert timer.stats()["upcoming"] == [{"job": "post@08:00", "due": "2026-03-03T08:00:00"}]
+        job = timer.stats()["jobs"]["post@08:00"]
+        assert job["runs"] == 1 and job["last_lateness_s"] == 5.0
+
+    def test_replace_within_minute_does_not_refire(self):
+        clock = FakeClock(datetime(2026, 3, 2, 8, 0))
+        timer = JobTimer({"post": 1}, clock=clock)
+        ran = []
+        jobs = [DailyJob("post@08:00", "post", "08:00", lambda: ran.append(1))]
+        timer.replace(jobs)
+        timer.fire_due()
+        assert timer.wait_idle(2)
+        clock.now = datetime(2026, 3, 2, 8, 0, 30)
+        timer.replace(jobs + [DailyJob("post@09:00", "post", "09:00", print)])
+        timer.fire_due()
+        assert timer.wait_idle(2)
+        assert ran == [1]
+        assert timer.stats()["upcoming"][-1] == {"job": "post@08:00", "due": "2026-03-03T08:00:00"}
+
+    def test_kind_limit_queues_and_coalesces(self):
+        clock = FakeClock(datetime(2026, 3, 2, 8, 0))
+        timer = JobTimer({"scrape": 1, "post": 1}, clock=clock)
+        release = threading.Event()
+        started = []
+
+        def slow_scrape():
+            started.append("scrape")
+            release.wait(2)
+
+        timer.run_now("scrape@a", "scrape", slow_scrape)
+        timer.run_now("scrape@b", "scrape", lambda: started.append("scrape@b"))
+        timer.run_now("scrape@b", "scrape", lambda: started.append("scrape@b"))
+        timer.run_now("post@a", "post", lambda: started.append("post"))
+        assert timer.stats()["waiting"] == {"scrape": ["scrape@b"]}
+        release.set()
+        assert timer.wait_idle(2)
+        assert sorted(started) == ["post", "scrape", "scrape@b"]
+        assert timer.stats()["jobs"]["scrape@b"]["coalesced"] == 1
+
+    def test_failure_is_counted_and_frees_the_slot(self):
+        timer = JobTimer({"post": 1}, clock=FakeClock(datetime(2026, 3, 2, 8, 0)))
+        ran = []
+
+        def boom():
+            raise RuntimeError("boom")
+
+        timer.run_now("post@x", "post", boom)
+        timer.run_now("post@y", "post", lambda: ran.append(1))
+        assert timer.wait_idle(2)
+        assert ran == [1]
+        assert timer.stats()["jobs"]["post@x"]["failures"] == 1
+
+    def test_stop_ends_run_loop(self):
+        timer = JobTimer({"post": 1}, clock=lambda: datetime.now())
+        timer.replace([DailyJob("post@t", "post", (datetime.now() + timedelta(hours=2)).strftime("%H:%M"), print)])
+        t = threading.Thread(target=timer.run)
+        t.start()
+        timer.stop()
+        t.join(2)
+        assert not t.is_alive()
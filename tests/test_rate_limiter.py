@@ -1,6 +1,6 @@
 import time
 from unittest.mock import patch
-from app.rate_limiter import TokenBucket, PerIPLimiter
+from app.rate_limiter import TokenBucket, PerIPLimiter, TelegramLimiter, DatabaseBuckets, KeyedLimiter, make_buckets
 
 
 class TestTokenBucket:
@@ -47,9 +47,95 @@ class TestPerIPLimiter:
         assert limiter.consume("new_ip") == 0.0
 
     def test_ttl_eviction(self):
-        limiter = PerIPLimiter(rate=10.0, capacity=5, ttl=0.05)
+        limiter = PerIPLimiter(rate=10.0, capacity=5, ttl=0.05, shards=1)
         limiter.consume("test_ip")
-        assert "test_ip" in limiter._buckets
+        assert "test_ip" in limiter
         time.sleep(0.1)
         limiter.consume("other_ip")
-        assert "test_ip" not in limiter._buckets
+        assert "test_ip" not in limiter
+
+    def test_cap_drops_least_recently_seen(self):
+        limiter = PerIPLimiter(rate=10.0, capacity=5, max_keys=2, shards=1)
+        limiter.consume("a")
+        limiter.consume("b")
+        limiter.consume("a")  # touch: "b" is now the coldest
+        limiter.consume("c")
+        assert len(limiter) == 2
+        assert "a" in limiter and "c" in limiter and "b" not in limiter
+
+    def test_eviction_work_is_bounded_per_call(self):
+        limiter = PerIPLimiter(rate=10.0, capacity=5, ttl=0.01, shards=1)
+        for i in range(50):
+            limiter.consume(f"ip{i}")
+        time.sleep(0.02)
+        limiter.consume("fresh")
+        assert len(limiter) == 50 - PerIPLimiter.EVICT_BATCH + 1
+
+
+class TestTelegramLimiter:
+    def test_chats_have_independent_buckets(self):
+        limiter = TelegramLimiter(group_capacity=1)
+        assert limiter.reserve("-1001") == 0.0
+        assert limiter.reserve("-1001") > 2.0  # 20/min -> 3s per message
+        assert limiter.reserve("@other") == 0.0
+
+    def test_private_chats_get_one_per_second(self):
+        limiter = TelegramLimiter()
+        limiter.reserve(42)
+        assert 0.5 < limiter.reserve(42) <= 1.0
+
+    def test_global_bucket_caps_all_chats(self):
+        limiter = TelegramLimiter(global_rate=1.0, global_capacity=2)
+        assert limiter.reserve_global() == 0.0
+        assert limiter.reserve_global() == 0.0
+        assert limiter.reserve_global() > 0.0
+
+    def test_held_back_message_does_not_burst_past_global_rate(self):
+        clock = [0.0]
+
+        def sleep(seconds):
+            clock[0] += seconds
+
+        with patch("app.rate_limiter.time.monotonic", lambda: clock[0]), \
+                patch("app.rate_limiter.time.sleep", sleep):
+            limiter = TelegramLimiter(global_rate=1.0, global_capacity=2, group_capacity=1)
+            sent = []
+            for chat_id in ("-1", "-1", "-2", "-3"):
+                limiter.acquire(chat_id)
+                sent.append(round(clock[0], 3))
+        # The second "-1" waits 3s for its chat; it must not have spent a
+        # global slot at t=0 and then go out at t=3 alongside "-2" and "-3".
+        assert sent == [0.0, 3.0, 3.0, 4.0]
+
+    def test_retry_after_blocks_chat_or_everything(self):
+        limiter = TelegramLimiter()
+        limiter.penalize(5, chat_id="-1")
+        assert limiter.reserve("-1") > 4.0
+        assert limiter.reserve("-2") == 0.0
+        limiter.penalize(5)
+        assert limiter.reserve("-3") > 4.0
+
+
+class TestDatabaseBuckets:
+    def test_shared_bucket_matches_token_bucket(self):
+        from app.database import consume_rate_limit
+        waits = [consume_rate_limit("t:shared", rate=1.0, capacity=2, now=100.0) for _ in range(4)]
+        assert waits == [0.0, 0.0, 1.0, 2.0]
+        assert consume_rate_limit("t:shared", rate=1.0, capacity=2, now=110.0) == 0.0
+
+    def test_limiters_share_state_through_the_table(self):
+        # Two limiter instances stand in for two worker processes.
+        a = KeyedLimiter(rate=0.001, capacity=1, buckets=DatabaseBuckets(), prefix="t:")
+        b = KeyedLimiter(rate=0.001, capacity=1, buckets=DatabaseBuckets(), prefix="t:")
+        assert a.consume("1.2.3.4") == 0.0
+        assert b.consume("1.2.3.4") > 0.0
+        assert b.consume("5.6.7.8") == 0.0
+
+    def test_falls_back_to_local_buckets_when_db_fails(self):
+        buckets = DatabaseBuckets()
+        with patch("app.database.consume_rate_limit", side_effect=RuntimeError("down")):
+            assert buckets.consume("t:down", 0.001, 1) == 0.0
+            assert buckets.consume("t:down", 0.001, 1) > 0.0
+
+    def test_unknown_backend_uses_memory(self):
+        assert type(make_buckets("redis")).__name__ == "MemoryBuckets"
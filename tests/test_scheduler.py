@@ -14,7 +14,7 @@ class TestCircuitBreaker:
         _reset()
         import app.scheduler as sched
         sched._telegram_failures = _TELEGRAM_CIRCUIT_BREAKER_MAX
-        with patch("app.scheduler.get_unposted_opportunities") as mock_get:
+        with patch("app.scheduler.claim_unposted") as mock_get:
             with patch("app.scheduler.get_schedule_times") as mock_times:
                 sched.run_post()
                 mock_get.assert_not_called()
@@ -24,7 +24,7 @@ class TestCircuitBreaker:
         _reset()
         import app.scheduler as sched
         sched._telegram_failures = _TELEGRAM_CIRCUIT_BREAKER_MAX + 2
-        with patch("app.scheduler.get_unposted_opportunities") as mock_get:
+        with patch("app.scheduler.claim_unposted") as mock_get:
             sched.run_post()
             assert sched._telegram_failures == _TELEGRAM_CIRCUIT_BREAKER_MAX + 1
             mock_get.assert_not_called()
@@ -33,7 +33,8 @@ class TestCircuitBreaker:
         _reset()
         import app.scheduler as sched
         sched._telegram_failures = 3
-        with patch("app.scheduler.get_unposted_opportunities") as mock_get:
+        with patch("app.scheduler.count_unposted", return_value=1), \
+                patch("app.scheduler.claim_unposted") as mock_get:
             mock_get.return_value = [{"id": 1, "title": "Test", "link": "https://x.com"}]
             with patch("app.scheduler.get_schedule_times") as mock_times:
                 mock_times.return_value = ["12:00"]
@@ -48,7 +49,8 @@ class TestCircuitBreaker:
         _reset()
         import app.scheduler as sched
         sched._telegram_failures = 0
-        with patch("app.scheduler.get_unposted_opportunities") as mock_get:
+        with patch("app.scheduler.count_unposted", return_value=1), \
+                patch("app.scheduler.claim_unposted") as mock_get:
             mock_get.return_value = [{"id": 1, "title": "Test"}]
             with patch("app.scheduler.get_schedule_times") as mock_times:
                 mock_times.return_value = ["12:00"]
@@ -1,7 +1,8 @@
 """Integration tests for scraper with real HTML fixtures."""
 
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 from bs4 import BeautifulSoup
+import asyncio
 import pytest
 import os
 
@@ -9,8 +10,10 @@ from app.scraper import (
     extract_detail_info,
     _fetch_article,
     fetch_opportunities_by_date,
+    HostClients,
+    backfill_dates,
+    backfill_opportunities,
 )
-from app.http_client import make_session
 
 FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "html_fixtures")
 
@@ -81,9 +84,8 @@ class TestFetchArticle:
 
         article = BeautifulSoup(listing_html, "html.parser").find("article")
 
-        with patch("app.scraper.safe_get", return_value=_fake_response(detail_html)), \
-             patch("app.scraper.make_session", return_value=MagicMock()):
-            opp = _fetch_article(article)
+        with patch("app.scraper.async_safe_get", AsyncMock(return_value=_fake_response(detail_html))):
+            opp = asyncio.run(_fetch_article(MagicMock(), article))
 
         assert opp is not None
         assert opp["title"] == "Test Opp"
@@ -101,23 +103,27 @@ class TestFetchArticle:
         listing_html = '<article><a href="https://opportunitydesk.org/2026/06/25/test-opp/">Test Opp</a></article>'
         article = BeautifulSoup(listing_html, "html.parser").find("article")
 
-        with patch("app.scraper.safe_get", return_value=_fake_response(detail_html)), \
-             patch("app.scraper.make_session", return_value=MagicMock()):
-            opp = _fetch_article(article)
+        with patch("app.scraper.async_safe_get", AsyncMock(return_value=_fake_response(detail_html))):
+            opp = asyncio.run(_fetch_article(MagicMock(), article))
 
         assert opp is None
 
     def test_no_title_link_returns_none(self):
         article = BeautifulSoup("<article><p>No anchor</p></article>", "html.parser").find("article")
-        assert _fetch_article(article) is None
+        assert asyncio.run(_fetch_article(MagicMock(), article)) is None
 
 
-@patch("app.scraper.bulk_save_opportunities", return_value=2)
-@patch("app.scraper.opportunities_exist", return_value=set())
+def _all_inserted(batch, scraped_date=None):
+    return [{"link": o["link"], "status": "inserted", "id": i} for i, o in enumerate(batch, 1)]
+
+
+@patch("app.scraper.index_scraped_articles", return_value=0)
+@patch("app.scraper.known_article_urls", return_value=set())
+@patch("app.scraper.bulk_insert_opportunities", side_effect=_all_inserted)
 class TestFetchOpportunitiesByDate:
     """End-to-end test for the main fetch function with mocked HTTP."""
 
-    def test_fetch_and_save(self, mock_exist, mock_save):
+    def test_fetch_and_save(self, mock_save, mock_known, mock_index):
         detail_html = _load_fixture("detail_page.html")
         listing_html = _load_fixture("listing_page.html")
         call_count = 0
@@ -129,7 +135,7 @@ class TestFetchOpportunitiesByDate:
                 return _fake_response(listing_html)
             return _fake_response(detail_html)
 
-        with patch("app.scraper.safe_get", side_effect=side_effect):
+        with patch("app.scraper.async_safe_get", AsyncMock(side_effect=side_effect)):
             result = fetch_opportunities_by_date("2026/06/25")
 
         assert len(result) == 2
@@ -139,20 +145,216 @@ class TestFetchOpportunitiesByDate:
         args = mock_save.call_args[0][0]
         assert len(args) == 2
 
-    def test_all_existing_returns_empty(self, mock_exist, mock_save):
-        mock_exist.return_value = {
-            "https://opportunitydesk.org/2026/06/25/test-opp-1/",
-            "https://opportunitydesk.org/2026/06/25/test-opp-2/",
-        }
+    def test_all_existing_returns_empty(self, mock_save, mock_known, mock_index):
+        with patch("app.scraper.async_safe_get", AsyncMock(return_value=_fake_response(_load_fixture("listing_page.html")))):
+            result = fetch_opportunities_by_date("2026/06/25")
+
+        assert result == []
+        mock_save.assert_not_called()
+
+    def test_conflicting_rows_do_not_sink_the_batch(self, mock_save, mock_known, mock_index):
+        detail_html = _load_fixture("detail_page.html")
+        listing_html = _load_fixture("listing_page.html")
 
-        with patch("app.scraper.safe_get", return_value=_fake_response(_load_fixture("listing_page.html"))):
+        async def _get(clients, url, max_retries=5):
+            if url.endswith("/2026/06/25/"):
+                return _fake_response(listing_html)
+            return _fake_response(detail_html.replace("https://apply.example.com/123", url.replace("opportunitydesk.org", "apply.example.com")))
+
+        def _one_duplicate(batch, scraped_date=None):
+            outcomes = _all_inserted(batch)
+            outcomes[0].update(status="duplicate", id=None)
+            return outcomes
+
+        mock_save.side_effect = _one_duplicate
+        with patch("app.scraper.async_safe_get", side_effect=_get):
             result = fetch_opportunities_by_date("2026/06/25")
 
+        assert [r["title"] for r in result] == ["Test Opportunity 2"]
+
+    def test_http_failure_returns_empty(self, mock_save, mock_known, mock_index):
+        with patch("app.scraper.async_safe_get", AsyncMock(return_value=None)):
+            result = fetch_opportunities_by_date("2026/06/25")
         assert result == []
         mock_save.assert_not_called()
 
-    def test_http_failure_returns_empty(self, mock_exist, mock_save):
-        with patch("app.scraper.safe_get", return_value=None):
+    def test_indexed_articles_skip_detail_fetch(self, mock_save, mock_known, mock_index):
+        mock_known.return_value = {
+            "https://opportunitydesk.org/2026/06/25/test-opp-1/",
+            "https://opportunitydesk.org/2026/06/25/test-opp-2/",
+        }
+        fake_get = AsyncMock(return_value=_fake_response(_load_fixture("listing_page.html")))
+
+        with patch("app.scraper.async_safe_get", fake_get):
             result = fetch_opportunities_by_date("2026/06/25")
+
         assert result == []
+        assert fake_get.await_count == 1
         mock_save.assert_not_called()
+
+    def test_saved_candidates_are_indexed(self, mock_save, mock_known, mock_index):
+        detail_html = _load_fixture("detail_page.html")
+        listing_html = _load_fixture("listing_page.html")
+
+        async def _get(clients, url, max_retries=5):
+            return _fake_response(listing_html if url.endswith("/2026/06/25/") else detail_html)
+
+        with patch("app.scraper.async_safe_get", side_effect=_get):
+            fetch_opportunities_by_date("2026/06/25")
+
+        entries = mock_index.call_args[0][0]
+        assert {e["source_url"] for e in entries} == {
+            "https://opportunitydesk.org/2026/06/25/test-opp-1/",
+            "https://opportunitydesk.org/2026/06/25/test-opp-2/",
+        }
+
+
+@patch("app.scraper.bulk_insert_opportunities", side_effect=_all_inserted)
+class TestBlockedDetailPages:
+    """A blocked or rate-limited detail page must not be indexed as a dead end."""
+
+    @pytest.mark.parametrize("status", [403, 429])
+    def test_non_200_detail_is_not_indexed(self, mock_insert, status):
+        from app.database import known_article_urls
+        listing_html = _load_fixture("listing_page.html")
+
+        async def _get(clients, url, max_retries=5):
+            if url.endswith("/2026/06/25/"):
+                return _fake_response(listing_html)
+            return _fake_response("<html><body>Too Many Requests</body></html>", status=status)
+
+        with patch("app.scraper.async_safe_get", side_effect=_get):
+            assert fetch_opportunities_by_date("2026/06/25") == []
+
+        assert known_article_urls([
+            "https://opportunitydesk.org/2026/06/25/test-opp-1/",
+            "https://opportunitydesk.org/2026/06/25/test-opp-2/",
+        ]) == set()
+        mock_insert.assert_not_called()
+
+
+class TestHostClients:
+    """Pooled per-host clients used by the async engine."""
+
+    def test_one_client_per_host(self):
+        async def _run():
+            async with HostClients(per_host=2) as clients:
+                a, slots_a = clients.get("https://opportunitydesk.org/2026/06/25/")
+                b, slots_b = clients.get("https://opportunitydesk.org/2026/06/25/test-opp/")
+                c, _ = clients.get("https://apply.example.com/123")
+                return a is b, slots_a is slots_b, a is c
+        same_client, same_slots, cross_host = asyncio.run(_run())
+        assert same_client and same_slots
+        assert not cross_host
+
+    def test_caps_concurrency_per_host(self):
+        in_flight = 0
+        peak = 0
+
+        async def _slow_get(url, headers=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return _fake_response("<html></html>")
+
+        async def _run():
+            from app.scraper import async_safe_get
+            async with HostClients(per_host=2) as clients:
+                client, _ = clients.get("https://opportunitydesk.org/")
+                client.get = _slow_get
+                await asyncio.gather(*(async_safe_get(clients, f"https://opportunitydesk.org/{i}/") for i in range(8)))
+
+        asyncio.run(_run())
+        assert peak == 2
+
+
+class TestBackfillDates:
+    def test_weekdays_only(self):
+        # 2026-06-26 is a Friday, 2026-06-29 a Monday
+        assert backfill_dates("2026-06-26", "2026-06-29") == ["2026/06/26", "2026/06/29"]
+
+    def test_include_weekends_and_reversed_range(self):
+        assert backfill_dates("2026/06/28", "2026/06/26", include_weekends=True) == [
+            "2026/06/26", "2026/06/27", "2026/06/28",
+        ]
+
+    def test_range_limit(self):
+        with pytest.raises(ValueError):
+            backfill_dates("2026-01-01", "2026-12-31")
+
+
+@patch("app.scraper.index_scraped_articles", return_value=0)
+@patch("app.scraper.known_article_urls", return_value=set())
+@patch("app.scraper.bulk_insert_opportunities", side_effect=_all_inserted)
+class TestBackfillOpportunities:
+    """Many dates scraped concurrently, persisted in one batch."""
+
+    def _get(self, listings, detail_html):
+        async def _fake(clients, url, max_retries=5):
+            if url in listings:
+                return _fake_response(listings[url])
+            return _fake_response(detail_html)
+        return _fake
+
+    def test_batches_saves_across_dates(self, mock_save, mock_known, mock_index):
+        listing = _load_fixture("listing_page.html")
+        other_day = listing.replace("test-opp-1", "test-opp-3").replace("test-opp-2", "test-opp-4")
+        listings = {
+            "https://opportunitydesk.org/2026/06/25/": listing,
+            "https://opportunitydesk.org/2026/06/26/": other_day,
+        }
+        detail_html = _load_fixture("detail_page.html")
+
+        with patch("app.scraper.async_safe_get", side_effect=self._get(listings, detail_html)):
+            result = backfill_opportunities(["2026/06/25", "2026/06/26"])
+
+        # Every detail page resolves to the same external link: saved once, under the first date
+        mock_save.assert_called_once()
+        batch = mock_save.call_args[0][0]
+        assert len(batch) == 1
+        assert batch[0]["scraped_date"] == "2026/06/25"
+        assert result["saved"] == 1
+        assert result["per_date"] == {"2026/06/25": 1, "2026/06/26": 0}
+
+    def test_failed_date_does_not_abort_others(self, mock_save, mock_known, mock_index):
+        listings = {"https://opportunitydesk.org/2026/06/25/": _load_fixture("listing_page.html")}
+        detail_html = _load_fixture("detail_page.html")
+        good = self._get(listings, detail_html)
+
+        async def _flaky(clients, url, max_retries=5):
+            if "/2026/06/26/" in url:
+                raise RuntimeError("boom")
+            return await good(clients, url)
+
+        with patch("app.scraper.async_safe_get", side_effect=_flaky):
+            result = backfill_opportunities(["2026/06/25", "2026/06/26"])
+
+        assert result["failed"] == ["2026/06/26"]
+        assert result["saved"] == 1
+
+    def test_global_budget_caps_in_flight(self, mock_save, mock_known, mock_index):
+        in_flight = 0
+        peak = 0
+
+        async def _slow_get(url, headers=None):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return _fake_response("<html></html>")
+
+        async def _run():
+            from app.scraper import async_safe_get
+            async with HostClients(per_host=4, total=3) as clients:
+                for host in ("a.example", "b.example"):
+                    client, _ = clients.get(f"https://{host}/")
+                    client.get = _slow_get
+                await asyncio.gather(*(
+                    async_safe_get(clients, f"https://{h}/{i}/") for h in ("a.example", "b.example") for i in range(6)
+                ))
+
+        asyncio.run(_run())
+        assert peak == 3
@@ -1,6 +1,7 @@
 import requests
+from unittest.mock import patch
 from app.utils import _close_html_tags, split_html_message
-from app.telegram_bot import _is_retryable
+from app.telegram_bot import _is_retryable, _post_to_telegram_with_retry
 
 
 class TestCloseHtmlTags:
@@ -52,6 +53,22 @@ class TestIsRetryable:
         assert _is_retryable(requests.RequestException("timeout"))
 
 
+class TestSendRateLimit:
+    def test_send_waits_for_chat_slot_and_honours_retry_after(self):
+        resp = requests.Response()
+        resp.status_code = 429
+        resp._content = b'{"ok": false, "parameters": {"retry_after": 12}}'
+        with patch("app.telegram_bot._send_http.post", return_value=resp), \
+                patch("app.telegram_bot.telegram_limiter") as limiter:
+            try:
+                # __wrapped__ skips the tenacity retries.
+                _post_to_telegram_with_retry.__wrapped__({"chat_id": "-100", "text": "x"})
+            except requests.HTTPError:
+                pass
+            limiter.acquire.assert_called_once_with("-100")
+            limiter.penalize.assert_called_once_with(12.0, chat_id="-100")
+
+
 class TestSplitHtmlMessage:
     def test_short_message_unchanged(self):
         msg = "<b>Title</b>\n\nShort description"
@@ -0,0 +1,79 @@
+import json
+import asyncio
+
+import httpx
+import pytest
+
+from app.telegram_client import AsyncTelegramClient, TelegramAPIError
+
+
+def _client(handler, **kwargs):
+    return AsyncTelegramClient(base_url="https://api.telegram.org/bot123:SECRET",
+                               transport=httpx.MockTransport(handler), **kwargs)
+
+
+class TestAsyncTelegramClient:
+    def test_typed_helper_builds_payload_and_returns_result(self):
+        seen = {}
+
+        def handler(request):
+            seen["path"] = request.url.path
+            seen["body"] = json.loads(request.content)
+            return httpx.Response(200, json={"ok": True, "result": {"message_id": 9}})
+
+        result = asyncio.run(_client(handler).send_message(5, "<b>hi</b>", reply_markup={"inline_keyboard": []}))
+        assert result == {"message_id": 9}
+        assert seen["path"].endswith("/sendMessage")
+        assert seen["body"] == {"chat_id": 5, "text": "<b>hi</b>", "parse_mode": "HTML",
+                                "reply_markup": {"inline_keyboard": []}}
+
+    def test_retries_429_after_retry_after(self):
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            if len(calls) == 1:
+                return httpx.Response(429, json={"ok": False, "error_code": 429, "description": "Too Many Requests",
+                                                 "parameters": {"retry_after": 0}})
+            return httpx.Response(200, json={"ok": True, "result": True})
+
+        assert asyncio.run(_client(handler).answer_callback_query("cb")) is True
+        assert len(calls) == 2
+
+    def test_client_errors_raise_without_retry(self):
+        calls = []
+
+        def handler(request):
+            calls.append(1)
+            return httpx.Response(400, json={"ok": False, "error_code": 400, "description": "chat not found"})
+
+        with pytest.raises(TelegramAPIError) as exc:
+            asyncio.run(_client(handler).send_chat_action(1))
+        assert exc.value.error_code == 400 and len(calls) == 1
+        assert "SECRET" not in str(exc.value)
+
+    def test_pool_is_reused_within_a_loop(self):
+        client = _client(lambda request: httpx.Response(200, json={"ok": True, "result": {}}))
+
+        async def twice():
+            await client.get_me()
+            first = client._client
+            await client.get_me()
+            assert client._client is first
+            await client.aclose()
+
+        asyncio.run(twice())
+
+
+class TestSendLater:
+    def test_chat_actions_are_coalesced(self):
+        from unittest.mock import patch
+        import app.telegram_client as tc
+        tc._chat_actions.clear()
+        with patch.object(tc, "_blocking_side_call") as call:
+            tc.send_later("sendChatAction", {"chat_id": 1, "action": "typing"})
+            tc.send_later("sendChatAction", {"chat_id": 1, "action": "typing"})
+            tc.send_later("sendChatAction", {"chat_id": 2, "action": "typing"})
+            tc._side_pool.shutdown(wait=True)
+            tc._side_pool = None
+        assert [c.args[1]["chat_id"] for c in call.call_args_list] == [1, 2]
@@ -0,0 +1,53 @@
+from unittest.mock import patch
+
+import app.telegram_handlers as handlers
+
+
+class TestReplyComposition:
+    def test_outside_webhook_replies_are_sent_directly(self):
+        with patch("app.telegram_handlers._http.post") as post:
+            handlers._reply("sendMessage", {"chat_id": 1, "text": "hi"})
+        post.assert_called_once()
+
+    def test_later_reply_flushes_the_held_one_first(self):
+        def process(data, run_in_background=None):
+            handlers._reply("sendMessage", {"chat_id": 1, "text": "first"})
+            handlers._reply("sendMessage", {"chat_id": 1, "text": "second"})
+
+        with patch("app.telegram_handlers.process_telegram_update", side_effect=process), \
+                patch("app.telegram_handlers._http.post") as post:
+            reply = handlers.handle_webhook_update({})
+        assert reply is None
+        assert [c.kwargs["json"]["text"] for c in post.call_args_list] == ["first", "second"]
+
+
+class TestRouting:
+    def _callback(self, data, user_id=12345):
+        return {"update_id": 1, "callback_query": {
+            "id": "cb", "data": data, "from": {"id": user_id},
+            "message": {"message_id": 7, "chat": {"id": user_id}},
+        }}
+
+    def test_unknown_callback_is_answered(self):
+        with patch("app.telegram_handlers._side_call") as side:
+            handlers.process_telegram_update(self._callback("nope_1"))
+        assert side.call_args.args[1]["text"] == "Not implemented or invalid action."
+
+    def test_wizard_is_loaded_by_its_callback(self):
+        with patch("app.telegram_handlers.safe_edit_message_text", return_value=None), \
+                patch("app.telegram_handlers._side_call"):
+            handlers.process_telegram_update(self._callback("create_post"))
+        wizard = handlers._loaded_custom_post()
+        assert wizard._get_custom_post_state(12345)["step"] == "title"
+        wizard._clear_custom_post_state(12345)
+
+
+class TestDayPicker:
+    def test_heatmap_labels(self):
+        from app.keyboards import build_day_picker
+        counts = {"2026-03-02": (3, 0), "2026-03-05": (0, 4)}
+        posted = [b for row in build_day_picker("posted", "2026-03", counts)["inline_keyboard"][:-1] for b in row]
+        unposted = [b for row in build_day_picker("unposted", "2026-03", counts)["inline_keyboard"][:-1] for b in row]
+        assert posted[4]["text"] == "5·4" and posted[1] == {"text": "·", "callback_data": "noop"}
+        assert unposted[1]["text"] == "2·3" and unposted[4]["text"] == "5✓"
+        assert unposted[0]["callback_data"] == "unposted_date_2026-03-01"
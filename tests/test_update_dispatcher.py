@@ -0,0 +1,71 @@
+import time
+import threading
+
+from app.update_dispatcher import UpdateDispatcher, update_chat_key
+
+
+def _msg(update_id, chat_id):
+    return {"update_id": update_id, "message": {"chat": {"id": chat_id}, "from": {"id": chat_id}, "text": "x"}}
+
+
+class TestChatKey:
+    def test_message_and_callback_share_the_chat(self):
+        callback = {"update_id": 2, "callback_query": {"from": {"id": 1}, "message": {"chat": {"id": 55}}}}
+        assert update_chat_key(_msg(1, 55)) == update_chat_key(callback) == 55
+
+    def test_update_without_chat_keyed_by_id(self):
+        assert update_chat_key({"update_id": 9}) == ("update", 9)
+
+
+class TestUpdateDispatcher:
+    def test_per_chat_order_is_kept(self):
+        seen = []
+        lock = threading.Lock()
+
+        def handler(update):
+            time.sleep(0.001)
+            with lock:
+                seen.append((update["message"]["chat"]["id"], update["update_id"]))
+
+        dispatcher = UpdateDispatcher(handler, workers=4).start()
+        for i in range(40):
+            dispatcher.submit(_msg(i, i % 5))
+        dispatcher.join()
+        dispatcher.stop()
+        for chat in range(5):
+            ids = [u for c, u in seen if c == chat]
+            assert ids == sorted(ids) and len(ids) == 8
+
+    def test_slow_chat_does_not_block_others(self):
+        release = threading.Event()
+        done = threading.Event()
+
+        def handler(update):
+            if update["message"]["chat"]["id"] == "slow":
+                release.wait(5)
+            else:
+                done.set()
+
+        dispatcher = UpdateDispatcher(handler, workers=2).start()
+        # Pick a fast chat that hashes onto the other worker.
+        fast = next(c for c in range(100) if hash(c) % 2 != hash("slow") % 2)
+        dispatcher.submit(_msg(1, "slow"))
+        dispatcher.submit(_msg(2, fast))
+        assert done.wait(2)
+        assert dispatcher.stats()["busy"] == 1
+        release.set()
+        dispatcher.join()
+        dispatcher.stop()
+
+    def test_stats_count_failures(self):
+        def handler(update):
+            if update["update_id"] == 1:
+                raise RuntimeError("boom")
+
+        dispatcher = UpdateDispatcher(handler, workers=1).start()
+        dispatcher.submit(_msg(1, 1))
+        dispatcher.submit(_msg(2, 1))
+        dispatcher.join()
+        stats = dispatcher.stats()
+        dispatcher.stop()
+        assert stats["processed"] == 2 and stats["failed"] == 1 and stats["queued"] == 0